@@ -10,33 +10,55 @@ bl_info = {
     "category": "Render",
 }
 
-import bpy
-from bpy.props import PointerProperty
-
-from .properties import DepthMapSettings
-from .preferences import DEPTHMAP_AddonPreferences
-from .operators.setup import DEPTHMAP_OT_setup
-from .operators.render import DEPTHMAP_OT_render
-from .operators.reset import DEPTHMAP_OT_reset
-from .operators.mask_export import DEPTHMAP_OT_export_mask
-from .panels.main_panel import DEPTHMAP_PT_main_panel
-from .panels.depth_settings_panel import DEPTHMAP_PT_depth_settings
-from .panels.output_panel import DEPTHMAP_PT_output
-from .panels.mask_panel import DEPTHMAP_PT_mask
-
-# Registration order: PropertyGroup -> Preferences -> Operators -> Parent Panel -> Sub-panels
-classes = (
-    DepthMapSettings,
-    DEPTHMAP_AddonPreferences,
-    DEPTHMAP_OT_setup,
-    DEPTHMAP_OT_render,
-    DEPTHMAP_OT_reset,
-    DEPTHMAP_OT_export_mask,
-    DEPTHMAP_PT_main_panel,
-    DEPTHMAP_PT_depth_settings,
-    DEPTHMAP_PT_output,
-    DEPTHMAP_PT_mask,
-)
+try:
+    import bpy
+except ImportError:
+    # Imported outside Blender (offline tools such as utils.renormalize and
+    # their worker processes): only the bpy-free submodules are usable.
+    bpy = None
+
+if bpy is not None:
+    from bpy.props import PointerProperty
+
+    from .properties import DepthMapSettings
+    from .preferences import DEPTHMAP_AddonPreferences
+    from .operators.setup import DEPTHMAP_OT_setup
+    from .operators.render import DEPTHMAP_OT_render
+    from .operators.reset import DEPTHMAP_OT_reset
+    from .operators.mask_export import DEPTHMAP_OT_export_mask
+    from .operators.render_combined import DEPTHMAP_OT_render_combined
+    from .operators.render_cameras import DEPTHMAP_OT_render_cameras
+    from .operators.crypto_mattes import DEPTHMAP_OT_crypto_from_selection
+    from .operators.publish import DEPTHMAP_OT_publish
+    from .operators.shard_cancel import DEPTHMAP_OT_cancel_shards
+    from .operators.auto_range import DEPTHMAP_OT_compute_auto_range
+    from .operators.proxy_preview import DEPTHMAP_OT_proxy_preview
+    from .panels.main_panel import DEPTHMAP_PT_main_panel
+    from .panels.depth_settings_panel import DEPTHMAP_PT_depth_settings
+    from .panels.output_panel import DEPTHMAP_PT_output
+    from .panels.mask_panel import DEPTHMAP_PT_mask
+    from .utils import live_sync, proxy_preview
+
+    # Registration order: PropertyGroup -> Preferences -> Operators -> Parent Panel -> Sub-panels
+    classes = (
+        DepthMapSettings,
+        DEPTHMAP_AddonPreferences,
+        DEPTHMAP_OT_setup,
+        DEPTHMAP_OT_render,
+        DEPTHMAP_OT_reset,
+        DEPTHMAP_OT_export_mask,
+        DEPTHMAP_OT_render_combined,
+        DEPTHMAP_OT_render_cameras,
+        DEPTHMAP_OT_crypto_from_selection,
+        DEPTHMAP_OT_publish,
+        DEPTHMAP_OT_cancel_shards,
+        DEPTHMAP_OT_compute_auto_range,
+        DEPTHMAP_OT_proxy_preview,
+        DEPTHMAP_PT_main_panel,
+        DEPTHMAP_PT_depth_settings,
+        DEPTHMAP_PT_output,
+        DEPTHMAP_PT_mask,
+    )
 
 
 def register():
@@ -51,6 +73,11 @@ def register():
 
 
 def unregister():
+    session = proxy_preview.get_active()
+    if session is not None:
+        session.stop()
+    live_sync.cancel()
+
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
 
@@ -0,0 +1,173 @@
+"""Benchmark encode time and bytes per frame of every depth output encoding.
+
+Inside Blender the FileOutput formats are measured with Blender's own
+encoders (the same ImBuf writers the compositor uses)::
+
+    blender -b -P depth_map_generator/bench_encodings.py -- --size 3840x2160
+
+Outside Blender only the encodings written by Python are measured
+(background PNG at each compression level, and NumPy)::
+
+    python -m depth_map_generator.bench_encodings --size 1920x1080 --json enc.json
+
+The test frame is synthetic depth: a smooth ramp with per-pixel noise and a
+background region, normalized like the LINEAR pipeline output.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+if __name__ == "__main__" and not __package__:
+    # Executed as a script (blender -b -P bench_encodings.py): make the
+    # package importable so the relative imports below resolve (PEP 366).
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import depth_map_generator  # noqa: F401
+    __package__ = "depth_map_generator"
+
+import numpy as np
+
+from .utils import frames
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+# (label, image_settings) measured through Blender's writers
+BLENDER_ENCODINGS = [
+    ("PNG 8-bit 15%", {"file_format": 'PNG', "color_depth": '8', "compression": 15}),
+    ("PNG 16-bit 0%", {"file_format": 'PNG', "color_depth": '16', "compression": 0}),
+    ("PNG 16-bit 15%", {"file_format": 'PNG', "color_depth": '16', "compression": 15}),
+    ("PNG 16-bit 50%", {"file_format": 'PNG', "color_depth": '16', "compression": 50}),
+    ("PNG 16-bit 90%", {"file_format": 'PNG', "color_depth": '16', "compression": 90}),
+    ("TIFF 16-bit none", {"file_format": 'TIFF', "color_depth": '16', "tiff_codec": 'NONE'}),
+    ("EXR half ZIP", {"file_format": 'OPEN_EXR', "color_depth": '16', "exr_codec": 'ZIP'}),
+    ("EXR half DWAA", {"file_format": 'OPEN_EXR', "color_depth": '16', "exr_codec": 'DWAA'}),
+    ("EXR half none", {"file_format": 'OPEN_EXR', "color_depth": '16', "exr_codec": 'NONE'}),
+    ("EXR float ZIP", {"file_format": 'OPEN_EXR', "color_depth": '32', "exr_codec": 'ZIP'}),
+]
+
+_EXTENSIONS = {'PNG': ".png", 'TIFF': ".tif", 'OPEN_EXR': ".exr"}
+
+
+def synthetic_depth(width, height, seed=0):
+    """A [0, 1] depth-like frame: vertical ramp, noise, and a 0-valued background."""
+    rng = np.random.default_rng(seed)
+    ramp = np.linspace(1.0, 0.2, height, dtype=np.float32)[:, np.newaxis]
+    values = np.broadcast_to(ramp, (height, width)).copy()
+    values += rng.normal(0.0, 0.01, size=(height, width)).astype(np.float32)
+    values[: height // 4, : width // 3] = 0.0
+    return np.clip(values, 0.0, 1.0)
+
+
+def _time(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return statistics.median(samples)
+
+
+def bench_python(depth, out_dir, repeat):
+    """Background-encoder formats: PNG per zlib level, and NumPy."""
+    results = []
+    for compression in (0, 15, 50, 90):
+        level = frames.png_compress_level(compression)
+        path = os.path.join(out_dir, f"py_{compression}.png")
+        ms = _time(lambda: frames.write_png(path, depth, 16, level), repeat)
+        results.append({"encoding": f"PNG 16-bit {compression}% (background)",
+                        "ms": ms, "bytes": os.path.getsize(path)})
+
+    path = os.path.join(out_dir, "py.npy")
+    ms = _time(lambda: frames.write_npy(path, depth), repeat)
+    results.append({"encoding": "NumPy float32", "ms": ms, "bytes": os.path.getsize(path)})
+    return results
+
+
+def bench_blender(depth, out_dir, repeat):
+    """FileOutput formats through Blender's image writers."""
+    height, width = depth.shape
+    scene = bpy.context.scene
+    image = bpy.data.images.new("DM_EncodeBench", width, height, float_buffer=True)
+    try:
+        rgba = np.empty((height, width, 4), dtype=np.float32)
+        rgba[..., :3] = depth[::-1, :, np.newaxis]
+        rgba[..., 3] = 1.0
+        image.pixels.foreach_set(rgba.ravel())
+
+        image_settings = scene.render.image_settings
+        original = {attr: getattr(image_settings, attr)
+                    for attr in ("file_format", "color_mode", "color_depth",
+                                 "compression", "exr_codec", "tiff_codec")}
+        results = []
+        try:
+            for label, options in BLENDER_ENCODINGS:
+                image_settings.file_format = options["file_format"]
+                image_settings.color_mode = 'BW'
+                for attr, value in options.items():
+                    setattr(image_settings, attr, value)
+                path = os.path.join(out_dir, label.replace(" ", "_").replace("%", "")
+                                    + _EXTENSIONS[options["file_format"]])
+                ms = _time(lambda: image.save_render(path, scene=scene), repeat)
+                results.append({"encoding": label, "ms": ms, "bytes": os.path.getsize(path)})
+        finally:
+            for attr, value in original.items():
+                setattr(image_settings, attr, value)
+        return results
+    finally:
+        bpy.data.images.remove(image)
+
+
+def run(width, height, repeat=3):
+    """Benchmark every available encoding.
+
+    Returns:
+        list: Dicts with ``encoding``, median ``ms`` and ``bytes`` per frame
+    """
+    depth = synthetic_depth(width, height)
+    with tempfile.TemporaryDirectory(prefix="dm_encode_bench_") as out_dir:
+        results = bench_python(depth, out_dir, repeat)
+        if bpy is not None:
+            results += bench_blender(depth, out_dir, repeat)
+    return results
+
+
+def format_table(results, width, height):
+    raw_bytes = width * height * 4
+    lines = [f"{'encoding':<34} {'ms/frame':>9} {'MB/frame':>9} {'ratio':>6}"]
+    for result in results:
+        lines.append(
+            f"{result['encoding']:<34} {result['ms']:9.1f} "
+            f"{result['bytes'] / 1e6:9.2f} {raw_bytes / max(result['bytes'], 1):6.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(description="Benchmark depth output encodings")
+    parser.add_argument("--size", default="1920x1080", help="Frame size WIDTHxHEIGHT")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per encoding (median)")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    results = run(width, height, args.repeat)
+    print(format_table(results, width, height))
+    if bpy is None:
+        print("(run inside Blender to include the EXR, TIFF and FileOutput PNG encoders)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"width": width, "height": height, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,369 @@
+"""Headless batch entry point - render depth maps for many .blend files in one process.
+
+Run inside Blender in background mode, passing arguments after ``--``::
+
+    blender -b -P depth_map_generator/cli.py -- jobs.json --report report.json
+
+or, with the addon installed::
+
+    blender -b --python-expr "from depth_map_generator import cli; cli.main()" -- jobs.json
+
+The job spec is a JSON file of the form::
+
+    {
+        "defaults": {"settings": {"output_bit_depth": "16"}},
+        "jobs": [
+            {"blend": "/shots/sh010.blend", "frames": [1, 120],
+             "settings": {"output_path": "/out/sh010/", "mask_enabled": true}},
+            {"blend": "/shots/sh020.blend", "scene": "Layout", "frame": 42}
+        ]
+    }
+
+``settings`` keys are DepthMapSettings property names. Jobs with ``frames``
+render an animation, jobs with ``frame`` (or neither) render a single frame.
+``"normalize_sequence": false`` skips the post-render passes (sequence
+statistics, label map split, publishing; used by parallel render workers,
+whose frames are normalized and published together).
+``"mode": "depth_mask"`` enables the alpha mask and writes depth and mask
+from one render per frame (the default ``"depth"`` renders what the
+settings ask for).
+``"cameras"`` renders the job from several cameras into one subfolder each:
+a list of camera names, or ``"all"`` for every camera in the scene. The
+pipeline is set up once for all cameras.
+Renders are blocking and run back to back. A JSON report is written to
+``--report`` (or stdout) and the exit code is 0 when every job succeeded,
+1 when any job failed and 2 when the job spec itself is invalid.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+if __name__ == "__main__" and not __package__:
+    # Executed as a script (blender -b -P cli.py): make the package importable
+    # so the relative imports below resolve (PEP 366).
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import depth_map_generator  # noqa: F401
+    __package__ = "depth_map_generator"
+
+import bpy
+
+from .utils import multi_camera, paths, rendering
+
+EXIT_OK = 0
+EXIT_JOB_FAILED = 1
+EXIT_BAD_SPEC = 2
+
+# Settings the CLI manages itself; overriding them from a job spec is an error.
+_RESERVED_SETTINGS = {"setup_complete"}
+
+# Batch jobs always write files unless a spec explicitly asks otherwise.
+_DEFAULT_SETTINGS = {"depth_output_method": 'FILE_OUTPUT'}
+
+# Job "mode" -> (render operator name, settings the mode requires)
+_MODES = {
+    "depth": ("render", {}),
+    "depth_mask": ("render_combined",
+                   {"depth_output_method": 'FILE_OUTPUT', "mask_enabled": True}),
+}
+
+
+class JobSpecError(ValueError):
+    """Raised when the job spec is malformed."""
+
+
+def parse_args(argv=None):
+    """Parse CLI arguments, taking only those after Blender's ``--`` separator."""
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    parser = argparse.ArgumentParser(
+        prog="depth_map_generator.cli",
+        description="Render depth maps for a list of .blend files without the UI.",
+    )
+    parser.add_argument("job_spec", help="Path to the JSON job spec")
+    parser.add_argument(
+        "--report", default=None,
+        help="Write the JSON report to this file instead of stdout",
+    )
+    parser.add_argument(
+        "--fail-fast", action="store_true",
+        help="Stop at the first failed job",
+    )
+    return parser.parse_args(argv)
+
+
+# JSON value types accepted per DepthMapSettings property type
+_JSON_TYPES = {'BOOLEAN': bool, 'INT': int, 'FLOAT': float, 'ENUM': str, 'STRING': str}
+_TYPE_NAMES = {'BOOLEAN': "true or false", 'INT': "an integer", 'FLOAT': "a number",
+               'ENUM': "a string", 'STRING': "a string"}
+
+
+def _is_int(value):
+    # JSON true / false load as bool, a subclass of int
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def load_job_spec(path):
+    """Load and validate a job spec file.
+
+    Returns:
+        list: One dict per job, with defaults merged in
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            spec = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise JobSpecError(f"Cannot read job spec {path}: {e}") from e
+
+    if isinstance(spec, list):
+        spec = {"jobs": spec}
+    if not isinstance(spec, dict) or not isinstance(spec.get("jobs"), list):
+        raise JobSpecError("Job spec must be an object with a 'jobs' list")
+
+    defaults = spec.get("defaults", {})
+    if not isinstance(defaults, dict) or not isinstance(defaults.get("settings", {}), dict):
+        raise JobSpecError("'defaults' must be an object with an optional 'settings' object")
+    default_settings = dict(_DEFAULT_SETTINGS)
+    default_settings.update(defaults.get("settings", {}))
+
+    jobs = []
+    for i, raw in enumerate(spec["jobs"]):
+        if not isinstance(raw, dict) or not raw.get("blend"):
+            raise JobSpecError(f"Job {i} must be an object with a 'blend' path")
+        if not isinstance(raw.get("settings", {}), dict):
+            raise JobSpecError(f"Job {i}: 'settings' must be an object")
+        job = {k: v for k, v in defaults.items() if k != "settings"}
+        job.update(raw)
+        job["settings"] = dict(default_settings, **raw.get("settings", {}))
+
+        mode = job.setdefault("mode", "depth")
+        if mode not in _MODES:
+            raise JobSpecError(f"Job {i}: 'mode' must be one of {sorted(_MODES)}")
+        job["settings"].update(_MODES[mode][1])
+        if job["settings"].get("output_format") == 'NUMPY':
+            # NumPy files are read from the Viewer, which blender -b never computes
+            raise JobSpecError(f"Job {i}: 'NUMPY' output needs an interactive render; "
+                               "use 'OPEN_EXR'")
+
+        cameras = job.get("cameras")
+        if cameras is not None:
+            if cameras == "all":
+                job["settings"]["batch_cameras"] = ""
+            elif (isinstance(cameras, list) and cameras
+                    and all(isinstance(name, str) and name for name in cameras)):
+                job["settings"]["batch_cameras"] = ",".join(cameras)
+            else:
+                raise JobSpecError(f"Job {i}: 'cameras' must be \"all\" or a list of names")
+
+        for key in ("frame", "threads"):
+            if job.get(key) is not None and not _is_int(job[key]):
+                raise JobSpecError(f"Job {i}: '{key}' must be an integer")
+
+        frames = job.get("frames")
+        if frames is not None and (
+                not isinstance(frames, list) or len(frames) != 2
+                or not all(_is_int(frame) for frame in frames) or frames[0] > frames[1]):
+            raise JobSpecError(f"Job {i}: 'frames' must be [start, end] with start <= end")
+        jobs.append(job)
+
+    return jobs
+
+
+def apply_settings_overrides(settings, overrides):
+    """Assign DepthMapSettings values from a plain dict of JSON values.
+
+    Integers are accepted for float settings; nothing else is coerced, so
+    "false" or 1.7 for a bool or int setting is an error, not True or 1.
+
+    Raises:
+        JobSpecError: For unknown or reserved setting names and mistyped values
+    """
+    props = settings.bl_rna.properties
+    for key, value in overrides.items():
+        if key in _RESERVED_SETTINGS or key not in props:
+            raise JobSpecError(f"Unknown or reserved setting: {key}")
+        prop_type = props[key].type
+        if prop_type == 'FLOAT' and _is_int(value):
+            value = float(value)
+        if not isinstance(value, _JSON_TYPES.get(prop_type, object)) or (
+                prop_type == 'INT' and isinstance(value, bool)):
+            raise JobSpecError(f"Setting {key} must be {_TYPE_NAMES[prop_type]}, "
+                               f"got {json.dumps(value)}")
+        setattr(settings, key, value)
+
+
+def _prepare_scene(job):
+    """Open the job's .blend file and configure the target scene.
+
+    Returns:
+        tuple: (scene, view_layer) that will be rendered
+    """
+    bpy.ops.wm.open_mainfile(filepath=bpy.path.abspath(job["blend"]))
+
+    scene_name = job.get("scene")
+    scene = bpy.data.scenes.get(scene_name) if scene_name else bpy.context.scene
+    if scene is None:
+        raise JobSpecError(f"Scene not found: {scene_name}")
+
+    layer_name = job.get("view_layer")
+    view_layer = scene.view_layers.get(layer_name) if layer_name else None
+    if view_layer is None:
+        if layer_name:
+            raise JobSpecError(f"View layer not found: {layer_name}")
+        view_layer = (bpy.context.view_layer if scene == bpy.context.scene
+                      else scene.view_layers[0])
+
+    settings = scene.depth_map_settings
+    settings.setup_complete = False
+    apply_settings_overrides(settings, job["settings"])
+
+    frames = job.get("frames")
+    if frames is not None:
+        settings.render_animation = True
+        settings.use_scene_frame_range = False
+        settings.frame_start, settings.frame_end = frames
+    else:
+        settings.render_animation = False
+        if job.get("frame") is not None:
+            scene.frame_set(job["frame"])
+
+    threads = job.get("threads")
+    if threads:
+        scene.render.threads_mode = 'FIXED'
+        scene.render.threads = threads
+
+    return scene, view_layer
+
+
+def call_in_scene(operator, scene, view_layer, **kwargs):
+    """Call an operator with ``scene`` / ``view_layer`` as the active context.
+
+    Background sessions have no window to switch scenes with, so the
+    context is overridden instead. Nested operator calls inherit it.
+    """
+    if hasattr(bpy.context, "temp_override"):
+        with bpy.context.temp_override(scene=scene, view_layer=view_layer):
+            return operator(**kwargs)
+    # Blender < 3.2: legacy dict override
+    return operator({"scene": scene, "view_layer": view_layer}, **kwargs)
+
+
+def run_job(job):
+    """Run a single job in the current Blender process.
+
+    Returns:
+        dict: A JSON-serializable result entry for the report
+    """
+    result = {
+        "blend": job["blend"],
+        "scene": job.get("scene"),
+        "mode": job.get("mode", "depth"),
+        "status": "ok",
+        "error": None,
+    }
+    started = time.perf_counter()
+    try:
+        scene, view_layer = _prepare_scene(job)
+        settings = scene.depth_map_settings
+        result["scene"] = scene.name
+        # Output folders may come from the addon preferences' defaults
+        prefs = rendering.get_addon_prefs(bpy.context)
+
+        # bpy.ops raises RuntimeError carrying the operator's ERROR report
+        if 'FINISHED' not in call_in_scene(bpy.ops.depthmap.setup, scene, view_layer):
+            raise RuntimeError("Depth map setup was cancelled")
+        mode = job.get("mode", "depth")
+        normalize_sequence = bool(job.get("normalize_sequence", True))
+        if job.get("cameras") is not None:
+            if 'FINISHED' not in call_in_scene(
+                    bpy.ops.depthmap.render_cameras, scene, view_layer, blocking=True,
+                    normalize_sequence=normalize_sequence, combined=mode == "depth_mask"):
+                raise RuntimeError("Camera batch was cancelled")
+            cameras = multi_camera.batch_cameras(scene, settings.batch_cameras)
+            result["cameras"] = multi_camera.camera_output_dirs(settings, cameras, prefs)
+        elif 'FINISHED' not in call_in_scene(
+                getattr(bpy.ops.depthmap, _MODES[mode][0]), scene, view_layer, blocking=True,
+                normalize_sequence=normalize_sequence):
+            raise RuntimeError("Depth render was cancelled")
+
+        if settings.render_animation:
+            result["frame_start"] = scene.frame_start
+            result["frame_end"] = scene.frame_end
+            result["frames"] = scene.frame_end - scene.frame_start + 1
+        else:
+            result["frame_start"] = result["frame_end"] = scene.frame_current
+            result["frames"] = 1
+
+        result["depth_output_dir"] = paths.get_depth_output_dir(settings, prefs)
+        if settings.mask_enabled:
+            result["mask_output_dir"] = paths.get_mask_output_dir(settings, prefs)
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_jobs(jobs, fail_fast=False):
+    """Run jobs back to back and build the exit report.
+
+    Returns:
+        dict: Report with per-job results and totals
+    """
+    results = []
+    for job in jobs:
+        result = run_job(job)
+        results.append(result)
+        print(f"[depth_map_generator] {result['blend']}: {result['status']}"
+              f" ({result['seconds']}s)", flush=True)
+        if fail_fast and result["status"] != "ok":
+            break
+
+    failed = sum(1 for r in results if r["status"] != "ok")
+    return {
+        "jobs": results,
+        "total": len(jobs),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "skipped": len(jobs) - len(results),
+    }
+
+
+def _ensure_registered():
+    """Register the addon classes if the addon isn't enabled in this session."""
+    if not hasattr(bpy.types.Scene, "depth_map_settings"):
+        from . import register
+        register()
+
+
+def write_report(report, path=None):
+    """Write the report as JSON to ``path`` or stdout."""
+    text = json.dumps(report, indent=2)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text, flush=True)
+
+
+def main(argv=None):
+    """CLI entry point. Returns the process exit code."""
+    args = parse_args(argv)
+    try:
+        jobs = load_job_spec(args.job_spec)
+    except JobSpecError as e:
+        write_report({"error": str(e), "jobs": []}, args.report)
+        return EXIT_BAD_SPEC
+
+    _ensure_registered()
+    report = run_jobs(jobs, fail_fast=args.fail_fast)
+    write_report(report, args.report)
+    return EXIT_OK if report["failed"] == 0 and report["skipped"] == 0 else EXIT_JOB_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,10 +4,24 @@ from .setup import DEPTHMAP_OT_setup
 from .render import DEPTHMAP_OT_render
 from .reset import DEPTHMAP_OT_reset
 from .mask_export import DEPTHMAP_OT_export_mask
+from .render_combined import DEPTHMAP_OT_render_combined
+from .render_cameras import DEPTHMAP_OT_render_cameras
+from .crypto_mattes import DEPTHMAP_OT_crypto_from_selection
+from .publish import DEPTHMAP_OT_publish
+from .shard_cancel import DEPTHMAP_OT_cancel_shards
+from .auto_range import DEPTHMAP_OT_compute_auto_range
+from .proxy_preview import DEPTHMAP_OT_proxy_preview
 
 __all__ = [
     "DEPTHMAP_OT_setup",
     "DEPTHMAP_OT_render",
     "DEPTHMAP_OT_reset",
     "DEPTHMAP_OT_export_mask",
+    "DEPTHMAP_OT_render_combined",
+    "DEPTHMAP_OT_render_cameras",
+    "DEPTHMAP_OT_crypto_from_selection",
+    "DEPTHMAP_OT_publish",
+    "DEPTHMAP_OT_cancel_shards",
+    "DEPTHMAP_OT_compute_auto_range",
+    "DEPTHMAP_OT_proxy_preview",
 ]
@@ -0,0 +1,42 @@
+"""Auto range operator - fits near/far to the visible geometry without rendering."""
+
+from bpy.types import Operator
+
+from ..utils import auto_range
+
+
+class DEPTHMAP_OT_compute_auto_range(Operator):
+    """Computes the depth range from the camera-space bounds of visible objects"""
+
+    bl_idname = "depthmap.compute_auto_range"
+    bl_label = "Compute Auto Range"
+    bl_description = "Fit near and far to the objects visible from the camera at the current frame"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene.camera is not None
+
+    def execute(self, context):
+        try:
+            scene = context.scene
+            settings = scene.depth_map_settings
+
+            if settings.setup_complete and scene.node_tree:
+                result = auto_range.apply_to_tree(context, scene.node_tree, settings)
+            elif auto_range.update_auto_range(context, settings):
+                result = (settings.auto_near, settings.auto_far)
+            else:
+                result = None
+
+            if result is None:
+                self.report({'WARNING'}, "No geometry in view of the camera")
+                return {'CANCELLED'}
+
+            near, far = result
+            self.report({'INFO'}, f"Auto range: {near:.3f} - {far:.3f}")
+            return {'FINISHED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"Auto range failed: {str(e)}")
+            return {'CANCELLED'}
@@ -0,0 +1,43 @@
+"""Cryptomatte matte list operator - fills the mattes from the current selection."""
+
+from bpy.types import Operator
+
+
+class DEPTHMAP_OT_crypto_from_selection(Operator):
+    """Lists the selected objects (or their collections) as Cryptomatte mattes"""
+
+    bl_idname = "depthmap.crypto_from_selection"
+    bl_label = "Use Selection"
+    bl_description = ("Fill the matte list with the selected objects, or with the "
+                      "collections they belong to in Collections mode")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        settings = context.scene.depth_map_settings
+        return settings.mask_source == 'CRYPTOMATTE' and settings.crypto_matte_mode != 'MANUAL'
+
+    def execute(self, context):
+        try:
+            settings = context.scene.depth_map_settings
+            selected = sorted(context.selected_objects, key=lambda obj: obj.name)
+            if not selected:
+                self.report({'ERROR'}, "Select the objects to export as mattes")
+                return {'CANCELLED'}
+
+            if settings.crypto_matte_mode == 'COLLECTIONS':
+                names = []
+                for obj in selected:
+                    for collection in obj.users_collection:
+                        if collection.name not in names:
+                            names.append(collection.name)
+            else:
+                names = [obj.name for obj in selected]
+
+            settings.crypto_mattes = ",".join(names)
+            self.report({'INFO'}, f"{len(names)} mattes: {', '.join(names)}")
+            return {'FINISHED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"Could not list mattes: {str(e)}")
+            return {'CANCELLED'}
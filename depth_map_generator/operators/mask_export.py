@@ -1,9 +1,13 @@
 """Mask export operator - renders alpha mask for ComfyUI workflows."""
 
 import bpy
+from bpy.props import BoolProperty
 from bpy.types import Operator
 
-from ..utils import nodes, paths
+from ..utils import (
+    async_encode, cached_render, nodes, paths, pipeline, render_profile, rendering,
+    static_frames,
+)
 
 
 class DEPTHMAP_OT_export_mask(Operator):
@@ -14,6 +18,13 @@ class DEPTHMAP_OT_export_mask(Operator):
     bl_description = "Render and export an alpha mask for the selected objects"
     bl_options = {'REGISTER', 'UNDO'}
 
+    blocking: BoolProperty(
+        name="Blocking",
+        description="Render in place and return when finished (used by the batch CLI)",
+        default=False,
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+
     @classmethod
     def poll(cls, context):
         settings = context.scene.depth_map_settings
@@ -24,8 +35,7 @@ class DEPTHMAP_OT_export_mask(Operator):
             scene = context.scene
             settings = scene.depth_map_settings
             tree = scene.node_tree
-            prefs = context.preferences.addons.get("depth_map_generator")
-            prefs = prefs.preferences if prefs else None
+            prefs = rendering.get_addon_prefs(context)
 
             # Validate Cryptomatte requires Cycles
             if (settings.mask_source == 'CRYPTOMATTE'
@@ -37,17 +47,19 @@ class DEPTHMAP_OT_export_mask(Operator):
                 )
                 return {'CANCELLED'}
 
-            # Ensure mask pipeline exists, rebuild if missing
-            mask_node = nodes.find_dm_node(tree, "DM_MaskFileOutput")
-            if not mask_node:
-                nodes.create_mask_pipeline(tree, settings, prefs)
-                mask_node = nodes.find_dm_node(tree, "DM_MaskFileOutput")
-
-            # Validate the mask FileOutput is actually connected
-            if not mask_node or not mask_node.inputs[0].links:
+            # Ensure the mask pipeline matches the settings
+            try:
+                pipeline.ensure_pipeline(context, settings, prefs)
+            except RuntimeError as e:
+                self.report({'ERROR'}, f"Mask pipeline failed: {str(e)}")
+                return {'CANCELLED'}
+            # Validate the sockets writing the mask are actually connected
+            # (a packed output writes depth and mask together)
+            problem = nodes.unconnected_mask_output(tree, settings)
+            if problem:
                 self.report(
                     {'ERROR'},
-                    "Mask pipeline is not connected. "
+                    f"Mask pipeline is not connected: {problem}. "
                     "Try 'Reset Compositing' then 'Setup Depth Map' with mask enabled."
                 )
                 return {'CANCELLED'}
@@ -59,24 +71,96 @@ class DEPTHMAP_OT_export_mask(Operator):
                 self.report({'ERROR'}, f"Invalid mask output path: {error_msg}")
                 return {'CANCELLED'}
 
+            # NumPy files are read from the Viewer, which background renders never compute
+            if settings.output_format == 'NUMPY' and bpy.app.background:
+                self.report({'ERROR'}, "NumPy output needs an interactive render; "
+                                       "use OpenEXR in background mode")
+                return {'CANCELLED'}
+
+            # Serve unchanged frames from the raw depth cache
+            if settings.use_depth_cache:
+                supported, reason = cached_render.check_supported(
+                    scene, settings, context.view_layer)
+                if supported:
+                    frame_list = rendering.requested_frames(scene, settings)
+                    on_finish = self._begin_render(context, prefs)
+                    served, to_render = rendering.start_guarded(
+                        cached_render.render_cached, context, frame_list, prefs,
+                        blocking=self.blocking, on_finish=on_finish
+                    )
+                    self.report(
+                        {'INFO'},
+                        f"Mask cache: {served} of {len(frame_list)} frames served, "
+                        f"rendering {to_render}"
+                    )
+                    return {'FINISHED'}
+                self.report({'WARNING'}, f"{reason}; rendering without cache")
+
             # Render — mask animation is independent of depth output method
             if settings.render_animation:
-                if not settings.use_scene_frame_range:
-                    scene.frame_start = settings.frame_start
-                    scene.frame_end = settings.frame_end
+                frame_start, frame_end = rendering.apply_frame_range(scene, settings)
+
+                frame_count = frame_end - frame_start + 1
+                if settings.skip_static_frames:
+                    on_finish = self._begin_render(context, prefs)
+                    skipped, to_render = rendering.start_guarded(
+                        static_frames.render_skipping_static, context,
+                        list(range(frame_start, frame_end + 1)), prefs,
+                        blocking=self.blocking, on_finish=on_finish
+                    )
+                    self.report(
+                        {'INFO'},
+                        f"Exporting mask animation: rendering {to_render} of "
+                        f"{frame_count} frames, skipping {skipped} static frames"
+                    )
+                    return {'FINISHED'}
 
-                frame_count = scene.frame_end - scene.frame_start + 1
                 self.report(
                     {'INFO'},
                     f"Exporting mask animation: {frame_count} frames to {output_dir}"
                 )
-                bpy.ops.render.render('INVOKE_DEFAULT', animation=True)
+                on_finish = self._begin_render(context, prefs)
+                result = rendering.start_guarded(
+                    rendering.start_render, animation=True, blocking=self.blocking,
+                    on_finish=on_finish
+                )
             else:
                 self.report({'INFO'}, "Exporting single mask frame")
-                bpy.ops.render.render('INVOKE_DEFAULT')
+                on_finish = self._begin_render(context, prefs)
+                result = rendering.start_guarded(
+                    rendering.start_render, blocking=self.blocking, on_finish=on_finish
+                )
+
+            if 'CANCELLED' in result:
+                self.report({'ERROR'}, "Render was cancelled")
+                return {'CANCELLED'}
 
             return {'FINISHED'}
 
         except Exception as e:
             self.report({'ERROR'}, f"Mask export failed: {str(e)}")
             return {'CANCELLED'}
+
+    def _begin_render(self, context, prefs):
+        """Apply the render profile and start background encoding if the pipeline uses it.
+
+        With async encoding (and NumPy output) DM_MaskFileOutput is muted;
+        the mask is encoded from the DM_Viewer alpha instead.
+        The profile is restored again if the encoder fails to start.
+
+        Returns:
+            callable: on_finish restoring the profile and finishing the encoder
+        """
+        scene = context.scene
+        settings = scene.depth_map_settings
+        restore = render_profile.begin(scene, context.view_layer, settings)
+        encoder = None
+        if nodes.wants_async_encoding(settings):
+            try:
+                encoder = async_encode.AsyncFrameEncoder(scene, settings, prefs).start(
+                    scene.node_tree)
+            except Exception:
+                if restore:
+                    restore()
+                raise
+        return rendering.chain_callbacks(restore, encoder.finish if encoder else None)
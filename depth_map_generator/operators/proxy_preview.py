@@ -0,0 +1,41 @@
+"""Proxy preview operator - starts or stops the auto-refreshing low-resolution depth proxy."""
+
+from bpy.types import Operator
+
+from ..utils import proxy_preview, rendering
+
+
+class DEPTHMAP_OT_proxy_preview(Operator):
+    """Toggles the low-resolution depth proxy that re-renders on scene and setting changes"""
+
+    bl_idname = "depthmap.proxy_preview"
+    bl_label = "Proxy Preview"
+    bl_description = ("Re-render a low-resolution depth proxy into the DM_DepthProxy image "
+                      "whenever the scene or the depth settings change")
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene.camera is not None
+
+    def execute(self, context):
+        try:
+            settings = context.scene.depth_map_settings
+            session = proxy_preview.get_active()
+            if session is not None:
+                session.stop()
+                settings.proxy_preview = False
+                self.report({'INFO'}, "Proxy preview stopped")
+                return {'FINISHED'}
+
+            settings.proxy_preview = True
+            proxy_preview.ProxyPreview(rendering.get_addon_prefs(context)).start()
+            self.report(
+                {'INFO'},
+                f"Proxy preview at {settings.proxy_resolution}% "
+                f"in the {proxy_preview.PROXY_IMAGE} image"
+            )
+            return {'FINISHED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"Proxy preview failed: {str(e)}")
+            return {'CANCELLED'}
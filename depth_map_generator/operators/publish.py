@@ -0,0 +1,43 @@
+"""Publish operator - places the rendered frames in the ComfyUI input directory."""
+
+from bpy.types import Operator
+
+from ..utils import paths, rendering
+from .render import publish_callback
+
+
+class DEPTHMAP_OT_publish(Operator):
+    """Publishes the rendered depth and mask frames into ComfyUI's input folder"""
+
+    bl_idname = "depthmap.publish"
+    bl_label = "Publish to ComfyUI"
+    bl_description = ("Place the rendered frames in the ComfyUI input directory "
+                      "(reflink, hardlink or copy) and write a manifest")
+
+    @classmethod
+    def poll(cls, context):
+        prefs = rendering.get_addon_prefs(context)
+        return bool(prefs and prefs.comfyui_input_dir)
+
+    def execute(self, context):
+        try:
+            scene = context.scene
+            settings = scene.depth_map_settings
+            prefs = rendering.get_addon_prefs(context)
+            manifest = publish_callback(
+                scene, settings, prefs, rendering.requested_frames(scene, settings),
+            )()
+            if manifest is None:
+                self.report({'ERROR'}, "No rendered frames to publish")
+                return {'CANCELLED'}
+
+            count = sum(len(sequence["files"]) for sequence in manifest["sequences"].values())
+            self.report(
+                {'INFO'},
+                f"Published {count} files to {paths.get_publish_dir(settings, prefs)}"
+            )
+            return {'FINISHED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"Publish failed: {str(e)}")
+            return {'CANCELLED'}
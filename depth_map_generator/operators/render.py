@@ -1,9 +1,16 @@
 """Render operator - handles both single frame and animation sequence rendering."""
 
+import os
+
 import bpy
+from bpy.props import BoolProperty
 from bpy.types import Operator
 
-from ..utils import paths
+from ..utils import (
+    async_encode, auto_range, cached_render, comfy_stream, frames, label_split, nodes, paths,
+    pipeline, publish, render_profile, rendering, renormalize, resume, shard, stack_capture,
+    static_frames, telemetry,
+)
 
 
 class DEPTHMAP_OT_render(Operator):
@@ -13,16 +20,39 @@ class DEPTHMAP_OT_render(Operator):
     bl_label = "Render Depth Map"
     bl_description = "Render the depth map with current settings"
 
+    blocking: BoolProperty(
+        name="Blocking",
+        description="Render in place and return when finished (used by the batch CLI)",
+        default=False,
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+
+    normalize_sequence: BoolProperty(
+        name="Normalize Sequence",
+        description="Run the sequence statistics pass and the label map split after "
+                    "rendering (parallel render workers leave them to the main process)",
+        default=True,
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+
     def execute(self, context):
         try:
             scene = context.scene
             settings = scene.depth_map_settings
-            prefs = context.preferences.addons.get("depth_map_generator")
-            prefs = prefs.preferences if prefs else None
+            prefs = rendering.get_addon_prefs(context)
 
-            # Auto-setup if not already configured
+            # Bring the pipeline up to date (a no-op when settings are unchanged)
             if not settings.setup_complete:
                 bpy.ops.depthmap.setup()
+            else:
+                try:
+                    pipeline.ensure_pipeline(context, settings, prefs)
+                except RuntimeError as e:
+                    self.report({'WARNING'}, f"Mask pipeline incomplete: {str(e)}")
+
+            # Fit near/far to the visible geometry (per frame if requested)
+            if settings.use_auto_range:
+                self._update_auto_range(context)
 
             # Validate output path when using file output
             if settings.depth_output_method == 'FILE_OUTPUT':
@@ -35,26 +65,528 @@ class DEPTHMAP_OT_render(Operator):
                     )
                     return {'CANCELLED'}
 
+                # NumPy files are read from the Viewer, which background
+                # renders (and parallel workers) never compute
+                sharded = settings.render_animation and settings.shard_workers > 1
+                if settings.output_format == 'NUMPY' and (bpy.app.background or sharded):
+                    self.report({'ERROR'}, "NumPy output needs an interactive render; "
+                                           "use OpenEXR in background mode")
+                    return {'CANCELLED'}
+
+            # Serve unchanged frames from the raw depth cache (sharded
+            # workers consult the cache themselves)
+            if settings.use_depth_cache and not (
+                    settings.render_animation and settings.shard_workers > 1):
+                supported, reason = cached_render.check_supported(
+                    scene, settings, context.view_layer)
+                if supported:
+                    if settings.resume_render and settings.render_animation:
+                        self.report({'WARNING'}, "Resume is not used with the depth cache")
+                    return self._render_cached(context, prefs)
+                self.report({'WARNING'}, f"{reason}; rendering without cache")
+
             if (settings.depth_output_method == 'FILE_OUTPUT'
                     and settings.render_animation):
                 # Set custom frame range if not using scene range
-                if not settings.use_scene_frame_range:
-                    scene.frame_start = settings.frame_start
-                    scene.frame_end = settings.frame_end
+                frame_start, frame_end = rendering.apply_frame_range(scene, settings)
+
+                if settings.shard_workers > 1:
+                    if settings.resume_render:
+                        self.report({'WARNING'}, "Resume is not used with parallel workers")
+                    return self._render_sharded(context, output_dir, prefs)
+
+                if settings.resume_render:
+                    return self._render_resuming(context, prefs)
 
-                frame_count = scene.frame_end - scene.frame_start + 1
+                if settings.skip_static_frames:
+                    return self._render_skipping_static(context, prefs)
+
+                frame_count = frame_end - frame_start + 1
                 self.report(
                     {'INFO'},
                     f"Rendering depth animation: {frame_count} frames to {output_dir}"
                 )
 
-                bpy.ops.render.render('INVOKE_DEFAULT', animation=True)
+                on_finish, _recorder = self._begin_render(
+                    context, prefs, frame_count, stack=True)
+                result = rendering.start_guarded(
+                    rendering.start_render, animation=True, blocking=self.blocking,
+                    on_finish=on_finish,
+                )
             else:
                 self.report({'INFO'}, "Rendering single depth map frame")
-                bpy.ops.render.render('INVOKE_DEFAULT')
+                on_finish, _recorder = self._begin_render(context, prefs, 1)
+                result = rendering.start_guarded(
+                    rendering.start_render, blocking=self.blocking, on_finish=on_finish
+                )
+
+            if 'CANCELLED' in result:
+                self.report({'ERROR'}, "Render was cancelled")
+                return {'CANCELLED'}
 
             return {'FINISHED'}
 
         except Exception as e:
             self.report({'ERROR'}, f"Render failed: {str(e)}")
             return {'CANCELLED'}
+
+    def _update_auto_range(self, context):
+        """Compute the auto range and write it into the range node."""
+        scene = context.scene
+        settings = scene.depth_map_settings
+        if scene.camera is None:
+            self.report({'WARNING'}, "Auto range needs a scene camera; keeping previous range")
+            return
+        frame_list = None
+        if settings.render_animation and settings.auto_range_per_frame:
+            frame_list = rendering.requested_frames(scene, settings)
+        if auto_range.apply_to_tree(context, scene.node_tree, settings, frame_list) is None:
+            self.report({'WARNING'}, "Auto range: no geometry in view; keeping previous range")
+
+    def _sequence_pass(self, context, prefs):
+        """Return the post-render sequence normalization callback, or None."""
+        if not self.normalize_sequence:
+            return None
+        scene = context.scene
+        settings = scene.depth_map_settings
+        callback = sequence_pass_callback(
+            scene, settings, prefs, rendering.requested_frames(scene, settings),
+        )
+        if callback is not None and settings.output_format != 'PNG':
+            self.report({'WARNING'}, "Sequence-wide normalization writes PNG depth files")
+        return callback
+
+    def _label_split(self, context, prefs):
+        """Return the post-render label map split callback, or None."""
+        if not self.normalize_sequence:
+            return None
+        scene = context.scene
+        settings = scene.depth_map_settings
+        try:
+            return label_split_callback(
+                settings, prefs, rendering.requested_frames(scene, settings),
+            )
+        except ValueError as e:
+            self.report({'WARNING'}, f"Label map split skipped: {str(e)}")
+            return None
+
+    def _publish(self, context, prefs):
+        """Return the publish into the ComfyUI input directory, or None."""
+        scene = context.scene
+        settings = scene.depth_map_settings
+        if not (self.normalize_sequence and settings.publish_to_comfyui):
+            return None
+        try:
+            return publish_callback(
+                scene, settings, prefs, rendering.requested_frames(scene, settings),
+            )
+        except ValueError as e:
+            self.report({'WARNING'}, f"Publishing skipped: {str(e)}")
+            return None
+
+    def _begin_render(self, context, prefs, total, stack=False, post_passes=True):
+        """Apply the render profile and start the per-frame outputs of a render.
+
+        What already started is finished again if a later step raises.
+
+        Args:
+            total: Frames the telemetry expects
+            stack: Also capture the frames into the stacked sequence file
+            post_passes: Run the sequence pass and the label map split afterwards
+
+        Returns:
+            tuple: (on_finish callback of the render, RenderTelemetry or None)
+        """
+        scene = context.scene
+        settings = scene.depth_map_settings
+        finishers = [render_profile.begin(scene, context.view_layer, settings)]
+        try:
+            encoder = self._start_encoder(context, prefs)
+            finishers.append(encoder.finish if encoder else None)
+            if stack:
+                capture = self._start_stack(context, prefs)
+                finishers.append(capture.finish if capture else None)
+            recorder = self._start_telemetry(context, prefs, total)
+            finishers.append(recorder.finish if recorder else None)
+            stream = self._start_stream(context, prefs)
+            finishers.append(stream.finish if stream else None)
+            if post_passes:
+                finishers += [self._sequence_pass(context, prefs),
+                              self._label_split(context, prefs)]
+            finishers.append(self._publish(context, prefs))
+        except Exception:
+            cleanup = rendering.chain_callbacks(*finishers)
+            if cleanup:
+                cleanup()
+            raise
+        return rendering.chain_callbacks(*finishers, rendering.render_finished), recorder
+
+    def _start_encoder(self, context, prefs):
+        """Start background PNG encoding when the pipeline routes files through the Viewer.
+
+        Returns:
+            AsyncFrameEncoder or None: Call its finish() once the render has ended
+        """
+        scene = context.scene
+        settings = scene.depth_map_settings
+        if not nodes.wants_async_encoding(settings):
+            return None
+        encoder = async_encode.AsyncFrameEncoder(scene, settings, prefs)
+        if encoder.transfer is None and settings.output_format == 'PNG':
+            self.report({'WARNING'}, "Background encoding reproduces only the Standard and "
+                                     "Raw view transforms; writing linear values")
+        return encoder.start(scene.node_tree)
+
+    def _start_stack(self, context, prefs):
+        """Start capturing frames into the stacked sequence file.
+
+        Returns:
+            StackCapture or None: Call its finish() once the render has ended
+        """
+        scene = context.scene
+        settings = scene.depth_map_settings
+        if not nodes.wants_stack_output(settings):
+            if settings.stack_sequence and bpy.app.background:
+                self.report({'WARNING'}, "Stacked sequence output needs an interactive "
+                                         "render; not written in background mode")
+            return None
+        capture = stack_capture.StackCapture(
+            scene, settings, rendering.requested_frames(scene, settings), prefs,
+        )
+        try:
+            return capture.start(scene.node_tree)
+        except OSError as e:
+            self.report({'WARNING'}, f"Stacked sequence output disabled: {str(e)}")
+            return None
+
+    def _start_stream(self, context, prefs):
+        """Start handing finished frames to the ComfyUI server.
+
+        Returns:
+            StreamSession or None: Call its finish() once the render has ended
+        """
+        scene = context.scene
+        settings = scene.depth_map_settings
+        if not nodes.wants_comfy_stream(settings):
+            return None
+        try:
+            session = comfy_stream.StreamSession(
+                settings, rendering.requested_frames(scene, settings), prefs,
+            )
+        except (OSError, ValueError) as e:
+            self.report({'WARNING'}, f"ComfyUI streaming disabled: {str(e)}")
+            return None
+        return session.start()
+
+    def _warn_no_stack(self, settings):
+        if nodes.wants_stack_output(settings):
+            self.report({'WARNING'}, "Stacked sequence output is only written by regular "
+                                     "(uncached, unsharded, unresumed, no static skipping) "
+                                     "renders")
+
+    def _start_telemetry(self, context, prefs, total):
+        """Start per-frame telemetry for a File Output render.
+
+        Returns:
+            RenderTelemetry or None: Call its finish() once the render has ended
+        """
+        settings = context.scene.depth_map_settings
+        if not settings.record_telemetry or settings.depth_output_method != 'FILE_OUTPUT':
+            return None
+        recorder = telemetry.RenderTelemetry(
+            telemetry.log_path_for(paths.get_depth_output_dir(settings, prefs)), total,
+            files_for_frame=lambda frame: paths.get_frame_output_files(settings, frame, prefs),
+        )
+        try:
+            return recorder.start()
+        except OSError as e:
+            self.report({'WARNING'}, f"Render telemetry disabled: {str(e)}")
+            return None
+
+    def _render_cached(self, context, prefs):
+        """Write cache hits directly and render only the missing frames."""
+        scene = context.scene
+        settings = scene.depth_map_settings
+        frame_list = rendering.requested_frames(scene, settings)
+        self._warn_no_stack(settings)
+        on_finish, recorder = self._begin_render(
+            context, prefs, len(frame_list), post_passes=False)
+        served, to_render = rendering.start_guarded(
+            cached_render.render_cached, context, frame_list, prefs,
+            blocking=self.blocking, on_finish=on_finish,
+        )
+        if recorder is not None:
+            recorder.total = to_render
+        self.report(
+            {'INFO'},
+            f"Depth cache: {served} of {len(frame_list)} frames served, "
+            f"rendering {to_render}"
+        )
+        return {'FINISHED'}
+
+    def _render_skipping_static(self, context, prefs):
+        """Render only frames that changed, reusing files for held frames."""
+        scene = context.scene
+        settings = scene.depth_map_settings
+        frame_list = rendering.requested_frames(scene, settings)
+        self._warn_no_stack(settings)
+        on_finish, recorder = self._begin_render(context, prefs, len(frame_list))
+        skipped, to_render = rendering.start_guarded(
+            static_frames.render_skipping_static, context, frame_list, prefs,
+            blocking=self.blocking, on_finish=on_finish,
+        )
+        if recorder is not None:
+            recorder.total = to_render
+        self.report(
+            {'INFO'},
+            f"Rendering {to_render} of {len(frame_list)} frames, "
+            f"skipping {skipped} static frames"
+        )
+        return {'FINISHED'}
+
+    def _render_resuming(self, context, prefs):
+        """Verify existing outputs and render only missing or invalid frames."""
+        scene = context.scene
+        settings = scene.depth_map_settings
+        frame_list = rendering.requested_frames(scene, settings)
+        self._warn_no_stack(settings)
+        if settings.skip_static_frames:
+            self.report({'WARNING'}, "Static frame skipping is not combined with resume")
+        if (self.normalize_sequence and nodes.wants_sequence_pass(settings)
+                and not settings.save_raw_depth):
+            self.report({'WARNING'}, "The sequence pass removes the raw depth frames; "
+                                     "enable Save Raw Depth to resume after it")
+        on_finish, recorder = self._begin_render(context, prefs, len(frame_list))
+        kept, to_render, invalid = rendering.start_guarded(
+            resume.render_resuming, context, frame_list, prefs,
+            blocking=self.blocking, on_finish=on_finish,
+        )
+        if recorder is not None:
+            recorder.total = to_render
+        if invalid:
+            detail = ", ".join(f"{frame} ({reason})" for frame, reason in
+                               sorted(invalid.items())[:5])
+            self.report({'WARNING'}, f"Re-rendering {len(invalid)} invalid frames: {detail}")
+        self.report(
+            {'INFO'},
+            f"Resuming: {kept} of {len(frame_list)} frames complete, rendering {to_render}"
+        )
+        return {'FINISHED'}
+
+    def _render_sharded(self, context, output_dir, prefs):
+        """Split the animation across background worker processes."""
+        if shard.get_active():
+            self.report({'ERROR'}, "A parallel render is already running")
+            return {'CANCELLED'}
+
+        scene = context.scene
+        settings = scene.depth_map_settings
+        self._warn_no_stack(settings)
+        if nodes.wants_comfy_stream(settings):
+            self.report({'WARNING'}, "Parallel renders don't stream to ComfyUI; "
+                                     "use Publish to ComfyUI instead")
+        job = shard.create_from_scene(
+            scene, context.view_layer, settings, output_dir, prefs
+        )
+        self.report(
+            {'INFO'},
+            f"Rendering depth animation: {job.total} frames across "
+            f"{job.workers} workers ({job.threads} threads each) to {output_dir}"
+        )
+
+        post_passes = rendering.chain_callbacks(
+            self._sequence_pass(context, prefs), self._label_split(context, prefs),
+            self._publish(context, prefs),
+        )
+        if not self.blocking:
+            def _on_finish(finished_job, progress):
+                _report_shards_finished(finished_job, progress)
+                if post_passes and not progress["failed"]:
+                    post_passes()
+                rendering.render_finished()
+
+            shard.run_in_background(job, on_finish=_on_finish)
+            return {'FINISHED'}
+
+        job.start(job.work_dir)
+        last_done = [-1]
+
+        def _print_progress(progress):
+            if progress["done"] != last_done[0]:
+                last_done[0] = progress["done"]
+                print(f"[depth_map_generator] {progress['done']}/{progress['total']}"
+                      f" frames ({progress['running']} workers running)", flush=True)
+
+        progress = job.wait(callback=_print_progress)
+        errors = job.worker_errors()
+        job.cleanup()
+        if progress["failed"]:
+            detail = "; ".join(errors) or f"shards {progress['failed']} exited with errors"
+            self.report({'ERROR'}, f"Parallel render failed: {detail}")
+            return {'CANCELLED'}
+        if post_passes:
+            post_passes()
+        return {'FINISHED'}
+
+
+def _report_shards_finished(job, progress):
+    """Print the outcome of a UI-started sharded render to the console."""
+    if progress["failed"]:
+        for error in job.worker_errors() or [f"shards {progress['failed']} failed"]:
+            print(f"[depth_map_generator] Parallel render error: {error}")
+        print(f"[depth_map_generator] Worker logs kept in {job.work_dir}")
+    else:
+        print(f"[depth_map_generator] Parallel render finished: {progress['done']}"
+              f"/{progress['total']} frames in {progress['elapsed']:.1f}s")
+        job.cleanup()
+
+
+def sequence_pass_callback(scene, settings, prefs, frame_list):
+    """Build the two-pass sequence normalization run after a render, or None.
+
+    Everything is captured up front: the callback may run from a render
+    handler after the operator has returned.
+    """
+    if not nodes.wants_sequence_pass(settings):
+        return None
+
+    raw_dir = paths.get_raw_depth_output_dir(settings, prefs)
+    raw_prefix = paths.output_prefix("raw_depth", settings)
+    depth_dir = paths.get_depth_output_dir(settings, prefs)
+    depth_prefix = paths.output_prefix("depth", settings)
+    params = cached_render.normalization_params(scene, settings)
+    low, high = settings.stats_low_percentile, settings.stats_high_percentile
+    keep_raw = settings.save_raw_depth
+    frame_list = list(frame_list)
+
+    def _run():
+        sources = {}
+        for frame in frame_list:
+            path = os.path.join(raw_dir, frames.frame_filename(raw_prefix, frame, ".exr"))
+            if os.path.isfile(path):
+                sources[frame] = path
+        if not sources:
+            print("[depth_map_generator] Sequence pass: no raw depth frames found")
+            return
+
+        written, fitted, stats = renormalize.normalize_sequence(
+            sources, depth_dir, params, low=low, high=high, dst_prefix=depth_prefix,
+            stats_path=os.path.join(raw_dir, "depth_stats.json"),
+        )
+        near, far = stats.percentile(low), stats.percentile(high)
+        # No percentiles when every pixel of the sequence is background
+        detail = f"{near:.3f} - {far:.3f}" if near is not None else "no valid depth"
+        print(f"[depth_map_generator] Sequence pass: {len(written)} frames normalized"
+              f" ({detail})")
+
+        if not keep_raw:
+            for path in sources.values():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    return _run
+
+
+def label_split_callback(settings, prefs, frame_list):
+    """Build the post-render split of the raw object index into label maps and masks, or None.
+
+    Raises:
+        ValueError: If the split indices can't be parsed
+    """
+    if not nodes.wants_label_map(settings):
+        return None
+
+    indices = label_split.parse_indices(settings.label_indices)
+    raw_dir = paths.get_raw_depth_output_dir(settings, prefs)
+    raw_prefix = paths.output_prefix("raw_index", settings)
+    mask_dir = paths.get_mask_output_dir(settings, prefs)
+    label_prefix = paths.output_prefix("labels", settings)
+    mask_prefix = paths.output_prefix("mask", settings)
+    bit_depth = settings.output_bit_depth
+    keep_raw = settings.save_raw_depth
+    frame_list = list(frame_list)
+
+    def _run():
+        sources = {}
+        for frame in frame_list:
+            path = os.path.join(raw_dir, frames.frame_filename(raw_prefix, frame, ".exr"))
+            if os.path.isfile(path):
+                sources[frame] = path
+        if not sources:
+            print("[depth_map_generator] Label map split: no raw index frames found")
+            return
+
+        label_split.split_sequence(
+            sources, mask_dir, indices, label_prefix=label_prefix,
+            mask_prefix=mask_prefix, bit_depth=bit_depth,
+        )
+        print(f"[depth_map_generator] Label map split: {len(sources)} frames,"
+              f" {len(indices)} masks per frame")
+
+        if not keep_raw:
+            for path in sources.values():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    return _run
+
+
+def publish_callback(scene, settings, prefs, frame_list):
+    """Build the publish of the finished frames into the ComfyUI input directory.
+
+    Depth and mask files are published as the "depth" and "mask" sequences
+    of ``paths.get_publish_dir()``; raw EXR intermediates are not. The
+    callback returns the manifest, or None when no frame was found.
+
+    Raises:
+        ValueError: If no ComfyUI input directory is set in the preferences
+    """
+    publish_dir = paths.get_publish_dir(settings, prefs)
+    if publish_dir is None:
+        raise ValueError("Set the ComfyUI input directory in the addon preferences")
+
+    depth_dir = paths.get_depth_output_dir(settings, prefs)
+    mask_dir = paths.get_mask_output_dir(settings, prefs)
+    sequence_pass = nodes.wants_sequence_pass(settings)
+    depth_prefix = paths.output_prefix("depth", settings)
+    near, far = nodes.depth_range(settings)
+    info = {
+        "scene": scene.name,
+        "normalization": settings.depth_normalization,
+        "near": near,
+        "far": far,
+        "output_format": 'PNG' if sequence_pass else settings.output_format,
+        "bit_depth": settings.output_bit_depth,
+    }
+    # Classified by role: the depth and mask folders may coincide or nest
+    frame_files = {}
+    for frame in frame_list:
+        files = paths.get_frame_output_files_by_kind(settings, frame, prefs)
+        if sequence_pass:
+            files["depth"].append(os.path.join(
+                depth_dir, frames.frame_filename(depth_prefix, frame, ".png")))
+        frame_files[frame] = {name: files[name] for name in ("depth", "mask")}
+
+    def _run():
+        sequences = {"depth": (depth_dir, {}), "mask": (mask_dir, {})}
+        for frame, files in frame_files.items():
+            for name, kind_files in files.items():
+                for path in kind_files:
+                    if os.path.isfile(path):
+                        sequences[name][1].setdefault(frame, []).append(path)
+        sequences = {name: sequence for name, sequence in sequences.items() if sequence[1]}
+        if not sequences:
+            print("[depth_map_generator] Publish: no finished frames found")
+            return None
+
+        manifest = publish.publish_sequences(sequences, publish_dir, info)
+        methods = ", ".join(f"{count} {method}" for method, count
+                            in sorted(manifest["methods"].items()))
+        print(f"[depth_map_generator] Published to {publish_dir} ({methods})")
+        return manifest
+
+    return _run
@@ -0,0 +1,105 @@
+"""Camera batch operator - renders the depth pipeline from several cameras in one job."""
+
+import bpy
+from bpy.props import BoolProperty
+from bpy.types import Operator
+
+from ..utils import multi_camera, pipeline, rendering
+
+
+class DEPTHMAP_OT_render_cameras(Operator):
+    """Renders depth from every camera (or the listed cameras) into per-camera folders"""
+
+    bl_idname = "depthmap.render_cameras"
+    bl_label = "Render All Cameras"
+    bl_description = ("Render the depth map from each camera in turn, writing one "
+                      "subfolder per camera; setup runs once for the whole batch")
+
+    blocking: BoolProperty(
+        name="Blocking",
+        description="Render in place and return when finished (used by the batch CLI)",
+        default=False,
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+
+    normalize_sequence: BoolProperty(
+        name="Normalize Sequence",
+        description="Run the sequence statistics pass after each camera's render",
+        default=True,
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+
+    combined: BoolProperty(
+        name="Depth + Mask",
+        description="Render depth and mask from one render per frame for each camera",
+        default=False,
+        options={'SKIP_SAVE'},
+    )
+
+    def execute(self, context):
+        try:
+            scene = context.scene
+            settings = scene.depth_map_settings
+            prefs = rendering.get_addon_prefs(context)
+
+            if multi_camera.get_active() is not None:
+                self.report({'ERROR'}, "A camera batch is already running")
+                return {'CANCELLED'}
+
+            try:
+                cameras = multi_camera.batch_cameras(scene, settings.batch_cameras)
+            except ValueError as e:
+                self.report({'ERROR'}, str(e))
+                return {'CANCELLED'}
+            if not cameras:
+                self.report({'ERROR'}, "No cameras to render")
+                return {'CANCELLED'}
+
+            # Build the pipeline once; each camera then only retargets the
+            # FileOutput base paths to its subfolder
+            settings.camera_subdir = ""
+            if not settings.setup_complete:
+                bpy.ops.depthmap.setup()
+            else:
+                try:
+                    pipeline.ensure_pipeline(context, settings, prefs)
+                except RuntimeError as e:
+                    self.report({'WARNING'}, f"Mask pipeline incomplete: {str(e)}")
+
+            operator = (bpy.ops.depthmap.render_combined if self.combined
+                        else bpy.ops.depthmap.render)
+            blocking = self.blocking or bpy.app.background
+
+            def _render():
+                return operator(blocking=blocking, normalize_sequence=self.normalize_sequence)
+
+            batch = multi_camera.CameraBatch(context, cameras, _render,
+                                             on_finish=_report_batch_finished)
+            names = ", ".join(camera.name for camera in cameras)
+            if blocking:
+                batch.run_blocking()
+                if batch.failed:
+                    self.report({'ERROR'}, f"Camera batch stopped at {batch.failed[0]} "
+                                           f"({len(batch.done)} of {len(cameras)} rendered)")
+                    return {'CANCELLED'}
+                self.report({'INFO'}, f"Rendered {len(cameras)} cameras: {names}")
+                return {'FINISHED'}
+
+            if not batch.start(context):
+                self.report({'ERROR'}, "Camera batch could not start rendering")
+                return {'CANCELLED'}
+            self.report({'INFO'}, f"Rendering {len(cameras)} cameras: {names}")
+            return {'FINISHED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"Camera batch failed: {str(e)}")
+            return {'CANCELLED'}
+
+
+def _report_batch_finished(batch):
+    """Print the outcome of a camera batch to the console."""
+    if batch.cancelled:
+        print(f"[depth_map_generator] Camera batch stopped: {len(batch.done)}"
+              f"/{len(batch.cameras)} cameras rendered")
+    else:
+        print(f"[depth_map_generator] Camera batch finished: {', '.join(batch.done)}")
@@ -0,0 +1,92 @@
+"""Combined render operator - depth and alpha mask from one render per frame."""
+
+import bpy
+from bpy.props import BoolProperty
+from bpy.types import Operator
+
+from ..utils import nodes, paths, pipeline, rendering
+
+
+class DEPTHMAP_OT_render_combined(Operator):
+    """Renders depth and alpha mask files in a single pass"""
+
+    bl_idname = "depthmap.render_combined"
+    bl_label = "Render Depth + Mask"
+    bl_description = ("Render once per frame and write both the depth map and the alpha mask "
+                      "(instead of rendering depth and mask separately)")
+
+    blocking: BoolProperty(
+        name="Blocking",
+        description="Render in place and return when finished (used by the batch CLI)",
+        default=False,
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+
+    normalize_sequence: BoolProperty(
+        name="Normalize Sequence",
+        description="Run the sequence statistics pass after rendering",
+        default=True,
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+
+    @classmethod
+    def poll(cls, context):
+        settings = context.scene.depth_map_settings
+        return settings.mask_enabled and settings.depth_output_method == 'FILE_OUTPUT'
+
+    def execute(self, context):
+        try:
+            scene = context.scene
+            settings = scene.depth_map_settings
+            prefs = rendering.get_addon_prefs(context)
+
+            if (settings.mask_source == 'CRYPTOMATTE'
+                    and scene.render.engine != 'CYCLES'):
+                self.report(
+                    {'ERROR'},
+                    "Cryptomatte requires Cycles render engine. "
+                    "Switch to Cycles or use Object Index mode."
+                )
+                return {'CANCELLED'}
+
+            # Both branches must be in the tree before anything renders:
+            # the depth render only warns about an incomplete mask branch
+            try:
+                pipeline.ensure_pipeline(context, settings, prefs)
+            except RuntimeError as e:
+                self.report({'ERROR'}, f"Mask pipeline failed: {str(e)}")
+                return {'CANCELLED'}
+            settings.setup_complete = True
+
+            problems = nodes.unconnected_outputs(scene.node_tree, settings)
+            if problems:
+                self.report(
+                    {'ERROR'},
+                    f"Cannot render depth + mask: {'; '.join(problems)}. "
+                    "Try 'Reset Compositing' then 'Setup Depth Map'."
+                )
+                return {'CANCELLED'}
+
+            # The depth path is validated by the depth render
+            mask_dir = paths.get_mask_output_dir(settings, prefs)
+            is_valid, error_msg = paths.validate_output_path(mask_dir)
+            if not is_valid:
+                self.report({'ERROR'}, f"Invalid mask output path: {error_msg}")
+                return {'CANCELLED'}
+
+            # The pipeline writes both outputs per frame, so the depth render
+            # (with its cache, static-frame, sharding and encoding paths)
+            # produces the mask as well
+            result = bpy.ops.depthmap.render(
+                blocking=self.blocking, normalize_sequence=self.normalize_sequence
+            )
+            if 'CANCELLED' in result:
+                self.report({'ERROR'}, "Render was cancelled")
+                return {'CANCELLED'}
+
+            self.report({'INFO'}, f"Rendering depth + mask (mask files to {mask_dir})")
+            return {'FINISHED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"Depth + mask render failed: {str(e)}")
+            return {'CANCELLED'}
@@ -1,9 +1,10 @@
 """Setup operator - configures render passes and compositing nodes."""
 
-import bpy
+import time
+
 from bpy.types import Operator
 
-from ..utils import nodes
+from ..utils import auto_range, pipeline, rendering
 
 
 class DEPTHMAP_OT_setup(Operator):
@@ -19,66 +20,33 @@ class DEPTHMAP_OT_setup(Operator):
         settings = scene.depth_map_settings
 
         try:
-            # Get addon preferences
-            prefs = context.preferences.addons.get("depth_map_generator")
-            prefs = prefs.preferences if prefs else None
-
-            # Enable render passes on view layer
-            view_layer = context.view_layer
-            view_layer.use_pass_z = True
-
-            if settings.mask_enabled and settings.mask_source == 'OBJECT_INDEX':
-                view_layer.use_pass_object_index = True
-
-            # Force Blender to process pass changes before we create
-            # compositor nodes that depend on those passes (IndexOB, etc.)
-            scene.update_tag()
-            context.evaluated_depsgraph_get().update()
-
-            # Set up compositing
-            scene.use_nodes = True
-            tree = scene.node_tree
-
-            if not settings.setup_complete:
-                # Fresh setup: remove only DM_ nodes to preserve user's setup
-                nodes.remove_dm_nodes(tree)
-
-                # Build depth pipeline
-                render_layers, output_socket = nodes.create_depth_pipeline(
-                    tree, settings, prefs
-                )
-
-                # Create output nodes
-                nodes.create_output_nodes(tree, settings, output_socket, prefs)
-
-                # Build mask pipeline if enabled (uses separate RenderLayers)
-                if settings.mask_enabled:
-                    try:
-                        nodes.create_mask_pipeline(
-                            tree, settings, prefs
-                        )
-                    except Exception as e:
-                        self.report(
-                            {'WARNING'},
-                            f"Depth setup OK, but mask failed: {str(e)}"
-                        )
-
-            else:
-                # Update existing nodes (may also create mask pipeline
-                # if mask was enabled after initial setup)
-                try:
-                    if not nodes.update_depth_nodes(tree, settings, prefs):
-                        self.report({'WARNING'}, "Node setup incomplete - rebuilding")
-                        settings.setup_complete = False
-                        return self.execute(context)
-                except RuntimeError as e:
-                    self.report(
-                        {'WARNING'},
-                        f"Depth update OK, but mask failed: {str(e)}"
-                    )
+            started = time.perf_counter()
+            prefs = rendering.get_addon_prefs(context)
+
+            # Refresh the automatic near/far before it is written to the nodes
+            if settings.use_auto_range and scene.camera:
+                auto_range.update_auto_range(context, settings)
+
+            # Add, remove or relink only the DM_ nodes that differ from the
+            # settings; returns None when nothing changed since last setup
+            try:
+                result = pipeline.ensure_pipeline(context, settings, prefs)
+            except RuntimeError as e:
+                settings.setup_complete = True
+                self.report({'WARNING'}, f"Depth setup OK, but mask failed: {str(e)}")
+                return {'FINISHED'}
 
             settings.setup_complete = True
-            self.report({'INFO'}, "Depth map setup complete")
+            elapsed = (time.perf_counter() - started) * 1000.0
+            if result is None:
+                self.report({'INFO'}, f"Depth map setup is up to date ({elapsed:.1f} ms)")
+            else:
+                self.report(
+                    {'INFO'},
+                    f"Depth map setup complete ({elapsed:.1f} ms, "
+                    f"{result['added']} added, {result['removed']} removed, "
+                    f"{result['evaluations']} evaluations)"
+                )
             return {'FINISHED'}
 
         except Exception as e:
@@ -0,0 +1,23 @@
+"""Cancel operator - stops a running parallel (sharded) animation render."""
+
+from bpy.types import Operator
+
+from ..utils import shard
+
+
+class DEPTHMAP_OT_cancel_shards(Operator):
+    """Terminates all background worker processes of the running parallel render"""
+
+    bl_idname = "depthmap.cancel_shards"
+    bl_label = "Cancel Parallel Render"
+    bl_description = "Stop all background Blender workers of the running parallel render"
+
+    @classmethod
+    def poll(cls, context):
+        return shard.get_active() is not None
+
+    def execute(self, context):
+        job = shard.get_active()
+        job.cancel()
+        self.report({'INFO'}, f"Cancelled parallel render ({job.workers} workers)")
+        return {'FINISHED'}
@@ -2,6 +2,8 @@
 
 from bpy.types import Panel
 
+from ..utils import proxy_preview
+
 
 class DEPTHMAP_PT_depth_settings(Panel):
     """Sub-panel for depth pass configuration"""
@@ -20,24 +22,66 @@ class DEPTHMAP_PT_depth_settings(Panel):
 
         # Normalization mode
         layout.prop(settings, "depth_normalization")
+        layout.prop(settings, "live_sync")
+
+        # Automatic depth range from scene bounds
+        layout.prop(settings, "use_auto_range")
+        if settings.use_auto_range:
+            box = layout.box()
+            row = box.row()
+            row.label(text=f"Near: {settings.auto_near:.3f}  Far: {settings.auto_far:.3f}")
+            row.operator("depthmap.compute_auto_range", text="", icon='FILE_REFRESH')
+            box.prop(settings, "auto_range_per_frame")
 
         # Custom depth range
         layout.prop(settings, "use_custom_range")
-        if settings.use_custom_range:
+        if settings.use_custom_range and not settings.use_auto_range:
             row = layout.row(align=True)
             row.prop(settings, "near_distance")
             row.prop(settings, "far_distance")
 
+        # Sequence-wide normalization from a statistics pass over raw depth
+        if settings.depth_normalization in {'LINEAR', 'LOGARITHMIC'}:
+            layout.prop(settings, "use_sequence_range")
+            if settings.use_sequence_range:
+                row = layout.row(align=True)
+                row.prop(settings, "stats_low_percentile")
+                row.prop(settings, "stats_high_percentile")
+
         # Scale factor (relevant for LOGARITHMIC and RAW)
         if settings.depth_normalization in {'LOGARITHMIC', 'RAW'}:
             layout.prop(settings, "depth_scale_factor")
 
-        # Bit depth
-        layout.prop(settings, "output_bit_depth")
+        # File encoding
+        layout.prop(settings, "output_format")
+        if settings.output_format == 'OPEN_EXR':
+            row = layout.row(align=True)
+            row.prop(settings, "exr_precision", text="")
+            row.prop(settings, "exr_codec", text="")
+        elif settings.output_format in {'PNG', 'TIFF'}:
+            layout.prop(settings, "output_bit_depth")
+        if settings.output_format == 'PNG':
+            layout.prop(settings, "png_compression")
 
         # Contrast / Brightness
         layout.prop(settings, "contrast_value")
         layout.prop(settings, "brightness_value")
 
+        # Raw float depth for offline re-normalization
+        layout.prop(settings, "save_raw_depth")
+
         # Preview toggle
         layout.prop(settings, "preview_before_export")
+
+        # Low-resolution proxy re-rendered on every change
+        session = proxy_preview.get_active()
+        row = layout.row(align=True)
+        row.operator("depthmap.proxy_preview", icon='IMAGE_ZDEPTH',
+                     text="Stop Proxy" if session else "Proxy Preview", depress=bool(session))
+        row.prop(settings, "proxy_resolution", text="")
+        if session is not None:
+            if session.last_error:
+                layout.label(text=session.last_error, icon='ERROR')
+            elif session.last_seconds is not None:
+                layout.label(text=f"{proxy_preview.PROXY_IMAGE}: {session.last_seconds:.2f}s",
+                             icon='TIME')
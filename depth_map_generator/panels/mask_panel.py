@@ -2,6 +2,8 @@
 
 from bpy.types import Panel
 
+from ..utils import nodes
+
 
 class DEPTHMAP_PT_mask(Panel):
     """Sub-panel for alpha mask export configuration"""
@@ -31,6 +33,14 @@ class DEPTHMAP_PT_mask(Panel):
                 and context.scene.render.engine != 'CYCLES'):
             layout.label(text="Cryptomatte requires Cycles!", icon='ERROR')
 
+        # Cryptomatte mattes: manual pick, or one mask per listed object / collection
+        if settings.mask_source == 'CRYPTOMATTE':
+            layout.prop(settings, "crypto_matte_mode")
+            if settings.crypto_matte_mode != 'MANUAL':
+                row = layout.row(align=True)
+                row.prop(settings, "crypto_mattes", text="")
+                row.operator("depthmap.crypto_from_selection", text="", icon='RESTRICT_SELECT_OFF')
+
         # Object Index settings
         if settings.mask_source == 'OBJECT_INDEX':
             layout.prop(settings, "mask_index")
@@ -38,10 +48,27 @@ class DEPTHMAP_PT_mask(Panel):
                 text="Set Pass Index on object: Properties > Object > Relations",
                 icon='INFO',
             )
+            # One render, many masks: split the raw index after rendering
+            if settings.depth_output_method == 'FILE_OUTPUT':
+                layout.prop(settings, "mask_label_map")
+                if settings.mask_label_map:
+                    layout.prop(settings, "label_indices")
 
-        # Format and output path
-        layout.prop(settings, "mask_output_format")
-        layout.prop(settings, "mask_output_path", text="")
+        # Packing into the depth files replaces the separate mask files
+        if (settings.depth_output_method == 'FILE_OUTPUT'
+                and settings.output_format in {'PNG', 'OPEN_EXR'}
+                and not nodes.wants_multi_matte(settings)):
+            layout.prop(settings, "pack_depth_mask")
+        if nodes.wants_packed_output(settings):
+            layout.label(
+                text="Red: depth, green: mask" if settings.output_format == 'PNG'
+                else "Layers: depth, mask",
+                icon='INFO',
+            )
+        else:
+            # Format and output path
+            layout.prop(settings, "mask_output_format")
+            layout.prop(settings, "mask_output_path", text="")
 
         # Export button
         layout.separator()
@@ -53,3 +80,10 @@ class DEPTHMAP_PT_mask(Panel):
         else:
             row.operator("depthmap.export_mask", text="Export Mask",
                           icon='RENDER_STILL')
+
+        # Depth and mask from the same render
+        row = layout.row()
+        row.enabled = settings.depth_output_method == 'FILE_OUTPUT'
+        row.operator("depthmap.render_combined", icon='RENDERLAYERS')
+        if settings.depth_output_method != 'FILE_OUTPUT':
+            layout.label(text="Depth + Mask needs File Output", icon='INFO')
@@ -2,6 +2,8 @@
 
 from bpy.types import Panel
 
+from ..utils import multi_camera, nodes, rendering, shard, telemetry
+
 
 class DEPTHMAP_PT_output(Panel):
     """Sub-panel for output configuration and rendering"""
@@ -22,6 +24,14 @@ class DEPTHMAP_PT_output(Panel):
 
         if settings.depth_output_method == 'FILE_OUTPUT':
             layout.prop(settings, "output_path", text="")
+            layout.prop(settings, "use_depth_cache")
+            if settings.output_format == 'PNG':
+                layout.prop(settings, "async_encoding")
+            if nodes.wants_async_encoding(settings):
+                row = layout.row(align=True)
+                row.prop(settings, "encode_threads")
+                row.prop(settings, "encode_queue_frames")
+            layout.prop(settings, "record_telemetry")
 
             # Animation options
             layout.prop(settings, "render_animation")
@@ -39,6 +49,84 @@ class DEPTHMAP_PT_output(Panel):
                              f" - {context.scene.frame_end}"
                     )
 
+                box.prop(settings, "skip_static_frames")
+                box.prop(settings, "resume_render")
+                box.prop(settings, "stack_sequence")
+
+                # Parallel rendering across background worker processes
+                box.prop(settings, "shard_workers")
+                if settings.shard_workers > 1:
+                    box.prop(settings, "shard_threads")
+
+        # Live progress of a running parallel render
+        job = shard.get_active()
+        if job is not None:
+            progress = job.progress
+            box = layout.box()
+            box.label(
+                text=f"Parallel: {progress['done']}/{progress['total']} frames"
+                     f" ({progress['running']}/{progress['workers']} workers)",
+                icon='TIME',
+            )
+            box.operator("depthmap.cancel_shards", icon='CANCEL')
+
+        # Camera batch in progress
+        batch = multi_camera.get_active()
+        if batch is not None:
+            progress = batch.progress
+            layout.box().label(
+                text=f"Camera {progress['done'] + 1}/{progress['total']}: {progress['camera']}",
+                icon='CAMERA_DATA',
+            )
+
+        # Throughput of the render in progress (or the last one)
+        recorder = telemetry.get_active() or telemetry.get_last()
+        if recorder is not None:
+            progress = recorder.progress
+            fps = progress["fps"]
+            box = layout.box()
+            if recorder is telemetry.get_active():
+                box.label(
+                    text=f"{progress['done']}/{progress['total']} frames"
+                         f"  {fps or 0.0:.2f} fps  ETA {telemetry.format_eta(progress['eta'])}",
+                    icon='TIME',
+                )
+            else:
+                box.label(
+                    text=f"Last render: {progress['done']} frames at {fps or 0.0:.2f} fps",
+                    icon='INFO',
+                )
+            if recorder.peak_rss_mb is not None:
+                box.label(text=f"Peak memory (sampled per frame): "
+                               f"{recorder.peak_rss_mb:.0f} MiB")
+
+        # Publishing into ComfyUI's input directory
+        prefs = rendering.get_addon_prefs(context)
+        box = layout.box()
+        box.prop(settings, "publish_to_comfyui")
+        if prefs and prefs.comfyui_input_dir:
+            if settings.publish_to_comfyui:
+                box.prop(settings, "publish_name")
+            box.operator("depthmap.publish", icon='EXPORT')
+        else:
+            box.label(text="Set the ComfyUI input directory in the preferences", icon='INFO')
+
+        # Queueing a workflow per frame on a running ComfyUI server
+        if settings.depth_output_method == 'FILE_OUTPUT':
+            box.prop(settings, "comfy_stream")
+            if settings.comfy_stream:
+                box.prop(settings, "comfy_workflow")
+                row = box.row(align=True)
+                row.prop(settings, "comfy_stream_transfer", text="")
+                row.prop(settings, "comfy_stream_window")
+                if nodes.wants_sequence_pass(settings):
+                    box.label(text="Not with sequence-wide normalization", icon='ERROR')
+
+        # Fast depth-only render profile
+        layout.prop(settings, "depth_only_profile")
+        if settings.depth_only_profile:
+            layout.prop(settings, "depth_only_override_materials")
+
         # Render buttons
         layout.separator()
         if (settings.depth_output_method == 'FILE_OUTPUT'
@@ -48,3 +136,13 @@ class DEPTHMAP_PT_output(Panel):
         else:
             layout.operator("depthmap.render", text="Render Depth Map",
                              icon='RENDER_STILL')
+
+        # Every camera (or the listed ones) into per-camera subfolders
+        if settings.depth_output_method == 'FILE_OUTPUT':
+            box = layout.box()
+            box.prop(settings, "batch_cameras")
+            row = box.row(align=True)
+            row.operator("depthmap.render_cameras", icon='CAMERA_DATA')
+            if settings.mask_enabled:
+                row.operator("depthmap.render_cameras", text="+ Mask",
+                             icon='RENDERLAYERS').combined = True
@@ -2,7 +2,7 @@
 
 import bpy
 from bpy.types import AddonPreferences
-from bpy.props import BoolProperty, EnumProperty, StringProperty
+from bpy.props import BoolProperty, EnumProperty, FloatProperty, StringProperty
 
 
 class DEPTHMAP_AddonPreferences(AddonPreferences):
@@ -41,12 +41,34 @@ class DEPTHMAP_AddonPreferences(AddonPreferences):
         subtype='DIR_PATH',
     )
 
+    comfyui_url: StringProperty(
+        name="ComfyUI Server",
+        description="URL of the ComfyUI server frames are streamed to",
+        default="http://127.0.0.1:8188",
+    )
+
     auto_create_directories: BoolProperty(
         name="Auto-Create Directories",
         description="Automatically create output directories if they don't exist",
         default=True,
     )
 
+    cache_dir: StringProperty(
+        name="Depth Cache Directory",
+        description="Where raw depth frames are cached (empty = system temp folder)",
+        default="",
+        subtype='DIR_PATH',
+    )
+
+    cache_budget_gb: FloatProperty(
+        name="Depth Cache Size (GB)",
+        description="Disk budget for the raw depth cache; least recently used "
+                    "frames are evicted beyond it (0 = unlimited)",
+        default=20.0,
+        min=0.0,
+        soft_max=1000.0,
+    )
+
     def draw(self, context):
         layout = self.layout
         layout.prop(self, "default_depth_output_dir")
@@ -54,4 +76,8 @@ class DEPTHMAP_AddonPreferences(AddonPreferences):
         layout.prop(self, "default_bit_depth")
         layout.separator()
         layout.prop(self, "comfyui_input_dir")
+        layout.prop(self, "comfyui_url")
         layout.prop(self, "auto_create_directories")
+        layout.separator()
+        layout.prop(self, "cache_dir")
+        layout.prop(self, "cache_budget_gb")
@@ -11,6 +11,12 @@ from bpy.props import (
 )
 
 
+def _live_update(self, context):
+    """Queue a sync of the edited value into the compositor nodes."""
+    from .utils import live_sync
+    live_sync.request(context)
+
+
 class DepthMapSettings(PropertyGroup):
     """Property group storing all depth map addon settings."""
 
@@ -21,11 +27,26 @@ class DepthMapSettings(PropertyGroup):
         default=False,
     )
 
+    pipeline_fingerprint: StringProperty(
+        name="Pipeline Fingerprint",
+        description="Hash of the node pipeline spec the compositor was last reconciled to",
+        default="",
+        options={'HIDDEN'},
+    )
+
+    live_sync: BoolProperty(
+        name="Live Update",
+        description="Apply depth range, contrast, scale, mask index and normalization "
+                    "changes to the compositor nodes right away (after setup)",
+        default=True,
+    )
+
     # --- Existing depth range properties (preserved for .blend compatibility) ---
     use_custom_range: BoolProperty(
         name="Custom Range",
         description="Specify custom near and far distances for depth range",
         default=False,
+        update=_live_update,
     )
 
     near_distance: FloatProperty(
@@ -34,6 +55,7 @@ class DepthMapSettings(PropertyGroup):
         min=0.01,
         max=1000.0,
         default=0.1,
+        update=_live_update,
     )
 
     far_distance: FloatProperty(
@@ -42,6 +64,66 @@ class DepthMapSettings(PropertyGroup):
         min=0.1,
         max=10000.0,
         default=100.0,
+        update=_live_update,
+    )
+
+    # --- Automatic depth range ---
+    use_auto_range: BoolProperty(
+        name="Auto Range",
+        description="Compute near and far from the camera-space bounds of visible "
+                    "objects before rendering (overrides Custom Range)",
+        default=False,
+        update=_live_update,
+    )
+
+    auto_range_per_frame: BoolProperty(
+        name="Per Frame",
+        description="Recompute the range for every frame of an animation "
+                    "instead of using the current frame's range for all",
+        default=False,
+    )
+
+    auto_near: FloatProperty(
+        name="Auto Near",
+        description="Near distance found by the last auto range update",
+        min=0.0,
+        default=0.1,
+        unit='LENGTH',
+    )
+
+    auto_far: FloatProperty(
+        name="Auto Far",
+        description="Far distance found by the last auto range update",
+        min=0.0,
+        default=1000.0,
+        unit='LENGTH',
+    )
+
+    # --- Sequence-wide normalization ---
+    use_sequence_range: BoolProperty(
+        name="Sequence Range",
+        description="After rendering an animation, run a statistics pass over its raw "
+                    "depth and normalize every frame with one global near/far "
+                    "(avoids flicker; File Output only)",
+        default=False,
+    )
+
+    stats_low_percentile: FloatProperty(
+        name="Near Percentile",
+        description="Depth percentile of the whole sequence used as the global near",
+        min=0.0,
+        max=100.0,
+        default=0.5,
+        subtype='PERCENTAGE',
+    )
+
+    stats_high_percentile: FloatProperty(
+        name="Far Percentile",
+        description="Depth percentile of the whole sequence used as the global far",
+        min=0.0,
+        max=100.0,
+        default=99.5,
+        subtype='PERCENTAGE',
     )
 
     # --- Existing output properties (preserved) ---
@@ -90,6 +172,164 @@ class DepthMapSettings(PropertyGroup):
         min=0,
     )
 
+    skip_static_frames: BoolProperty(
+        name="Skip Static Frames",
+        description="Render a frame only if the camera, object transforms or deforming "
+                    "geometry changed since the previous frame; otherwise reuse its files",
+        default=False,
+    )
+
+    # --- Resumable renders ---
+    resume_render: BoolProperty(
+        name="Resume Render",
+        description="Verify the files of earlier runs against the completion manifest and "
+                    "render only frames that are missing, truncated or corrupt",
+        default=False,
+    )
+
+    # --- Parallel animation rendering ---
+    shard_workers: IntProperty(
+        name="Worker Processes",
+        description="Split the animation frame range across this many background "
+                    "Blender processes (1 = render in this session)",
+        default=1,
+        min=1,
+        max=256,
+    )
+
+    shard_threads: IntProperty(
+        name="Threads per Worker",
+        description="Render threads for each worker process (0 = divide all cores evenly)",
+        default=0,
+        min=0,
+        max=1024,
+    )
+
+    # --- Multi-camera batch ---
+    batch_cameras: StringProperty(
+        name="Cameras",
+        description="Comma-separated camera names for Render All Cameras "
+                    "(empty renders every camera in the scene)",
+        default="",
+    )
+
+    camera_subdir: StringProperty(
+        name="Camera Subfolder",
+        description="Per-camera output subfolder of the camera batch in progress",
+        default="",
+        options={'HIDDEN'},
+    )
+
+    # --- Background PNG encoding ---
+    async_encoding: BoolProperty(
+        name="Background Encoding",
+        description="Encode depth and mask PNGs on worker threads from the Viewer output "
+                    "while the next frame renders, instead of inside the compositor",
+        default=False,
+    )
+
+    encode_threads: IntProperty(
+        name="Encoder Threads",
+        description="Threads compressing PNGs in the background (0 = up to 4, by core count)",
+        default=0,
+        min=0,
+        max=64,
+    )
+
+    encode_queue_frames: IntProperty(
+        name="Frames in Flight",
+        description="Rendered frames that may wait for encoding; rendering pauses while "
+                    "the queue is full so memory stays bounded",
+        default=3,
+        min=1,
+        max=64,
+    )
+
+    # --- Stacked sequence output ---
+    stack_sequence: BoolProperty(
+        name="Stacked Sequence",
+        description="Also write every animation frame into one preallocated, memory-mappable "
+                    "depth_stack.npy (with a JSON sidecar) as frames finish, so loaders can "
+                    "slice frame ranges without decoding files",
+        default=False,
+    )
+
+    # --- Publishing into ComfyUI ---
+    publish_to_comfyui: BoolProperty(
+        name="Publish to ComfyUI",
+        description="After rendering, place the finished frames in the ComfyUI input "
+                    "directory (addon preferences) by reflink, hardlink or copy, with "
+                    "atomic renames and a JSON manifest",
+        default=False,
+    )
+
+    publish_name: StringProperty(
+        name="Sequence Name",
+        description="Folder name inside the ComfyUI input directory (empty = blend file name)",
+        default="",
+    )
+
+    # --- Streaming into ComfyUI ---
+    comfy_stream: BoolProperty(
+        name="Stream to ComfyUI",
+        description="Queue a ComfyUI workflow for each frame as soon as its files are "
+                    "written, while the render continues (server URL in the addon preferences)",
+        default=False,
+    )
+
+    comfy_workflow: StringProperty(
+        name="Workflow",
+        description="ComfyUI workflow saved with Save (API); \"{depth}\", \"{mask}\" and "
+                    "\"{frame}\" values are filled in per frame",
+        default="",
+        subtype='FILE_PATH',
+    )
+
+    comfy_stream_transfer: EnumProperty(
+        name="Transfer",
+        description="How frames reach the ComfyUI server",
+        items=[
+            ('UPLOAD', "Upload", "Upload each file over HTTP (works with remote servers)"),
+            ('INPUT_DIR', "Input Directory",
+             "Publish the files into the ComfyUI input directory and reference them "
+             "(no upload; the server must share that directory)"),
+        ],
+        default='UPLOAD',
+    )
+
+    comfy_stream_window: IntProperty(
+        name="In-Flight Workflows",
+        description="Workflows queued on the server and not finished yet, at most; the "
+                    "render waits for ComfyUI beyond this",
+        default=4,
+        min=1,
+        soft_max=32,
+    )
+
+    # --- Render telemetry ---
+    record_telemetry: BoolProperty(
+        name="Record Telemetry",
+        description="Log per-frame render, write time, file sizes and peak memory as JSON "
+                    "lines next to the output folder (<folder>_telemetry.jsonl)",
+        default=True,
+    )
+
+    # --- Fast depth-only render profile ---
+    depth_only_profile: BoolProperty(
+        name="Fast Depth-Only Render",
+        description="Temporarily render with minimal samples and no denoising, bounces, "
+                    "depth of field, motion blur or pixel filtering. "
+                    "Original settings are restored after the render",
+        default=False,
+    )
+
+    depth_only_override_materials: BoolProperty(
+        name="Flat Material Override",
+        description="Replace all materials with a flat one while rendering. "
+                    "Disable for scenes relying on material displacement or alpha cutouts",
+        default=True,
+    )
+
     # --- New v2.0: Depth pass controls ---
     depth_normalization: EnumProperty(
         name="Normalization",
@@ -101,8 +341,12 @@ class DepthMapSettings(PropertyGroup):
              "Logarithmic mapping for more near-field detail"),
             ('RAW', "Raw",
              "Unprocessed depth values (no MapRange or ColorRamp)"),
+            ('HISTOGRAM', "Histogram",
+             "Histogram-equalized over the whole sequence from a statistics pass "
+             "on raw depth (File Output; the preview uses Linear)"),
         ],
         default='LINEAR',
+        update=_live_update,
     )
 
     depth_scale_factor: FloatProperty(
@@ -111,11 +355,56 @@ class DepthMapSettings(PropertyGroup):
         min=0.001,
         max=1000.0,
         default=1.0,
+        update=_live_update,
+    )
+
+    output_format: EnumProperty(
+        name="File Format",
+        description="Encoding of the depth and mask files",
+        items=[
+            ('PNG', "PNG", "Integer PNG (loads directly in ComfyUI)"),
+            ('OPEN_EXR', "OpenEXR", "Half or full float EXR; lossless float depth, fast to decode"),
+            ('TIFF', "TIFF", "Uncompressed integer TIFF for maximum write throughput"),
+            ('NUMPY', "NumPy (.npy)",
+             "Raw float32 arrays from the Viewer output, written in the background "
+             "(interactive renders only)"),
+        ],
+        default='PNG',
+    )
+
+    png_compression: IntProperty(
+        name="PNG Compression",
+        description="PNG compression in percent: higher is smaller but slower to write",
+        default=15,
+        min=0,
+        max=100,
+        subtype='PERCENTAGE',
+    )
+
+    exr_precision: EnumProperty(
+        name="Precision",
+        description="Float precision of EXR output",
+        items=[
+            ('16', "Half", "16-bit half float"),
+            ('32', "Float", "32-bit full float"),
+        ],
+        default='16',
+    )
+
+    exr_codec: EnumProperty(
+        name="Codec",
+        description="EXR compression",
+        items=[
+            ('ZIP', "ZIP", "Lossless, good ratio for depth"),
+            ('DWAA', "DWAA", "Lossy, small files and fast to decode"),
+            ('NONE', "None", "Uncompressed, fastest to write"),
+        ],
+        default='ZIP',
     )
 
     output_bit_depth: EnumProperty(
         name="Bit Depth",
-        description="Output bit depth for PNG files (16-bit recommended for ComfyUI)",
+        description="Output bit depth for PNG and TIFF files (16-bit recommended for ComfyUI)",
         items=[
             ('8', "8-bit", "Standard 8-bit PNG"),
             ('16', "16-bit", "High precision 16-bit PNG (recommended)"),
@@ -129,6 +418,7 @@ class DepthMapSettings(PropertyGroup):
         min=-1.0,
         max=1.0,
         default=0.2,
+        update=_live_update,
     )
 
     brightness_value: FloatProperty(
@@ -137,6 +427,22 @@ class DepthMapSettings(PropertyGroup):
         min=-1.0,
         max=1.0,
         default=0.0,
+        update=_live_update,
+    )
+
+    save_raw_depth: BoolProperty(
+        name="Save Raw Depth",
+        description="Also write unprocessed float depth as OpenEXR (raw/ subfolder) "
+                    "so normalization can be changed later without re-rendering",
+        default=False,
+    )
+
+    use_depth_cache: BoolProperty(
+        name="Use Depth Cache",
+        description="Reuse cached raw depth for frames whose camera, geometry and "
+                    "resolution are unchanged instead of re-rendering them "
+                    "(cache location and size are set in the addon preferences)",
+        default=False,
     )
 
     preview_before_export: BoolProperty(
@@ -145,6 +451,33 @@ class DepthMapSettings(PropertyGroup):
         default=False,
     )
 
+    # --- Proxy depth preview ---
+    proxy_preview: BoolProperty(
+        name="Proxy Preview",
+        description="Re-render a low-resolution depth proxy into the DM_DepthProxy image "
+                    "whenever the scene or the depth settings change",
+        default=False,
+    )
+
+    proxy_resolution: IntProperty(
+        name="Proxy Resolution",
+        description="Render resolution of the proxy, in percent of the scene resolution",
+        default=25,
+        min=1,
+        max=100,
+        subtype='PERCENTAGE',
+    )
+
+    proxy_debounce: FloatProperty(
+        name="Proxy Delay",
+        description="Seconds without further changes before the proxy re-renders",
+        default=0.3,
+        min=0.05,
+        soft_max=2.0,
+        subtype='TIME',
+        unit='TIME',
+    )
+
     # --- New v2.0: Alpha mask export ---
     mask_enabled: BoolProperty(
         name="Enable Mask Export",
@@ -176,12 +509,57 @@ class DepthMapSettings(PropertyGroup):
         default='GRAYSCALE',
     )
 
+    pack_depth_mask: BoolProperty(
+        name="Pack Depth + Mask",
+        description="Write depth and mask into one file per frame in the depth folder: "
+                    "a 16-bit PNG with depth in red and the mask in green, or a "
+                    "multilayer EXR with depth and mask layers",
+        default=False,
+    )
+
     mask_index: IntProperty(
         name="Pass Index",
         description="Object Pass Index to isolate (set on object Properties > Object > Relations)",
         min=0,
         max=32767,
         default=1,
+        update=_live_update,
+    )
+
+    crypto_matte_mode: EnumProperty(
+        name="Mattes",
+        description="Which Cryptomatte mattes to export",
+        items=[
+            ('MANUAL', "Manual",
+             "Pick the matte in the DM_Cryptomatte node; one mask per render"),
+            ('OBJECTS', "Objects",
+             "One mask per listed object, all from the same render"),
+            ('COLLECTIONS', "Collections",
+             "One mask per listed collection, covering all of its objects"),
+        ],
+        default='MANUAL',
+    )
+
+    crypto_mattes: StringProperty(
+        name="Matte List",
+        description="Comma-separated object or collection names, one mask each "
+                    "(written to a subfolder per matte)",
+        default="",
+    )
+
+    mask_label_map: BoolProperty(
+        name="Label Map",
+        description="Also write the raw object index once per frame as a 16-bit label map "
+                    "and split it into masks for the indices below after rendering, "
+                    "instead of one render per object",
+        default=False,
+    )
+
+    label_indices: StringProperty(
+        name="Split Indices",
+        description="Pass indices to write masks for from the label map, e.g. 1,3,5-9 "
+                    "(empty: label map and per-index statistics only)",
+        default="",
     )
 
     mask_output_path: StringProperty(
@@ -1,9 +1,60 @@
 """Utility module exports."""
 
-from . import nodes
-from . import paths
+try:
+    import bpy
+except ImportError:
+    # Outside Blender only the bpy-free modules (e.g. renormalize) can be
+    # imported directly; skip the Blender-side helpers.
+    bpy = None
+
+from . import auto_range
+from . import comfy_client
+from . import completion
+from . import depth_stats
+from . import frame_stack
+from . import label_split
+from . import publish
+
+if bpy is not None:
+    from . import async_encode
+    from . import cached_render
+    from . import comfy_stream
+    from . import live_sync
+    from . import multi_camera
+    from . import nodes
+    from . import paths
+    from . import pipeline
+    from . import proxy_preview
+    from . import render_profile
+    from . import rendering
+    from . import resume
+    from . import shard
+    from . import stack_capture
+    from . import static_frames
+    from . import telemetry
 
 __all__ = [
+    "async_encode",
+    "auto_range",
+    "comfy_client",
+    "comfy_stream",
+    "completion",
+    "depth_stats",
+    "frame_stack",
+    "cached_render",
+    "label_split",
+    "live_sync",
+    "multi_camera",
     "nodes",
     "paths",
+    "pipeline",
+    "proxy_preview",
+    "publish",
+    "render_profile",
+    "rendering",
+    "resume",
+    "shard",
+    "stack_capture",
+    "static_frames",
+    "telemetry",
 ]
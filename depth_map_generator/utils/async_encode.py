@@ -0,0 +1,222 @@
+"""Background PNG / NumPy encoding of depth and mask frames, off the render thread.
+
+With ``async_encoding`` (PNG) or NumPy output the DM_ FileOutput nodes are
+muted and the DM_Viewer node receives depth in its color and the mask in its
+alpha. A render_post
+handler copies the Viewer pixels and hands them to an EncodePool, so the
+next frame renders while the previous one is compressed. The pool bounds
+the frames in flight: when it is full, the handler waits for the oldest
+frame, pausing the render instead of growing memory. The render's finish
+callback flushes the pool before completion is reported.
+
+Threads are used rather than processes: zlib and NumPy release the GIL, and
+4K float buffers would otherwise be pickled between processes.
+"""
+
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import bpy
+import numpy as np
+
+from . import cached_render, frames, paths, renormalize
+
+VIEWER_IMAGE = "Viewer Node"
+VIEWER_NODE_NAME = "DM_Viewer"
+
+# Depth is read from the red channel, the mask from alpha
+_DEPTH_CHANNEL = 0
+_MASK_CHANNEL = 3
+
+# The encoder of the render in progress, if any
+_active = None
+
+
+def get_active():
+    """Return the encoder of the render in progress, if any."""
+    return _active
+
+
+def wait_for_frame(frame):
+    """Block until ``frame``'s background-encoded files are written (no-op when idle)."""
+    if _active is not None:
+        _active.pool.wait(frame)
+
+
+def default_threads():
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+class EncodePool:
+    """Bounded pool of encode tasks keyed by frame.
+
+    Args:
+        threads: Worker threads (0 = default_threads())
+        max_pending: Frames queued or encoding at most; submit() blocks beyond it
+    """
+
+    def __init__(self, threads=0, max_pending=3):
+        self.max_pending = max(1, max_pending)
+        self.errors = []
+        self.encoded = 0
+        self._executor = ThreadPoolExecutor(max_workers=threads or default_threads(),
+                                            thread_name_prefix="dm_encode")
+        self._pending = OrderedDict()
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def submit(self, frame, function, *args):
+        """Queue ``function(*args)`` for ``frame``, first waiting while the pool is full."""
+        self._collect_done()
+        while len(self._pending) >= self.max_pending:
+            oldest = next(iter(self._pending))
+            self.wait(oldest)
+        self._pending[frame] = self._executor.submit(function, *args)
+
+    def wait(self, frame):
+        """Wait for ``frame``'s task, if it is still pending."""
+        future = self._pending.pop(frame, None)
+        if future is not None:
+            self._result(frame, future)
+
+    def flush(self):
+        """Wait for every pending task."""
+        while self._pending:
+            frame, future = self._pending.popitem(last=False)
+            self._result(frame, future)
+
+    def close(self):
+        """Flush and stop the worker threads."""
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+    def _collect_done(self):
+        for frame in [f for f, future in self._pending.items() if future.done()]:
+            self._result(frame, self._pending.pop(frame))
+
+    def _result(self, frame, future):
+        try:
+            future.result()
+            self.encoded += 1
+        except Exception as e:
+            self.errors.append(f"frame {frame}: {e}")
+
+
+def encode_frame(pixels, width, height, outputs):
+    """Write the files of one frame from a flat RGBA float Viewer buffer.
+
+    Args:
+        pixels: float32 array of width * height * 4 values, rows bottom to top
+        width, height: Image size
+        outputs: (channel, path, encoding) tuples. ``encoding`` holds
+            ``file_format`` ('PNG' or 'NUMPY'); PNG also ``bit_depth``,
+            ``transfer`` ('SRGB' applies the view transform's encoding),
+            ``color_mode`` ('RGBA' writes gray RGB + opaque alpha) and
+            ``compress_level`` (zlib 0-9). NUMPY writes the float32 values as is.
+    """
+    rgba = pixels.reshape(height, width, 4)[::-1]
+    for channel, path, encoding in outputs:
+        values = rgba[..., channel]
+        if encoding["file_format"] == 'NUMPY':
+            frames.write_npy(path, values)
+            continue
+        if encoding["transfer"] == 'SRGB':
+            values = renormalize.srgb_encode(values)
+        if encoding["color_mode"] == 'RGBA':
+            values = np.stack((values, values, values, np.ones_like(values)), axis=-1)
+        frames.write_png(path, values, encoding["bit_depth"], encoding["compress_level"])
+
+
+class AsyncFrameEncoder:
+    """Captures each rendered frame from the Viewer and encodes it in the background.
+
+    Everything needed to name and encode the files is captured up front:
+    the handlers run after the render operator has returned.
+
+    Args:
+        scene: Scene being rendered
+        settings: DepthMapSettings property group
+        prefs: AddonPreferences (optional)
+    """
+
+    def __init__(self, scene, settings, prefs=None):
+        self.transfer = cached_render.view_transfer(scene)
+        encoding = {
+            "file_format": settings.output_format,
+            "bit_depth": settings.output_bit_depth,
+            "transfer": self.transfer or 'LINEAR',
+            "color_mode": 'BW',
+            "compress_level": frames.png_compress_level(settings.png_compression),
+        }
+        ext = paths.output_extension(settings)
+
+        depth_dir = paths.get_depth_output_dir(settings, prefs)
+        self._outputs = [(_DEPTH_CHANNEL, depth_dir, paths.output_prefix("depth", settings),
+                          ext, encoding)]
+        if settings.mask_enabled:
+            self._outputs.append((
+                _MASK_CHANNEL, paths.get_mask_output_dir(settings, prefs),
+                paths.output_prefix("mask", settings), ext,
+                dict(encoding, color_mode='RGBA' if settings.mask_output_format == 'RGBA_PNG'
+                     else 'BW'),
+            ))
+        for _channel, directory, *_rest in self._outputs:
+            paths.resolve_output_path(directory, create=True, prefs=prefs)
+
+        self.pool = EncodePool(settings.encode_threads, settings.encode_queue_frames)
+        self.captured = 0
+        self.missed = []
+
+    def start(self, tree=None):
+        """Register the render_post handler and make DM_Viewer the active viewer."""
+        global _active
+        if _active is not None:
+            _active.finish()
+        viewer = tree.nodes.get(VIEWER_NODE_NAME) if tree is not None else None
+        if viewer is not None:
+            # Only the active Viewer node fills the "Viewer Node" image
+            tree.nodes.active = viewer
+        bpy.app.handlers.render_post.append(self._on_post)
+        _active = self
+        return self
+
+    def finish(self):
+        """Unregister, flush every pending frame and report problems. Idempotent.
+
+        Returns:
+            list: Error messages (encode failures and frames without Viewer pixels)
+        """
+        global _active
+        if self._on_post in bpy.app.handlers.render_post:
+            bpy.app.handlers.render_post.remove(self._on_post)
+        if _active is self:
+            _active = None
+        self.pool.close()
+
+        errors = list(self.pool.errors)
+        if self.missed:
+            errors.append(f"no Viewer pixels for frames {self.missed}")
+        for error in errors:
+            print(f"[depth_map_generator] Background encoding failed: {error}")
+        return errors
+
+    def _on_post(self, scene, *_args):
+        frame = scene.frame_current
+        image = bpy.data.images.get(VIEWER_IMAGE)
+        if image is None or not image.size[0]:
+            self.missed.append(frame)
+            return
+        width, height = image.size
+        # The copy is the buffer handed to the pool; the Viewer image is
+        # overwritten by the next frame
+        pixels = np.empty(width * height * 4, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+
+        outputs = [(channel, os.path.join(directory, frames.frame_filename(prefix, frame, ext)),
+                    encoding)
+                   for channel, directory, prefix, ext, encoding in self._outputs]
+        self.pool.submit(frame, encode_frame, pixels, width, height, outputs)
+        self.captured += 1
@@ -0,0 +1,244 @@
+"""Automatic near/far depth range from camera-space scene bounds, without rendering.
+
+The bounding boxes of all rendered object instances (including collection,
+particle and geometry-nodes instances) are gathered once and transformed
+into camera space with a single batched NumPy product, so the cost stays
+in the milliseconds even for tens of thousands of instances. Real objects
+are read with foreach_get; objects and instancers disabled in renders are
+skipped. Boxes entirely outside the camera frustum are ignored; the result
+is clamped to the camera's clip_start / clip_end.
+"""
+
+import math
+
+import numpy as np
+
+from . import fingerprint
+
+# Object types without renderable geometry
+_NON_GEOMETRY_TYPES = {'CAMERA', 'LIGHT', 'LIGHT_PROBE', 'SPEAKER', 'EMPTY', 'ARMATURE', 'LATTICE'}
+
+RANGE_NODE_NAME = "DM_RangeMapper"
+
+
+def _matrix_to_numpy(matrix):
+    return np.array(matrix, dtype=np.float64)
+
+
+def _is_visible_geometry(obj):
+    return (obj.type not in _NON_GEOMETRY_TYPES and getattr(obj, "visible_camera", True)
+            and not fingerprint.hidden_in_render(obj))
+
+
+def _foreach_array(collection, attr, shape):
+    values = np.empty(len(collection) * int(np.prod(shape)), dtype=np.float32)
+    collection.foreach_get(attr, values)
+    return values.reshape((-1,) + shape)
+
+
+def gather_bounds(depsgraph):
+    """Fetch world matrices and local bounding boxes of every rendered geometry instance.
+
+    Real objects come from depsgraph.objects in two foreach_get calls.
+    Collection, particle and geometry-nodes instances have no bulk accessor
+    and are read from depsgraph.object_instances (the same traversal as
+    fingerprint.scene_fingerprint); each instanced object's bounding box is
+    read once and shared by all of its instances.
+
+    Returns:
+        tuple: ((N, 4, 4) world matrices, (N, 8, 3) bounding box corners)
+    """
+    objects = depsgraph.objects
+    keep = np.array([_is_visible_geometry(obj) for obj in objects], dtype=bool)
+    # foreach_get returns Blender's column-major matrices
+    matrices = [_foreach_array(objects, "matrix_world", (4, 4)).transpose(0, 2, 1)[keep]]
+    corners = [_foreach_array(objects, "bound_box", (8, 3))[keep]]
+
+    instance_matrices, box_index = [], []
+    boxes, box_ids = [], {}
+    for instance in depsgraph.object_instances:
+        if not instance.is_instance:
+            continue
+        obj = instance.object
+        if not _is_visible_geometry(obj) or fingerprint.hidden_in_render(instance.parent):
+            continue
+        # Instances share evaluated data; objects sharing a mesh can differ by modifiers
+        data = obj.data
+        key = (obj.name_full, data.name_full if data is not None else "")
+        index = box_ids.get(key)
+        if index is None:
+            index = box_ids[key] = len(boxes)
+            boxes.append(np.array(obj.bound_box, dtype=np.float32).reshape(8, 3))
+        # Copy now: Blender reuses the instance struct while iterating
+        instance_matrices.append(_matrix_to_numpy(instance.matrix_world))
+        box_index.append(index)
+    if instance_matrices:
+        matrices.append(np.stack(instance_matrices).astype(np.float32))
+        corners.append(np.stack(boxes)[np.array(box_index)])
+    return np.concatenate(matrices), np.concatenate(corners)
+
+
+def compute_depth_range(scene, depsgraph, camera=None):
+    """Compute the camera-space depth span of all visible geometry.
+
+    Args:
+        scene: Scene (for resolution and camera)
+        depsgraph: Evaluated depsgraph of the frame
+        camera: Camera object (defaults to scene.camera)
+
+    Returns:
+        tuple or None: (near, far) planar distances, or None when no
+            geometry is in view
+    """
+    camera = camera or scene.camera
+    if camera is None:
+        return None
+    camera = camera.evaluated_get(depsgraph)
+
+    matrices, corners = gather_bounds(depsgraph)
+    if len(matrices) == 0:
+        return None
+
+    render = scene.render
+    projection = _matrix_to_numpy(camera.calc_matrix_camera(
+        depsgraph,
+        x=render.resolution_x, y=render.resolution_y,
+        scale_x=render.pixel_aspect_x, scale_y=render.pixel_aspect_y,
+    ))
+    view = np.linalg.inv(_matrix_to_numpy(camera.matrix_world))
+
+    # Homogeneous corners -> world -> camera space, batched over all objects
+    ones = np.ones(corners.shape[:2] + (1,), dtype=np.float64)
+    local = np.concatenate((corners.astype(np.float64), ones), axis=2)
+    world = np.einsum("nij,nkj->nki", matrices.astype(np.float64), local)
+    cam = world @ view.T
+    clip = cam @ projection.T
+
+    # Discard boxes fully outside one side of the frustum
+    x, y, w = clip[..., 0], clip[..., 1], clip[..., 3]
+    outside = (
+        np.all(x < -w, axis=1) | np.all(x > w, axis=1)
+        | np.all(y < -w, axis=1) | np.all(y > w, axis=1)
+        | np.all(cam[..., 2] > 0.0, axis=1)  # entirely behind the camera
+    )
+    depth = -cam[~outside, :, 2]
+    if depth.size == 0:
+        return None
+
+    clip_start = camera.data.clip_start
+    clip_end = camera.data.clip_end
+    near = float(np.clip(depth.min(), clip_start, clip_end))
+    far = float(np.clip(depth.max(), clip_start, clip_end))
+    if far <= near:
+        far = min(near * 1.001 + 1e-4, clip_end) if near < clip_end else near + 1e-4
+    return near, far
+
+
+def mapping_range(near, far, settings):
+    """Convert a distance range to the DM_RangeMapper input range for the pipeline.
+
+    LOGARITHMIC maps log10(depth * scale), so its range is converted too.
+    """
+    if settings.depth_normalization == 'LOGARITHMIC':
+        scale = settings.depth_scale_factor
+        return math.log10(max(near * scale, 1e-6)), math.log10(max(far * scale, 1e-6))
+    return near, far
+
+
+def update_auto_range(context, settings):
+    """Compute the range for the current frame and store it on ``settings``.
+
+    Returns:
+        bool: False when no geometry is in view (previous values kept)
+    """
+    result = compute_depth_range(context.scene, context.evaluated_depsgraph_get())
+    if result is None:
+        return False
+    settings.auto_near, settings.auto_far = result
+    return True
+
+
+def _range_fcurve_paths():
+    base = f'nodes["{RANGE_NODE_NAME}"].inputs'
+    return (f"{base}[1].default_value", f"{base}[2].default_value")
+
+
+def clear_range_keyframes(tree):
+    """Remove per-frame auto range animation from the DM_RangeMapper node."""
+    anim = tree.animation_data
+    if anim is None or anim.action is None:
+        return
+    for fcurve in list(anim.action.fcurves):
+        if fcurve.data_path in _range_fcurve_paths():
+            anim.action.fcurves.remove(fcurve)
+
+
+def keyframe_range_per_frame(context, tree, settings, frame_list):
+    """Bake a per-frame auto range into constant keyframes on DM_RangeMapper.
+
+    Frames without visible geometry keep the previous frame's range.
+
+    Returns:
+        int: Number of frames keyed
+    """
+    import bpy
+
+    scene = context.scene
+    if tree.nodes.get(RANGE_NODE_NAME) is None:
+        return 0
+
+    original_frame = scene.frame_current
+    keys = []
+    near_far = (settings.auto_near, settings.auto_far)
+    try:
+        for frame in frame_list:
+            scene.frame_set(frame)
+            result = compute_depth_range(scene, context.evaluated_depsgraph_get())
+            if result is not None:
+                near_far = result
+            keys.append((frame,) + mapping_range(*near_far, settings))
+    finally:
+        scene.frame_set(original_frame)
+
+    if not keys:
+        return 0
+
+    anim = tree.animation_data or tree.animation_data_create()
+    if anim.action is None:
+        anim.action = bpy.data.actions.new("DM_AutoRange")
+    clear_range_keyframes(tree)
+
+    keyed = np.array(keys, dtype=np.float32)
+    for column, data_path in enumerate(_range_fcurve_paths(), start=1):
+        fcurve = anim.action.fcurves.new(data_path)
+        points = fcurve.keyframe_points
+        points.add(len(keyed))
+        points.foreach_set("co", keyed[:, [0, column]].ravel())
+        # Enum value 0 is CONSTANT: hold each frame's range without blending
+        points.foreach_set("interpolation", np.zeros(len(keyed), dtype=np.int32))
+        fcurve.update()
+    return len(keys)
+
+
+def apply_to_tree(context, tree, settings, frame_list=None):
+    """Refresh the auto range and push it into the DM_RangeMapper node.
+
+    With ``auto_range_per_frame`` and several frames, each frame's range is
+    baked into keyframes; otherwise the current frame's range is used for all.
+
+    Returns:
+        tuple or None: (near, far) of the current frame, None if nothing is in view
+    """
+    range_node = tree.nodes.get(RANGE_NODE_NAME)
+    found = update_auto_range(context, settings)
+
+    if settings.auto_range_per_frame and frame_list and len(frame_list) > 1:
+        keyframe_range_per_frame(context, tree, settings, frame_list)
+    else:
+        clear_range_keyframes(tree)
+        if range_node is not None:
+            from_min, from_max = mapping_range(settings.auto_near, settings.auto_far, settings)
+            range_node.inputs['From Min'].default_value = from_min
+            range_node.inputs['From Max'].default_value = from_max
+
+    return (settings.auto_near, settings.auto_far) if found else None
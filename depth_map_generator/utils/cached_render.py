@@ -0,0 +1,252 @@
+"""Serve depth / mask frames from the raw depth cache and render only the misses.
+
+For each requested frame the scene is evaluated (no render) and fingerprinted.
+Hits are normalized from the cached raw depth with NumPy and written as the
+same depth / mask PNGs the compositor would produce. Misses are rendered with
+a FrameQueue; their raw EXR output is ingested into the cache afterwards.
+"""
+
+import os
+
+import bpy
+import numpy as np
+
+from . import (
+    comfy_stream, depth_cache, fingerprint, frames, nodes, paths, renormalize, rendering,
+)
+
+# View transforms whose PNG encoding renormalize can reproduce exactly
+_REPRODUCIBLE_VIEW_TRANSFORMS = {'Standard': 'SRGB', 'Raw': 'LINEAR'}
+
+
+def get_cache(prefs=None):
+    """Return the DepthCache configured in the addon preferences."""
+    root = prefs.cache_dir if prefs and prefs.cache_dir else depth_cache.default_cache_dir()
+    budget_gb = prefs.cache_budget_gb if prefs else 0.0
+    return depth_cache.DepthCache(bpy.path.abspath(root), int(budget_gb * 1024 ** 3))
+
+
+def check_supported(scene, settings, view_layer=None):
+    """Check whether cached frames can reproduce this scene's output exactly.
+
+    Args:
+        scene: Scene to render
+        settings: DepthMapSettings property group
+        view_layer: View layer being rendered; when given, scenes whose
+            viewport geometry differs from the render are refused (the
+            cache key is computed from the viewport depsgraph)
+
+    Returns:
+        tuple: (is_supported: bool, reason: str or None)
+    """
+    if settings.depth_output_method != 'FILE_OUTPUT':
+        return False, "Depth cache requires File Output"
+    if settings.output_format != 'PNG':
+        return False, "Depth cache writes PNG output only"
+    if nodes.wants_packed_output(settings):
+        return False, "Depth cache does not write packed depth + mask files"
+    if nodes.wants_label_map(settings):
+        return False, "Depth cache does not support the object index label map"
+    if settings.mask_enabled and settings.mask_source == 'CRYPTOMATTE':
+        return False, "Depth cache does not support Cryptomatte masks"
+    if settings.use_auto_range and settings.auto_range_per_frame:
+        return False, "Depth cache does not support a per-frame auto range"
+    if nodes.wants_sequence_pass(settings):
+        return False, "Depth cache does not support sequence-wide normalization"
+    if view_transfer(scene) is None:
+        return False, "Depth cache requires the Standard or Raw view transform"
+    if view_layer is not None:
+        mismatch = fingerprint.render_mismatch(view_layer)
+        if mismatch:
+            return False, f"Depth cache can't fingerprint the render: {mismatch}"
+    return True, None
+
+
+def view_transfer(scene):
+    """The renormalize transfer ('SRGB' / 'LINEAR') matching the scene's PNG encoding.
+
+    Returns:
+        str or None: None when the view transform can't be reproduced exactly
+    """
+    view = scene.view_settings
+    if (view.look not in {'None', ''}
+            or view.exposure != 0.0 or view.gamma != 1.0):
+        return None
+    return _REPRODUCIBLE_VIEW_TRANSFORMS.get(view.view_transform)
+
+
+def normalization_params(scene, settings):
+    """Normalization parameters matching the compositor output of ``scene``."""
+    params = renormalize.params_from_settings(settings)
+    params["transfer"] = _REPRODUCIBLE_VIEW_TRANSFORMS.get(
+        scene.view_settings.view_transform, 'LINEAR'
+    )
+    return params
+
+
+def _needs_index(settings):
+    return settings.mask_enabled and settings.mask_source == 'OBJECT_INDEX'
+
+
+def plan_frames(context, settings, frame_list, cache):
+    """Fingerprint each frame and split the list into cache hits and misses.
+
+    Returns:
+        tuple: (keys: dict frame -> fingerprint, hits: list, misses: list)
+    """
+    scene = context.scene
+    original_frame = scene.frame_current
+    needs_index = _needs_index(settings)
+
+    keys, hits, misses = {}, [], []
+    try:
+        for frame in frame_list:
+            scene.frame_set(frame)
+            key = fingerprint.scene_fingerprint(scene, context.evaluated_depsgraph_get())
+            keys[frame] = key
+            hit = cache.contains(key, "depth") and (
+                not needs_index or cache.contains(key, "index"))
+            (hits if hit else misses).append(frame)
+    finally:
+        scene.frame_set(original_frame)
+    return keys, hits, misses
+
+
+def write_from_cache(scene, settings, frame, key, cache, prefs=None):
+    """Write the depth (and mask) outputs of one frame from cached raw data.
+
+    Returns:
+        bool: False if an entry vanished or was corrupt (frame must be rendered)
+    """
+    depth = cache.load(key, "depth")
+    if depth is None:
+        return False
+    labels = None
+    if _needs_index(settings):
+        labels = cache.load(key, "index")
+        if labels is None:
+            return False
+
+    params = normalization_params(scene, settings)
+    depth_dir = paths.get_depth_output_dir(settings, prefs)
+    os.makedirs(depth_dir, exist_ok=True)
+    frames.write_png(
+        os.path.join(depth_dir, frames.frame_filename(
+            paths.output_prefix("depth", settings), frame)),
+        renormalize.normalize(depth, params), settings.output_bit_depth,
+    )
+
+    if settings.save_raw_depth:
+        # Same name and format as the DM_RawDepthOutput files of rendered frames
+        raw_dir = paths.get_raw_depth_output_dir(settings, prefs)
+        os.makedirs(raw_dir, exist_ok=True)
+        frames.write_exr(os.path.join(raw_dir, frames.frame_filename(
+            paths.output_prefix("raw_depth", settings), frame, ".exr")), depth)
+
+    if labels is not None:
+        # Same rule as the DM_MaskCompare node: |index - mask_index| <= 0.5
+        mask = (np.abs(labels.astype(np.float32) - settings.mask_index) <= 0.5)
+        mask = mask.astype(np.float32)
+        if settings.mask_output_format == 'RGBA_PNG':
+            mask = np.stack((mask, mask, mask, np.ones_like(mask)), axis=-1)
+        mask_dir = paths.get_mask_output_dir(settings, prefs)
+        os.makedirs(mask_dir, exist_ok=True)
+        frames.write_png(
+            os.path.join(mask_dir,
+                         frames.frame_filename(paths.output_prefix("mask", settings), frame)),
+            mask, settings.output_bit_depth,
+        )
+    return True
+
+
+def ingest_frame(settings, frame, key, cache, prefs=None):
+    """Copy a freshly rendered frame's raw EXR outputs into the cache.
+
+    Returns:
+        bool: False if a raw output couldn't be read or stored
+    """
+    raw_dir = paths.get_raw_depth_output_dir(settings, prefs)
+    kinds = ["depth"] + (["index"] if _needs_index(settings) else [])
+    for kind in kinds:
+        raw_path = os.path.join(raw_dir, frames.frame_filename(
+            paths.output_prefix(f"raw_{kind}", settings), frame, ".exr"))
+        try:
+            data = frames.load_depth(raw_path)
+            if kind == "index":
+                data = np.rint(data).astype(np.uint16)
+            cache.put(key, data, kind)
+        except (OSError, ValueError, ImportError) as e:
+            print(f"[depth_map_generator] Cache ingest failed for frame {frame}: {e}")
+            return False
+
+        # Raw EXRs only exist for the cache unless the user asked to keep them
+        if kind == "index" or not settings.save_raw_depth:
+            try:
+                os.remove(raw_path)
+            except OSError:
+                pass
+    return True
+
+
+def render_cached(context, frame_list, prefs=None, blocking=False, on_finish=None):
+    """Serve cache hits and render only the missing frames.
+
+    Args:
+        context: Blender context (scene, view layer, window)
+        frame_list: Frames to produce
+        prefs: AddonPreferences (optional)
+        blocking: Render misses in place instead of interactively
+        on_finish: Optional callable run once all misses are rendered
+
+    Returns:
+        tuple: (served: int, to_render: int)
+    """
+    scene = context.scene
+    settings = scene.depth_map_settings
+    cache = get_cache(prefs)
+
+    keys, hits, misses = plan_frames(context, settings, frame_list, cache)
+    for frame in hits:
+        if write_from_cache(scene, settings, frame, keys[frame], cache, prefs):
+            comfy_stream.hand_off(frame)
+        else:
+            misses.append(frame)
+    misses.sort()
+
+    # Misses sharing a fingerprint (e.g. held frames) are rendered once and
+    # the rest are written from the freshly ingested entry.
+    render_frames, duplicates = [], {}
+    first_by_key = {}
+    for frame in misses:
+        first = first_by_key.setdefault(keys[frame], frame)
+        if first == frame:
+            render_frames.append(frame)
+        else:
+            duplicates.setdefault(first, []).append(frame)
+    served = len(frame_list) - len(render_frames)
+
+    def _on_frame(frame):
+        comfy_stream.hand_off(frame)
+        ingested = ingest_frame(settings, frame, keys[frame], cache, prefs)
+        failed = []
+        for duplicate in duplicates.pop(frame, ()):
+            if ingested and write_from_cache(scene, settings, duplicate, keys[frame], cache,
+                                             prefs):
+                comfy_stream.hand_off(duplicate)
+            else:
+                failed.append(duplicate)
+        # Render what couldn't be written from the cache
+        queue.add(failed)
+
+    def _on_finish(_queue):
+        cache.evict()
+        if on_finish:
+            on_finish()
+
+    queue = rendering.FrameQueue(scene, render_frames, on_frame=_on_frame,
+                                 on_finish=_on_finish)
+    if blocking or bpy.app.background:
+        queue.run_blocking()
+    else:
+        queue.start(context)
+    return served, len(render_frames)
@@ -0,0 +1,310 @@
+"""Hand rendered frames to a local ComfyUI server while the render continues.
+
+A ComfyStream uploads each finished frame's files (or references them when
+they are published into ComfyUI's input directory) and queues a copy of an
+API-format workflow template with the file names filled in. Requests go
+through a small pool of persistent HTTP/1.1 connections, and at most
+``window`` queued workflows are outstanding on the server: submit() waits
+for ComfyUI to finish older ones before handing off more, so a render that
+outpaces inference pauses instead of piling up the server queue.
+
+Workflow templates are ComfyUI's "Save (API)" JSON. String values are
+filled from the frame's files: ``"{depth}"`` and ``"{mask}"`` become the
+image names to load (e.g. in a LoadImage node's ``image`` input) and
+``"{frame}"`` the frame number; a value that is exactly a placeholder
+takes the value's type, placeholders inside longer strings are replaced
+as text (``"depth_{frame}"`` -> ``"depth_12"``).
+
+Runs inside or outside Blender (standard library only).
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http import client as http_client
+from urllib.parse import urlsplit
+
+from . import publish
+
+DEFAULT_URL = "http://127.0.0.1:8188"
+
+# Errors of a keep-alive connection the server has already closed
+_STALE = (http_client.RemoteDisconnected, http_client.BadStatusLine,
+          ConnectionResetError, BrokenPipeError)
+
+
+class ComfyError(RuntimeError):
+    """A request to the ComfyUI server failed."""
+
+
+class ConnectionPool:
+    """Persistent HTTP connections to one server, shared between threads.
+
+    Args:
+        url: Server URL, e.g. http://127.0.0.1:8188
+        size: Connections kept open at most
+        timeout: Socket timeout in seconds
+    """
+
+    def __init__(self, url, size=4, timeout=30.0):
+        parts = urlsplit(url if "//" in url else f"http://{url}")
+        if parts.scheme not in {"http", "https"} or not parts.hostname:
+            raise ValueError(f"Invalid ComfyUI URL: {url!r}")
+        self._connection_class = (http_client.HTTPSConnection if parts.scheme == "https"
+                                  else http_client.HTTPConnection)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(1, size))
+
+    def request(self, method, path, body=None, headers=None):
+        """Send one request and return ``(status, body bytes)``.
+
+        A connection the server closed while idle is replaced and the
+        request retried once.
+        """
+        with self._slots:
+            for attempt in (0, 1):
+                connection = self._get()
+                try:
+                    connection.request(method, self.prefix + path, body=body,
+                                       headers=headers or {})
+                    response = connection.getresponse()
+                    data = response.read()
+                except _STALE:
+                    connection.close()
+                    if attempt:
+                        raise
+                    continue
+                except Exception:
+                    connection.close()
+                    raise
+                if response.will_close:
+                    connection.close()
+                else:
+                    self._idle.put(connection)
+                return response.status, data
+
+    def json(self, method, path, payload=None, body=None, headers=None):
+        """Send a request and decode the JSON response.
+
+        Raises:
+            ComfyError: On a non-2xx status
+        """
+        if payload is not None:
+            body = json.dumps(payload).encode("utf-8")
+            headers = {"Content-Type": "application/json"}
+        status, data = self.request(method, path, body, headers)
+        if not 200 <= status < 300:
+            detail = data.decode("utf-8", "replace").strip()[:300]
+            raise ComfyError(f"{method} {path} returned {status}: {detail}")
+        return json.loads(data) if data else {}
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _get(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connection_class(self.host, self.port, timeout=self.timeout)
+
+
+class ComfyClient:
+    """The few ComfyUI endpoints the hand-off needs.
+
+    Args:
+        url: Server URL
+        pool_size: Persistent connections
+        timeout: Socket timeout in seconds
+    """
+
+    def __init__(self, url=DEFAULT_URL, pool_size=4, timeout=30.0):
+        self.pool = ConnectionPool(url, pool_size, timeout)
+        self.client_id = uuid.uuid4().hex
+
+    def upload_image(self, path, subfolder="", name=None):
+        """Upload a file into ComfyUI's input directory (overwriting).
+
+        Returns:
+            str: The image name workflows load it by (``subfolder/name``)
+        """
+        name = (name or os.path.basename(path)).replace('"', "_")
+        with open(path, "rb") as f:
+            data = f.read()
+        boundary = uuid.uuid4().hex
+        parts = []
+        for field, value in (("type", "input"), ("subfolder", subfolder),
+                             ("overwrite", "true")):
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"'
+                         f'\r\n\r\n{value}\r\n'.encode("utf-8"))
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="image"; '
+                     f'filename="{name}"\r\nContent-Type: application/octet-stream'
+                     f'\r\n\r\n'.encode("utf-8") + data + b"\r\n")
+        parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+        result = self.pool.json(
+            "POST", "/upload/image", body=b"".join(parts),
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+        subfolder = result.get("subfolder", subfolder)
+        return f"{subfolder}/{result['name']}" if subfolder else result["name"]
+
+    def queue_prompt(self, workflow):
+        """Queue a workflow and return its prompt id.
+
+        Raises:
+            ComfyError: If the server rejects the workflow
+        """
+        result = self.pool.json("POST", "/prompt",
+                                {"prompt": workflow, "client_id": self.client_id})
+        if "prompt_id" not in result:
+            raise ComfyError(f"Workflow rejected: {result.get('error') or result}")
+        return result["prompt_id"]
+
+    def outstanding(self):
+        """Prompt ids that are running or pending on the server."""
+        result = self.pool.json("GET", "/queue")
+        return {item[1] for key in ("queue_running", "queue_pending")
+                for item in result.get(key, [])}
+
+    def close(self):
+        self.pool.close()
+
+
+def load_workflow(path):
+    """Read an API-format workflow template.
+
+    Raises:
+        ValueError: If the file isn't a workflow in API format
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        workflow = json.load(f)
+    if not isinstance(workflow, dict) or not all(
+            isinstance(node, dict) and "class_type" in node for node in workflow.values()):
+        raise ValueError(f"{os.path.basename(path)} is not an API-format workflow "
+                         "(export it with Save (API))")
+    return workflow
+
+
+def fill_workflow(template, values):
+    """Copy of ``template`` with ``{name}`` placeholders replaced from ``values``."""
+    if isinstance(template, dict):
+        return {key: fill_workflow(value, values) for key, value in template.items()}
+    if isinstance(template, list):
+        return [fill_workflow(value, values) for value in template]
+    if isinstance(template, str) and "{" in template:
+        for name, value in values.items():
+            token = "{" + name + "}"
+            if template == token:
+                return value
+            template = template.replace(token, str(value))
+    return template
+
+
+class ComfyStream:
+    """Queues one workflow per finished frame with a bounded number outstanding.
+
+    Args:
+        client: ComfyClient
+        template: API-format workflow with placeholders (see module docstring)
+        window: Queued workflows ComfyUI hasn't finished, at most
+        workers: Threads uploading and queueing
+        input_dir: ComfyUI's input directory when it is on this machine: the
+            files are published into ``input_dir/subfolder`` (see
+            publish.publish_file) and referenced instead of uploaded
+        subfolder: Folder below ComfyUI's input directory for this sequence;
+            each placeholder's files go to a subfolder of it (``shot/depth``)
+        poll_interval: Seconds between queue checks while the window is full
+    """
+
+    def __init__(self, client, template, window=4, workers=2, input_dir=None,
+                 subfolder="", poll_interval=0.25):
+        self.client = client
+        self.template = template
+        self.window = max(1, window)
+        self.input_dir = input_dir
+        self.subfolder = subfolder.strip("/")
+        self.poll_interval = poll_interval
+        self.errors = []
+        self.queued = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers),
+                                            thread_name_prefix="dm_comfy")
+        self._submitting = {}
+        self._outstanding = set()
+        self.waited = 0.0
+
+    def submit(self, frame, files):
+        """Hand off one frame, first waiting while the window is full.
+
+        Args:
+            frame: Frame number
+            files: dict placeholder name -> file path (e.g. depth, mask)
+        """
+        started = time.perf_counter()
+        self._collect()
+        while len(self._submitting) + len(self._outstanding) >= self.window:
+            if self._submitting:
+                frame_done = next(iter(self._submitting))
+                self._result(frame_done, self._submitting.pop(frame_done))
+                continue
+            try:
+                self._outstanding &= self.client.outstanding()
+            except (OSError, ComfyError) as e:
+                self.errors.append(f"queue check failed: {e}")
+                self._outstanding.clear()
+            if len(self._outstanding) >= self.window:
+                time.sleep(self.poll_interval)
+        self.waited += time.perf_counter() - started
+        self._submitting[frame] = self._executor.submit(self._hand_off, frame, dict(files))
+
+    def finish(self):
+        """Wait until every frame is queued (not until ComfyUI has run them).
+
+        Returns:
+            list: Error messages
+        """
+        while self._submitting:
+            frame = next(iter(self._submitting))
+            self._result(frame, self._submitting.pop(frame))
+        self._executor.shutdown(wait=True)
+        self.client.close()
+        return list(self.errors)
+
+    def _hand_off(self, frame, files):
+        values = {"frame": frame}
+        for name, path in files.items():
+            values[name] = self._reference(name, path)
+        return self.client.queue_prompt(fill_workflow(self.template, values))
+
+    def _reference(self, name, path):
+        # Same layout as publish.publish_sequences: <subfolder>/<depth|mask>/<file>
+        subfolder = f"{self.subfolder}/{name}" if self.subfolder else name
+        if self.input_dir is None:
+            return self.client.upload_image(path, subfolder)
+        directory = os.path.join(self.input_dir, *subfolder.split("/"))
+        os.makedirs(directory, exist_ok=True)
+        publish.publish_file(path, os.path.join(directory, os.path.basename(path)))
+        return f"{subfolder}/{os.path.basename(path)}"
+
+    def _collect(self):
+        for frame in [f for f, future in self._submitting.items() if future.done()]:
+            self._result(frame, self._submitting.pop(frame))
+
+    def _result(self, frame, future):
+        try:
+            prompt_id = future.result()
+        except Exception as e:
+            self.errors.append(f"frame {frame}: {e}")
+            return
+        self.queued[frame] = prompt_id
+        self._outstanding.add(prompt_id)
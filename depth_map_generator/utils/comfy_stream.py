@@ -0,0 +1,124 @@
+"""Queue a ComfyUI workflow for each frame as soon as its files are written.
+
+With ``comfy_stream`` a render_write handler hands every finished frame to a
+comfy_client.ComfyStream, so ComfyUI runs inference on early frames while
+Blender renders the later ones. The frame's depth and (first) mask files
+fill the ``{depth}`` / ``{mask}`` placeholders of the workflow template.
+Renders that go frame by frame through rendering.FrameQueue (cache misses,
+static frame skipping, resume) get no render_write; they call hand_off()
+from their on_frame hook, and for frames written without rendering (cache
+hits, reused static frames) as soon as the files are written. Anything
+left (e.g. a still) is handed off when the render finishes.
+"""
+
+import os
+
+import bpy
+
+from . import async_encode, comfy_client, paths
+
+# The stream of the render in progress, if any
+_active = None
+
+
+def get_active():
+    """Return the ComfyUI stream of the render in progress, if any."""
+    return _active
+
+
+def hand_off(frame):
+    """Hand a written frame to the running stream, if any (idempotent per frame)."""
+    if _active is not None:
+        _active.hand_off(frame)
+
+
+def frame_files(settings, frame, prefs=None):
+    """The files a frame hands off: ``{"depth": path, "mask": path}`` as enabled."""
+    files = paths.get_frame_output_files_by_kind(settings, frame, prefs)
+    return {name: files[name][0] for name in ("depth", "mask") if files[name]}
+
+
+class StreamSession:
+    """Hands the frames of one render to ComfyUI while it runs.
+
+    Everything is captured up front: the handlers run after the render
+    operator has returned.
+
+    Args:
+        settings: DepthMapSettings property group
+        frame_list: Frames of the render
+        prefs: AddonPreferences (optional; server URL and input directory)
+
+    Raises:
+        ValueError: If the workflow template or the server URL is invalid
+        OSError: If the workflow template can't be read
+    """
+
+    def __init__(self, settings, frame_list, prefs=None):
+        template = comfy_client.load_workflow(bpy.path.abspath(settings.comfy_workflow))
+        url = (prefs.comfyui_url if prefs else "") or comfy_client.DEFAULT_URL
+        input_dir = None
+        publish_dir = paths.get_publish_dir(settings, prefs)
+        if settings.comfy_stream_transfer == 'INPUT_DIR':
+            if publish_dir is None:
+                raise ValueError("Set the ComfyUI input directory in the addon preferences")
+            input_dir = bpy.path.abspath(prefs.comfyui_input_dir)
+        subfolder = (os.path.relpath(publish_dir, bpy.path.abspath(prefs.comfyui_input_dir))
+                     if publish_dir else paths.publish_folder(settings))
+
+        window = settings.comfy_stream_window
+        self.stream = comfy_client.ComfyStream(
+            comfy_client.ComfyClient(url, pool_size=min(window, 4)),
+            template, window=window, workers=min(window, 4), input_dir=input_dir,
+            subfolder=subfolder.replace(os.sep, "/"),
+        )
+        self.files = {frame: frame_files(settings, frame, prefs) for frame in frame_list}
+        self.handed_off = set()
+
+    def start(self):
+        """Register the render_write handler."""
+        global _active
+        if _active is not None:
+            _active.finish()
+        bpy.app.handlers.render_write.append(self._on_write)
+        _active = self
+        return self
+
+    def finish(self):
+        """Unregister, hand off the remaining written frames and wait until all are queued.
+
+        Idempotent.
+
+        Returns:
+            list: Error messages
+        """
+        global _active
+        if self._on_write in bpy.app.handlers.render_write:
+            bpy.app.handlers.render_write.remove(self._on_write)
+        if _active is not self:
+            return []
+        _active = None
+        for frame in sorted(set(self.files) - self.handed_off):
+            self.hand_off(frame)
+        errors = self.stream.finish()
+        for error in errors:
+            print(f"[depth_map_generator] ComfyUI hand-off failed: {error}")
+        print(f"[depth_map_generator] ComfyUI: {len(self.stream.queued)} workflows queued"
+              f" (waited {self.stream.waited:.1f}s for the server)")
+        return errors
+
+    def _on_write(self, scene, *_args):
+        self.hand_off(scene.frame_current)
+
+    def hand_off(self, frame):
+        """Queue the workflow of a frame whose files are written (once per frame)."""
+        files = self.files.get(frame)
+        if not files or frame in self.handed_off:
+            return
+        # Background-encoded files may still be in flight
+        async_encode.wait_for_frame(frame)
+        if not all(os.path.isfile(path) for path in files.values()):
+            return
+        self.handed_off.add(frame)
+        self.stream.submit(frame, files)
+
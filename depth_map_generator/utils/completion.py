@@ -0,0 +1,255 @@
+"""Per-frame completion manifest for resumable renders.
+
+The manifest (``render_manifest.json`` in the depth output directory)
+records for every finished frame the size and checksum of each of its
+output files, together with a fingerprint of the settings that produced
+them. When a render is resumed, the files of every requested frame are
+verified in parallel:
+
+* files listed in the manifest must have the recorded size and checksum
+* files rendered without a manifest entry (e.g. the frame the crash
+  interrupted) must be structurally intact: PNGs are walked chunk by chunk
+  with CRC checks up to IEND, EXR headers are parsed and every line block
+  of the offset table must be complete, NumPy files need their header and
+  the full data length
+
+Frames whose files all pass are kept; missing, truncated or corrupt ones are
+rendered again. A manifest written with other settings is discarded.
+
+Runs inside or outside Blender (NumPy required).
+"""
+
+import hashlib
+import io
+import json
+import os
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import frames
+
+MANIFEST_FILENAME = "render_manifest.json"
+FORMAT_VERSION = 1
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_NPY_MAGIC = b"\x93NUMPY"
+
+# Scanlines per EXR line block by compression code: NONE, RLE, ZIPS, ZIP,
+# PIZ, PXR24, B44, B44A, DWAA, DWAB
+_EXR_BLOCK_LINES = (1, 1, 1, 16, 32, 16, 32, 32, 32, 256)
+
+
+def _png_error(data):
+    if not data.startswith(_PNG_SIGNATURE):
+        return "not a PNG file"
+    offset, seen = len(_PNG_SIGNATURE), []
+    while offset + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[offset:offset + 8])
+        end = offset + 12 + length
+        if end > len(data):
+            return "truncated"
+        crc, = struct.unpack(">I", data[end - 4:end])
+        if zlib.crc32(data[offset + 4:end - 4]) != crc:
+            return f"corrupt {kind.decode('latin-1')} chunk"
+        seen.append(kind)
+        if kind == b"IEND":
+            return None if seen[0] == b"IHDR" and b"IDAT" in seen else "missing chunks"
+        offset = end
+    return "truncated"
+
+
+def _exr_error(data):
+    if not data.startswith(frames.EXR_MAGIC):
+        return "not an OpenEXR file"
+    try:
+        attributes, table = frames.read_exr_header(data)
+        _x_min, _y_min, _width, height = frames.exr_data_window(attributes)
+        compression = attributes["compression"][1][0]
+    except (ValueError, KeyError, IndexError, struct.error):
+        return "corrupt or truncated header"
+    if compression >= len(_EXR_BLOCK_LINES) or height <= 0:
+        return "corrupt header"
+
+    # Every line block the offset table points to must be complete; files
+    # cut short leave zero (or dangling) offsets behind
+    blocks = -(-height // _EXR_BLOCK_LINES[compression])
+    first_block = table + 8 * blocks
+    if first_block > len(data):
+        return "truncated"
+    offsets = np.frombuffer(data, dtype="<u8", count=blocks, offset=table).astype(np.int64)
+    if offsets.min() < first_block or offsets.max() + 8 > len(data):
+        return "truncated"
+    # Block: int32 y, int32 byte count, pixel data
+    raw = np.frombuffer(data, dtype=np.uint8)
+    sizes = raw[offsets[:, np.newaxis] + np.arange(4, 8)].copy().view("<i4").ravel()
+    if sizes.min() < 0 or (offsets + 8 + sizes).max() > len(data):
+        return "truncated"
+    return None
+
+
+def _npy_error(data):
+    if not data.startswith(_NPY_MAGIC):
+        return "not a NumPy file"
+    try:
+        f = io.BytesIO(data)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, _fortran, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, _fortran, dtype = np.lib.format.read_array_header_2_0(f)
+    except ValueError:
+        return "corrupt header"
+    expected = f.tell() + int(np.prod(shape)) * dtype.itemsize
+    return None if len(data) >= expected else "truncated"
+
+
+def structure_error(path, data):
+    """Why ``data`` (the contents of ``path``) is not an intact image, or None."""
+    if not data:
+        return "empty"
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".png":
+        return _png_error(data)
+    if ext == ".exr":
+        return _exr_error(data)
+    if ext == ".npy":
+        return _npy_error(data)
+    return None
+
+
+def check_file(path, record=None):
+    """Verify one output file.
+
+    Args:
+        path: File path
+        record: Its manifest entry ({"bytes", "checksum"}), if any
+
+    Returns:
+        tuple: (error message or None, entry {"bytes", "checksum"} of the file
+            as it is now, or None when missing)
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return "missing", None
+    except OSError as e:
+        return f"unreadable ({e.strerror})", None
+
+    entry = {"bytes": len(data),
+             "checksum": hashlib.blake2b(data, digest_size=16).hexdigest()}
+    if record is not None:
+        if record["bytes"] != entry["bytes"]:
+            return f"size {entry['bytes']} != {record['bytes']}", entry
+        if record["checksum"] != entry["checksum"]:
+            return "checksum mismatch", entry
+        return None, entry
+    return structure_error(path, data), entry
+
+
+class CompletionManifest:
+    """Finished frames of a render and the checksums of their files.
+
+    Args:
+        path: Manifest file path (file paths are stored relative to its folder)
+        fingerprint: Settings fingerprint the frames must have been rendered with
+    """
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.frames = {}
+        self.discarded = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """Read the manifest at ``path``; entries of other settings are dropped."""
+        manifest = cls(path, fingerprint)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+        if data.get("version") != FORMAT_VERSION or data.get("fingerprint") != fingerprint:
+            manifest.discarded = True
+            return manifest
+        manifest.frames = {int(frame): files for frame, files in data["frames"].items()}
+        return manifest
+
+    def _key(self, path):
+        try:
+            return os.path.relpath(path, os.path.dirname(self.path)).replace(os.sep, "/")
+        except ValueError:
+            # Another drive on Windows
+            return os.path.abspath(path)
+
+    def record(self, frame, paths, entries=None):
+        """Mark ``frame`` finished with its files (checksummed unless ``entries`` are given).
+
+        Returns:
+            str or None: Why the frame could not be recorded (e.g. a missing file)
+        """
+        files = {}
+        for i, path in enumerate(paths):
+            entry = entries[i] if entries else None
+            if entry is None:
+                error, entry = check_file(path)
+                if error:
+                    return f"{os.path.basename(path)}: {error}"
+            files[self._key(path)] = entry
+        with self._lock:
+            self.frames[frame] = files
+        return None
+
+    def forget(self, frame):
+        with self._lock:
+            self.frames.pop(frame, None)
+
+    def save(self):
+        """Write the manifest atomically."""
+        with self._lock:
+            data = {
+                "version": FORMAT_VERSION,
+                "fingerprint": self.fingerprint,
+                "frames": {str(frame): files for frame, files in sorted(self.frames.items())},
+            }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        frames.write_atomic(self.path, json.dumps(data, indent=1).encode("utf-8"))
+
+    def verify(self, frame_files, workers=8):
+        """Check the files of every frame in parallel and update the manifest.
+
+        Intact frames without an entry are recorded; invalid ones are forgotten.
+
+        Args:
+            frame_files: dict frame -> list of the frame's output file paths
+            workers: Threads reading files
+
+        Returns:
+            tuple: (valid: sorted list of frames, invalid: dict frame -> reason)
+        """
+        tasks = [(frame, path, self.frames.get(frame, {}).get(self._key(path)))
+                 for frame, paths in frame_files.items() for path in paths]
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            results = list(pool.map(lambda task: check_file(task[1], task[2]), tasks))
+
+        invalid, entries = {}, {}
+        for (frame, path, _record), (error, entry) in zip(tasks, results):
+            entries.setdefault(frame, []).append(entry)
+            if error and frame not in invalid:
+                invalid[frame] = f"{os.path.basename(path)}: {error}"
+
+        valid = []
+        for frame, paths in frame_files.items():
+            if frame in invalid or not paths:
+                self.forget(frame)
+                invalid.setdefault(frame, "no output files")
+            else:
+                self.record(frame, paths, entries[frame])
+                valid.append(frame)
+        return sorted(valid), invalid
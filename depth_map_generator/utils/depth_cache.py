@@ -0,0 +1,141 @@
+"""Persistent, content-addressed on-disk cache of raw depth frames with LRU eviction.
+
+Entries are ``.npy`` arrays stored under ``<root>/<key[:2]>/<key>.<kind>.npy``
+where ``key`` is a frame fingerprint (see fingerprint.py) and ``kind`` is
+``depth`` (float32 camera distance) or ``index`` (object pass index).
+File modification time doubles as the LRU clock: hits touch the entry,
+eviction removes the least recently used entries until the cache fits its
+byte budget.
+
+This module must not import bpy.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+KINDS = ("depth", "index")
+
+
+def default_cache_dir():
+    """Cache location used when the addon preference is empty."""
+    return os.path.join(tempfile.gettempdir(), "depth_map_generator_cache")
+
+
+class DepthCache:
+    """Raw depth / object index frames keyed by content fingerprint.
+
+    Args:
+        root: Cache directory (created on first write)
+        budget_bytes: Maximum total size kept after evict(); 0 = unlimited
+    """
+
+    def __init__(self, root, budget_bytes=0):
+        self.root = root
+        self.budget_bytes = int(budget_bytes)
+
+    def path(self, key, kind="depth"):
+        """Return the entry path for ``key`` / ``kind`` (whether or not it exists)."""
+        if kind not in KINDS:
+            raise ValueError(f"Unknown cache entry kind: {kind}")
+        return os.path.join(self.root, key[:2], f"{key}.{kind}.npy")
+
+    def contains(self, key, kind="depth"):
+        return os.path.isfile(self.path(key, kind))
+
+    def get(self, key, kind="depth"):
+        """Return the entry path on a hit (marking it recently used), else None."""
+        path = self.path(key, kind)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def load(self, key, kind="depth"):
+        """Load an entry as an array, or return None on a miss or corrupt entry."""
+        path = self.get(key, kind)
+        if path is None:
+            return None
+        try:
+            return np.load(path)
+        except (OSError, ValueError):
+            # Truncated or corrupt entry: drop it so it gets re-rendered
+            self.discard(key, kind)
+            return None
+
+    def put(self, key, array, kind="depth"):
+        """Store an array atomically. Returns the entry path."""
+        path = self.path(key, kind)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path[:-4]}.tmp{os.getpid()}.npy"
+        np.save(tmp_path, np.ascontiguousarray(array))
+        os.replace(tmp_path, path)
+        return path
+
+    def discard(self, key, kind="depth"):
+        try:
+            os.remove(self.path(key, kind))
+        except OSError:
+            pass
+
+    def _entries(self):
+        """Yield (mtime, size, path) for every cache entry."""
+        try:
+            shards = os.scandir(self.root)
+        except OSError:
+            return
+        with shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as entries:
+                    for entry in entries:
+                        if not entry.name.endswith(".npy") or ".tmp" in entry.name:
+                            continue
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        yield stat.st_mtime, stat.st_size, entry.path
+
+    def usage(self):
+        """Total bytes currently used by cache entries."""
+        return sum(size for _mtime, size, _path in self._entries())
+
+    def evict(self, budget_bytes=None):
+        """Remove least recently used entries until the cache fits the budget.
+
+        Returns:
+            tuple: (entries_removed, bytes_freed)
+        """
+        budget = self.budget_bytes if budget_bytes is None else int(budget_bytes)
+        if budget <= 0:
+            return 0, 0
+
+        entries = sorted(self._entries())
+        total = sum(size for _mtime, size, _path in entries)
+        removed = freed = 0
+        for _mtime, size, path in entries:
+            if total <= budget:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            freed += size
+            removed += 1
+        return removed, freed
+
+    def clear(self):
+        """Remove every entry. Returns the number of entries removed."""
+        removed = 0
+        for _mtime, _size, path in list(self._entries()):
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
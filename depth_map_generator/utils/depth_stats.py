@@ -0,0 +1,188 @@
+"""Streaming depth statistics over raw depth sequences, with bounded memory.
+
+A DepthStats accumulates exact min/max and a fixed-bin histogram of depth
+values frame by frame. The bin edges are identical for every instance
+(log-spaced over the whole Blender depth range), so partial statistics from
+worker processes or machines merge by simply adding counts. Percentiles and
+the histogram-equalization curve are derived from the merged histogram.
+
+This module must not import bpy.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import frames
+
+# Blender's MapRange treats |value| > BLENDER_ZMAX as "no hit" (background)
+BLENDER_ZMAX = 10000.0
+
+# Fixed log-spaced bins from HIST_MIN to BLENDER_ZMAX: ~0.25% relative width
+HIST_BINS = 8192
+HIST_MIN = 1e-4
+
+_LOG_MIN = np.log10(HIST_MIN)
+_LOG_SPAN = np.log10(BLENDER_ZMAX) - _LOG_MIN
+
+STATS_FILENAME = "depth_stats.json"
+
+
+def bin_edges():
+    """Return the HIST_BINS + 1 depth values bounding the histogram bins."""
+    return np.logspace(_LOG_MIN, _LOG_MIN + _LOG_SPAN, HIST_BINS + 1)
+
+
+class DepthStats:
+    """Mergeable min/max, count and histogram of valid (non-background) depth."""
+
+    def __init__(self):
+        self.counts = np.zeros(HIST_BINS, dtype=np.int64)
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.background = 0
+        self.frames = 0
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def add(self, depth):
+        """Accumulate one depth frame."""
+        depth = np.asarray(depth, dtype=np.float32).ravel()
+        valid = np.isfinite(depth) & (depth > 0.0) & (depth <= BLENDER_ZMAX)
+        self.background += int(depth.size - np.count_nonzero(valid))
+        self.frames += 1
+
+        values = depth[valid]
+        if values.size == 0:
+            return
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+
+        index = (np.log10(np.maximum(values, HIST_MIN)) - _LOG_MIN) * (HIST_BINS / _LOG_SPAN)
+        index = np.clip(index.astype(np.int64), 0, HIST_BINS - 1)
+        self.counts += np.bincount(index, minlength=HIST_BINS)
+
+    def merge(self, other):
+        """Add another DepthStats' counts into this one. Returns self."""
+        self.counts += other.counts
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.background += other.background
+        self.frames += other.frames
+        return self
+
+    def percentile(self, q):
+        """Approximate the ``q``-th percentile (0-100) of valid depth.
+
+        Interpolates geometrically inside the bin and clamps to the exact
+        min/max, so 0 and 100 return the true extremes.
+
+        Returns:
+            float or None: None when no valid depth was seen
+        """
+        total = self.total
+        if total == 0:
+            return None
+        if q <= 0.0:
+            return self.minimum
+        if q >= 100.0:
+            return self.maximum
+
+        target = total * q / 100.0
+        cumulative = np.cumsum(self.counts)
+        index = int(np.searchsorted(cumulative, target))
+        before = cumulative[index - 1] if index > 0 else 0
+        fraction = (target - before) / max(self.counts[index], 1)
+        log_value = _LOG_MIN + (index + fraction) * (_LOG_SPAN / HIST_BINS)
+        return float(np.clip(10.0 ** log_value, self.minimum, self.maximum))
+
+    def equalization_curve(self):
+        """Return (depth_knots, levels) of the histogram-equalized mapping.
+
+        levels run from 1 (nearest) to 0 (farthest) like the inverted
+        MapRange of the LINEAR pipeline. Only knots where the cumulative
+        distribution changes are kept.
+        """
+        edges = bin_edges()
+        cdf = np.concatenate(([0], np.cumsum(self.counts))) / max(self.total, 1)
+        changes = np.diff(cdf) != 0.0
+        keep = np.concatenate(([False], changes)) | np.concatenate((changes, [False]))
+        if not keep.any():
+            return np.array([0.0, BLENDER_ZMAX]), np.array([1.0, 0.0])
+        knots = np.clip(edges[keep], self.minimum, self.maximum)
+        return knots, 1.0 - cdf[keep]
+
+    def to_dict(self):
+        nonzero = np.flatnonzero(self.counts)
+        return {
+            "bins": HIST_BINS,
+            "hist_min": HIST_MIN,
+            "hist_max": BLENDER_ZMAX,
+            "min": self.minimum if self.total else None,
+            "max": self.maximum if self.total else None,
+            "background": self.background,
+            "frames": self.frames,
+            # Sparse: most bins of a scene are empty
+            "counts": {str(i): int(self.counts[i]) for i in nonzero},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("bins") != HIST_BINS or data.get("hist_min") != HIST_MIN:
+            raise ValueError("Depth statistics were collected with a different histogram layout")
+        stats = cls()
+        for index, count in data["counts"].items():
+            stats.counts[int(index)] = count
+        if data.get("min") is not None:
+            stats.minimum = data["min"]
+            stats.maximum = data["max"]
+        stats.background = data.get("background", 0)
+        stats.frames = data.get("frames", 0)
+        return stats
+
+    def save(self, path):
+        frames.write_atomic(path, json.dumps(self.to_dict()).encode("utf-8"))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def _stats_task(paths):
+    """Worker: accumulate a chunk of frames, one frame in memory at a time."""
+    stats = DepthStats()
+    for path in paths:
+        stats.add(frames.load_depth(path))
+    return stats.to_dict()
+
+
+def collect_stats(paths, workers=None):
+    """Run the statistics pass over raw depth files.
+
+    Each worker accumulates a contiguous chunk of frames into its own
+    DepthStats; the partial results are merged here.
+
+    Args:
+        paths: Raw depth files (.exr / .npy)
+        workers: Process count (None = os.cpu_count(), 1 = in-process)
+
+    Returns:
+        DepthStats: Merged statistics of all frames
+    """
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) <= 1:
+        return DepthStats.from_dict(_stats_task(paths))
+
+    chunk = -(-len(paths) // workers)
+    chunks = [paths[i:i + chunk] for i in range(0, len(paths), chunk)]
+    merged = DepthStats()
+    with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+        for partial in pool.map(_stats_task, chunks):
+            merged.merge(DepthStats.from_dict(partial))
+    return merged
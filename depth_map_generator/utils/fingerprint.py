@@ -0,0 +1,187 @@
+"""Content fingerprints of what the Depth / IndexOB passes see for the current frame.
+
+A fingerprint hashes the evaluated camera, the render resolution and every
+rendered object instance's transform, pass index, geometry and modifier
+render state. Two frames with equal fingerprints render identical raw
+depth, so the hash can key a cache or detect frames where nothing changed.
+
+The evaluated depsgraph available to Python is the viewport one: it skips
+objects hidden in the viewport and evaluates modifiers at their viewport
+settings. Instances hidden from renders are skipped, and each modifier's
+render toggle and render levels are hashed. What the viewport geometry
+can't show at all (rendered objects hidden in the viewport, modifiers
+enabled only for renders) is reported by render_mismatch() so callers
+don't trust the fingerprint for it.
+"""
+
+import hashlib
+import struct
+
+import numpy as np
+
+# Bump when the hashed inputs change so stale cache entries are not reused
+FINGERPRINT_VERSION = 2
+
+_CAMERA_ATTRS = (
+    "type", "lens", "lens_unit", "ortho_scale", "sensor_fit", "sensor_width",
+    "sensor_height", "shift_x", "shift_y", "clip_start", "clip_end",
+)
+
+# Object types without renderable geometry
+_NON_GEOMETRY_TYPES = {'CAMERA', 'LIGHT', 'LIGHT_PROBE', 'SPEAKER', 'EMPTY'}
+
+# Modifier settings used by renders instead of their viewport counterparts
+_RENDER_LEVEL_ATTRS = ("render_levels",)
+
+_RENDER_ATTRS = (
+    "engine", "resolution_x", "resolution_y", "resolution_percentage",
+    "pixel_aspect_x", "pixel_aspect_y", "use_border", "border_min_x",
+    "border_max_x", "border_min_y", "border_max_y",
+)
+
+
+def _hash_matrix(hasher, matrix):
+    hasher.update(struct.pack("16f", *(v for row in matrix for v in row)))
+
+
+def _mesh_digest(obj):
+    """Hash the evaluated vertex positions of a mesh object."""
+    mesh = obj.data
+    count = len(mesh.vertices)
+    coords = np.empty(count * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(struct.pack("2I", count, len(mesh.polygons)))
+    hasher.update(coords.tobytes())
+    return hasher.digest()
+
+
+def _geometry_digest(obj):
+    """Hash an evaluated object's geometry (bounding box for non-mesh types)."""
+    if obj.type == 'MESH':
+        return _mesh_digest(obj)
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(obj.type.encode())
+    for corner in obj.bound_box:
+        hasher.update(struct.pack("3f", *corner))
+    return hasher.digest()
+
+
+def camera_digest(scene, camera=None):
+    """Hash the evaluated camera transform, lens and the render resolution."""
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(struct.pack("I", FINGERPRINT_VERSION))
+
+    render = scene.render
+    for attr in _RENDER_ATTRS:
+        hasher.update(repr(getattr(render, attr, None)).encode())
+
+    camera = camera or scene.camera
+    if camera is not None:
+        _hash_matrix(hasher, camera.matrix_world)
+        for attr in _CAMERA_ATTRS:
+            hasher.update(repr(getattr(camera.data, attr, None)).encode())
+    return hasher.digest()
+
+
+def _is_deforming(obj):
+    """Whether an object's geometry can change between frames (modifiers, shape keys)."""
+    original = obj.original
+    if original.modifiers:
+        return True
+    data = getattr(original, "data", None)
+    return getattr(data, "shape_keys", None) is not None
+
+
+def hidden_in_render(obj):
+    """Whether an (evaluated) object is disabled in renders, directly or by all its collections."""
+    original = obj.original
+    if original.hide_render:
+        return True
+    collections = original.users_collection
+    return bool(collections) and all(collection.hide_render for collection in collections)
+
+
+def instance_hidden_in_render(instance):
+    """Whether a depsgraph object instance is left out of renders."""
+    if hidden_in_render(instance.object):
+        return True
+    # Instances of an instancer disabled in renders are not rendered either
+    return instance.is_instance and hidden_in_render(instance.parent)
+
+
+def _modifier_render_state(obj):
+    """Hash input for the render-side settings of an object's modifiers."""
+    parts = []
+    for modifier in obj.original.modifiers:
+        parts.append(f"{modifier.type}:{modifier.show_render}")
+        for attr in _RENDER_LEVEL_ATTRS:
+            if hasattr(modifier, attr):
+                parts.append(repr(getattr(modifier, attr)))
+    return "\0".join(parts).encode()
+
+
+def render_mismatch(view_layer):
+    """Why the viewport depsgraph may not show the geometry the render sees, or None.
+
+    Reports the first rendered object that is hidden in the viewport (so it
+    is missing from the evaluated depsgraph) or has a modifier enabled only
+    for renders (its effect is missing from the evaluated geometry).
+    """
+    for obj in view_layer.objects:
+        if obj.type in _NON_GEOMETRY_TYPES or hidden_in_render(obj):
+            continue
+        if not obj.visible_get(view_layer=view_layer):
+            return f"{obj.name} is hidden in the viewport but rendered"
+        for modifier in obj.modifiers:
+            if modifier.show_render and not modifier.show_viewport:
+                return f"{obj.name} has the render-only modifier {modifier.name}"
+    return None
+
+
+def scene_fingerprint(scene, depsgraph, camera=None, full_geometry=True):
+    """Fingerprint the current frame as seen by the Depth and IndexOB passes.
+
+    Args:
+        scene: Scene being rendered (already set to the frame)
+        depsgraph: Evaluated depsgraph for that frame
+        camera: Camera object (defaults to scene.camera)
+        full_geometry: Hash every mesh's vertices. When False (a cheap
+            per-frame change signature within one session), static meshes
+            are identified by name and only modifier / shape-key driven
+            geometry is hashed.
+
+    Returns:
+        str: Hex digest
+    """
+    camera = camera or scene.camera
+    if camera is not None:
+        camera = camera.evaluated_get(depsgraph)
+
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(camera_digest(scene, camera))
+
+    # Instances share evaluated data; hash each geometry once per call
+    geometry = {}
+    for instance in depsgraph.object_instances:
+        obj = instance.object
+        if obj.type in _NON_GEOMETRY_TYPES:
+            continue
+        if not getattr(obj, "visible_camera", True) or instance_hidden_in_render(instance):
+            continue
+        # Objects sharing a mesh can still differ through their modifiers
+        data = obj.data
+        key = (obj.name_full, data.name_full if data is not None else "")
+        digest = geometry.get(key)
+        if digest is None:
+            if full_geometry or obj.type != 'MESH' or _is_deforming(obj):
+                digest = _geometry_digest(obj)
+            else:
+                digest = "\0".join(key).encode()
+            digest += _modifier_render_state(obj)
+            geometry[key] = digest
+        hasher.update(digest)
+        _hash_matrix(hasher, instance.matrix_world)
+        hasher.update(struct.pack("i", obj.pass_index))
+
+    return hasher.hexdigest()
@@ -0,0 +1,143 @@
+"""Memory-mappable stacked sequence container: every frame of a render in one .npy file.
+
+The array is preallocated as ``(frames, height, width)`` when the render
+starts and frames are written into their slot as they finish, so loaders
+can memory-map the file and slice any frame range without opening or
+decoding per-frame PNGs. A JSON sidecar (``<name>.npy.json``) records the
+frame numbers of the slots, which slots are filled, the byte offset of the
+data and of each frame (for readers without NumPy), how the values were
+produced (normalization mode, near/far, bit depth, transfer) and, once the
+render has ended, the frames that were never captured (``missing``)::
+
+    from depth_map_generator.utils.frame_stack import FrameStack
+
+    stack = FrameStack.open("depth_maps/depth_stack.npy")
+    clip = stack.frame_range(100, 199)   # zero-copy (100, H, W) view
+
+Runs inside or outside Blender (NumPy required).
+"""
+
+import json
+import os
+
+import numpy as np
+
+from . import frames
+
+STACK_FILENAME = "depth_stack.npy"
+SIDECAR_SUFFIX = ".json"
+FORMAT_VERSION = 1
+
+
+def sidecar_path(path):
+    """Path of the JSON sidecar of a stack file."""
+    return path + SIDECAR_SUFFIX
+
+
+def _data_offset(path):
+    """Byte offset of the array data in a .npy file (after magic and header)."""
+    with open(path, "rb") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            np.lib.format.read_array_header_1_0(f)
+        else:
+            np.lib.format.read_array_header_2_0(f)
+        return f.tell()
+
+
+class FrameStack:
+    """A stacked frame sequence backed by a memory-mapped .npy file.
+
+    Use create() to preallocate a stack for a render and open() to read one.
+
+    Args:
+        path: .npy file path
+        array: Memory-mapped (frames, height, width) array
+        meta: Sidecar contents (see create())
+    """
+
+    def __init__(self, path, array, meta):
+        self.path = path
+        self.array = array
+        self.meta = meta
+        self.frames = list(meta["frames"])
+        self.filled = set(meta.get("filled", []))
+        self._slots = {frame: slot for slot, frame in enumerate(self.frames)}
+
+    @classmethod
+    def create(cls, path, frame_list, height, width, dtype=np.uint16, **info):
+        """Preallocate a stack for ``frame_list`` and write its sidecar.
+
+        Args:
+            path: .npy file path (its directory is created)
+            frame_list: Frame numbers, one slot each in this order
+            height, width: Frame size in pixels
+            dtype: Stored value type (uint8 / uint16 quantized, float32 linear)
+            info: Extra sidecar entries, e.g. normalization, near, far
+
+        Returns:
+            FrameStack: Opened for writing
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        frame_list = list(frame_list)
+        array = np.lib.format.open_memmap(
+            path, mode="w+", dtype=dtype, shape=(len(frame_list), height, width),
+        )
+        meta = dict(info)
+        meta.update(
+            version=FORMAT_VERSION,
+            file=os.path.basename(path),
+            shape=list(array.shape),
+            dtype=array.dtype.str,
+            frames=frame_list,
+            filled=[],
+            data_offset=_data_offset(path),
+            frame_bytes=height * width * array.dtype.itemsize,
+        )
+        stack = cls(path, array, meta)
+        stack.sync()
+        return stack
+
+    @classmethod
+    def open(cls, path, mode="r"):
+        """Memory-map an existing stack and read its sidecar.
+
+        Args:
+            path: .npy file path
+            mode: numpy memmap mode ('r' read-only, 'r+' to keep writing)
+        """
+        with open(sidecar_path(path), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(path, np.load(path, mmap_mode=mode), meta)
+
+    def slot(self, frame):
+        """Index of ``frame`` in the stack. Raises KeyError for unknown frames."""
+        return self._slots[frame]
+
+    def __contains__(self, frame):
+        return frame in self._slots
+
+    def __getitem__(self, frame):
+        return self.array[self.slot(frame)]
+
+    def frame_range(self, first, last):
+        """Zero-copy view of frames ``first`` - ``last`` (inclusive, consecutive slots)."""
+        start, stop = self.slot(first), self.slot(last) + 1
+        if stop <= start:
+            raise ValueError(f"Frame {last} comes before frame {first} in the stack")
+        return self.array[start:stop]
+
+    def write(self, frame, values):
+        """Store one frame (already in the stack's dtype and size) in its slot."""
+        self.array[self.slot(frame)] = values
+        self.filled.add(frame)
+
+    def is_complete(self):
+        return len(self.filled) == len(self.frames)
+
+    def sync(self):
+        """Flush written frames to disk and rewrite the sidecar's filled list."""
+        self.array.flush()
+        self.meta["filled"] = sorted(self.filled)
+        frames.write_atomic(sidecar_path(self.path),
+                            json.dumps(self.meta, indent=1).encode("utf-8"))
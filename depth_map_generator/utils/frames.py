@@ -0,0 +1,560 @@
+"""Frame file helpers usable outside Blender - sequence naming, frame loading, PNG writing.
+
+This module must not import bpy at module level: it is used by offline
+tools and their worker processes. NumPy is required (bundled with Blender);
+EXR reading needs the OpenImageIO or OpenEXR Python bindings, decodes
+uncompressed files (as written by write_exr()) with NumPy otherwise, and
+falls back to Blender's image loader when running inside Blender. PNG
+reading uses OpenCV when available and a NumPy decoder otherwise.
+"""
+
+import io
+import os
+import re
+import struct
+import zlib
+
+import numpy as np
+
+# Blender's FileOutput node pads frame numbers to at least four digits
+FRAME_DIGITS = 4
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# PNG color types by channel count: gray, gray+alpha, RGB, RGBA
+_PNG_COLOR_TYPES = {1: 0, 2: 4, 3: 2, 4: 6}
+
+EXR_MAGIC = b"\x76\x2f\x31\x01"
+
+# EXR version flags of files that aren't single-part scanline images
+# (tiled, deep data, multipart)
+_EXR_UNSUPPORTED_FLAGS = 0x200 | 0x800 | 0x1000
+
+# EXR channel pixel types: UINT, HALF, FLOAT
+_EXR_PIXEL_TYPES = {0: np.dtype("<u4"), 1: np.dtype("<f2"), 2: np.dtype("<f4")}
+
+
+def frame_filename(prefix, frame, ext=".png"):
+    """Return the sequence file name Blender writes for ``frame``, e.g. depth_0042.png."""
+    return f"{prefix}{frame:0{FRAME_DIGITS}d}{ext}"
+
+
+def find_frames(directory, prefix, ext=".png"):
+    """Map frame number -> path for every ``<prefix>####<ext>`` file in ``directory``.
+
+    Returns:
+        dict: Sorted by frame number; empty if the directory doesn't exist
+    """
+    pattern = re.compile(rf"^{re.escape(prefix)}(\d+){re.escape(ext)}$")
+    found = {}
+    try:
+        entries = os.scandir(directory)
+    except OSError:
+        return found
+    with entries:
+        for entry in entries:
+            match = pattern.match(entry.name)
+            if match:
+                found[int(match.group(1))] = entry.path
+    return dict(sorted(found.items()))
+
+
+def _load_exr(path):
+    """Read the first channel of an EXR file as float32 (rows top to bottom)."""
+    try:
+        import OpenImageIO as oiio
+    except ImportError:
+        oiio = None
+
+    if oiio is not None:
+        image = oiio.ImageInput.open(path)
+        if image is None:
+            raise OSError(f"Cannot open {path}: {oiio.geterror()}")
+        try:
+            pixels = image.read_image(0, 0, 0, 1, "float")
+        finally:
+            image.close()
+        if pixels is None:
+            raise OSError(f"Cannot read {path}")
+        return np.asarray(pixels, dtype=np.float32).reshape(pixels.shape[:2])
+
+    try:
+        import Imath
+        import OpenEXR
+    except ImportError:
+        with open(path, "rb") as f:
+            depth = _decode_exr(f.read())
+        return depth if depth is not None else _load_exr_blender(path)
+
+    exr = OpenEXR.InputFile(path)
+    try:
+        header = exr.header()
+        window = header["dataWindow"]
+        width = window.max.x - window.min.x + 1
+        height = window.max.y - window.min.y + 1
+        channel = next(iter(sorted(header["channels"])))
+        data = exr.channel(channel, Imath.PixelType(Imath.PixelType.FLOAT))
+    finally:
+        exr.close()
+    return np.frombuffer(data, dtype=np.float32).reshape(height, width)
+
+
+def _load_exr_blender(path):
+    """Read an EXR through Blender's image loader (only inside Blender)."""
+    try:
+        import bpy
+    except ImportError as e:
+        raise ImportError(
+            "Reading EXR depth requires the OpenImageIO or OpenEXR Python "
+            "bindings; alternatively save raw depth as .npy"
+        ) from e
+
+    try:
+        image = bpy.data.images.load(path, check_existing=False)
+    except RuntimeError as e:
+        # Blender reports missing and unreadable files as RuntimeError
+        raise OSError(str(e)) from e
+    try:
+        image.colorspace_settings.is_data = True
+        width, height = image.size
+        pixels = np.empty(width * height * image.channels, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+    finally:
+        bpy.data.images.remove(image)
+    # Blender stores rows bottom to top
+    return pixels.reshape(height, width, -1)[::-1, :, 0].copy()
+
+
+def load_depth(path):
+    """Load a raw float depth frame written as .exr or .npy.
+
+    Returns:
+        numpy.ndarray: 2D float32 array of camera distances
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npy":
+        depth = np.load(path)
+    elif ext == ".exr":
+        depth = _load_exr(path)
+    else:
+        raise ValueError(f"Unsupported raw depth format: {path}")
+
+    depth = np.asarray(depth, dtype=np.float32)
+    if depth.ndim == 3:
+        depth = depth[..., 0]
+    return depth
+
+
+def read_exr_header(data):
+    """Parse the header of a single-part scanline EXR.
+
+    Returns:
+        tuple: (attributes: dict name -> (type name, value bytes), offset of
+            the byte after the header, where the line offset table starts)
+
+    Raises:
+        ValueError: If ``data`` holds no complete single-part scanline header
+    """
+    if data[:4] != EXR_MAGIC:
+        raise ValueError("Not an OpenEXR file")
+    if len(data) < 8:
+        raise ValueError("Truncated OpenEXR header")
+    if struct.unpack_from("<I", data, 4)[0] & _EXR_UNSUPPORTED_FLAGS:
+        raise ValueError("Tiled, deep or multipart OpenEXR files are not supported")
+    attributes, position = {}, 8
+    while True:
+        name_end = data.find(b"\0", position)
+        if name_end < 0:
+            raise ValueError("Truncated OpenEXR header")
+        if name_end == position:
+            return attributes, position + 1
+        type_end = data.find(b"\0", name_end + 1)
+        if type_end < 0 or type_end + 5 > len(data):
+            raise ValueError("Truncated OpenEXR header")
+        size = struct.unpack_from("<i", data, type_end + 1)[0]
+        start = type_end + 5
+        if size < 0 or start + size > len(data):
+            raise ValueError("Truncated OpenEXR header")
+        attributes[data[position:name_end].decode("latin-1")] = (
+            data[name_end + 1:type_end].decode("latin-1"), data[start:start + size])
+        position = start + size
+
+
+def exr_channels(attributes):
+    """(name, NumPy dtype) of each channel of a parsed EXR header, in file order."""
+    value = attributes["channels"][1]
+    channels, position = [], 0
+    while position < len(value) and value[position:position + 1] != b"\0":
+        name_end = value.index(b"\0", position)
+        pixel_type = struct.unpack_from("<i", value, name_end + 1)[0]
+        if pixel_type not in _EXR_PIXEL_TYPES:
+            raise ValueError(f"Unknown OpenEXR pixel type {pixel_type}")
+        channels.append((value[position:name_end].decode("latin-1"),
+                         _EXR_PIXEL_TYPES[pixel_type]))
+        # Name, then pixel type, pLinear + 3 reserved bytes, x / y sampling
+        position = name_end + 17
+    return channels
+
+
+def exr_data_window(attributes):
+    """(x_min, y_min, width, height) of a parsed EXR header's data window."""
+    x_min, y_min, x_max, y_max = struct.unpack("<iiii", attributes["dataWindow"][1])
+    return x_min, y_min, x_max - x_min + 1, y_max - y_min + 1
+
+
+def _decode_exr(data):
+    """Decode the first channel of an uncompressed scanline EXR as float32.
+
+    Returns:
+        numpy.ndarray or None: None for compressed files
+    """
+    attributes, position = read_exr_header(data)
+    if attributes["compression"][1] != b"\0":
+        return None
+    _x_min, y_min, width, height = exr_data_window(attributes)
+    dtype = exr_channels(attributes)[0][1]
+    depth = np.empty((height, width), dtype=np.float32)
+    offsets = np.frombuffer(data, dtype="<u8", count=height, offset=position)
+    for offset in offsets.tolist():
+        # Line block: y, byte count, then each channel's row in file order
+        y = struct.unpack_from("<i", data, offset)[0]
+        depth[y - y_min] = np.frombuffer(data, dtype=dtype, count=width, offset=offset + 8)
+    return depth
+
+
+def _load_exr_layers(path, layers):
+    """Read the first channel of each named layer of a multilayer EXR as float32.
+
+    Returns:
+        dict: Layer name -> 2D array (rows top to bottom)
+    """
+    try:
+        import OpenImageIO as oiio
+    except ImportError:
+        oiio = None
+
+    if oiio is not None:
+        image = oiio.ImageInput.open(path)
+        if image is None:
+            raise OSError(f"Cannot open {path}: {oiio.geterror()}")
+        try:
+            names = list(image.spec().channelnames)
+            result = {}
+            for layer in layers:
+                index = _first_layer_channel(names, layer, path)
+                pixels = image.read_image(0, 0, index, index + 1, "float")
+                if pixels is None:
+                    raise OSError(f"Cannot read {path}")
+                result[layer] = np.asarray(pixels, dtype=np.float32).reshape(pixels.shape[:2])
+        finally:
+            image.close()
+        return result
+
+    try:
+        import Imath
+        import OpenEXR
+    except ImportError as e:
+        raise ImportError(
+            "Reading multilayer EXR requires the OpenImageIO or OpenEXR Python bindings"
+        ) from e
+
+    exr = OpenEXR.InputFile(path)
+    try:
+        header = exr.header()
+        window = header["dataWindow"]
+        width = window.max.x - window.min.x + 1
+        height = window.max.y - window.min.y + 1
+        names = sorted(header["channels"])
+        result = {}
+        for layer in layers:
+            channel = names[_first_layer_channel(names, layer, path)]
+            data = exr.channel(channel, Imath.PixelType(Imath.PixelType.FLOAT))
+            result[layer] = np.frombuffer(data, dtype=np.float32).reshape(height, width)
+    finally:
+        exr.close()
+    return result
+
+
+def _first_layer_channel(names, layer, path):
+    """Index of the first ``<layer>.<channel>`` name (V, R, ... as Blender writes them)."""
+    for index, name in enumerate(names):
+        if name.split(".")[0] == layer:
+            return index
+    raise ValueError(f"No '{layer}' layer in {path} (channels: {names})")
+
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = np.abs(p - a), np.abs(p - b), np.abs(p - c)
+    return np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c))
+
+
+def _unfilter_wavefront(lines, kinds, previous, bpp):
+    """Undo any mix of PNG filters on a block of rows, one anti-diagonal at a time.
+
+    Average and Paeth predict each pixel from its left, upper and upper-left
+    neighbours, so within a row they can't be vectorized. All those
+    neighbours of a pixel lie on the previous anti-diagonal, though: each
+    step decodes every pixel with x + y == step at once, width + height - 1
+    vectorized steps instead of one per pixel.
+    """
+    height, stride = lines.shape
+    width = stride // bpp
+    lines = lines.reshape(height, width, bpp).astype(np.int16)
+    # One row of padding above (the previous row) and one column on the left (zeros)
+    out = np.zeros((height + 1, width + 1, bpp), dtype=np.int16)
+    out[0, 1:] = previous.reshape(width, bpp)
+    kinds = kinds.astype(np.int16)
+    for step in range(height + width - 1):
+        ys = np.arange(max(0, step - width + 1), min(height - 1, step) + 1)
+        xs = step - ys
+        left, up, upper_left = out[ys + 1, xs], out[ys, xs + 1], out[ys, xs]
+        kind = kinds[ys][:, None]
+        predicted = np.select(
+            (kind == 1, kind == 2, kind == 3, kind == 4),
+            (left, up, (left + up) >> 1, _paeth(left, up, upper_left)),
+        )
+        out[ys + 1, xs + 1] = (lines[ys, xs] + predicted) & 0xFF
+    return out[1:, 1:].reshape(height, stride).astype(np.uint8)
+
+
+def _unfilter(data, height, stride, bpp):
+    """Undo the per-row PNG filters of decompressed IDAT data.
+
+    None, Sub and Up rows are vectorized row by row. The rows from the first
+    to the last Average or Paeth row depend on their left neighbours and are
+    decoded together by _unfilter_wavefront.
+    """
+    rows = np.frombuffer(data, dtype=np.uint8)[:height * (stride + 1)]
+    rows = rows.reshape(height, stride + 1)
+    kinds, lines = rows[:, 0], rows[:, 1:]
+    if kinds.size and kinds.max() > 4:
+        raise ValueError(f"Invalid PNG filter type {kinds.max()}")
+    predicted_rows = np.flatnonzero(kinds >= 3)
+    out = np.empty((height, stride), dtype=np.uint8)
+    previous = np.zeros(stride, dtype=np.uint8)
+    y = 0
+    while y < height:
+        kind, line = kinds[y], lines[y]
+        if kind >= 3:
+            end = predicted_rows[-1] + 1
+            out[y:end] = _unfilter_wavefront(lines[y:end], kinds[y:end], previous, bpp)
+            previous = out[end - 1]
+            y = end
+            continue
+        if kind == 0:
+            row = line
+        elif kind == 1:
+            row = np.cumsum(line.reshape(-1, bpp), axis=0, dtype=np.uint8).ravel()
+        else:
+            row = line + previous
+        out[y] = row
+        previous = out[y]
+        y += 1
+    return out
+
+
+def _decode_png(data):
+    """Decode non-interlaced 8/16-bit gray, gray+alpha, RGB or RGBA PNG bytes."""
+    if data[:8] != _PNG_SIGNATURE:
+        raise ValueError("Not a PNG file")
+    position, header, idat = 8, None, []
+    while position < len(data):
+        length, kind = struct.unpack(">I4s", data[position:position + 8])
+        chunk = data[position + 8:position + 8 + length]
+        position += 12 + length
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", chunk)
+        elif kind == b"IDAT":
+            idat.append(chunk)
+        elif kind == b"IEND":
+            break
+
+    width, height, bit_depth, color_type, _compression, _filter, interlace = header
+    channels = {v: k for k, v in _PNG_COLOR_TYPES.items()}.get(color_type)
+    if channels is None or bit_depth not in (8, 16) or interlace:
+        raise ValueError(f"Unsupported PNG (color type {color_type}, {bit_depth}-bit, "
+                         f"interlace {interlace})")
+
+    bpp = channels * bit_depth // 8
+    rows = _unfilter(zlib.decompress(b"".join(idat)), height, width * bpp, bpp)
+    if bit_depth == 16:
+        return rows.view(">u2").astype(np.uint16).reshape(height, width, channels)
+    return rows.reshape(height, width, channels)
+
+
+def read_png(path):
+    """Read an 8/16-bit PNG as integer pixels.
+
+    Uses OpenCV when installed, otherwise a NumPy decoder (exact, but slow
+    on rows compressed with the Average or Paeth filters).
+
+    Returns:
+        numpy.ndarray: (H, W, C) uint8 or uint16 array, rows top to bottom
+    """
+    try:
+        import cv2
+    except ImportError:
+        cv2 = None
+
+    if cv2 is not None:
+        pixels = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if pixels is None:
+            raise OSError(f"Cannot read {path}")
+        if pixels.ndim == 2:
+            return pixels[..., np.newaxis]
+        # OpenCV orders channels BGR(A)
+        order = [2, 1, 0, 3][:pixels.shape[2]] if pixels.shape[2] >= 3 else [0, 1]
+        return pixels[..., order]
+
+    with open(path, "rb") as f:
+        return _decode_png(f.read())
+
+
+def load_packed(path):
+    """Load a packed depth + mask frame (``depth_mask_####``) as written by the addon.
+
+    PNG files carry depth in red and the mask in green; multilayer EXR
+    files carry ``depth`` and ``mask`` layers.
+
+    Returns:
+        tuple: (depth, mask) 2D float32 arrays, rows top to bottom; PNG
+            values are scaled to [0, 1]
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".png":
+        pixels = read_png(path)
+        scale = 65535.0 if pixels.dtype == np.uint16 else 255.0
+        values = pixels.astype(np.float32) / scale
+        return values[..., 0], values[..., 1]
+    if ext == ".exr":
+        layers = _load_exr_layers(path, ("depth", "mask"))
+        return layers["depth"], layers["mask"]
+    raise ValueError(f"Unsupported packed format: {path}")
+
+
+def quantize(values, bit_depth=16):
+    """Convert [0, 1] floats to uint8/uint16, clamping and rounding like Blender."""
+    max_value = 65535 if str(bit_depth) == '16' else 255
+    dtype = np.uint16 if max_value == 65535 else np.uint8
+    scaled = np.clip(values, 0.0, 1.0) * max_value + 0.5
+    return scaled.astype(dtype)
+
+
+def _png_chunk(kind, data):
+    return (struct.pack(">I", len(data)) + kind + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+
+def encode_png(pixels, compress_level=1):
+    """Encode a uint8/uint16 image as PNG bytes.
+
+    Args:
+        pixels: (H, W) or (H, W, C) array with C in 1..4, rows top to bottom
+        compress_level: zlib level 0-9 (1 favors speed for large depth frames)
+
+    Returns:
+        bytes: A complete PNG file
+    """
+    pixels = np.asarray(pixels)
+    if pixels.ndim == 2:
+        pixels = pixels[..., np.newaxis]
+    height, width, channels = pixels.shape
+    if channels not in _PNG_COLOR_TYPES:
+        raise ValueError(f"Unsupported channel count: {channels}")
+    if pixels.dtype == np.uint16:
+        bit_depth = 16
+        raw = pixels.astype(">u2").view(np.uint8)
+    elif pixels.dtype == np.uint8:
+        bit_depth = 8
+        raw = pixels
+    else:
+        raise ValueError(f"Pixels must be uint8 or uint16, got {pixels.dtype}")
+
+    # Filter type 0 (None) for every row
+    rows = raw.reshape(height, -1)
+    scanlines = np.zeros((height, rows.shape[1] + 1), dtype=np.uint8)
+    scanlines[:, 1:] = rows
+
+    header = struct.pack(">IIBBBBB", width, height, bit_depth,
+                         _PNG_COLOR_TYPES[channels], 0, 0, 0)
+    return b"".join((
+        _PNG_SIGNATURE,
+        _png_chunk(b"IHDR", header),
+        _png_chunk(b"IDAT", zlib.compress(scanlines.tobytes(), compress_level)),
+        _png_chunk(b"IEND", b""),
+    ))
+
+
+def _exr_attribute(name, kind, value):
+    return b"".join((name.encode(), b"\0", kind.encode(), b"\0",
+                     struct.pack("<i", len(value)), value))
+
+
+def encode_exr(values):
+    """Encode a 2D float array as an uncompressed single-channel (``Y``) float32 EXR.
+
+    Args:
+        values: (H, W) array, rows top to bottom
+
+    Returns:
+        bytes: A complete scanline OpenEXR file
+    """
+    values = np.ascontiguousarray(values, dtype="<f4")
+    height, width = values.shape
+    window = struct.pack("<iiii", 0, 0, width - 1, height - 1)
+    header = b"".join((
+        EXR_MAGIC, struct.pack("<I", 2),
+        # Channel Y: FLOAT, linear flag and reserved bytes, 1 x 1 sampling
+        _exr_attribute("channels", "chlist", b"Y\0" + struct.pack("<iB3xii", 2, 0, 1, 1)
+                       + b"\0"),
+        _exr_attribute("compression", "compression", b"\0"),
+        _exr_attribute("dataWindow", "box2i", window),
+        _exr_attribute("displayWindow", "box2i", window),
+        _exr_attribute("lineOrder", "lineOrder", b"\0"),
+        _exr_attribute("pixelAspectRatio", "float", struct.pack("<f", 1.0)),
+        _exr_attribute("screenWindowCenter", "v2f", struct.pack("<ff", 0.0, 0.0)),
+        _exr_attribute("screenWindowWidth", "float", struct.pack("<f", 1.0)),
+        b"\0",
+    ))
+    # One scanline per line block, after the table of block offsets
+    line_bytes = width * 4
+    blocks = np.empty((height, 8 + line_bytes), dtype=np.uint8)
+    blocks[:, :4] = np.arange(height, dtype="<i4").view(np.uint8).reshape(height, 4)
+    blocks[:, 4:8] = np.frombuffer(struct.pack("<i", line_bytes), dtype=np.uint8)
+    blocks[:, 8:] = values.view(np.uint8).reshape(height, line_bytes)
+    offsets = len(header) + 8 * height + np.arange(height, dtype="<u8") * (8 + line_bytes)
+    return header + offsets.astype("<u8").tobytes() + blocks.tobytes()
+
+
+def png_compress_level(compression):
+    """zlib level Blender uses for a PNG compression percentage (15% -> 1)."""
+    return max(0, min(9, int(compression) // 11))
+
+
+def write_atomic(path, data):
+    """Write bytes through a temporary name and rename, so readers never see partial files."""
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_png(path, values, bit_depth=16, compress_level=1):
+    """Quantize [0, 1] float values (or pass integer pixels through) and write a PNG."""
+    values = np.asarray(values)
+    if values.dtype.kind == 'f':
+        values = quantize(values, bit_depth)
+    write_atomic(path, encode_png(values, compress_level))
+
+
+def write_npy(path, values):
+    """Write a float32 array as .npy through write_atomic()."""
+    buffer = io.BytesIO()
+    np.save(buffer, np.asarray(values, dtype=np.float32))
+    write_atomic(path, buffer.getvalue())
+
+
+def write_exr(path, values):
+    """Write a float array as an uncompressed float32 EXR through write_atomic()."""
+    write_atomic(path, encode_exr(values))
@@ -0,0 +1,237 @@
+"""Split object-index label maps into per-index masks with NumPy.
+
+One render writes the raw IndexOB pass; this post-stage turns it into a
+16-bit label map (``labels_####.png``, pixel value = object pass index)
+and any number of binary masks, so isolating N objects costs one render
+instead of N. Per frame and index it also records the pixel count and the
+bounding box, saved as ``label_stats.json``.
+
+Runs inside or outside Blender (NumPy required)::
+
+    python -m depth_map_generator.utils.label_split depth_maps/raw mask_maps \\
+        --indices 1,3,5-9 --workers 16
+
+Masks use the DM_MaskCompare rule (``|index - n| <= 0.5``) and are written
+to ``index_<n>/mask_####.png`` below the output directory.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import frames
+
+RAW_INDEX_PREFIX = "raw_index_"
+LABEL_PREFIX = "labels_"
+MASK_PREFIX = "mask_"
+STATS_FILENAME = "label_stats.json"
+
+
+def parse_indices(text):
+    """Parse a list of pass indices such as ``"1, 3, 5-9"``.
+
+    Returns:
+        list: Sorted unique indices; empty for empty text
+
+    Raises:
+        ValueError: For malformed entries or indices outside 0-65535
+    """
+    indices = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if "-" in part:
+                first, last = (int(value) for value in part.split("-", 1))
+            else:
+                first = last = int(part)
+        except ValueError:
+            raise ValueError(f"Invalid pass index entry: '{part}'") from None
+        if first > last:
+            raise ValueError(f"Invalid pass index range: '{part}'")
+        if first < 0 or last > 65535:
+            raise ValueError(f"Pass indices must be within 0-65535: '{part}'")
+        indices.update(range(first, last + 1))
+    return sorted(indices)
+
+
+def to_labels(index_pass):
+    """Round a float IndexOB pass to a uint16 label map."""
+    return np.clip(np.rint(index_pass), 0, 65535).astype(np.uint16)
+
+
+def load_labels(path):
+    """Load a ``labels_####.png`` label map as a 2D uint16 array (rows top to bottom)."""
+    return frames.read_png(path)[..., 0]
+
+
+def split_labels(labels, indices=None):
+    """Split a label map into binary masks, pixel counts and bounding boxes.
+
+    Args:
+        labels: 2D uint16 label map
+        indices: Pass indices to extract (None = every non-zero index present)
+
+    Returns:
+        tuple: (masks: (K, H, W) bool array in ``indices`` order,
+            stats: dict index -> {"pixels": int, "bbox": [x_min, y_min,
+            x_max, y_max] (inclusive, rows top to bottom) or None})
+    """
+    labels = np.asarray(labels)
+    if indices is None:
+        indices = [int(index) for index in np.unique(labels) if index]
+    indices = np.asarray(indices, dtype=labels.dtype)
+
+    masks = labels[np.newaxis] == indices[:, np.newaxis, np.newaxis]
+    counts = masks.sum(axis=(1, 2))
+    rows = masks.any(axis=2)
+    cols = masks.any(axis=1)
+    height, width = labels.shape
+    y_min = rows.argmax(axis=1)
+    y_max = height - 1 - rows[:, ::-1].argmax(axis=1)
+    x_min = cols.argmax(axis=1)
+    x_max = width - 1 - cols[:, ::-1].argmax(axis=1)
+
+    stats = {}
+    for k, index in enumerate(indices.tolist()):
+        bbox = None
+        if counts[k]:
+            bbox = [int(x_min[k]), int(y_min[k]), int(x_max[k]), int(y_max[k])]
+        stats[index] = {"pixels": int(counts[k]), "bbox": bbox}
+    return masks, stats
+
+
+def mask_dir(dst_dir, index):
+    """Directory of the mask sequence of one pass index."""
+    return os.path.join(dst_dir, f"index_{index}")
+
+
+def split_file(src_path, dst_dir, frame, indices=None, label_prefix=LABEL_PREFIX,
+               mask_prefix=MASK_PREFIX, bit_depth=16, compress_level=1):
+    """Write the label map and per-index masks of one raw index frame.
+
+    Returns:
+        tuple: (frame, stats dict from split_labels())
+    """
+    labels = to_labels(frames.load_depth(src_path))
+    frames.write_png(os.path.join(dst_dir, frames.frame_filename(label_prefix, frame)),
+                     labels, compress_level=compress_level)
+
+    masks, stats = split_labels(labels, indices)
+    if indices:
+        for mask, index in zip(masks, stats):
+            frames.write_png(
+                os.path.join(mask_dir(dst_dir, index),
+                             frames.frame_filename(mask_prefix, frame)),
+                mask.astype(np.float32), bit_depth, compress_level,
+            )
+    return frame, stats
+
+
+def _split_task(args):
+    return split_file(*args)
+
+
+def split_sequence(sources, dst_dir, indices=None, workers=None, label_prefix=LABEL_PREFIX,
+                   mask_prefix=MASK_PREFIX, bit_depth=16, compress_level=1,
+                   stats_path=None):
+    """Split raw index frames (frame -> path) into label maps and masks using a process pool.
+
+    Args:
+        sources: dict frame -> raw IndexOB ``.exr`` / ``.npy`` path
+        dst_dir: Directory for the label maps; masks go to ``index_<n>/``
+        indices: Pass indices to write masks for (None / empty = no masks;
+            statistics then cover every non-zero index present)
+        workers: Process count (None = os.cpu_count(), 1 = in-process)
+        bit_depth: Bit depth of the mask PNGs
+        compress_level: zlib level for the PNG output
+        stats_path: Where to save the statistics JSON (default:
+            label_stats.json in ``dst_dir``)
+
+    Returns:
+        dict: frame -> {index: {"pixels", "bbox"}}
+    """
+    indices = list(indices or [])
+    os.makedirs(dst_dir, exist_ok=True)
+    for index in indices:
+        os.makedirs(mask_dir(dst_dir, index), exist_ok=True)
+
+    tasks = [
+        (path, dst_dir, frame, indices or None, label_prefix, mask_prefix, bit_depth,
+         compress_level)
+        for frame, path in sorted(sources.items())
+    ]
+    if workers == 1 or len(tasks) <= 1:
+        results = [_split_task(task) for task in tasks]
+    else:
+        chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_split_task, tasks, chunksize=chunksize))
+
+    stats = dict(results)
+    save_stats(stats, stats_path or os.path.join(dst_dir, STATS_FILENAME))
+    return stats
+
+
+def save_stats(stats, path):
+    """Save per-frame label statistics as JSON (frame and index keys become strings)."""
+    data = {
+        "frames": {
+            str(frame): {str(index): entry for index, entry in frame_stats.items()}
+            for frame, frame_stats in sorted(stats.items())
+        },
+    }
+    frames.write_atomic(path, json.dumps(data, indent=1).encode("utf-8"))
+
+
+def load_stats(path):
+    """Load label statistics saved by save_stats() as frame -> index -> entry."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {
+        int(frame): {int(index): entry for index, entry in frame_stats.items()}
+        for frame, frame_stats in data["frames"].items()
+    }
+
+
+def find_index_frames(src_dir, src_prefix=RAW_INDEX_PREFIX):
+    """Map frame -> raw index path for ``.exr`` and ``.npy`` frames in ``src_dir``."""
+    sources = frames.find_frames(src_dir, src_prefix, ".exr")
+    sources.update(frames.find_frames(src_dir, src_prefix, ".npy"))
+    return dict(sorted(sources.items()))
+
+
+def main(argv=None):
+    """Command line entry point. Returns the process exit code."""
+    parser = argparse.ArgumentParser(
+        prog="depth_map_generator.utils.label_split",
+        description="Split raw object-index frames into 16-bit label maps and per-index masks.",
+    )
+    parser.add_argument("src_dir", help="Directory with raw_index_####.exr/.npy frames")
+    parser.add_argument("dst_dir", help="Output directory for labels_####.png and masks")
+    parser.add_argument("--indices", default="",
+                        help="Pass indices to write masks for, e.g. 1,3,5-9")
+    parser.add_argument("--src-prefix", default=RAW_INDEX_PREFIX)
+    parser.add_argument("--bit-depth", choices=('8', '16'), default='16')
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--compress-level", type=int, default=1, choices=range(10))
+    args = parser.parse_args(argv)
+
+    try:
+        indices = parse_indices(args.indices)
+    except ValueError as e:
+        parser.error(str(e))
+    sources = find_index_frames(args.src_dir, args.src_prefix)
+    stats = split_sequence(sources, args.dst_dir, indices, workers=args.workers,
+                           bit_depth=args.bit_depth, compress_level=args.compress_level)
+    print(f"Split {len(stats)} frames into {len(indices)} masks in {args.dst_dir}")
+    return 0 if stats else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Carry DepthMapSettings edits into the compositor tree while the user edits them.
+
+Depth settings call request() from their ``update=`` callbacks. The first
+edit registers a timer; edits until it fires only mark the scene dirty, so
+a slider drag syncs about every SYNC_INTERVAL seconds instead of once per
+value. The sync is pipeline.ensure_pipeline(): value edits (near / far,
+contrast, brightness, scale, mask index) only write the differing inputs
+of the existing LIVE_NODES, a normalization change reconciles just the
+DM_ nodes of the depth chain that differ. Nothing is synced before the
+pipeline was set up, with ``live_sync`` off or in background mode; cancel()
+drops a pending sync when the addon is unregistered.
+"""
+
+import bpy
+
+from . import pipeline, rendering
+
+SYNC_INTERVAL = 0.1
+
+# Names of the scenes edited since the last sync
+_dirty = set()
+
+
+def request(context):
+    """Queue a sync of ``context.scene``'s pipeline (property update callback)."""
+    scene = context.scene
+    settings = scene.depth_map_settings
+    # Batch renders set settings from scripts and run setup themselves
+    if bpy.app.background or not (settings.live_sync and settings.setup_complete):
+        return
+    _dirty.add(scene.name)
+    if not bpy.app.timers.is_registered(_flush):
+        bpy.app.timers.register(_flush, first_interval=SYNC_INTERVAL)
+
+
+def pending():
+    """Whether edits are waiting for the next sync."""
+    return bool(_dirty)
+
+
+def cancel():
+    """Drop queued edits and the pending sync timer (addon unregister)."""
+    _dirty.clear()
+    if bpy.app.timers.is_registered(_flush):
+        bpy.app.timers.unregister(_flush)
+
+
+def _flush():
+    context = bpy.context
+    scene = context.scene
+    names = set(_dirty)
+    _dirty.clear()
+    # Edits come from the UI of the active scene; others sync at the next setup
+    if scene is None or scene.name not in names:
+        return None
+    try:
+        settings = scene.depth_map_settings
+        pipeline.ensure_pipeline(context, settings, rendering.get_addon_prefs(context))
+    except RuntimeError as e:
+        print(f"[depth_map_generator] Live update: {e}")
+    except Exception as e:
+        print(f"[depth_map_generator] Live update failed: {e}")
+    # Timer callback: None = don't repeat
+    return None
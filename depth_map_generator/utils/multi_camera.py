@@ -0,0 +1,185 @@
+"""Render depth from several cameras of a scene in one batch.
+
+The DM_ pipeline is built once. Per camera only ``scene.camera`` and
+``settings.camera_subdir`` change; paths.get_depth_output_dir() then
+resolves to ``<output>/<camera>/``, so reconciling the pipeline rewrites
+just the FileOutput base paths, without rebuilding nodes or evaluating
+the scene. The depth-only render profile is applied once for the whole
+batch and covers every camera.
+
+Blocking batches (CLI, background mode) render the cameras in a loop.
+Interactive batches start the next camera from a timer once the previous
+camera's render has fully ended (rendering.when_render_finished()).
+"""
+
+import bpy
+
+from . import paths, render_profile, rendering
+
+# The camera batch in progress, if any
+_active = None
+
+
+def get_active():
+    """Return the camera batch in progress, if any."""
+    return _active
+
+
+def batch_cameras(scene, names=""):
+    """Resolve the cameras of a batch.
+
+    Args:
+        scene: Scene whose objects are searched
+        names: Comma-separated camera object names; empty selects every
+            camera object in the scene, sorted by name
+
+    Returns:
+        list: Camera objects in render order
+
+    Raises:
+        ValueError: For names that are not camera objects of the scene
+    """
+    wanted = [name.strip() for name in names.split(",") if name.strip()]
+    if not wanted:
+        return sorted((obj for obj in scene.objects if obj.type == 'CAMERA'),
+                      key=lambda obj: obj.name)
+
+    cameras = []
+    for name in wanted:
+        obj = scene.objects.get(name)
+        if obj is None or obj.type != 'CAMERA':
+            raise ValueError(f"'{name}' is not a camera in scene '{scene.name}'")
+        cameras.append(obj)
+    return cameras
+
+
+def camera_output_dirs(settings, cameras, prefs=None):
+    """Map camera name -> depth output directory the batch writes it to."""
+    subdir = settings.camera_subdir
+    try:
+        dirs = {}
+        for camera in cameras:
+            settings.camera_subdir = paths.folder_name(camera.name)
+            dirs[camera.name] = paths.get_depth_output_dir(settings, prefs)
+        return dirs
+    finally:
+        settings.camera_subdir = subdir
+
+
+class CameraBatch:
+    """Renders the same depth pipeline once per camera into per-camera folders.
+
+    Args:
+        context: Blender context (scene, view layer, window)
+        cameras: Camera objects, rendered in the given order
+        render: Callable starting the depth render of the active camera;
+            returns the operator result set
+        on_finish: Optional callback(batch) once every camera is done or
+            the batch was cancelled
+    """
+
+    def __init__(self, context, cameras, render, on_finish=None):
+        self.scene = context.scene
+        self.view_layer = context.view_layer
+        self.settings = self.scene.depth_map_settings
+        self.cameras = list(cameras)
+        self.render = render
+        self.on_finish = on_finish
+        self.done = []
+        self.failed = []
+        self.cancelled = False
+        self.current = None
+        self._pending = list(self.cameras)
+        self._window = None
+        self._original_camera = None
+        self._restore_profile = None
+
+    @property
+    def progress(self):
+        return {"done": len(self.done), "total": len(self.cameras),
+                "camera": self.current.name if self.current else None}
+
+    def run_blocking(self):
+        """Render every camera in place. Returns the names of the rendered cameras."""
+        self._begin()
+        try:
+            for camera in self._pending:
+                self._activate(camera)
+                if 'CANCELLED' in self.render():
+                    self.failed.append(camera.name)
+                    self.cancelled = True
+                    break
+                self.done.append(camera.name)
+        finally:
+            self._pending = []
+            self._finish()
+        return self.done
+
+    def start(self, context):
+        """Render the cameras one after another, interactively."""
+        self._window = context.window
+        self._begin()
+        bpy.app.handlers.render_cancel.append(self._on_cancel)
+        self._render_next()
+        return not self.cancelled
+
+    def _begin(self):
+        global _active
+        _active = self
+        self._original_camera = self.scene.camera
+        self._restore_profile = render_profile.begin(
+            self.scene, self.view_layer, self.settings, cameras=self.cameras
+        )
+
+    def _activate(self, camera):
+        self.current = camera
+        self.scene.camera = camera
+        self.settings.camera_subdir = paths.folder_name(camera.name)
+
+    def _render_next(self):
+        if self.cancelled or not self._pending:
+            self._finish()
+            return None
+        camera = self._pending.pop(0)
+        self._activate(camera)
+        rendering.when_render_finished(self._on_camera_done)
+        try:
+            result = rendering.call_in_window(self._window, self.render)
+        except Exception:
+            rendering.forget_render_finished(self._on_camera_done)
+            self.failed.append(camera.name)
+            self.cancelled = True
+            self._finish()
+            raise
+        if 'CANCELLED' in result:
+            rendering.forget_render_finished(self._on_camera_done)
+            self.failed.append(camera.name)
+            self.cancelled = True
+            self._finish()
+        # Timer callback: None = don't repeat
+        return None
+
+    def _on_camera_done(self):
+        if not self.cancelled:
+            self.done.append(self.current.name)
+        # Starting a render from inside a render handler is not allowed
+        bpy.app.timers.register(self._render_next, first_interval=0.01)
+
+    def _on_cancel(self, *_args):
+        self.cancelled = True
+
+    def _finish(self):
+        global _active
+        if self._on_cancel in bpy.app.handlers.render_cancel:
+            bpy.app.handlers.render_cancel.remove(self._on_cancel)
+        if _active is not self:
+            return
+        _active = None
+        self.current = None
+        self.settings.camera_subdir = ""
+        self.scene.camera = self._original_camera
+        if self._restore_profile:
+            self._restore_profile()
+        if self.on_finish:
+            callback, self.on_finish = self.on_finish, None
+            callback(self)
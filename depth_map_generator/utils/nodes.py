@@ -1,9 +1,16 @@
-"""Node creation and management helpers for the depth map compositor pipeline."""
+"""Node helpers and the declarative spec of the depth map compositor pipeline.
+
+pipeline_spec() describes every DM_ node, its values and links as plain data
+derived from the settings; utils/pipeline.py reconciles a node tree against
+it, touching only what differs.
+"""
 
 import os
 
 import bpy
 
+from . import auto_range
+
 
 def remove_dm_nodes(tree):
     """Remove all nodes with the DM_ prefix from the node tree."""
@@ -31,454 +38,678 @@ def clear_all_nodes(tree):
     tree.links.new(render_layers.outputs['Image'], composite.inputs['Image'])
 
 
+def _as_directory(base_path):
+    """Append a separator so Blender treats base_path as a directory, not a filename prefix."""
+    if base_path and not base_path.endswith(('/', '\\')):
+        base_path = base_path + os.sep
+    return base_path
+
+
+def _slot_paths(prefix, slots=None):
+    """File slot paths: the prefix alone, or ``<slot>/<prefix>`` per named slot."""
+    if not slots:
+        return [prefix]
+    return [f"{slot}/{prefix}" for slot in slots]
+
+
 def configure_file_output(node, base_path, prefix, bit_depth='16',
-                          color_mode='BW'):
+                          color_mode='BW', file_format='PNG', compression=15,
+                          exr_codec='ZIP', layers=None, slots=None):
     """Centralized FileOutput node configuration.
 
     Args:
         node: CompositorNodeOutputFile node
         base_path: Absolute directory path for output
         prefix: Filename prefix (e.g. "depth_" or "depth_map")
-        bit_depth: '8' or '16'
-        color_mode: 'BW' or 'RGBA'
+        bit_depth: '8' or '16' for PNG / TIFF, '16' or '32' for OPEN_EXR
+        color_mode: 'BW', 'RGB' or 'RGBA'
+        file_format: 'PNG', 'OPEN_EXR', 'OPEN_EXR_MULTILAYER' or 'TIFF'
+        compression: PNG compression percentage
+        exr_codec: OPEN_EXR codec, e.g. 'ZIP', 'DWAA' or 'NONE'
+        layers: OPEN_EXR_MULTILAYER layer names, one input socket each
+        slots: Names of several image slots, each written to its own
+            ``<slot>/<prefix>####`` sequence (one input socket each)
     """
-    # Ensure base_path ends with a separator so Blender treats it as a
-    # directory, not a filename prefix.
-    if base_path and not base_path.endswith(('/', '\\')):
-        base_path = base_path + os.sep
-    node.base_path = base_path
-    node.format.file_format = 'PNG'
-    node.format.color_mode = color_mode
-    node.format.color_depth = bit_depth
-    node.format.compression = 15
+    if file_format == 'OPEN_EXR_MULTILAYER':
+        # Multilayer files are named by the base path itself, not per slot
+        node.base_path = os.path.join(base_path, prefix)
+        image_format = node.format
+        image_format.file_format = file_format
+        image_format.color_depth = bit_depth
+        image_format.exr_codec = exr_codec
+        if [slot.name for slot in node.layer_slots] != list(layers):
+            node.layer_slots.clear()
+            for name in layers:
+                node.layer_slots.new(name)
+        return
 
-    node.file_slots[0].path = prefix
-    node.file_slots[0].format.file_format = 'PNG'
-    node.file_slots[0].format.color_mode = color_mode
-    node.file_slots[0].format.color_depth = bit_depth
-    node.file_slots[0].format.compression = 15
+    node.base_path = _as_directory(base_path)
+    slot_paths = _slot_paths(prefix, slots)
+    if len(node.file_slots) != len(slot_paths):
+        node.file_slots.clear()
+        for path in slot_paths:
+            node.file_slots.new(path)
+    for slot, path in zip(node.file_slots, slot_paths):
+        if slot.path != path:
+            slot.path = path
+
+    for image_format in (node.format, *(slot.format for slot in node.file_slots)):
+        image_format.file_format = file_format
+        image_format.color_mode = color_mode
+        image_format.color_depth = bit_depth
+        if file_format == 'OPEN_EXR':
+            image_format.exr_codec = exr_codec
+        elif file_format == 'TIFF':
+            image_format.tiff_codec = 'NONE'
+        else:
+            image_format.compression = compression
+
+
+def file_output_matches(node, base_path, prefix, bit_depth='16', color_mode='BW',
+                        file_format='PNG', compression=15, exr_codec='ZIP', layers=None,
+                        slots=None):
+    """Whether a FileOutput node is already configured as configure_file_output() would."""
+    image_format = node.format
+    if file_format == 'OPEN_EXR_MULTILAYER':
+        return (node.base_path == os.path.join(base_path, prefix)
+                and image_format.file_format == file_format
+                and image_format.color_depth == bit_depth
+                and image_format.exr_codec == exr_codec
+                and [slot.name for slot in node.layer_slots] == list(layers))
+    if file_format == 'OPEN_EXR':
+        codec_matches = image_format.exr_codec == exr_codec
+    elif file_format == 'TIFF':
+        codec_matches = image_format.tiff_codec == 'NONE'
+    else:
+        codec_matches = image_format.compression == compression
+    return (node.base_path == _as_directory(base_path)
+            and [slot.path for slot in node.file_slots] == _slot_paths(prefix, slots)
+            and image_format.file_format == file_format
+            and image_format.color_mode == color_mode
+            and image_format.color_depth == bit_depth
+            and codec_matches)
 
 
-def _create_render_layers(tree):
-    """Create a fresh DM_RenderLayers node.
+def output_encoding(settings):
+    """configure_file_output() format arguments for the depth and mask files.
 
-    Always creates a new node so its output sockets reflect the current
-    view layer pass configuration (Depth, IndexOB, etc.). Existing
-    RenderLayers nodes are left untouched to preserve user setups.
+    NUMPY files are written by the background encoder; the (muted) nodes
+    stay configured as PNG.
     """
-    render_layers = tree.nodes.new(type='CompositorNodeRLayers')
-    render_layers.name = "DM_RenderLayers"
-    render_layers.label = "Depth Map Input"
-    render_layers.location = (0, 0)
-    return render_layers
+    if settings.output_format == 'OPEN_EXR':
+        return {"file_format": 'OPEN_EXR', "bit_depth": settings.exr_precision,
+                "exr_codec": settings.exr_codec}
+    if settings.output_format == 'TIFF':
+        return {"file_format": 'TIFF', "bit_depth": settings.output_bit_depth}
+    return {"file_format": 'PNG', "bit_depth": settings.output_bit_depth,
+            "compression": settings.png_compression}
 
 
-def _create_linear_pipeline(tree, render_layers, settings):
-    """LINEAR normalization: Depth -> MapRange(inverted) -> Contrast -> ColorRamp.
+def depth_range(settings):
+    """Return the (From Min, From Max) inputs of the DM_RangeMapper node.
 
-    Returns the final output socket to connect to output nodes.
+    Auto range takes precedence over the custom range; both fall back to
+    0.1-1000 when disabled.
     """
-    # MapRange node
-    map_range = tree.nodes.new(type='CompositorNodeMapRange')
-    map_range.name = "DM_RangeMapper"
-    map_range.label = "Depth Range Adjuster"
-    map_range.location = (200, 0)
-
+    if settings.use_auto_range:
+        return auto_range.mapping_range(settings.auto_near, settings.auto_far, settings)
     if settings.use_custom_range:
-        map_range.inputs['From Min'].default_value = settings.near_distance
-        map_range.inputs['From Max'].default_value = settings.far_distance
-    else:
-        map_range.inputs['From Min'].default_value = 0.1
-        map_range.inputs['From Max'].default_value = 1000.0
+        return settings.near_distance, settings.far_distance
+    return 0.1, 1000.0
+
+
+def wants_sequence_pass(settings):
+    """Whether depth PNGs come from the post-render sequence statistics pass.
+
+    The DM_FileOutput node is muted then; the pass normalizes the raw depth.
+    """
+    if settings.depth_output_method != 'FILE_OUTPUT':
+        return False
+    if settings.depth_normalization == 'HISTOGRAM':
+        return True
+    return (settings.use_sequence_range and settings.render_animation
+            and settings.depth_normalization != 'RAW')
 
-    # Invert output range for proper depth visualization
-    map_range.inputs['To Min'].default_value = 1.0
-    map_range.inputs['To Max'].default_value = 0.0
 
-    tree.links.new(render_layers.outputs['Depth'], map_range.inputs['Value'])
+def wants_async_encoding(settings):
+    """Whether depth / mask PNGs are encoded in the background from the DM_Viewer output.
 
-    # Contrast node
-    contrast = tree.nodes.new(type='CompositorNodeBrightContrast')
-    contrast.name = "DM_Contrast"
-    contrast.label = "Enhance Depth Contrast"
-    contrast.location = (400, 0)
-    contrast.inputs['Contrast'].default_value = settings.contrast_value
-    contrast.inputs['Bright'].default_value = settings.brightness_value
-    tree.links.new(map_range.outputs['Value'], contrast.inputs['Image'])
+    The DM_FileOutput and DM_MaskFileOutput nodes are muted then; the
+    Viewer carries depth in its color and the mask in its alpha. NumPy
+    output always takes this path, PNG when async_encoding is enabled.
+    Background renders (``blender -b``) never compute the Viewer, so the
+    FileOutput nodes write the files there.
+    """
+    if bpy.app.background:
+        return False
+    if (settings.depth_output_method != 'FILE_OUTPUT' or wants_sequence_pass(settings)
+            or wants_packed_output(settings) or wants_multi_matte(settings)):
+        return False
+    return settings.output_format == 'NUMPY' or (
+        settings.async_encoding and settings.output_format == 'PNG')
 
-    # ColorRamp node
-    colorramp = tree.nodes.new(type='CompositorNodeValToRGB')
-    colorramp.name = "DM_ColorRamp"
-    colorramp.label = "Depth Visualization"
-    colorramp.location = (600, 0)
 
-    if len(colorramp.color_ramp.elements) > 1:
-        colorramp.color_ramp.elements.remove(colorramp.color_ramp.elements[0])
+def wants_stack_output(settings):
+    """Whether animation frames are also written to the stacked depth_stack.npy.
 
-    colorramp.color_ramp.elements[0].position = 0.0
-    colorramp.color_ramp.elements[0].color = (0.0, 0.0, 0.0, 1.0)
-    newstop = colorramp.color_ramp.elements.new(1.0)
-    newstop.color = (1.0, 1.0, 1.0, 1.0)
+    Frames are captured from the DM_Viewer output, which background renders
+    (``blender -b``) never compute; sequence-wide normalization writes its
+    depth files after the render. Both are excluded.
+    """
+    return (settings.stack_sequence and not bpy.app.background
+            and settings.render_animation and settings.depth_output_method == 'FILE_OUTPUT'
+            and not wants_sequence_pass(settings))
 
-    tree.links.new(contrast.outputs['Image'], colorramp.inputs['Fac'])
 
-    return colorramp.outputs[0]
+def wants_comfy_stream(settings):
+    """Whether finished frames are handed to a ComfyUI server while rendering.
 
+    Sequence-wide normalization writes its depth files after the whole
+    render and is excluded.
+    """
+    return (settings.comfy_stream and settings.depth_output_method == 'FILE_OUTPUT'
+            and not wants_sequence_pass(settings))
 
-def _create_logarithmic_pipeline(tree, render_layers, settings):
-    """LOGARITHMIC normalization: Depth -> Multiply(scale) -> Log -> MapRange -> Contrast -> ColorRamp.
 
-    Returns the final output socket.
+def wants_packed_output(settings):
+    """Whether depth and mask are written into one DM_PackedOutput file per frame.
+
+    PNG packs depth into red and the mask into green of a 16-bit RGB file;
+    OpenEXR writes a multilayer file with ``depth`` and ``mask`` layers.
+    DM_FileOutput and DM_MaskFileOutput are left out then.
     """
-    # Scale factor multiply
-    multiply = tree.nodes.new(type='CompositorNodeMath')
-    multiply.name = "DM_ScaleMultiply"
-    multiply.label = "Depth Scale"
-    multiply.location = (200, 0)
-    multiply.operation = 'MULTIPLY'
-    multiply.inputs[1].default_value = settings.depth_scale_factor
-    tree.links.new(render_layers.outputs['Depth'], multiply.inputs[0])
-
-    # Logarithm node
-    log_node = tree.nodes.new(type='CompositorNodeMath')
-    log_node.name = "DM_Logarithm"
-    log_node.label = "Logarithmic Depth"
-    log_node.location = (400, 0)
-    log_node.operation = 'LOGARITHM'
-    log_node.inputs[1].default_value = 10.0
-    tree.links.new(multiply.outputs['Value'], log_node.inputs[0])
-
-    # MapRange node
-    map_range = tree.nodes.new(type='CompositorNodeMapRange')
-    map_range.name = "DM_RangeMapper"
-    map_range.label = "Depth Range Adjuster"
-    map_range.location = (600, 0)
+    return (settings.pack_depth_mask and settings.mask_enabled
+            and settings.depth_output_method == 'FILE_OUTPUT'
+            and settings.output_format in {'PNG', 'OPEN_EXR'}
+            and not (wants_sequence_pass(settings) or wants_multi_matte(settings)))
 
-    if settings.use_custom_range:
-        map_range.inputs['From Min'].default_value = settings.near_distance
-        map_range.inputs['From Max'].default_value = settings.far_distance
-    else:
-        map_range.inputs['From Min'].default_value = 0.1
-        map_range.inputs['From Max'].default_value = 1000.0
 
-    map_range.inputs['To Min'].default_value = 1.0
-    map_range.inputs['To Max'].default_value = 0.0
-    tree.links.new(log_node.outputs['Value'], map_range.inputs['Value'])
+def wants_multi_matte(settings):
+    """Whether listed Cryptomatte mattes are exported from one render.
 
-    # Contrast node
-    contrast = tree.nodes.new(type='CompositorNodeBrightContrast')
-    contrast.name = "DM_Contrast"
-    contrast.label = "Enhance Depth Contrast"
-    contrast.location = (800, 0)
-    contrast.inputs['Contrast'].default_value = settings.contrast_value
-    contrast.inputs['Bright'].default_value = settings.brightness_value
-    tree.links.new(map_range.outputs['Value'], contrast.inputs['Image'])
+    Each matte gets a DM_CryptoMatte_<n> node and its own file slot on the
+    shared DM_CryptoFileOutput, replacing DM_Cryptomatte and DM_MaskFileOutput.
+    """
+    return (settings.mask_enabled and settings.mask_source == 'CRYPTOMATTE'
+            and settings.crypto_matte_mode != 'MANUAL')
 
-    # ColorRamp node
-    colorramp = tree.nodes.new(type='CompositorNodeValToRGB')
-    colorramp.name = "DM_ColorRamp"
-    colorramp.label = "Depth Visualization"
-    colorramp.location = (1000, 0)
 
-    if len(colorramp.color_ramp.elements) > 1:
-        colorramp.color_ramp.elements.remove(colorramp.color_ramp.elements[0])
+def crypto_mattes(settings):
+    """Resolve the listed mattes to (name, Cryptomatte matte ID) pairs.
 
-    colorramp.color_ramp.elements[0].position = 0.0
-    colorramp.color_ramp.elements[0].color = (0.0, 0.0, 0.0, 1.0)
-    newstop = colorramp.color_ramp.elements.new(1.0)
-    newstop.color = (1.0, 1.0, 1.0, 1.0)
+    OBJECTS lists object names, one matte each; COLLECTIONS lists
+    collection names, each matte covering every object in the collection.
 
-    tree.links.new(contrast.outputs['Image'], colorramp.inputs['Fac'])
+    Returns:
+        tuple: (mattes: list of (name, matte_id), errors: list of messages)
+    """
+    names = []
+    for name in (part.strip() for part in settings.crypto_mattes.split(",")):
+        if name and name not in names:
+            names.append(name)
+    if settings.crypto_matte_mode != 'COLLECTIONS':
+        return [(name, name) for name in names], []
+
+    mattes, errors = [], []
+    for name in names:
+        collection = bpy.data.collections.get(name)
+        if collection is None:
+            errors.append(f"Collection '{name}' not found")
+            continue
+        objects = sorted(obj.name for obj in collection.all_objects)
+        if not objects:
+            errors.append(f"Collection '{name}' has no objects")
+            continue
+        mattes.append((name, ",".join(objects)))
+    return mattes, errors
+
+
+def matte_folders(mattes):
+    """Unique mask subfolder per (name, matte_id) pair, in matte order."""
+    from . import paths
 
-    return colorramp.outputs[0]
+    folders = []
+    for name, _matte_id in mattes:
+        folder = base = paths.folder_name(name, "matte")
+        suffix = 1
+        while folder in folders:
+            suffix += 1
+            folder = f"{base}_{suffix}"
+        folders.append(folder)
+    return folders
 
 
-def _create_raw_pipeline(tree, render_layers, settings):
-    """RAW normalization: Depth -> Multiply(scale) -> Contrast -> Output (no MapRange, no ColorRamp).
+def _socket_linked(tree, name, socket=0):
+    node = find_dm_node(tree, name)
+    return node is not None and bool(node.inputs[socket].links)
 
-    Returns the final output socket.
-    """
-    # Scale factor multiply
-    multiply = tree.nodes.new(type='CompositorNodeMath')
-    multiply.name = "DM_ScaleMultiply"
-    multiply.label = "Depth Scale"
-    multiply.location = (200, 0)
-    multiply.operation = 'MULTIPLY'
-    multiply.inputs[1].default_value = settings.depth_scale_factor
-    tree.links.new(render_layers.outputs['Depth'], multiply.inputs[0])
-
-    # Contrast node
-    contrast = tree.nodes.new(type='CompositorNodeBrightContrast')
-    contrast.name = "DM_Contrast"
-    contrast.label = "Enhance Depth Contrast"
-    contrast.location = (400, 0)
-    contrast.inputs['Contrast'].default_value = settings.contrast_value
-    contrast.inputs['Bright'].default_value = settings.brightness_value
-    tree.links.new(multiply.outputs['Value'], contrast.inputs['Image'])
-
-    return contrast.outputs['Image']
-
-
-def create_depth_pipeline(tree, settings, prefs=None):
-    """Build the full depth map compositor pipeline based on normalization mode.
 
-    Args:
-        tree: The compositor node tree
-        settings: DepthMapSettings property group
-        prefs: AddonPreferences (optional, for default paths)
+def unconnected_outputs(tree, settings):
+    """Name the depth / mask outputs that would write nothing in a render.
+
+    Checks the sockets that actually write files for the current settings:
+    the FileOutput nodes, the raw depth output when the sequence pass
+    produces the depth files, the Viewer sockets when encoding runs in
+    the background and the packing inputs of a packed output.
 
     Returns:
-        tuple: (render_layers_node, final_output_socket)
+        list: Human-readable descriptions; empty when both branches are connected
     """
-    render_layers = _create_render_layers(tree)
-
-    normalization = settings.depth_normalization
-    if normalization == 'LINEAR':
-        output_socket = _create_linear_pipeline(tree, render_layers, settings)
-    elif normalization == 'LOGARITHMIC':
-        output_socket = _create_logarithmic_pipeline(tree, render_layers, settings)
-    elif normalization == 'RAW':
-        output_socket = _create_raw_pipeline(tree, render_layers, settings)
+    problems = []
+    if wants_packed_output(settings):
+        depth = _PACKED_INPUTS[settings.output_format][0]
+        if not _socket_linked(tree, "DM_PackedOutput"):
+            problems.append("packed output (DM_PackedOutput) is not connected")
+    elif wants_async_encoding(settings):
+        depth = ("DM_Viewer", 'Image')
+    elif wants_sequence_pass(settings):
+        depth = ("DM_RawDepthOutput", 0)
+    else:
+        depth = ("DM_FileOutput", 0)
+    if settings.depth_output_method != 'FILE_OUTPUT':
+        problems.append("depth is not set to File Output")
+    elif not _socket_linked(tree, *depth):
+        problems.append(f"depth branch ({depth[0]}) is not connected")
+
+    if not settings.mask_enabled:
+        problems.append("alpha mask is disabled")
     else:
-        output_socket = _create_linear_pipeline(tree, render_layers, settings)
+        problem = unconnected_mask_output(tree, settings)
+        if problem and problem not in problems:
+            problems.append(problem)
+    return problems
 
-    return render_layers, output_socket
 
+def unconnected_mask_output(tree, settings):
+    """Describe why the (enabled) mask branch would write nothing.
 
-def _get_output_x_offset(normalization):
-    """Get the X offset for output nodes based on pipeline length."""
-    if normalization == 'LOGARITHMIC':
-        return 1200
-    elif normalization == 'RAW':
-        return 600
-    return 800  # LINEAR
+    Returns:
+        str or None: None when the sockets writing the mask are connected
+    """
+    if wants_multi_matte(settings):
+        node = find_dm_node(tree, "DM_CryptoFileOutput")
+        if node is None or not all(socket.links for socket in node.inputs):
+            return "Cryptomatte mattes (DM_CryptoFileOutput) are not connected"
+        return None
+    if wants_packed_output(settings):
+        if not _socket_linked(tree, "DM_PackedOutput"):
+            return "packed output (DM_PackedOutput) is not connected"
+        mask = _PACKED_INPUTS[settings.output_format][1]
+    elif wants_async_encoding(settings):
+        mask = ("DM_Viewer", 'Alpha')
+    else:
+        mask = ("DM_MaskFileOutput", 0)
+    if not _socket_linked(tree, *mask):
+        return f"mask branch ({mask[0]}) is not connected"
+    return None
+
+
+def wants_raw_depth(settings):
+    """Whether a DM_RawDepthOutput node belongs in the tree (saved, cached or sequence pass)."""
+    return (settings.depth_output_method == 'FILE_OUTPUT'
+            and (settings.save_raw_depth or settings.use_depth_cache
+                 or wants_sequence_pass(settings)))
+
+
+def wants_label_map(settings):
+    """Whether the raw object index is split into a label map and masks after rendering."""
+    return (settings.mask_label_map and settings.mask_enabled
+            and settings.mask_source == 'OBJECT_INDEX'
+            and settings.depth_output_method == 'FILE_OUTPUT')
+
+
+def wants_raw_index(settings):
+    """Whether a DM_RawIndexOutput node belongs in the tree (cached masks or the label map)."""
+    return wants_label_map(settings) or (
+        settings.use_depth_cache and settings.mask_enabled
+        and settings.mask_source == 'OBJECT_INDEX')
+
+
+# --- Declarative pipeline spec ---
+
+# Depth branch layout per normalization mode: node names left to right.
+# HISTOGRAM previews with the LINEAR chain; its files come from the sequence pass.
+_DEPTH_CHAINS = {
+    'LINEAR': ("DM_RangeMapper", "DM_Contrast", "DM_ColorRamp"),
+    'LOGARITHMIC': ("DM_ScaleMultiply", "DM_Logarithm", "DM_RangeMapper",
+                    "DM_Contrast", "DM_ColorRamp"),
+    'RAW': ("DM_ScaleMultiply", "DM_Contrast"),
+}
+
+# Layer names of a packed multilayer EXR, in channel order
+PACKED_LAYERS = ("depth", "mask")
+
+# Packed output: (depth input, mask input) per output_format. PNG combines
+# both into the red / green channels first; EXR writes one layer each.
+_PACKED_INPUTS = {
+    'PNG': (("DM_PackCombine", 0), ("DM_PackCombine", 1)),
+    'OPEN_EXR': (("DM_PackedOutput", 'depth'), ("DM_PackedOutput", 'mask')),
+}
+
+# (input socket, output socket) of each depth branch node
+_CHAIN_SOCKETS = {
+    "DM_ScaleMultiply": (0, 'Value'),
+    "DM_Logarithm": (0, 'Value'),
+    "DM_RangeMapper": ('Value', 'Value'),
+    "DM_Contrast": ('Image', 'Image'),
+    "DM_ColorRamp": ('Fac', 0),
+}
+
+
+def _node(node_type, label, location, props=None, inputs=None, **extra):
+    """Describe one node: type, label, location, RNA properties and input values."""
+    spec = {
+        "type": node_type,
+        "label": label,
+        "location": location,
+        "props": props or {},
+        "inputs": inputs or {},
+    }
+    spec.update(extra)
+    return spec
+
+
+def _file_output(base_path, prefix, bit_depth='16', color_mode='BW', file_format='PNG',
+                 **codec):
+    """configure_file_output() arguments of a FileOutput node spec."""
+    return {
+        "base_path": base_path,
+        "prefix": prefix,
+        "bit_depth": bit_depth,
+        "color_mode": color_mode,
+        "file_format": file_format,
+        **codec,
+    }
+
+
+def _depth_branch(settings, view_layer_name):
+    """Return (nodes, links, output) of the depth branch for the normalization mode."""
+    chain = _DEPTH_CHAINS.get(settings.depth_normalization, _DEPTH_CHAINS['LINEAR'])
+    from_min, from_max = depth_range(settings)
+
+    catalog = {
+        "DM_ScaleMultiply": lambda: _node(
+            'CompositorNodeMath', "Depth Scale", None,
+            props={"operation": 'MULTIPLY'},
+            inputs={1: settings.depth_scale_factor},
+        ),
+        "DM_Logarithm": lambda: _node(
+            'CompositorNodeMath', "Logarithmic Depth", None,
+            props={"operation": 'LOGARITHM'},
+            inputs={1: 10.0},
+        ),
+        # Inverted output range for proper depth visualization
+        "DM_RangeMapper": lambda: _node(
+            'CompositorNodeMapRange', "Depth Range Adjuster", None,
+            inputs={'From Min': from_min, 'From Max': from_max,
+                    'To Min': 1.0, 'To Max': 0.0},
+        ),
+        "DM_Contrast": lambda: _node(
+            'CompositorNodeBrightContrast', "Enhance Depth Contrast", None,
+            inputs={'Contrast': settings.contrast_value,
+                    'Bright': settings.brightness_value},
+        ),
+        "DM_ColorRamp": lambda: _node(
+            'CompositorNodeValToRGB', "Depth Visualization", None,
+            ramp='BLACK_WHITE',
+        ),
+    }
+
+    nodes = {
+        "DM_RenderLayers": _node(
+            'CompositorNodeRLayers', "Depth Map Input", (0, 0),
+            props={"layer": view_layer_name},
+        ),
+    }
+    links = []
+    upstream = ("DM_RenderLayers", 'Depth')
+    for index, name in enumerate(chain):
+        node = catalog[name]()
+        node["location"] = (200 * (index + 1), 0)
+        nodes[name] = node
+        in_socket, out_socket = _CHAIN_SOCKETS[name]
+        links.append(upstream + (name, in_socket))
+        upstream = (name, out_socket)
+
+    return nodes, links, upstream
+
+
+def _output_nodes(settings, prefs, source, x_offset):
+    """Composite / Viewer / FileOutput nodes fed by the depth branch."""
+    from . import paths
 
+    nodes = {
+        "DM_Composite": _node(
+            'CompositorNodeComposite', "Depth Map Output",
+            (x_offset, 0 if settings.depth_output_method == 'COMPOSITE' else -100),
+        ),
+    }
+    links = [source + ("DM_Composite", 'Image')]
+
+    file_output = settings.depth_output_method == 'FILE_OUTPUT'
+    if (settings.depth_output_method == 'VIEWER' or wants_async_encoding(settings)
+            or wants_stack_output(settings) or settings.proxy_preview
+            or (file_output and settings.preview_before_export)):
+        nodes["DM_Viewer"] = _node(
+            'CompositorNodeViewer', "Depth Preview",
+            (x_offset, 200 if file_output else 50),
+        )
+        links.append(source + ("DM_Viewer", 'Image'))
+
+    if file_output and wants_packed_output(settings):
+        packed_nodes, packed_links = _packed_output(settings, prefs, source, x_offset)
+        nodes.update(packed_nodes)
+        links.extend(packed_links)
+    elif file_output:
+        nodes["DM_FileOutput"] = _node(
+            'CompositorNodeOutputFile', "Depth Map Files", (x_offset, 100),
+            props={"mute": wants_sequence_pass(settings) or wants_async_encoding(settings)},
+            file_output=_file_output(
+                paths.get_depth_output_dir(settings, prefs),
+                paths.output_prefix("depth", settings),
+                **output_encoding(settings),
+            ),
+        )
+        links.append(source + ("DM_FileOutput", 0))
+
+    if file_output:
+        # Unprocessed float depth for offline re-normalization, the cache
+        # and the sequence pass
+        if wants_raw_depth(settings):
+            nodes["DM_RawDepthOutput"] = _node(
+                'CompositorNodeOutputFile', "Raw Depth Files", (x_offset, 300),
+                file_output=_raw_file_output(settings, "depth", prefs),
+            )
+            links.append(("DM_RenderLayers", 'Depth', "DM_RawDepthOutput", 0))
 
-def create_output_nodes(tree, settings, output_socket, prefs=None):
-    """Create output nodes (Composite, Viewer, FileOutput) based on settings.
+    return nodes, links
 
-    Args:
-        tree: The compositor node tree
-        settings: DepthMapSettings property group
-        output_socket: The final socket from the depth pipeline to connect
-        prefs: AddonPreferences (optional)
+
+def _packed_output(settings, prefs, source, x_offset):
+    """DM_PackedOutput, plus the channel packing node for PNG, fed by the depth branch.
+
+    The mask branch links into the second of the _PACKED_INPUTS sockets.
     """
     from . import paths
 
-    x_offset = _get_output_x_offset(settings.depth_normalization)
-    bit_depth = settings.output_bit_depth
+    base_path = paths.get_depth_output_dir(settings, prefs)
+    prefix = paths.output_prefix("depth_mask", settings)
+    depth_input, _mask_input = _PACKED_INPUTS[settings.output_format]
+    nodes, links = {}, [source + depth_input]
+
+    if settings.output_format == 'PNG':
+        # Depth in red, mask in green, opaque alpha: an RGB file keeps the
+        # channels independent of alpha premultiplication
+        if bpy.app.version >= (3, 3, 0):
+            combine = _node('CompositorNodeCombineColor', "Pack Depth + Mask", (x_offset, 100),
+                            props={"mode": 'RGB'}, inputs={2: 0.0, 3: 1.0})
+        else:
+            combine = _node('CompositorNodeCombRGBA', "Pack Depth + Mask", (x_offset, 100),
+                            inputs={2: 0.0, 3: 1.0})
+        nodes["DM_PackCombine"] = combine
+        links.append(("DM_PackCombine", 0, "DM_PackedOutput", 0))
+        location = (x_offset + 200, 100)
+        file_output = _file_output(base_path, prefix, color_mode='RGB',
+                                   compression=settings.png_compression)
+    else:
+        location = (x_offset, 100)
+        file_output = _file_output(base_path, prefix, bit_depth=settings.exr_precision,
+                                   file_format='OPEN_EXR_MULTILAYER',
+                                   exr_codec=settings.exr_codec, layers=PACKED_LAYERS)
+
+    nodes["DM_PackedOutput"] = _node(
+        'CompositorNodeOutputFile', "Packed Depth + Mask Files", location,
+        file_output=file_output,
+    )
+    return nodes, links
 
-    # Always create Composite node
-    composite = tree.nodes.new(type='CompositorNodeComposite')
-    composite.name = "DM_Composite"
-    composite.label = "Depth Map Output"
-    composite.location = (x_offset, -100)
-    tree.links.new(output_socket, composite.inputs['Image'])
-
-    if settings.depth_output_method == 'COMPOSITE':
-        composite.location = (x_offset, 0)
-
-    elif settings.depth_output_method == 'VIEWER':
-        viewer = tree.nodes.new(type='CompositorNodeViewer')
-        viewer.name = "DM_Viewer"
-        viewer.label = "Depth Preview"
-        viewer.location = (x_offset, 50)
-        tree.links.new(output_socket, viewer.inputs['Image'])
-
-    elif settings.depth_output_method == 'FILE_OUTPUT':
-        output_dir = paths.get_depth_output_dir(settings, prefs)
-        paths.resolve_output_path(output_dir, create=True, prefs=prefs)
-
-        file_output = tree.nodes.new(type='CompositorNodeOutputFile')
-        file_output.name = "DM_FileOutput"
-        file_output.label = "Depth Map Files"
-        file_output.location = (x_offset, 100)
-
-        # Link BEFORE configuring file slots — configure_file_output
-        # renames file_slots[0].path which also renames the input
-        # socket, making inputs['Image'] unreliable afterwards.
-        tree.links.new(output_socket, file_output.inputs[0])
-
-        prefix = "depth_" if settings.render_animation else "depth_map"
-        configure_file_output(
-            file_output, output_dir, prefix,
-            bit_depth=bit_depth, color_mode='BW'
-        )
 
-    # Optional preview viewer alongside file output
-    if settings.preview_before_export and settings.depth_output_method == 'FILE_OUTPUT':
-        viewer = tree.nodes.new(type='CompositorNodeViewer')
-        viewer.name = "DM_Viewer"
-        viewer.label = "Depth Preview"
-        viewer.location = (x_offset, 200)
-        tree.links.new(output_socket, viewer.inputs['Image'])
+def _raw_file_output(settings, kind, prefs=None):
+    """32-bit EXR output in the raw/ folder with a ``raw_<kind>`` prefix."""
+    from . import paths
 
+    return _file_output(
+        paths.get_raw_depth_output_dir(settings, prefs),
+        paths.output_prefix(f"raw_{kind}", settings),
+        bit_depth='32', file_format='OPEN_EXR',
+    )
 
-def create_mask_pipeline(tree, settings, prefs=None):
-    """Build the alpha mask compositor pipeline.
 
-    Creates its own DM_MaskRenderLayers node to guarantee that
-    IndexOB / Cryptomatte outputs are available (independent of the
-    depth pipeline's RenderLayers node).
+def _mask_branch(settings, prefs, view_layer_name):
+    """Return (nodes, links, errors) of the alpha mask branch.
 
-    Args:
-        tree: The compositor node tree
-        settings: DepthMapSettings property group
-        prefs: AddonPreferences (optional)
+    The branch has its own DM_MaskRenderLayers node, independent of the
+    depth pipeline's RenderLayers node.
     """
     from . import paths
 
+    nodes, links, errors = {}, [], []
     if settings.mask_source == 'OBJECT_INDEX':
-        # Ensure pass is enabled before creating the node
-        view_layer = bpy.context.view_layer
-        view_layer.use_pass_object_index = True
-
-        # Create a dedicated RenderLayers node for the mask pipeline
-        mask_rl = tree.nodes.new(type='CompositorNodeRLayers')
-        mask_rl.name = "DM_MaskRenderLayers"
-        mask_rl.label = "Mask Input"
-        mask_rl.location = (0, -300)
-
-        # Assign view layer and force depsgraph update so the node
-        # rebuilds its sockets with the newly enabled IndexOB pass
-        mask_rl.layer = view_layer.name
-        bpy.context.scene.update_tag()
-        bpy.context.evaluated_depsgraph_get().update()
-
-        # Find IndexOB socket by iteration — the 'in' operator on
-        # bpy_prop_collection can fail for pass sockets even when
-        # the socket exists, because it uses internal key lookup
-        # that may not reflect recently enabled passes.
-        index_ob = next(
-            (s for s in mask_rl.outputs if s.name == 'IndexOB'), None
+        nodes["DM_MaskRenderLayers"] = _node(
+            'CompositorNodeRLayers', "Mask Input", (0, -300),
+            props={"layer": view_layer_name},
         )
-        if index_ob is None:
-            available = [s.name for s in mask_rl.outputs]
-            raise RuntimeError(
-                "IndexOB output not found on RenderLayers node. "
-                f"Available outputs: {available}. "
-                "Enable 'Object Index Pass' on the view layer "
-                "(Properties > View Layer > Passes > Data)."
-            )
+        # IndexOB -> Compare(mask_index, epsilon 0.5) -> FileOutput
+        nodes["DM_MaskCompare"] = _node(
+            'CompositorNodeMath', "Mask Index Compare", (200, -300),
+            props={"operation": 'COMPARE'},
+            inputs={1: float(settings.mask_index), 2: 0.5},
+        )
+        links.append(("DM_MaskRenderLayers", 'IndexOB', "DM_MaskCompare", 0))
+        mask_source = ("DM_MaskCompare", 'Value')
 
-        # IndexOB -> Compare(mask_index) -> FileOutput
-        compare = tree.nodes.new(type='CompositorNodeMath')
-        compare.name = "DM_MaskCompare"
-        compare.label = "Mask Index Compare"
-        compare.location = (200, -300)
-        compare.operation = 'COMPARE'
-        compare.inputs[1].default_value = float(settings.mask_index)
-        compare.inputs[2].default_value = 0.5  # epsilon
-        tree.links.new(index_ob, compare.inputs[0])
-        mask_output_socket = compare.outputs['Value']
+        if wants_raw_index(settings):
+            nodes["DM_RawIndexOutput"] = _node(
+                'CompositorNodeOutputFile', "Raw Object Index Files", (400, -500),
+                file_output=_raw_file_output(settings, "index", prefs),
+            )
+            links.append(("DM_MaskRenderLayers", 'IndexOB', "DM_RawIndexOutput", 0))
 
     elif settings.mask_source == 'CRYPTOMATTE':
         if bpy.app.version < (3, 2, 0):
-            raise RuntimeError(
-                "CryptomatteV2 requires Blender 3.2 or newer."
-            )
-
-        # Cryptomatte node
-        crypto = tree.nodes.new(type='CompositorNodeCryptomatteV2')
-        crypto.name = "DM_Cryptomatte"
-        crypto.label = "Cryptomatte Mask"
-        crypto.location = (200, -300)
-        mask_output_socket = crypto.outputs['Matte']
+            errors.append("CryptomatteV2 requires Blender 3.2 or newer.")
+            return {}, [], errors
+        if wants_multi_matte(settings):
+            return _matte_outputs(settings, prefs)
+        # Matte selection is left to the user; only the node is managed
+        nodes["DM_Cryptomatte"] = _node(
+            'CompositorNodeCryptomatteV2', "Cryptomatte Mask", (200, -300),
+        )
+        mask_source = ("DM_Cryptomatte", 'Matte')
 
     else:
-        return
-
-    # Create mask file output
-    output_dir = paths.get_mask_output_dir(settings, prefs)
-    paths.resolve_output_path(output_dir, create=True, prefs=prefs)
-
-    mask_file_output = tree.nodes.new(type='CompositorNodeOutputFile')
-    mask_file_output.name = "DM_MaskFileOutput"
-    mask_file_output.label = "Mask Map Files"
-    mask_file_output.location = (400, -300)
-
-    # Link BEFORE configuring file slots — configure_file_output
-    # renames file_slots[0].path which also renames the input
-    # socket, making inputs['Image'] unreliable afterwards.
-    tree.links.new(mask_output_socket, mask_file_output.inputs[0])
-
-    color_mode = 'RGBA' if settings.mask_output_format == 'RGBA_PNG' else 'BW'
-    prefix = "mask_" if settings.render_animation else "mask_map"
-    configure_file_output(
-        mask_file_output, output_dir, prefix,
-        bit_depth=settings.output_bit_depth, color_mode=color_mode
+        return nodes, links, errors
+
+    if wants_packed_output(settings):
+        links.append(mask_source + _PACKED_INPUTS[settings.output_format][1])
+        return nodes, links, errors
+
+    nodes["DM_MaskFileOutput"] = _node(
+        'CompositorNodeOutputFile', "Mask Map Files", (400, -300),
+        props={"mute": wants_async_encoding(settings)},
+        file_output=_file_output(
+            paths.get_mask_output_dir(settings, prefs),
+            paths.output_prefix("mask", settings),
+            color_mode='RGBA' if settings.mask_output_format == 'RGBA_PNG' else 'BW',
+            **output_encoding(settings),
+        ),
     )
+    links.append(mask_source + ("DM_MaskFileOutput", 0))
+    if wants_async_encoding(settings):
+        links.append(mask_source + ("DM_Viewer", 'Alpha'))
+    return nodes, links, errors
 
 
-def update_depth_nodes(tree, settings, prefs=None):
-    """Update existing depth pipeline nodes without recreating them.
+def _matte_outputs(settings, prefs):
+    """Return (nodes, links, errors): a DM_CryptoMatte_<n> node per listed matte.
 
-    Returns True if update succeeded, False if rebuild is needed.
+    All mattes share the DM_CryptoFileOutput node, one file slot (and
+    ``<matte>/`` subfolder of the mask folder) each.
     """
-    range_node = find_dm_node(tree, "DM_RangeMapper")
-    if range_node:
-        if settings.use_custom_range:
-            range_node.inputs['From Min'].default_value = settings.near_distance
-            range_node.inputs['From Max'].default_value = settings.far_distance
-        else:
-            range_node.inputs['From Min'].default_value = 0.1
-            range_node.inputs['From Max'].default_value = 1000.0
-        range_node.inputs['To Min'].default_value = 1.0
-        range_node.inputs['To Max'].default_value = 0.0
-
-    contrast_node = find_dm_node(tree, "DM_Contrast")
-    if contrast_node:
-        contrast_node.inputs['Contrast'].default_value = settings.contrast_value
-        contrast_node.inputs['Bright'].default_value = settings.brightness_value
-
-    scale_node = find_dm_node(tree, "DM_ScaleMultiply")
-    if scale_node:
-        scale_node.inputs[1].default_value = settings.depth_scale_factor
-
-    ramp_node = find_dm_node(tree, "DM_ColorRamp")
-    if settings.depth_normalization != 'RAW' and not ramp_node:
-        return False
-
-    # Update file output path
     from . import paths
-    file_output = find_dm_node(tree, "DM_FileOutput")
-    if file_output and settings.depth_output_method == 'FILE_OUTPUT':
-        output_dir = paths.get_depth_output_dir(settings, prefs)
-        paths.resolve_output_path(output_dir, create=True, prefs=prefs)
-        prefix = "depth_" if settings.render_animation else "depth_map"
-        configure_file_output(
-            file_output, output_dir, prefix,
-            bit_depth=settings.output_bit_depth, color_mode='BW'
+
+    mattes, errors = crypto_mattes(settings)
+    if not mattes:
+        return {}, [], errors or ["No Cryptomatte mattes listed"]
+
+    folders = matte_folders(mattes)
+    prefix = paths.output_prefix("mask", settings)
+    nodes, links = {}, []
+    for index, ((name, matte_id), slot_path) in enumerate(
+            zip(mattes, _slot_paths(prefix, folders))):
+        node_name = f"DM_CryptoMatte_{index}"
+        nodes[node_name] = _node(
+            'CompositorNodeCryptomatteV2', f"Matte: {name}", (200, -300 - 150 * index),
+            props={"matte_id": matte_id},
         )
+        links.append((node_name, 'Matte', "DM_CryptoFileOutput", slot_path))
+
+    nodes["DM_CryptoFileOutput"] = _node(
+        'CompositorNodeOutputFile', "Cryptomatte Matte Files", (400, -300),
+        file_output=_file_output(
+            paths.get_mask_output_dir(settings, prefs), prefix,
+            color_mode='RGBA' if settings.mask_output_format == 'RGBA_PNG' else 'BW',
+            slots=tuple(folders), **output_encoding(settings),
+        ),
+    )
+    return nodes, links, errors
 
-    # Update or create mask pipeline
-    mask_file_output = find_dm_node(tree, "DM_MaskFileOutput")
+
+def pipeline_spec(settings, view_layer, prefs=None):
+    """Describe the complete DM_ pipeline for the current settings.
+
+    Args:
+        settings: DepthMapSettings property group
+        view_layer: View layer whose passes the RenderLayers nodes read
+        prefs: AddonPreferences (optional, for default paths)
+
+    Returns:
+        dict: ``passes`` (view layer flags), ``nodes`` (name -> node spec),
+            ``links`` ((from, socket, to, socket) tuples) and ``errors``
+            (problems that leave a branch out)
+    """
+    nodes, links, source = _depth_branch(settings, view_layer.name)
+    x_offset = 200 * len(nodes)
+    output_nodes, output_links = _output_nodes(settings, prefs, source, x_offset)
+    nodes.update(output_nodes)
+    links.extend(output_links)
+
+    # Passes are only ever enabled; disabling is left to Reset
+    passes = {"use_pass_z": True}
+    if settings.mask_enabled and settings.mask_source == 'OBJECT_INDEX':
+        passes["use_pass_object_index"] = True
+    if wants_multi_matte(settings):
+        passes["use_pass_cryptomatte_object"] = True
+
+    errors = []
     if settings.mask_enabled:
-        if mask_file_output:
-            # Update existing mask file output path
-            mask_output_dir = paths.get_mask_output_dir(settings, prefs)
-            paths.resolve_output_path(mask_output_dir, create=True, prefs=prefs)
-            color_mode = 'RGBA' if settings.mask_output_format == 'RGBA_PNG' else 'BW'
-            prefix = "mask_" if settings.render_animation else "mask_map"
-            configure_file_output(
-                mask_file_output, mask_output_dir, prefix,
-                bit_depth=settings.output_bit_depth, color_mode=color_mode
-            )
-            # Sync mask index threshold to comparator node
-            compare_node = find_dm_node(tree, "DM_MaskCompare")
-            if compare_node:
-                compare_node.inputs[1].default_value = float(settings.mask_index)
-        else:
-            # Mask was enabled after initial setup — create the pipeline now.
-            # Errors are intentionally not caught here so the caller (setup
-            # operator) can report them to the user.
-            create_mask_pipeline(tree, settings, prefs)
-    elif mask_file_output:
-        # Mask was disabled after setup — remove stale mask pipeline nodes
-        for name in ("DM_MaskFileOutput", "DM_MaskRenderLayers", "DM_MaskCompare",
-                     "DM_Cryptomatte"):
-            node = find_dm_node(tree, name)
-            if node:
-                tree.nodes.remove(node)
-
-    return True
+        mask_nodes, mask_links, errors = _mask_branch(settings, prefs, view_layer.name)
+        nodes.update(mask_nodes)
+        links.extend(mask_links)
+
+    return {
+        "passes": passes,
+        "nodes": nodes,
+        "links": links,
+        "errors": errors,
+    }
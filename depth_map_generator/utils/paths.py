@@ -1,9 +1,19 @@
 """Path resolution and directory management for depth map output."""
 
 import os
+import re
 
 import bpy
 
+from . import frames
+
+# FileOutput prefixes for single-frame renders; animations use "<name>_"
+_STILL_PREFIXES = {"depth": "depth_map", "mask": "mask_map", "depth_mask": "depth_mask_map",
+                   "labels": "label_map"}
+
+# File extension of each output_format, as Blender writes them
+_EXTENSIONS = {'PNG': ".png", 'OPEN_EXR': ".exr", 'TIFF': ".tif", 'NUMPY': ".npy"}
+
 
 def resolve_output_path(path, create=True, prefs=None):
     """Resolve a Blender path (possibly relative with //) to absolute and optionally create it.
@@ -29,6 +39,7 @@ def get_depth_output_dir(settings, prefs=None):
     """Get the resolved depth map output directory.
 
     Uses scene-level output_path if set, otherwise falls back to addon preferences.
+    During a camera batch the camera's subfolder is appended.
 
     Args:
         settings: DepthMapSettings property group
@@ -42,13 +53,27 @@ def get_depth_output_dir(settings, prefs=None):
         path = prefs.default_depth_output_dir
     if not path:
         path = "//depth_maps/"
-    return bpy.path.abspath(path)
+    return _camera_dir(bpy.path.abspath(path), settings)
+
+
+def get_raw_depth_output_dir(settings, prefs=None):
+    """Get the directory for raw float depth frames (``raw/`` inside the depth output).
+
+    Args:
+        settings: DepthMapSettings property group
+        prefs: AddonPreferences (optional)
+
+    Returns:
+        Absolute path string
+    """
+    return os.path.join(get_depth_output_dir(settings, prefs), "raw")
 
 
 def get_mask_output_dir(settings, prefs=None):
     """Get the resolved mask map output directory.
 
     Uses scene-level mask_output_path if set, otherwise falls back to addon preferences.
+    During a camera batch the camera's subfolder is appended.
 
     Args:
         settings: DepthMapSettings property group
@@ -62,7 +87,128 @@ def get_mask_output_dir(settings, prefs=None):
         path = prefs.default_mask_output_dir
     if not path:
         path = "//mask_maps/"
-    return bpy.path.abspath(path)
+    return _camera_dir(bpy.path.abspath(path), settings)
+
+
+def get_publish_dir(settings, prefs=None):
+    """Get the directory a finished sequence is published to inside ComfyUI's input folder.
+
+    ``<comfyui_input_dir>/<publish_name or blend file name>/``, plus the
+    camera subfolder during a camera batch.
+
+    Args:
+        settings: DepthMapSettings property group
+        prefs: AddonPreferences (optional)
+
+    Returns:
+        Absolute path string, or None when no ComfyUI input directory is set
+    """
+    root = prefs.comfyui_input_dir if prefs else ""
+    if not root:
+        return None
+    return _camera_dir(
+        os.path.join(bpy.path.abspath(root), publish_folder(settings), ""), settings
+    )
+
+
+def publish_folder(settings):
+    """Folder name of the sequence in ComfyUI's input directory (publish name or blend name)."""
+    name = (settings.publish_name
+            or os.path.splitext(os.path.basename(bpy.data.filepath))[0])
+    return folder_name(name, "depth_map")
+
+
+def _camera_dir(path, settings):
+    """Append the camera batch subfolder, if one is active, keeping the trailing separator."""
+    if not settings.camera_subdir:
+        return path
+    return os.path.join(path, settings.camera_subdir, "")
+
+
+def folder_name(name, fallback="camera"):
+    """Folder name for a camera or matte: its name with unsafe characters replaced."""
+    return re.sub(r"[^\w.-]+", "_", name).strip(".") or fallback
+
+
+def output_prefix(name, settings):
+    """FileOutput slot prefix for an output, e.g. depth_ (animation) or depth_map (still).
+
+    Args:
+        name: Output name: "depth", "mask", "depth_mask" (packed), "labels",
+            "raw_depth" or "raw_index"
+        settings: DepthMapSettings property group
+    """
+    if settings.render_animation:
+        return f"{name}_"
+    return _STILL_PREFIXES.get(name, name)
+
+
+def output_extension(settings):
+    """File extension of the depth and mask files, e.g. ".png"."""
+    return _EXTENSIONS.get(settings.output_format, ".png")
+
+
+def get_frame_output_files(settings, frame, prefs=None):
+    """List the files the DM_ FileOutput nodes write for one frame.
+
+    Args:
+        settings: DepthMapSettings property group
+        frame: Frame number
+        prefs: AddonPreferences (optional)
+
+    Returns:
+        list: Absolute file paths (depth, mask or packed, and raw outputs that are enabled)
+    """
+    return [path for files in get_frame_output_files_by_kind(settings, frame, prefs).values()
+            for path in files]
+
+
+def get_frame_output_files_by_kind(settings, frame, prefs=None):
+    """The files of get_frame_output_files() grouped by what they hold.
+
+    Folders may coincide or nest, so callers classify files by this and
+    not by their directory.
+
+    Returns:
+        dict: "depth" (depth or packed depth + mask files), "raw" (raw depth
+            and object index EXRs) and "mask" -> lists of absolute paths
+    """
+    from . import nodes
+
+    files = {"depth": [], "raw": [], "mask": []}
+    packed = nodes.wants_packed_output(settings)
+    if packed:
+        files["depth"].append(os.path.join(
+            get_depth_output_dir(settings, prefs),
+            frames.frame_filename(output_prefix("depth_mask", settings), frame,
+                                  output_extension(settings))))
+    if settings.depth_output_method == 'FILE_OUTPUT':
+        # Depth PNGs of a sequence pass are written after the whole render
+        if not (packed or nodes.wants_sequence_pass(settings)):
+            files["depth"].append(os.path.join(
+                get_depth_output_dir(settings, prefs),
+                frames.frame_filename(output_prefix("depth", settings), frame,
+                                      output_extension(settings))))
+        if nodes.wants_raw_depth(settings):
+            files["raw"].append(os.path.join(
+                get_raw_depth_output_dir(settings, prefs),
+                frames.frame_filename(output_prefix("raw_depth", settings), frame, ".exr")))
+        if nodes.wants_label_map(settings):
+            files["raw"].append(os.path.join(
+                get_raw_depth_output_dir(settings, prefs),
+                frames.frame_filename(output_prefix("raw_index", settings), frame, ".exr")))
+    if settings.mask_enabled and not packed:
+        prefixes = [output_prefix("mask", settings)]
+        if nodes.wants_multi_matte(settings):
+            # One sequence per Cryptomatte matte, each in its own subfolder
+            mattes, _errors = nodes.crypto_mattes(settings)
+            prefixes = [os.path.join(folder, prefixes[0])
+                        for folder in nodes.matte_folders(mattes)]
+        for prefix in prefixes:
+            files["mask"].append(os.path.join(
+                get_mask_output_dir(settings, prefs),
+                frames.frame_filename(prefix, frame, output_extension(settings))))
+    return files
 
 
 def validate_output_path(path):
@@ -0,0 +1,292 @@
+"""Reconcile the compositor node tree against the declarative pipeline spec.
+
+Only DM_ nodes that are missing, stale or of the wrong type are added or
+removed, only values that differ are written and only links that differ are
+relinked, so re-running setup on an unchanged tree touches nothing. A
+fingerprint of the spec's structure is stored on the settings; when it
+matches and all nodes are present, ensure_pipeline() only pushes the input
+values of the LIVE_NODES (range, contrast, scale, mask index) that differ,
+without looking further. Settings edits reach the tree this way through
+live_sync.
+
+Enabling a pass never forces a scene evaluation: RenderLayers nodes expose
+pass sockets as soon as the view layer flag is set, and links are resolved
+by name afterwards. Only if a socket is still missing is the node tree (not
+the scene's geometry) re-evaluated, once.
+"""
+
+import hashlib
+import time
+
+from . import auto_range, nodes, paths
+
+
+# Nodes whose input values follow settings edits without a reconcile
+LIVE_NODES = ("DM_RangeMapper", "DM_Contrast", "DM_ScaleMultiply", "DM_MaskCompare")
+
+
+def spec_fingerprint(spec):
+    """Stable hash of a pipeline spec (it is built deterministically from settings)."""
+    return hashlib.blake2b(repr(spec).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def structure_fingerprint(spec):
+    """Hash of a pipeline spec without the input values of the LIVE_NODES."""
+    wanted = {name: dict(want, inputs=None) if name in LIVE_NODES else want
+              for name, want in spec["nodes"].items()}
+    return spec_fingerprint(dict(spec, nodes=wanted))
+
+
+def push_values(tree, spec, skip=()):
+    """Write the spec'd input values of the LIVE_NODES that differ.
+
+    Args:
+        tree: Compositor node tree with the pipeline in place
+        spec: nodes.pipeline_spec() result
+        skip: Node names to leave alone (e.g. a keyframed range)
+
+    Returns:
+        int: Number of nodes changed
+    """
+    changed = 0
+    for name in LIVE_NODES:
+        want = spec["nodes"].get(name)
+        node = tree.nodes.get(name)
+        if want is None or node is None or name in skip:
+            continue
+        written = False
+        for key, value in want["inputs"].items():
+            socket = _find_socket(node.inputs, key)
+            if socket is not None and socket.default_value != value:
+                socket.default_value = value
+                written = True
+        changed += written
+    return changed
+
+
+def _find_socket(sockets, key):
+    """Look up a socket by index or name.
+
+    Names are matched by iteration — the 'in' operator and key lookup on
+    bpy_prop_collection can miss pass sockets that were just enabled.
+    Enabled sockets win over hidden ones of the same name.
+    """
+    if isinstance(key, int):
+        return sockets[key] if key < len(sockets) else None
+    matches = [s for s in sockets if s.name == key]
+    return next((s for s in matches if s.enabled), matches[0] if matches else None)
+
+
+def _set_black_white_ramp(node):
+    """Two-stop ramp: black at 0, white at 1."""
+    elements = node.color_ramp.elements
+    while len(elements) > 1:
+        elements.remove(elements[-1])
+    elements[0].position = 0.0
+    elements[0].color = (0.0, 0.0, 0.0, 1.0)
+    elements.new(1.0).color = (1.0, 1.0, 1.0, 1.0)
+
+
+def _apply_node(node, want, prefs=None):
+    """Write the spec'd values that differ. Returns True if anything changed."""
+    changed = False
+    if want["location"] is not None and tuple(node.location) != tuple(want["location"]):
+        node.location = want["location"]
+        changed = True
+    if node.label != want["label"]:
+        node.label = want["label"]
+        changed = True
+
+    for attr, value in want["props"].items():
+        if getattr(node, attr) != value:
+            setattr(node, attr, value)
+            changed = True
+
+    for key, value in want["inputs"].items():
+        socket = _find_socket(node.inputs, key)
+        if socket is not None and socket.default_value != value:
+            socket.default_value = value
+            changed = True
+
+    file_output = want.get("file_output")
+    if file_output and not nodes.file_output_matches(node, **file_output):
+        paths.resolve_output_path(file_output["base_path"], create=True, prefs=prefs)
+        nodes.configure_file_output(node, **file_output)
+        changed = True
+    return changed
+
+
+def _reconcile_links(tree, spec):
+    """Relink DM_ node inputs to match the spec.
+
+    Returns:
+        tuple: (relinked: int, missing: list of (node, socket) names whose
+            output socket doesn't exist, errors: list of messages)
+    """
+    relinked, missing, errors = 0, [], []
+    wanted_inputs = set()
+
+    for from_name, from_key, to_name, to_key in spec["links"]:
+        from_node = tree.nodes.get(from_name)
+        to_node = tree.nodes.get(to_name)
+        from_socket = _find_socket(from_node.outputs, from_key)
+        to_socket = _find_socket(to_node.inputs, to_key)
+        if from_socket is None:
+            missing.append((from_name, from_key))
+            available = [s.name for s in from_node.outputs]
+            errors.append(
+                f"{from_key} output not found on {from_name}. "
+                f"Available outputs: {available}. "
+                "Enable the matching pass on the view layer "
+                "(Properties > View Layer > Passes)."
+            )
+            continue
+        wanted_inputs.add(to_socket.as_pointer())
+
+        if any(link.from_socket == from_socket for link in to_socket.links):
+            continue
+        for link in list(to_socket.links):
+            tree.links.remove(link)
+        tree.links.new(from_socket, to_socket)
+        relinked += 1
+
+    # Drop leftover links between DM_ nodes (e.g. after a mode change)
+    for link in list(tree.links):
+        if (link.to_node.name.startswith("DM_") and link.from_node.name.startswith("DM_")
+                and link.to_socket.as_pointer() not in wanted_inputs):
+            tree.links.remove(link)
+            relinked += 1
+    return relinked, missing, errors
+
+
+def reconcile(tree, spec, prefs=None, refresh_sockets=None):
+    """Make the DM_ nodes of ``tree`` match ``spec`` with minimal changes.
+
+    Non-DM_ nodes are never touched.
+
+    Args:
+        tree: Compositor node tree
+        spec: nodes.pipeline_spec() result
+        prefs: AddonPreferences (optional)
+        refresh_sockets: Optional callable run once when a link's output
+            socket is missing (e.g. a just-enabled pass); links are then
+            resolved again
+
+    Returns:
+        dict: Counts of nodes ``added``, ``removed``, ``updated`` and links
+            ``relinked``, ``errors`` (links that could not be made) and
+            ``timings`` (milliseconds per phase)
+    """
+    started = time.perf_counter()
+    wanted = spec["nodes"]
+    result = {"added": 0, "removed": 0, "updated": 0, "relinked": 0}
+
+    for node in [n for n in tree.nodes if n.name.startswith("DM_")]:
+        want = wanted.get(node.name)
+        if want is None or node.bl_idname != want["type"]:
+            tree.nodes.remove(node)
+            result["removed"] += 1
+
+    for name, want in wanted.items():
+        node = tree.nodes.get(name)
+        if node is None:
+            node = tree.nodes.new(type=want["type"])
+            node.name = name
+            if want.get("ramp") == 'BLACK_WHITE':
+                _set_black_white_ramp(node)
+            result["added"] += 1
+        if _apply_node(node, want, prefs):
+            result["updated"] += 1
+
+    nodes_done = time.perf_counter()
+
+    result["relinked"], missing, link_errors = _reconcile_links(tree, spec)
+    if missing and refresh_sockets is not None:
+        refresh_sockets()
+        relinked, _missing, link_errors = _reconcile_links(tree, spec)
+        result["relinked"] += relinked
+    result["errors"] = list(spec["errors"]) + link_errors
+
+    result["timings"] = {
+        "nodes": (nodes_done - started) * 1000.0,
+        "links": (time.perf_counter() - nodes_done) * 1000.0,
+    }
+    return result
+
+
+def is_current(tree, spec, fingerprint, settings, view_layer):
+    """Cheap check whether the tree was last reconciled against this spec."""
+    return (settings.setup_complete
+            and settings.pipeline_fingerprint == fingerprint
+            and all(getattr(view_layer, attr) == value
+                    for attr, value in spec["passes"].items())
+            and all(name in tree.nodes for name in spec["nodes"]))
+
+
+def ensure_pipeline(context, settings, prefs=None, force=False):
+    """Bring the compositor pipeline in line with the settings.
+
+    Args:
+        context: Blender context (scene, view layer)
+        settings: DepthMapSettings property group
+        prefs: AddonPreferences (optional)
+        force: Reconcile even when the fingerprint is unchanged
+
+    Returns:
+        dict or None: reconcile() counts plus ``evaluations`` (depsgraph
+            updates performed, 0 or 1) and total ``timings``, or None when
+            already up to date. When only LIVE_NODES values changed, just
+            those are written and counted as ``updated``.
+
+    Raises:
+        RuntimeError: When a branch (e.g. the mask) could not be connected;
+            the rest of the pipeline is in place
+    """
+    started = time.perf_counter()
+    scene = context.scene
+    view_layer = context.view_layer
+    spec = nodes.pipeline_spec(settings, view_layer, prefs)
+    fingerprint = structure_fingerprint(spec)
+    spec_done = time.perf_counter()
+
+    if not scene.use_nodes:
+        scene.use_nodes = True
+    tree = scene.node_tree
+    if not force and is_current(tree, spec, fingerprint, settings, view_layer):
+        # Per-frame auto range keyframes own the range inputs
+        keyed = settings.use_auto_range and settings.auto_range_per_frame
+        updated = push_values(tree, spec, skip={"DM_RangeMapper"} if keyed else ())
+        if not updated:
+            return None
+        total = (time.perf_counter() - started) * 1000.0
+        return {"added": 0, "removed": 0, "updated": updated, "relinked": 0, "errors": [],
+                "evaluations": 0, "timings": {"spec": (spec_done - started) * 1000.0,
+                                              "total": total}}
+
+    # All pass changes at once; setting the flag updates the RenderLayers
+    # sockets without evaluating the scene
+    for attr, value in spec["passes"].items():
+        if getattr(view_layer, attr) != value:
+            setattr(view_layer, attr, value)
+
+    evaluations = []
+
+    def _refresh_sockets():
+        # Tag only the node tree so the update doesn't re-evaluate geometry
+        tree.update_tag()
+        context.evaluated_depsgraph_get().update()
+        evaluations.append(1)
+
+    result = reconcile(tree, spec, prefs, refresh_sockets=_refresh_sockets)
+    if not (settings.use_auto_range and settings.auto_range_per_frame):
+        auto_range.clear_range_keyframes(tree)
+
+    result["evaluations"] = len(evaluations)
+    result["timings"]["spec"] = (spec_done - started) * 1000.0
+    result["timings"]["total"] = (time.perf_counter() - started) * 1000.0
+
+    if result["errors"]:
+        settings.pipeline_fingerprint = ""
+        raise RuntimeError("; ".join(result["errors"]))
+    settings.pipeline_fingerprint = fingerprint
+    return result
@@ -0,0 +1,188 @@
+"""Low-resolution proxy depth preview that re-renders when the scene or settings change.
+
+While the preview is on, a depsgraph_update_post handler watches for
+object and camera edits, frame changes and pipeline changes (near / far,
+contrast, normalization... anything that changes the compositor spec) and
+schedules a refresh through bpy.app.timers, restarting the delay on every
+change so a drag renders once at the end. A refresh brings the pipeline up
+to date and renders one frame in place at ``proxy_resolution`` percent with
+the depth-only profile (1 sample, no bounces, no denoising) and the DM_
+File Output nodes muted, restores every changed value and copies the
+DM_Viewer result into the ``DM_DepthProxy`` image datablock, which stays
+valid when a later render overwrites the Viewer.
+
+The preview follows the active scene and view layer: they are looked up in
+bpy.context on every update and refresh, never kept from the operator call
+that started it (an operator's context and the structs it hands out are
+only valid during that call, and undo replaces the scene).
+"""
+
+import time
+
+import bpy
+import numpy as np
+
+from . import (
+    async_encode, fingerprint, multi_camera, nodes, pipeline, render_profile, shard,
+)
+
+PROXY_IMAGE = "DM_DepthProxy"
+
+# The preview session of this Blender instance, if any
+_active = None
+
+
+def get_active():
+    """Return the running proxy preview, if any."""
+    return _active
+
+
+def _render_busy():
+    """Whether a real render (or a batch of them) is running."""
+    is_job_running = getattr(bpy.app, "is_job_running", None)
+    if is_job_running is not None and is_job_running('RENDER'):
+        return True
+    return shard.get_active() is not None or multi_camera.get_active() is not None
+
+
+def _moved(depsgraph):
+    """Whether a depsgraph update moved or reshaped an object (including the camera)."""
+    for update in getattr(depsgraph, "updates", ()):
+        if (isinstance(update.id, bpy.types.Object)
+                and (update.is_updated_transform or update.is_updated_geometry)):
+            return True
+    return False
+
+
+def store_proxy_image(width, height, pixels):
+    """Copy a flat RGBA float buffer into the DM_DepthProxy image (created or resized)."""
+    image = bpy.data.images.get(PROXY_IMAGE)
+    if image is None:
+        image = bpy.data.images.new(PROXY_IMAGE, width, height, float_buffer=True)
+    elif tuple(image.size) != (width, height):
+        image.scale(width, height)
+    image.pixels.foreach_set(pixels)
+    image.update()
+    return image
+
+
+class ProxyPreview:
+    """Debounced proxy renders of the active scene.
+
+    Args:
+        prefs: AddonPreferences (optional)
+    """
+
+    def __init__(self, prefs=None):
+        self.prefs = prefs
+        self.renders = 0
+        self.last_seconds = None
+        self.last_error = None
+        self._key = None
+
+    def start(self):
+        """Register the depsgraph handler and schedule the first proxy render."""
+        global _active
+        if _active is not None:
+            _active.stop()
+        bpy.app.handlers.depsgraph_update_post.append(self._on_depsgraph_update)
+        _active = self
+        self.schedule()
+        return self
+
+    def stop(self):
+        """Unregister the handler and drop a pending refresh. Idempotent."""
+        global _active
+        if self._on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+            bpy.app.handlers.depsgraph_update_post.remove(self._on_depsgraph_update)
+        if bpy.app.timers.is_registered(self._refresh):
+            bpy.app.timers.unregister(self._refresh)
+        if _active is self:
+            _active = None
+
+    def schedule(self):
+        """(Re)start the debounce delay before the next proxy render."""
+        if bpy.app.timers.is_registered(self._refresh):
+            bpy.app.timers.unregister(self._refresh)
+        bpy.app.timers.register(
+            self._refresh,
+            first_interval=bpy.context.scene.depth_map_settings.proxy_debounce,
+        )
+
+    def state_key(self, context):
+        """What the proxy depends on besides object edits: camera, frame and pipeline spec."""
+        scene = context.scene
+        settings = scene.depth_map_settings
+        spec = nodes.pipeline_spec(settings, context.view_layer, self.prefs)
+        return (scene.name, fingerprint.camera_digest(scene), scene.frame_current,
+                pipeline.spec_fingerprint(spec), settings.proxy_resolution)
+
+    def _on_depsgraph_update(self, scene, depsgraph=None):
+        if scene != bpy.context.scene:
+            return
+        # Updates caused by the proxy render itself leave the key unchanged
+        key = self.state_key(bpy.context)
+        if key != self._key or _moved(depsgraph):
+            self.schedule()
+
+    def _refresh(self):
+        try:
+            if _render_busy():
+                # Try again once the render is done
+                return 1.0
+            self.render(bpy.context)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"[depth_map_generator] Proxy preview failed: {e}")
+        # Timer callback: None = don't repeat
+        return None
+
+    def render(self, context):
+        """Render the proxy now and store it in the DM_DepthProxy image.
+
+        Args:
+            context: Blender context of this moment (scene, view layer)
+
+        Returns:
+            Image: The proxy image
+
+        Raises:
+            RuntimeError: If the pipeline has errors or the render produced no pixels
+        """
+        scene = context.scene
+        settings = scene.depth_map_settings
+        started = time.perf_counter()
+        pipeline.ensure_pipeline(context, settings, self.prefs)
+        tree = scene.node_tree
+
+        # Materials are only replaced when the user opted into that for real renders
+        snapshot = render_profile.apply_depth_only_profile(
+            scene, context.view_layer,
+            override_materials=settings.depth_only_profile
+            and settings.depth_only_override_materials,
+        )
+        snapshot.set(scene.render, "resolution_percentage", settings.proxy_resolution)
+        for node in tree.nodes:
+            if node.name.startswith("DM_") and node.bl_idname == 'CompositorNodeOutputFile':
+                snapshot.set(node, "mute", True)
+        viewer = tree.nodes.get(async_encode.VIEWER_NODE_NAME)
+        if viewer is not None:
+            # Only the active Viewer node fills the "Viewer Node" image
+            snapshot.set(tree.nodes, "active", viewer)
+        try:
+            bpy.ops.render.render(write_still=False)
+            image = bpy.data.images.get(async_encode.VIEWER_IMAGE)
+            if image is None or not image.size[0]:
+                raise RuntimeError("The proxy render produced no Viewer pixels")
+            width, height = image.size
+            pixels = np.empty(width * height * 4, dtype=np.float32)
+            image.pixels.foreach_get(pixels)
+        finally:
+            snapshot.restore()
+
+        proxy = store_proxy_image(width, height, pixels)
+        self._key = self.state_key(context)
+        self.renders += 1
+        self.last_seconds = time.perf_counter() - started
+        self.last_error = None
+        return proxy
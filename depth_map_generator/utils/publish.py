@@ -0,0 +1,173 @@
+"""Publish finished frames into another directory (e.g. ComfyUI/input) without duplicate I/O.
+
+Each file is placed under a hidden temporary name and renamed into place,
+so readers never see partially written frames. The cheapest available
+method is used per file:
+
+* ``reflink`` - copy-on-write clone (Linux FICLONE: Btrfs, XFS, ...), no
+  data copied and later changes to either side stay separate
+* ``hardlink`` - same file, no data copied; needs the same filesystem
+* ``copy`` - streaming copy (sendfile / copy_file_range where available)
+
+A JSON manifest describing the published sequences is written last, also
+atomically, so its presence means every listed file is in place.
+
+Note that a hardlinked frame shares its data with the render output: a
+later render that rewrites the source file in place changes the published
+frame too. Publishing again replaces every link atomically.
+"""
+
+import errno
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import frames
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no reflink ioctl
+    fcntl = None
+
+MANIFEST_FILENAME = "manifest.json"
+METHODS = ("reflink", "hardlink", "copy")
+
+# Linux ioctl cloning a whole file (FICLONE = _IOW(0x94, 9, int))
+_FICLONE = 0x40049409
+
+# errnos meaning "this method is not possible here", not "publishing failed"
+_UNSUPPORTED = {errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL,
+                errno.EMLINK, errno.ENOSYS}
+
+
+def _temp_path(dst):
+    """Hidden temporary name next to ``dst`` (skipped by directory listings like ComfyUI's)."""
+    directory, name = os.path.split(dst)
+    return os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+
+
+def _reflink(src, dst):
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "reflink is not supported on this platform")
+    with open(src, "rb") as source, open(dst, "wb") as target:
+        fcntl.ioctl(target.fileno(), _FICLONE, source.fileno())
+
+
+def _place(method, src, tmp):
+    if method == "reflink":
+        _reflink(src, tmp)
+    elif method == "hardlink":
+        os.link(src, tmp)
+    else:
+        shutil.copyfile(src, tmp)
+
+
+def publish_file(src, dst, methods=METHODS):
+    """Place ``src`` at ``dst`` atomically using the first method that works.
+
+    Args:
+        src: Existing file
+        dst: Destination path (its directory must exist)
+        methods: Methods to try in order, see METHODS
+
+    Returns:
+        str: The method used, or "unchanged" when ``dst`` already is ``src``
+            (a hardlink from an earlier publish)
+
+    Raises:
+        OSError: If no method could place the file
+    """
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        return "unchanged"
+    tmp = _temp_path(dst)
+    # Left over from an interrupted publish
+    _remove(tmp)
+    error = None
+    for method in methods:
+        try:
+            _place(method, src, tmp)
+        except OSError as e:
+            _remove(tmp)
+            if e.errno not in _UNSUPPORTED and method != methods[-1]:
+                raise
+            error = e
+            continue
+        try:
+            os.replace(tmp, dst)
+        except OSError:
+            _remove(tmp)
+            raise
+        return method
+    raise error
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def publish_sequences(sequences, dst_dir, info=None, methods=METHODS, workers=8):
+    """Publish several frame sequences into ``dst_dir`` and write the manifest.
+
+    Args:
+        sequences: dict name -> (source root, {frame: [file paths]}). Files
+            keep their path relative to the source root below
+            ``dst_dir/<name>/``.
+        dst_dir: Publish directory (created)
+        info: Extra manifest entries (e.g. normalization settings)
+        methods: Methods to try per file, see METHODS
+        workers: Threads placing files in parallel
+
+    Returns:
+        dict: The manifest (also written to ``dst_dir/manifest.json``)
+
+    Raises:
+        OSError: If a file could not be published; no manifest is written then
+    """
+    tasks = []
+    manifest_sequences = {}
+    for name, (src_root, frame_files) in sorted(sequences.items()):
+        entries = []
+        for frame, files in sorted(frame_files.items()):
+            for src in files:
+                relative = os.path.relpath(src, src_root)
+                tasks.append((src, os.path.join(dst_dir, name, relative)))
+                entries.append({"frame": frame, "path": f"{name}/{relative}".replace(os.sep, "/"),
+                                "bytes": os.path.getsize(src)})
+        manifest_sequences[name] = {
+            "frames": sorted(frame_files),
+            "files": entries,
+        }
+
+    for directory in {os.path.dirname(dst) for _src, dst in tasks} | {dst_dir}:
+        os.makedirs(directory, exist_ok=True)
+
+    started = time.perf_counter()
+    if tasks:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(tasks)))) as pool:
+            used = list(pool.map(lambda task: publish_file(*task, methods=methods), tasks))
+    else:
+        used = []
+
+    manifest = dict(info or {})
+    manifest.update(
+        version=1,
+        published=time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        seconds=round(time.perf_counter() - started, 3),
+        methods={method: used.count(method) for method in set(used)},
+        sequences=manifest_sequences,
+    )
+    frames.write_atomic(os.path.join(dst_dir, MANIFEST_FILENAME),
+                        json.dumps(manifest, indent=1).encode("utf-8"))
+    return manifest
+
+
+def load_manifest(dst_dir):
+    """Read the manifest of a publish directory."""
+    with open(os.path.join(dst_dir, MANIFEST_FILENAME), "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,156 @@
+"""Depth-only render profile - temporarily strips the scene to what the Z pass needs.
+
+The Depth pass only depends on the first camera-ray hit, so samples,
+denoising, light bounces, caustics, depth of field, motion blur and
+pixel filtering are pure overhead for depth/mask export. The profile
+switches them off for the duration of a render and records every value
+it changed so they can be restored exactly afterwards.
+"""
+
+import bpy
+
+OVERRIDE_MATERIAL_NAME = "DM_DepthOnlyMaterial"
+
+# The snapshot of the profile currently applied by begin(), if any
+_active = None
+
+# (settings path, attribute, depth-only value). Attributes missing in the
+# running Blender version (e.g. removed EEVEE options) are skipped.
+_CYCLES_OVERRIDES = (
+    ("cycles", "samples", 1),
+    ("cycles", "use_adaptive_sampling", False),
+    ("cycles", "use_denoising", False),
+    ("cycles", "max_bounces", 0),
+    ("cycles", "diffuse_bounces", 0),
+    ("cycles", "glossy_bounces", 0),
+    ("cycles", "transmission_bounces", 0),
+    ("cycles", "volume_bounces", 0),
+    ("cycles", "caustics_reflective", False),
+    ("cycles", "caustics_refractive", False),
+    # Smallest allowed filter: unfiltered per-pixel depth
+    ("cycles", "filter_width", 0.01),
+)
+
+_EEVEE_OVERRIDES = (
+    ("eevee", "taa_render_samples", 1),
+    ("eevee", "use_gtao", False),
+    ("eevee", "use_ssr", False),
+    ("eevee", "use_bloom", False),
+    ("eevee", "use_volumetric_lights", False),
+    ("eevee", "use_motion_blur", False),
+)
+
+_RENDER_OVERRIDES = (
+    ("render", "use_motion_blur", False),
+    ("render", "filter_size", 0.0),
+)
+
+
+class ProfileSnapshot:
+    """Original values changed by apply_depth_only_profile, restorable once."""
+
+    def __init__(self):
+        self.changes = []
+        self.created_material = None
+        self.restored = False
+
+    def set(self, owner, attr, value):
+        """Set ``owner.attr`` to ``value``, remembering the original."""
+        if owner is None or not hasattr(owner, attr):
+            return
+        current = getattr(owner, attr)
+        if current == value:
+            return
+        self.changes.append((owner, attr, current))
+        setattr(owner, attr, value)
+
+    def restore(self):
+        """Restore every recorded value in reverse order. Safe to call twice."""
+        if self.restored:
+            return
+        self.restored = True
+        for owner, attr, value in reversed(self.changes):
+            try:
+                setattr(owner, attr, value)
+            except (ReferenceError, AttributeError):
+                # Datablock removed while rendering; nothing to restore
+                pass
+        self.changes.clear()
+
+        material = self.created_material
+        if material is not None and material.users == 0:
+            bpy.data.materials.remove(material)
+        self.created_material = None
+
+
+def _get_override_material(snapshot):
+    """Return the flat override material, creating it if needed."""
+    material = bpy.data.materials.get(OVERRIDE_MATERIAL_NAME)
+    if material is None:
+        material = bpy.data.materials.new(OVERRIDE_MATERIAL_NAME)
+        material.use_nodes = False
+        material.diffuse_color = (0.8, 0.8, 0.8, 1.0)
+        snapshot.created_material = material
+    return material
+
+
+def apply_depth_only_profile(scene, view_layer, override_materials=True, cameras=None):
+    """Switch ``scene`` to minimal depth-only render settings.
+
+    Args:
+        scene: Scene to render
+        view_layer: View layer whose material override is set
+        override_materials: Replace all materials with a flat one. Material
+            displacement and alpha transparency are then not evaluated.
+        cameras: Camera objects whose depth of field is disabled (default:
+            the scene camera)
+
+    Returns:
+        ProfileSnapshot: Call ``restore()`` after the render
+    """
+    snapshot = ProfileSnapshot()
+
+    overrides = _RENDER_OVERRIDES
+    if scene.render.engine == 'CYCLES':
+        overrides += _CYCLES_OVERRIDES
+        snapshot.set(getattr(view_layer, "cycles", None), "use_denoising", False)
+    elif scene.render.engine.startswith('BLENDER_EEVEE'):
+        overrides += _EEVEE_OVERRIDES
+
+    for path, attr, value in overrides:
+        snapshot.set(getattr(scene, path, None), attr, value)
+
+    for camera in cameras or [scene.camera]:
+        if camera is not None and camera.type == 'CAMERA':
+            snapshot.set(camera.data.dof, "use_dof", False)
+
+    if override_materials:
+        snapshot.set(view_layer, "material_override",
+                     _get_override_material(snapshot))
+
+    return snapshot
+
+
+def begin(scene, view_layer, settings, cameras=None):
+    """Apply the depth-only profile if enabled in ``settings``.
+
+    Renders started while a profile is applied (the cameras of a camera
+    batch) share it: nested calls change nothing and return None.
+
+    Args:
+        cameras: Camera objects the profile must cover (default: the scene camera)
+
+    Returns:
+        callable or None: Restores the original settings when called
+    """
+    global _active
+    if not settings.depth_only_profile:
+        return None
+    if _active is not None and not _active.restored:
+        return None
+    _active = apply_depth_only_profile(
+        scene, view_layer,
+        override_materials=settings.depth_only_override_materials,
+        cameras=cameras,
+    )
+    return _active.restore
@@ -0,0 +1,286 @@
+"""Render launching helpers shared by the operators and the batch CLI."""
+
+import bpy
+
+
+def get_addon_prefs(context):
+    """Return the addon preferences, or None when the addon isn't enabled by name."""
+    addon = context.preferences.addons.get("depth_map_generator")
+    return addon.preferences if addon else None
+
+
+def apply_frame_range(scene, settings):
+    """Apply the addon's custom frame range to the scene if requested.
+
+    Returns:
+        tuple: (frame_start, frame_end) that will be rendered
+    """
+    if not settings.use_scene_frame_range:
+        scene.frame_start = settings.frame_start
+        scene.frame_end = settings.frame_end
+    return scene.frame_start, scene.frame_end
+
+
+def requested_frames(scene, settings):
+    """Return the frames a depth/mask render will produce, applying the frame range.
+
+    Returns:
+        list: The whole (custom or scene) range for animations, else the current frame
+    """
+    if settings.render_animation:
+        frame_start, frame_end = apply_frame_range(scene, settings)
+        return list(range(frame_start, frame_end + 1))
+    return [scene.frame_current]
+
+
+def call_after_render(callback):
+    """Run ``callback()`` once, when the next render completes or is cancelled.
+
+    Returns:
+        callable: The registered handler, for remove_render_handler()
+    """
+    def _handler(*_args):
+        remove_render_handler(_handler)
+        callback()
+
+    bpy.app.handlers.render_complete.append(_handler)
+    bpy.app.handlers.render_cancel.append(_handler)
+    return _handler
+
+
+def remove_render_handler(handler):
+    """Unregister a handler added by call_after_render()."""
+    for handlers in (bpy.app.handlers.render_complete,
+                     bpy.app.handlers.render_cancel):
+        if handler in handlers:
+            handlers.remove(handler)
+
+
+# One-shot callbacks waiting for the current depth render to end
+_finished_callbacks = []
+
+
+def when_render_finished(callback):
+    """Run ``callback()`` once the depth render about to start has ended.
+
+    Unlike call_after_render() this waits for every frame of renders made of
+    several jobs (cache misses, skipped static frames, parallel workers):
+    the render operator calls render_finished() as its last finish step.
+    """
+    _finished_callbacks.append(callback)
+
+
+def forget_render_finished(callback):
+    """Drop a when_render_finished() callback (e.g. the render did not start)."""
+    if callback in _finished_callbacks:
+        _finished_callbacks.remove(callback)
+
+
+def render_finished():
+    """Run and clear the when_render_finished() callbacks."""
+    callbacks = list(_finished_callbacks)
+    _finished_callbacks.clear()
+    for callback in callbacks:
+        callback()
+
+
+def redraw_sidebars():
+    """Tag 3D Viewports for redraw so progress readouts update."""
+    wm = bpy.context.window_manager
+    if wm is None:
+        return
+    for window in wm.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+
+def chain_callbacks(*callbacks):
+    """Combine optional no-argument callbacks into one, run in order (None if all are None).
+
+    The combined callback runs only once; later calls do nothing. A failing
+    callback doesn't stop the ones after it (restoring settings, finishing
+    encoders); the first error is raised once all have run.
+    """
+    callbacks = [callback for callback in callbacks if callback]
+    if not callbacks:
+        return None
+    done = []
+
+    def _run():
+        if done:
+            return
+        done.append(True)
+        errors = []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                errors.append(e)
+        for error in errors[1:]:
+            print(f"[depth_map_generator] Render finish step failed: {error}")
+        if errors:
+            raise errors[0]
+    return _run
+
+
+def start_guarded(start, *args, on_finish=None, **kwargs):
+    """Call ``start(*args, on_finish=on_finish, **kwargs)``, running on_finish if it raises.
+
+    Renders that fail before they are under way never reach their finish
+    callback; on_finish must tolerate a second call (chain_callbacks()
+    results do) for those that already ran it.
+    """
+    try:
+        return start(*args, on_finish=on_finish, **kwargs)
+    except Exception:
+        if on_finish:
+            on_finish()
+        raise
+
+
+def start_render(animation=False, blocking=False, on_finish=None):
+    """Start a render of the active scene.
+
+    Interactive sessions use INVOKE_DEFAULT so the UI stays responsive.
+    Blocking renders (batch CLI, background mode) execute in place and
+    only return once every frame has been written.
+
+    Args:
+        animation: Render the scene frame range instead of the current frame
+        blocking: Render in place instead of as a background job
+        on_finish: Optional callable run once the render has ended,
+            whether it finished, was cancelled or failed to start
+
+    Returns:
+        set: The operator result, e.g. {'FINISHED'} or {'CANCELLED'}
+    """
+    if blocking or bpy.app.background:
+        try:
+            return bpy.ops.render.render(animation=animation)
+        finally:
+            if on_finish:
+                on_finish()
+
+    handler = call_after_render(on_finish) if on_finish else None
+    try:
+        result = bpy.ops.render.render('INVOKE_DEFAULT', animation=animation)
+    except Exception:
+        if handler is not None:
+            remove_render_handler(handler)
+            on_finish()
+        raise
+    if handler is not None and 'RUNNING_MODAL' not in result:
+        # The render job never started, so the handlers will not fire
+        remove_render_handler(handler)
+        on_finish()
+    return result
+
+
+def call_in_window(window, operator, *args, **kwargs):
+    """Call an operator in ``window``'s context from outside an operator (e.g. a timer)."""
+    if window is None:
+        return operator(*args, **kwargs)
+    if hasattr(bpy.context, "temp_override"):
+        with bpy.context.temp_override(window=window, screen=window.screen):
+            return operator(*args, **kwargs)
+    # Blender < 3.2: legacy dict override
+    return operator({"window": window, "screen": window.screen}, *args, **kwargs)
+
+
+def _invoke_render(window):
+    """Start an interactive single-frame render from outside an operator (e.g. a timer)."""
+    return call_in_window(window, bpy.ops.render.render, 'INVOKE_DEFAULT')
+
+
+class FrameQueue:
+    """Renders an arbitrary (possibly non-contiguous) list of frames one at a time.
+
+    Used when only some frames of a range need rendering, e.g. cache misses.
+    Blocking queues render in place; interactive queues chain INVOKE_DEFAULT
+    renders from render_complete handlers and a timer so the UI stays live.
+
+    Args:
+        scene: Scene to render
+        frames: Frame numbers, rendered in the given order
+        on_frame: Optional callback(frame) after each frame's outputs are written
+        on_finish: Optional callback(queue) once all frames are done or the
+            queue was cancelled
+    """
+
+    def __init__(self, scene, frames, on_frame=None, on_finish=None):
+        self.scene = scene
+        self.frames = list(frames)
+        self.on_frame = on_frame
+        self.on_finish = on_finish
+        self.rendered = []
+        self.cancelled = False
+        self.current = None
+        self._pending = list(self.frames)
+        self._window = None
+
+    def add(self, frames):
+        """Queue more frames behind the pending ones (e.g. from on_frame)."""
+        self.frames.extend(frames)
+        self._pending.extend(frames)
+
+    def run_blocking(self):
+        """Render every frame in place. Returns the list of rendered frames."""
+        original_frame = self.scene.frame_current
+        try:
+            for frame in self._pending:
+                self.scene.frame_set(frame)
+                result = bpy.ops.render.render()
+                if 'CANCELLED' in result:
+                    self.cancelled = True
+                    break
+                self._frame_done(frame)
+        finally:
+            self._pending = []
+            self.scene.frame_set(original_frame)
+            if self.on_finish:
+                self.on_finish(self)
+        return self.rendered
+
+    def start(self, context):
+        """Start rendering interactively. Returns False if nothing could start."""
+        self._window = context.window
+        bpy.app.handlers.render_complete.append(self._on_complete)
+        bpy.app.handlers.render_cancel.append(self._on_cancel)
+        self._render_next()
+        return not self.cancelled
+
+    def _frame_done(self, frame):
+        self.rendered.append(frame)
+        if self.on_frame:
+            self.on_frame(frame)
+
+    def _render_next(self):
+        if not self._pending:
+            self._finish()
+            return None
+        self.current = self._pending.pop(0)
+        self.scene.frame_set(self.current)
+        if 'RUNNING_MODAL' not in _invoke_render(self._window):
+            self.cancelled = True
+            self._finish()
+        # Timer callback: None = don't repeat
+        return None
+
+    def _on_complete(self, *_args):
+        self._frame_done(self.current)
+        # Starting a render from inside a render handler is not allowed
+        bpy.app.timers.register(self._render_next, first_interval=0.01)
+
+    def _on_cancel(self, *_args):
+        self.cancelled = True
+        self._finish()
+
+    def _finish(self):
+        for handlers, handler in ((bpy.app.handlers.render_complete, self._on_complete),
+                                  (bpy.app.handlers.render_cancel, self._on_cancel)):
+            if handler in handlers:
+                handlers.remove(handler)
+        if self.on_finish:
+            callback, self.on_finish = self.on_finish, None
+            callback(self)
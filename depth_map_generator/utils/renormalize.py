@@ -0,0 +1,359 @@
+"""Offline re-normalization of raw float depth - NumPy versions of the compositor mappings.
+
+Reproduces the LINEAR, LOGARITHMIC and RAW pipelines built in nodes.py
+(MapRange, Math, Bright/Contrast and the black-to-white ColorRamp) so a
+sequence saved with "Save Raw Depth" can be re-normalized with new
+near/far, contrast or scale values without re-rendering.
+
+Runs inside or outside Blender (NumPy required)::
+
+    python -m depth_map_generator.utils.renormalize raw_dir out_dir \\
+        --mode LINEAR --near 0.5 --far 40 --contrast 0.2 --workers 16
+
+Outputs match renders using the Standard view transform on linear data;
+pass ``--transfer srgb`` to apply the sRGB encoding Blender uses when saving
+PNGs through a display transform.
+
+``--global-range`` (or ``--mode HISTOGRAM``) adds a statistics pass over the
+whole sequence first, so every frame shares one near/far (or one
+histogram-equalization curve) instead of flickering frame to frame.
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import auto_range, depth_stats, frames
+
+# Blender's MapRange treats |value| > BLENDER_ZMAX as "no hit" (background)
+BLENDER_ZMAX = depth_stats.BLENDER_ZMAX
+
+# Range used by the compositor pipeline when use_custom_range is off
+DEFAULT_NEAR = 0.1
+DEFAULT_FAR = 1000.0
+
+NORMALIZATION_MODES = ('LINEAR', 'LOGARITHMIC', 'RAW', 'HISTOGRAM')
+
+# Percentiles of the sequence statistics used as the global near/far
+DEFAULT_LOW_PERCENTILE = 0.5
+DEFAULT_HIGH_PERCENTILE = 99.5
+
+RAW_DEPTH_PREFIX = "raw_depth_"
+
+
+def default_params():
+    """Return normalization parameters matching the DepthMapSettings defaults."""
+    return {
+        "mode": 'LINEAR',
+        "near": DEFAULT_NEAR,
+        "far": DEFAULT_FAR,
+        "scale": 1.0,
+        "contrast": 0.2,
+        "brightness": 0.0,
+        "bit_depth": '16',
+        "transfer": 'LINEAR',
+        # HISTOGRAM only: (depth_knots, levels) from DepthStats.equalization_curve()
+        "curve": None,
+    }
+
+
+def params_from_settings(settings):
+    """Build normalization parameters from a DepthMapSettings property group."""
+    params = default_params()
+    params.update(
+        mode=settings.depth_normalization,
+        scale=settings.depth_scale_factor,
+        contrast=settings.contrast_value,
+        brightness=settings.brightness_value,
+        bit_depth=settings.output_bit_depth,
+    )
+    if settings.use_auto_range:
+        near, far = auto_range.mapping_range(settings.auto_near, settings.auto_far, settings)
+        params.update(near=near, far=far)
+    elif settings.use_custom_range:
+        params.update(near=settings.near_distance, far=settings.far_distance)
+    return params
+
+
+def map_range(values, from_min, from_max, to_min, to_max):
+    """Compositor MapRange (no clamp), including its BLENDER_ZMAX handling."""
+    span = from_max - from_min
+    factor = (to_max - to_min) / span if span != 0.0 else 0.0
+    out = (values - from_min) * factor + to_min
+    out = np.where(values > BLENDER_ZMAX, to_max, out)
+    return np.where(values < -BLENDER_ZMAX, to_min, out)
+
+
+def log10_safe(values):
+    """Compositor Math LOGARITHM with base 10: 0 for non-positive inputs."""
+    out = np.zeros_like(values)
+    np.log10(values, out=out, where=values > 0.0)
+    return out
+
+
+def bright_contrast(values, contrast, brightness):
+    """Compositor Bright/Contrast node (Werner D. Streidt's algorithm)."""
+    brightness = brightness / 100.0
+    delta = contrast / 200.0
+    if contrast > 0.0:
+        a = 1.0 / max(1.0 - delta * 2.0, np.finfo(np.float32).eps)
+        b = a * (brightness - delta)
+    else:
+        delta = -delta
+        a = max(1.0 - delta * 2.0, 0.0)
+        b = a * brightness + delta
+    return values * a + b
+
+
+def srgb_encode(values):
+    """Linear -> sRGB transfer function."""
+    values = np.clip(values, 0.0, 1.0)
+    return np.where(
+        values <= 0.0031308,
+        values * 12.92,
+        1.055 * np.power(values, 1.0 / 2.4) - 0.055,
+    )
+
+
+def normalize(depth, params):
+    """Apply the configured normalization pipeline to a raw depth array.
+
+    Returns:
+        numpy.ndarray: float32 values; [0, 1] for LINEAR / LOGARITHMIC
+    """
+    depth = np.asarray(depth, dtype=np.float32)
+    mode = params["mode"]
+    if mode not in NORMALIZATION_MODES:
+        mode = 'LINEAR'
+
+    if mode == 'LINEAR':
+        values = map_range(depth, params["near"], params["far"], 1.0, 0.0)
+    elif mode == 'LOGARITHMIC':
+        values = log10_safe(depth * params["scale"])
+        values = map_range(values, params["near"], params["far"], 1.0, 0.0)
+    elif mode == 'HISTOGRAM':
+        if params.get("curve") is None:
+            values = map_range(depth, params["near"], params["far"], 1.0, 0.0)
+        else:
+            knots, levels = params["curve"]
+            values = np.interp(depth, knots, levels).astype(np.float32)
+            values = np.where(depth > BLENDER_ZMAX, 0.0, values)
+    else:
+        values = depth * params["scale"]
+
+    values = bright_contrast(values, params["contrast"], params["brightness"])
+
+    if mode != 'RAW':
+        # Black-to-white ColorRamp: linear ramp clamped to [0, 1]
+        values = np.clip(values, 0.0, 1.0)
+
+    if params.get("transfer", 'LINEAR').upper() == 'SRGB':
+        values = srgb_encode(values)
+
+    return values.astype(np.float32, copy=False)
+
+
+def renormalize_file(src_path, dst_path, params, compress_level=1):
+    """Normalize one raw depth file and write it as an 8/16-bit PNG."""
+    values = normalize(frames.load_depth(src_path), params)
+    frames.write_png(dst_path, values, params["bit_depth"], compress_level)
+    return dst_path
+
+
+def _renormalize_task(args):
+    return renormalize_file(*args)
+
+
+def renormalize_frames(sources, dst_dir, params, workers=None, dst_prefix="depth_",
+                       compress_level=1):
+    """Normalize raw depth files (frame -> path) into PNGs using a process pool.
+
+    Args:
+        sources: dict frame -> raw ``.exr`` / ``.npy`` path
+        dst_dir: Directory for ``<dst_prefix>####.png`` output (created)
+        params: Normalization parameters, see default_params()
+        workers: Process count (None = os.cpu_count(), 1 = in-process)
+        compress_level: zlib level for the PNG output
+
+    Returns:
+        list: Written PNG paths in frame order
+    """
+    os.makedirs(dst_dir, exist_ok=True)
+    tasks = [
+        (path, os.path.join(dst_dir, frames.frame_filename(dst_prefix, frame)),
+         params, compress_level)
+        for frame, path in sorted(sources.items())
+    ]
+    if not tasks:
+        return []
+
+    if workers == 1 or len(tasks) == 1:
+        return [_renormalize_task(task) for task in tasks]
+
+    chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_renormalize_task, tasks, chunksize=chunksize))
+
+
+def find_raw_frames(src_dir, src_prefix=RAW_DEPTH_PREFIX):
+    """Map frame -> raw depth path for ``.exr`` and ``.npy`` frames in ``src_dir``."""
+    sources = frames.find_frames(src_dir, src_prefix, ".exr")
+    sources.update(frames.find_frames(src_dir, src_prefix, ".npy"))
+    return dict(sorted(sources.items()))
+
+
+def renormalize_sequence(src_dir, dst_dir, params, workers=None,
+                         src_prefix=RAW_DEPTH_PREFIX, dst_prefix="depth_",
+                         compress_level=1):
+    """Re-normalize every raw depth frame in ``src_dir`` using a process pool.
+
+    Both ``.exr`` and ``.npy`` raw frames are picked up.
+
+    Args:
+        src_dir: Directory containing ``<src_prefix>####.exr|.npy`` files
+        dst_dir: Directory for ``<dst_prefix>####.png`` output (created)
+        params: Normalization parameters, see default_params()
+        workers: Process count (None = os.cpu_count(), 1 = in-process)
+        compress_level: zlib level for the PNG output
+
+    Returns:
+        list: Written PNG paths in frame order
+    """
+    return renormalize_frames(
+        find_raw_frames(src_dir, src_prefix), dst_dir, params, workers=workers,
+        dst_prefix=dst_prefix, compress_level=compress_level,
+    )
+
+
+def apply_stats(params, stats, low=DEFAULT_LOW_PERCENTILE, high=DEFAULT_HIGH_PERCENTILE):
+    """Return a copy of ``params`` fitted to whole-sequence depth statistics.
+
+    HISTOGRAM gets the equalization curve; LINEAR and LOGARITHMIC get one
+    global near/far from the ``low`` / ``high`` percentiles. RAW is unchanged.
+    """
+    params = dict(params)
+    if stats.total == 0 or params["mode"] == 'RAW':
+        return params
+
+    near = stats.percentile(low)
+    far = stats.percentile(high)
+    if far <= near:
+        far = near * 1.001 + 1e-6
+
+    if params["mode"] == 'HISTOGRAM':
+        knots, levels = stats.equalization_curve()
+        params["curve"] = (knots.tolist(), levels.tolist())
+        params.update(near=near, far=far)
+    elif params["mode"] == 'LOGARITHMIC':
+        scale = params["scale"]
+        params.update(near=float(np.log10(max(near * scale, 1e-6))),
+                      far=float(np.log10(max(far * scale, 1e-6))))
+    else:
+        params.update(near=near, far=far)
+    return params
+
+
+def normalize_sequence(sources, dst_dir, params, low=DEFAULT_LOW_PERCENTILE,
+                       high=DEFAULT_HIGH_PERCENTILE, workers=None, dst_prefix="depth_",
+                       compress_level=1, stats=None, stats_path=None):
+    """Two-pass, temporally stable normalization of a raw depth sequence.
+
+    Pass one streams every frame into merged DepthStats (skipped when
+    ``stats`` is given); pass two normalizes all frames with the same
+    global range or equalization curve. The statistics are saved to
+    ``stats_path`` (default: depth_stats.json in ``dst_dir``) for merging.
+
+    Args:
+        sources: dict frame -> raw depth path
+        dst_dir: Directory for the PNG output
+        params: Normalization parameters, see default_params()
+        low: Percentile used as the global near
+        high: Percentile used as the global far
+        workers: Process count for both passes
+        dst_prefix: Output file prefix
+        compress_level: zlib level for the PNG output
+        stats: Pre-collected DepthStats (e.g. merged from other machines)
+        stats_path: Where to save the statistics JSON
+
+    Returns:
+        tuple: (written PNG paths, fitted params, DepthStats)
+    """
+    if stats is None:
+        stats = depth_stats.collect_stats(
+            [path for _frame, path in sorted(sources.items())], workers
+        )
+    fitted = apply_stats(params, stats, low, high)
+    written = renormalize_frames(sources, dst_dir, fitted, workers=workers,
+                                 dst_prefix=dst_prefix, compress_level=compress_level)
+    stats.save(stats_path or os.path.join(dst_dir, depth_stats.STATS_FILENAME))
+    return written, fitted, stats
+
+
+def main(argv=None):
+    """Command line entry point. Returns the process exit code."""
+    defaults = default_params()
+    parser = argparse.ArgumentParser(
+        prog="depth_map_generator.utils.renormalize",
+        description="Re-normalize raw float depth frames into 8/16-bit PNGs.",
+    )
+    parser.add_argument("src_dir", help="Directory with raw_depth_####.exr/.npy frames")
+    parser.add_argument("dst_dir", help="Output directory for depth_####.png frames")
+    parser.add_argument("--mode", choices=NORMALIZATION_MODES, default=defaults["mode"])
+    parser.add_argument("--near", type=float, default=defaults["near"])
+    parser.add_argument("--far", type=float, default=defaults["far"])
+    parser.add_argument("--scale", type=float, default=defaults["scale"])
+    parser.add_argument("--contrast", type=float, default=defaults["contrast"])
+    parser.add_argument("--brightness", type=float, default=defaults["brightness"])
+    parser.add_argument("--bit-depth", choices=('8', '16'), default=defaults["bit_depth"])
+    parser.add_argument("--transfer", choices=('linear', 'srgb'), default='linear')
+    parser.add_argument("--src-prefix", default=RAW_DEPTH_PREFIX)
+    parser.add_argument("--dst-prefix", default="depth_")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--compress-level", type=int, default=1, choices=range(10))
+    parser.add_argument("--global-range", action="store_true",
+                        help="Fit one near/far to the whole sequence (implied by HISTOGRAM)")
+    parser.add_argument("--low-percentile", type=float, default=DEFAULT_LOW_PERCENTILE)
+    parser.add_argument("--high-percentile", type=float, default=DEFAULT_HIGH_PERCENTILE)
+    parser.add_argument("--stats", nargs="+", metavar="JSON",
+                        help="Use (and merge) pre-collected depth_stats.json files "
+                             "instead of running the statistics pass")
+    args = parser.parse_args(argv)
+
+    params = {
+        "mode": args.mode,
+        "near": args.near,
+        "far": args.far,
+        "scale": args.scale,
+        "contrast": args.contrast,
+        "brightness": args.brightness,
+        "bit_depth": args.bit_depth,
+        "transfer": args.transfer.upper(),
+        "curve": None,
+    }
+    sources = find_raw_frames(args.src_dir, args.src_prefix)
+    if args.global_range or args.stats or args.mode == 'HISTOGRAM':
+        stats = None
+        if args.stats:
+            stats = depth_stats.DepthStats()
+            for path in args.stats:
+                stats.merge(depth_stats.DepthStats.load(path))
+        written, fitted, _stats = normalize_sequence(
+            sources, args.dst_dir, params, low=args.low_percentile,
+            high=args.high_percentile, workers=args.workers,
+            dst_prefix=args.dst_prefix, compress_level=args.compress_level, stats=stats,
+        )
+        print(f"Global range: {fitted['near']:.4f} - {fitted['far']:.4f}")
+    else:
+        written = renormalize_frames(
+            sources, args.dst_dir, params, workers=args.workers,
+            dst_prefix=args.dst_prefix, compress_level=args.compress_level,
+        )
+    print(f"Wrote {len(written)} frames to {args.dst_dir}")
+    return 0 if written else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
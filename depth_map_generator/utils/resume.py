@@ -0,0 +1,155 @@
+"""Resume an interrupted animation render from its completion manifest.
+
+With ``resume_render`` the requested frames are verified against the
+completion.CompletionManifest in the depth output directory before
+anything renders. Only frames with missing, truncated, corrupt or
+outdated files are rendered, one at a time through rendering.FrameQueue.
+Each frame is checksummed and recorded as soon as its files are written,
+and the manifest is saved every few seconds, so a crash loses at most the
+frames since the last save (and those are still adopted on the next
+resume when their files are intact).
+"""
+
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bpy
+
+from . import async_encode, comfy_stream, completion, nodes, paths, rendering
+
+# Seconds between manifest saves while rendering
+SAVE_INTERVAL = 5.0
+
+# Render settings that change the pixels of every output file
+_RENDER_ATTRS = ("engine", "resolution_x", "resolution_y", "resolution_percentage",
+                 "pixel_aspect_x", "pixel_aspect_y")
+
+# Preview-only nodes that don't change the files
+_PREVIEW_NODES = ("DM_Viewer", "DM_Composite")
+
+
+def settings_fingerprint(scene, view_layer, settings, prefs=None):
+    """Hash of everything that shapes the output files: pipeline spec and render size."""
+    spec = nodes.pipeline_spec(settings, view_layer, prefs)
+    wanted = {name: want for name, want in spec["nodes"].items() if name not in _PREVIEW_NODES}
+    links = [link for link in spec["links"] if link[2] not in _PREVIEW_NODES]
+    render = scene.render
+    key = (wanted, links, spec["passes"],
+           [getattr(render, attr, None) for attr in _RENDER_ATTRS])
+    return hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def manifest_path(settings, prefs=None):
+    """Path of the completion manifest in the depth output directory."""
+    return os.path.join(paths.get_depth_output_dir(settings, prefs),
+                        completion.MANIFEST_FILENAME)
+
+
+def plan_resume(context, settings, frame_list, prefs=None, workers=8):
+    """Verify the existing outputs and decide which frames to render.
+
+    Returns:
+        tuple: (manifest, to_render: list of frames, invalid: dict frame -> reason
+            for frames whose files exist but failed the check)
+    """
+    manifest = completion.CompletionManifest.load(
+        manifest_path(settings, prefs),
+        settings_fingerprint(context.scene, context.view_layer, settings, prefs),
+    )
+    frame_files = {frame: paths.get_frame_output_files(settings, frame, prefs)
+                   for frame in frame_list}
+    if manifest.discarded:
+        # Files of other settings are never reused
+        valid, invalid = [], {}
+    else:
+        valid, problems = manifest.verify(frame_files, workers)
+        invalid = {frame: reason for frame, reason in problems.items()
+                   if not reason.endswith(": missing")}
+    manifest.save()
+    kept = set(valid)
+    return manifest, [frame for frame in frame_list if frame not in kept], invalid
+
+
+class ResumeRecorder:
+    """Checksums each rendered frame in the background and records it in the manifest.
+
+    Args:
+        manifest: CompletionManifest
+        frame_files: dict frame -> output file paths
+    """
+
+    def __init__(self, manifest, frame_files):
+        self.manifest = manifest
+        self.frame_files = frame_files
+        self.errors = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dm_resume")
+        self._saved = time.monotonic()
+
+    def on_frame(self, frame):
+        """FrameQueue callback: the frame's outputs are written."""
+        # Background-encoded files may still be in flight
+        async_encode.wait_for_frame(frame)
+        self._executor.submit(self._record, frame)
+
+    def finish(self):
+        """Record the remaining frames and save the manifest. Returns error messages."""
+        self._executor.shutdown(wait=True)
+        self.manifest.save()
+        for error in self.errors:
+            print(f"[depth_map_generator] Resume manifest: {error}")
+        return list(self.errors)
+
+    def _record(self, frame):
+        error = self.manifest.record(frame, self.frame_files[frame])
+        if error:
+            self.errors.append(f"frame {frame} not recorded: {error}")
+        if time.monotonic() - self._saved >= SAVE_INTERVAL:
+            self.manifest.save()
+            self._saved = time.monotonic()
+
+
+def render_resuming(context, frame_list, prefs=None, blocking=False, on_finish=None):
+    """Render only the frames without valid outputs, recording each one.
+
+    Args:
+        context: Blender context (scene, window)
+        frame_list: Frames to produce, in order
+        prefs: AddonPreferences (optional)
+        blocking: Render in place instead of interactively
+        on_finish: Optional callable run once all frames are done
+
+    Returns:
+        tuple: (kept: int, to_render: int, invalid: dict frame -> reason)
+    """
+    scene = context.scene
+    settings = scene.depth_map_settings
+    manifest, to_render, invalid = plan_resume(context, settings, frame_list, prefs)
+    recorder = ResumeRecorder(manifest, {
+        frame: paths.get_frame_output_files(settings, frame, prefs) for frame in to_render
+    })
+    # Frames kept from earlier runs are written already
+    pending = set(to_render)
+    for frame in frame_list:
+        if frame not in pending:
+            comfy_stream.hand_off(frame)
+
+    def _on_finish(queue):
+        recorder.finish()
+        if not queue.cancelled:
+            print(f"[depth_map_generator] Resumed render: {len(queue.rendered)} frames"
+                  f" rendered, {len(frame_list) - len(to_render)} kept")
+        if on_finish:
+            on_finish()
+
+    def _on_frame(frame):
+        recorder.on_frame(frame)
+        comfy_stream.hand_off(frame)
+
+    queue = rendering.FrameQueue(scene, to_render, on_frame=_on_frame, on_finish=_on_finish)
+    if blocking or bpy.app.background:
+        queue.run_blocking()
+    else:
+        queue.start(context)
+    return len(frame_list) - len(to_render), len(to_render), invalid
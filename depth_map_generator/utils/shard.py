@@ -0,0 +1,318 @@
+"""Frame-range sharding across multiple background Blender worker processes.
+
+Each worker is a ``blender -b`` process running the batch CLI on a saved copy
+of the current file, rendering one contiguous slice of the frame range. All
+workers write into the same output directory; frame numbers are disjoint so
+``depth_####`` / ``mask_####`` files never collide.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import bpy
+
+from . import rendering
+
+# The single sharded render started from the UI, polled by a timer
+_active = None
+
+
+def split_frame_range(frame_start, frame_end, workers):
+    """Split an inclusive frame range into at most ``workers`` contiguous chunks.
+
+    Chunk sizes differ by at most one frame. Contiguous chunks keep
+    simulation and cache playback sequential within each worker.
+
+    Returns:
+        list: (start, end) tuples, inclusive
+    """
+    total = frame_end - frame_start + 1
+    workers = max(1, min(workers, total))
+    base, extra = divmod(total, workers)
+
+    chunks = []
+    start = frame_start
+    for i in range(workers):
+        size = base + (1 if i < extra else 0)
+        chunks.append((start, start + size - 1))
+        start += size
+    return chunks
+
+
+def threads_per_worker(workers, threads=0):
+    """Resolve the render thread budget for each worker (0 = share all cores evenly)."""
+    if threads > 0:
+        return threads
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+class ShardedRender:
+    """A frame range rendered by N background Blender processes.
+
+    Args:
+        blender: Path to the Blender executable
+        blend_path: .blend file the workers open
+        frame_start: First frame (inclusive)
+        frame_end: Last frame (inclusive)
+        workers: Number of worker processes
+        output_dir: Absolute depth output directory, used for progress
+        threads: Render threads per worker (0 = cpu_count / workers)
+        scene: Scene name to render (None = the file's active scene)
+        view_layer: View layer name (None = the scene's active layer)
+        settings: DepthMapSettings overrides passed to every worker
+        prefix: Depth file prefix used to count finished frames
+        ext: Depth file extension used to count finished frames
+
+    Workers never run the sequence statistics pass; the caller runs it over
+    all shards' raw depth once they finish.
+    """
+
+    def __init__(self, blender, blend_path, frame_start, frame_end, workers,
+                 output_dir, threads=0, scene=None, view_layer=None,
+                 settings=None, prefix="depth_", ext=".png"):
+        self.blender = blender
+        self.blend_path = blend_path
+        self.frame_start = frame_start
+        self.frame_end = frame_end
+        self.output_dir = output_dir
+        self.threads = threads_per_worker(workers, threads)
+        self.scene = scene
+        self.view_layer = view_layer
+        self.settings = dict(settings or {})
+        self.prefix = prefix
+        self.ext = ext
+
+        self.chunks = split_frame_range(frame_start, frame_end, workers)
+        self.total = frame_end - frame_start + 1
+        self.work_dir = None
+        self.started = None
+        self.progress = None
+        self._procs = []
+        self._expected = {
+            f"{prefix}{frame:04d}{ext}"
+            for frame in range(frame_start, frame_end + 1)
+        }
+
+    @property
+    def workers(self):
+        return len(self.chunks)
+
+    def _worker_command(self, index, chunk):
+        """Write the worker's job spec and return its command line."""
+        from .. import cli
+
+        job = {
+            "blend": self.blend_path,
+            "frames": list(chunk),
+            "threads": self.threads,
+            # Workers must never shard again
+            "settings": dict(self.settings, shard_workers=1),
+            # Sequence-wide normalization runs once over all shards' frames
+            "normalize_sequence": False,
+        }
+        if self.scene:
+            job["scene"] = self.scene
+        if self.view_layer:
+            job["view_layer"] = self.view_layer
+
+        spec_path = os.path.join(self.work_dir, f"shard_{index:03d}.json")
+        with open(spec_path, "w", encoding="utf-8") as f:
+            json.dump({"jobs": [job]}, f)
+
+        report_path = os.path.join(self.work_dir, f"shard_{index:03d}_report.json")
+        return [
+            self.blender, "-b", "-P", cli.__file__,
+            "--", spec_path, "--report", report_path,
+        ]
+
+    def start(self, work_dir=None):
+        """Launch all worker processes."""
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix="dm_shards_")
+        os.makedirs(self.work_dir, exist_ok=True)
+        self.started = time.time()
+
+        for index, chunk in enumerate(self.chunks):
+            log = open(os.path.join(self.work_dir, f"shard_{index:03d}.log"), "wb")
+            proc = subprocess.Popen(
+                self._worker_command(index, chunk),
+                stdout=log, stderr=subprocess.STDOUT,
+            )
+            self._procs.append((proc, log))
+
+    def frames_done(self):
+        """Count depth frames written by this run (ignores stale files)."""
+        try:
+            entries = os.scandir(self.output_dir)
+        except OSError:
+            return 0
+        with entries:
+            return sum(
+                1 for entry in entries
+                if entry.name in self._expected
+                and entry.stat().st_mtime >= self.started
+            )
+
+    def poll(self):
+        """Return aggregate progress without blocking.
+
+        Returns:
+            dict: done / total frames, running worker count, failed shard
+                indices and whether every worker has exited
+        """
+        running = 0
+        failed = []
+        for index, (proc, _log) in enumerate(self._procs):
+            code = proc.poll()
+            if code is None:
+                running += 1
+            elif code != 0:
+                failed.append(index)
+        return {
+            "done": self.frames_done(),
+            "total": self.total,
+            "workers": self.workers,
+            "running": running,
+            "failed": failed,
+            "finished": running == 0,
+            "elapsed": time.time() - self.started,
+        }
+
+    def wait(self, interval=1.0, callback=None):
+        """Block until all workers exit, calling ``callback(progress)`` each poll."""
+        while True:
+            progress = self.poll()
+            if callback:
+                callback(progress)
+            if progress["finished"]:
+                self.close()
+                return progress
+            time.sleep(interval)
+
+    def cancel(self):
+        """Terminate all running workers."""
+        for proc, _log in self._procs:
+            if proc.poll() is None:
+                proc.terminate()
+        self.close()
+
+    def worker_errors(self):
+        """Collect error messages from the workers' JSON reports."""
+        errors = []
+        for index in range(self.workers):
+            path = os.path.join(self.work_dir, f"shard_{index:03d}_report.json")
+            try:
+                with open(path, encoding="utf-8") as f:
+                    report = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            for job in report.get("jobs", []):
+                if job.get("error"):
+                    errors.append(f"shard {index}: {job['error']}")
+            if report.get("error"):
+                errors.append(f"shard {index}: {report['error']}")
+        return errors
+
+    def close(self):
+        """Close worker log handles."""
+        for proc, log in self._procs:
+            if proc.poll() is not None and not log.closed:
+                log.close()
+
+    def cleanup(self):
+        """Remove the temporary work directory (job specs, logs, file copy)."""
+        if self.work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def create_from_scene(scene, view_layer, settings, output_dir, prefs=None):
+    """Save a copy of the current file and build a ShardedRender for it.
+
+    Workers open the copy, so unsaved edits are rendered too. Output paths
+    are passed as absolute overrides because relative ``//`` paths would
+    otherwise resolve next to the copy.
+
+    Returns:
+        ShardedRender: Not yet started; its work_dir holds the file copy
+    """
+    from . import nodes, paths
+
+    work_dir = tempfile.mkdtemp(prefix="dm_shards_")
+    blend_path = os.path.join(work_dir, "shard_source.blend")
+    bpy.ops.wm.save_as_mainfile(filepath=blend_path, copy=True)
+
+    frame_start, frame_end = rendering.apply_frame_range(scene, settings)
+
+    # With a sequence pass the workers only write raw depth; count those
+    progress_dir, prefix = output_dir, paths.output_prefix("depth", settings)
+    ext = paths.output_extension(settings)
+    if nodes.wants_packed_output(settings):
+        prefix = paths.output_prefix("depth_mask", settings)
+    elif nodes.wants_sequence_pass(settings):
+        progress_dir = paths.get_raw_depth_output_dir(settings, prefs)
+        prefix, ext = paths.output_prefix("raw_depth", settings), ".exr"
+
+    shard = ShardedRender(
+        bpy.app.binary_path,
+        blend_path,
+        frame_start,
+        frame_end,
+        settings.shard_workers,
+        progress_dir,
+        threads=settings.shard_threads,
+        scene=scene.name,
+        view_layer=view_layer.name,
+        settings={
+            "output_path": output_dir,
+            "mask_output_path": paths.get_mask_output_dir(settings, prefs),
+            # The paths above already include a camera batch subfolder
+            "camera_subdir": "",
+            # Each worker would preallocate (and truncate) the same stack file
+            "stack_sequence": False,
+            "publish_to_comfyui": False,
+            "comfy_stream": False,
+            # Workers would rewrite the same completion manifest
+            "resume_render": False,
+        },
+        prefix=prefix,
+        ext=ext,
+    )
+    shard.work_dir = work_dir
+    return shard
+
+
+def get_active():
+    """Return the sharded render started from the UI, if any."""
+    return _active
+
+
+def run_in_background(shard, on_finish=None, interval=1.0):
+    """Start ``shard`` and poll it from a bpy.app timer so the UI stays live.
+
+    Args:
+        shard: ShardedRender to start
+        on_finish: Optional callback(shard, progress) run once workers exit
+        interval: Seconds between progress polls
+    """
+    global _active
+    shard.start(shard.work_dir)
+    shard.progress = shard.poll()
+    _active = shard
+
+    def _tick():
+        global _active
+        shard.progress = shard.poll()
+        rendering.redraw_sidebars()
+        if not shard.progress["finished"]:
+            return interval
+        shard.close()
+        _active = None
+        if on_finish:
+            on_finish(shard, shard.progress)
+        return None
+
+    bpy.app.timers.register(_tick, first_interval=interval)
+
@@ -0,0 +1,138 @@
+"""Append rendered depth frames to the stacked sequence container during the render.
+
+With ``stack_sequence`` the DM_Viewer node receives the normalized depth.
+A render_post handler copies the Viewer pixels (as background encoding
+does) and a single-thread EncodePool quantizes them like the depth files
+and writes them into the preallocated frame_stack.FrameStack, so the stack
+fills up frame by frame while the render continues. The sidecar is synced
+after every frame; the render's finish callback flushes the last ones and
+lists the frames that were never captured under ``missing``.
+"""
+
+import os
+
+import bpy
+import numpy as np
+
+from . import async_encode, cached_render, frame_stack, frames, nodes, paths, renormalize
+
+# The capture of the render in progress, if any
+_active = None
+
+
+def get_active():
+    """Return the stack capture of the render in progress, if any."""
+    return _active
+
+
+def stack_path(settings, prefs=None):
+    """Path of the stacked sequence file in the depth output directory."""
+    return os.path.join(paths.get_depth_output_dir(settings, prefs),
+                        frame_stack.STACK_FILENAME)
+
+
+class StackCapture:
+    """Captures each rendered frame from the Viewer into a FrameStack.
+
+    Args:
+        scene: Scene being rendered
+        settings: DepthMapSettings property group
+        frame_list: Frames of the render, one stack slot each
+        prefs: AddonPreferences (optional)
+    """
+
+    def __init__(self, scene, settings, frame_list, prefs=None):
+        render = scene.render
+        self.width = render.resolution_x * render.resolution_percentage // 100
+        self.height = render.resolution_y * render.resolution_percentage // 100
+        self.path = stack_path(settings, prefs)
+        self.frame_list = list(frame_list)
+        self.transfer = cached_render.view_transfer(scene) or 'LINEAR'
+
+        # Same values as the depth files: quantized for PNG / TIFF, linear floats otherwise
+        if settings.output_format in {'OPEN_EXR', 'NUMPY'}:
+            self.dtype, self.bit_depth = np.float32, None
+        else:
+            self.bit_depth = settings.output_bit_depth
+            self.dtype = np.uint16 if self.bit_depth == '16' else np.uint8
+        near, far = nodes.depth_range(settings)
+        self.info = {
+            "normalization": settings.depth_normalization,
+            "near": near,
+            "far": far,
+            "bit_depth": self.bit_depth,
+            "transfer": self.transfer if self.bit_depth else 'LINEAR',
+        }
+
+        self.pool = async_encode.EncodePool(threads=1,
+                                            max_pending=settings.encode_queue_frames)
+        self.stack = None
+        self.missed = []
+
+    def start(self, tree=None):
+        """Preallocate the stack and register the render_post handler.
+
+        Raises:
+            OSError: If the stack file can't be created
+        """
+        global _active
+        if _active is not None:
+            _active.finish()
+        self.stack = frame_stack.FrameStack.create(
+            self.path, self.frame_list, self.height, self.width, self.dtype, **self.info
+        )
+        viewer = tree.nodes.get(async_encode.VIEWER_NODE_NAME) if tree is not None else None
+        if viewer is not None:
+            # Only the active Viewer node fills the "Viewer Node" image
+            tree.nodes.active = viewer
+        bpy.app.handlers.render_post.append(self._on_post)
+        _active = self
+        return self
+
+    def finish(self):
+        """Unregister, store every pending frame and sync the sidecar. Idempotent.
+
+        Returns:
+            list: Error messages (write failures and frames without Viewer pixels)
+        """
+        global _active
+        if self._on_post in bpy.app.handlers.render_post:
+            bpy.app.handlers.render_post.remove(self._on_post)
+        if _active is self:
+            _active = None
+        self.pool.close()
+        if self.stack is not None:
+            # Frames cancelled, failed or without Viewer pixels keep zeroed slots
+            self.stack.meta["missing"] = [frame for frame in self.stack.frames
+                                          if frame not in self.stack.filled]
+            self.stack.sync()
+
+        errors = list(self.pool.errors)
+        if self.missed:
+            errors.append(f"no Viewer pixels for frames {self.missed}")
+        for error in errors:
+            print(f"[depth_map_generator] Stacked sequence output failed: {error}")
+        return errors
+
+    def _on_post(self, scene, *_args):
+        frame = scene.frame_current
+        if frame not in self.stack:
+            return
+        image = bpy.data.images.get(async_encode.VIEWER_IMAGE)
+        if image is None or tuple(image.size) != (self.width, self.height):
+            self.missed.append(frame)
+            return
+        # The Viewer image is overwritten by the next frame
+        pixels = np.empty(self.width * self.height * 4, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+        self.pool.submit(frame, self._store, frame, pixels)
+
+    def _store(self, frame, pixels):
+        # Depth is in the red channel; Blender stores rows bottom to top
+        values = pixels.reshape(self.height, self.width, 4)[::-1, :, 0]
+        if self.bit_depth:
+            if self.transfer == 'SRGB':
+                values = renormalize.srgb_encode(values)
+            values = frames.quantize(values, self.bit_depth)
+        self.stack.write(frame, values)
+        self.stack.sync()
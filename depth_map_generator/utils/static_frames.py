@@ -0,0 +1,127 @@
+"""Skip re-rendering frames where nothing visible changed since the previous frame.
+
+Every frame of the range is evaluated (not rendered) and given a cheap change
+signature: camera, resolution, object matrices, modifier / shape-key driven
+geometry, render visibility and modifier render settings. Frames where the
+viewport can't show what the render sees (see fingerprint.render_mismatch)
+always render. Consecutive frames with equal signatures form a run; only
+the first frame of each run is rendered and its output files are copied to
+the rest.
+"""
+
+import shutil
+
+import bpy
+
+from . import async_encode, comfy_stream, fingerprint, paths, rendering
+
+
+def compute_signatures(context, frame_list):
+    """Evaluate each frame and return its change signature.
+
+    A frame whose viewport geometry differs from the render gets a unique
+    signature, so it is never replaced by a copy.
+
+    Returns:
+        dict: frame -> signature (hex string)
+    """
+    scene = context.scene
+    original_frame = scene.frame_current
+    signatures = {}
+    try:
+        for frame in frame_list:
+            scene.frame_set(frame)
+            signature = fingerprint.scene_fingerprint(
+                scene, context.evaluated_depsgraph_get(), full_geometry=False
+            )
+            if fingerprint.render_mismatch(context.view_layer):
+                signature = f"{signature}:{frame}"
+            signatures[frame] = signature
+    finally:
+        scene.frame_set(original_frame)
+    return signatures
+
+
+def group_static_runs(frame_list, signatures):
+    """Split frames into those to render and those reusing an earlier frame.
+
+    A frame is reused when its signature equals the previous frame's.
+
+    Returns:
+        tuple: (render_frames: list, reuse: dict source_frame -> [frames])
+    """
+    render_frames = []
+    reuse = {}
+    source = None
+    previous = None
+    for frame in frame_list:
+        signature = signatures[frame]
+        if source is not None and signature == previous:
+            reuse.setdefault(source, []).append(frame)
+        else:
+            source = frame
+            render_frames.append(frame)
+        previous = signature
+    return render_frames, reuse
+
+
+def copy_frame_outputs(settings, source_frame, frames, prefs=None):
+    """Copy every output file written for ``source_frame`` to ``frames``.
+
+    Files are copied, not hard-linked: Blender overwrites outputs in place on
+    re-render, which would silently change every linked frame.
+    """
+    # Background-encoded outputs of the source frame may still be in flight
+    async_encode.wait_for_frame(source_frame)
+    sources = paths.get_frame_output_files(settings, source_frame, prefs)
+    for frame in frames:
+        targets = paths.get_frame_output_files(settings, frame, prefs)
+        for src, dst in zip(sources, targets):
+            try:
+                shutil.copyfile(src, dst)
+            except OSError as e:
+                print(f"[depth_map_generator] Could not reuse frame {source_frame}"
+                      f" for frame {frame}: {e}")
+
+
+def render_skipping_static(context, frame_list, prefs=None, blocking=False,
+                           on_finish=None):
+    """Render only frames whose signature changed, copying outputs to the rest.
+
+    Args:
+        context: Blender context (scene, window)
+        frame_list: Frames to produce, in order
+        prefs: AddonPreferences (optional)
+        blocking: Render in place instead of interactively
+        on_finish: Optional callable run once all frames are done
+
+    Returns:
+        tuple: (skipped: int, to_render: int)
+    """
+    scene = context.scene
+    settings = scene.depth_map_settings
+    signatures = compute_signatures(context, frame_list)
+    render_frames, reuse = group_static_runs(frame_list, signatures)
+
+    def _on_frame(frame):
+        comfy_stream.hand_off(frame)
+        if frame in reuse:
+            copy_frame_outputs(settings, frame, reuse[frame], prefs)
+            for reused in reuse[frame]:
+                comfy_stream.hand_off(reused)
+
+    def _on_finish(queue):
+        if not queue.cancelled:
+            skipped = len(frame_list) - len(render_frames)
+            print(f"[depth_map_generator] Rendered {len(queue.rendered)} frames,"
+                  f" reused {skipped} static frames")
+        if on_finish:
+            on_finish()
+
+    queue = rendering.FrameQueue(scene, render_frames, on_frame=_on_frame,
+                                 on_finish=_on_finish)
+    if blocking or bpy.app.background:
+        queue.run_blocking()
+    else:
+        queue.start(context)
+    return len(frame_list) - len(render_frames), len(render_frames)
@@ -0,0 +1,262 @@
+"""Per-frame render telemetry written as JSON lines, with a live throughput readout.
+
+A RenderTelemetry registers render_pre / render_post / render_write /
+render_complete / render_cancel handlers for the duration of one render
+operation and appends one JSON object per line to a log next to the depth
+output directory:
+
+* ``start``  - planned frame count, Blender version, process id
+* ``frame``  - wall time (render_pre until the frame is finished), render
+  time (render_pre -> render_post, including compositing and therefore the
+  DM_ FileOutput and render result writes: Blender runs render_post and
+  render_write back to back after saving, so writes can't be timed apart),
+  bytes and size of each output file, and the resident memory of the
+  process sampled at render_post (``rss_mb``) with its change since
+  render_pre (``rss_delta_mb``); None where it can't be read
+* ``finish`` - frames recorded, elapsed time, frames/sec, whether cancelled
+
+Parallel render workers append to the same log; every line carries the
+writing process id.
+"""
+
+import json
+import os
+import time
+from collections import deque
+
+import bpy
+
+from . import rendering
+
+# Completed-frame timestamps kept for the frames/sec estimate
+RATE_WINDOW = 20
+
+LOG_SUFFIX = "_telemetry.jsonl"
+
+_HANDLER_NAMES = ("render_pre", "render_post", "render_write", "render_complete", "render_cancel")
+
+# The telemetry of the running render, and of the last finished one
+_active = None
+_last = None
+
+
+def get_active():
+    """Return the telemetry of the render in progress, if any."""
+    return _active
+
+
+def get_last():
+    """Return the telemetry of the most recently finished render, if any."""
+    return _last
+
+
+def log_path_for(output_dir):
+    """Telemetry log path next to ``output_dir``: ``<parent>/<dirname>_telemetry.jsonl``."""
+    output_dir = output_dir.rstrip("/\\")
+    return os.path.join(os.path.dirname(output_dir), os.path.basename(output_dir) + LOG_SUFFIX)
+
+
+def resident_memory_mb():
+    """Current resident memory of this process in MiB, or None where unsupported."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        # Not Linux: no cheap way to read the current resident size
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024.0 * 1024.0)
+
+
+def format_eta(seconds):
+    """Format seconds as H:MM:SS (or M:SS under an hour)."""
+    if seconds is None:
+        return "--:--"
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+class RenderTelemetry:
+    """Records per-frame timings of one render operation.
+
+    Args:
+        log_path: JSONL file to append to
+        total: Number of frames expected (for the ETA; may be updated later)
+        files_for_frame: Optional callable(frame) -> output file paths whose
+            sizes are recorded
+        clock: Monotonic clock in seconds (replaceable in tests)
+    """
+
+    def __init__(self, log_path, total, files_for_frame=None, clock=time.perf_counter):
+        self.log_path = log_path
+        self.total = total
+        self.files_for_frame = files_for_frame
+        self.clock = clock
+        self.done = 0
+        self.peak_rss_mb = None
+        self.cancelled = False
+        self.started = None
+        self.finished = None
+        self._finish_times = deque(maxlen=RATE_WINDOW)
+        self._pending = None
+        self._log = None
+        self._handlers = {}
+
+    # --- Lifecycle ---
+
+    def start(self):
+        """Open the log, write the start record and register the render handlers."""
+        global _active
+        if _active is not None:
+            _active.finish()
+
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        self._log = open(self.log_path, "a", encoding="utf-8", buffering=1)
+        self.started = self.clock()
+        self._write({
+            "event": "start",
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "frames": self.total,
+            "blender": bpy.app.version_string,
+        })
+
+        self._handlers = {
+            "render_pre": self._on_pre,
+            "render_post": self._on_post,
+            "render_write": self._on_write,
+            "render_complete": self._on_complete,
+            "render_cancel": self._on_cancel,
+        }
+        for name, handler in self._handlers.items():
+            getattr(bpy.app.handlers, name).append(handler)
+        _active = self
+        return self
+
+    def finish(self):
+        """Record any pending frame, write the summary and unregister. Idempotent."""
+        global _active, _last
+        if self._log is None:
+            return
+        self._finish_frame()
+        for name in _HANDLER_NAMES:
+            handlers = getattr(bpy.app.handlers, name)
+            handler = self._handlers.get(name)
+            if handler in handlers:
+                handlers.remove(handler)
+        self._handlers = {}
+
+        self.finished = self.clock()
+        elapsed = self.finished - self.started
+        self._write({
+            "event": "finish",
+            "frames": self.done,
+            "elapsed_s": round(elapsed, 3),
+            "fps": round(self.done / elapsed, 4) if elapsed > 0 else None,
+            "cancelled": self.cancelled,
+        })
+        self._log.close()
+        self._log = None
+        if _active is self:
+            _active = None
+        _last = self
+
+    # --- Render handlers ---
+
+    def _on_pre(self, scene, *_args):
+        # Stills and queued frames get no render_write: close the previous one here
+        self._finish_frame()
+        self._pending = {"frame": scene.frame_current, "pre": self.clock(), "post": None,
+                         "rss_pre": resident_memory_mb(), "rss_post": None}
+
+    def _on_post(self, *_args):
+        if self._pending is not None:
+            self._pending["post"] = self.clock()
+            self._pending["rss_post"] = resident_memory_mb()
+
+    def _on_write(self, *_args):
+        self._finish_frame()
+
+    def _on_complete(self, *_args):
+        self._finish_frame()
+
+    def _on_cancel(self, *_args):
+        # The interrupted frame produced no complete output
+        self.cancelled = True
+        self._pending = None
+
+    # --- Records ---
+
+    def _finish_frame(self):
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        now = self.clock()
+
+        def _ms(start, end):
+            if start is None or end is None:
+                return None
+            return round((end - start) * 1000.0, 3)
+
+        sizes = {}
+        if self.files_for_frame is not None:
+            for path in self.files_for_frame(pending["frame"]):
+                try:
+                    sizes[os.path.basename(path)] = os.path.getsize(path)
+                except OSError:
+                    pass
+
+        rss, rss_pre = pending["rss_post"], pending["rss_pre"]
+        if rss is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb or 0.0, round(rss, 1))
+        self._write({
+            "event": "frame",
+            "frame": pending["frame"],
+            "wall_ms": _ms(pending["pre"], now),
+            "render_ms": _ms(pending["pre"], pending["post"]),
+            "bytes": sum(sizes.values()),
+            "files": sizes,
+            "rss_mb": round(rss, 1) if rss is not None else None,
+            "rss_delta_mb": round(rss - rss_pre, 1) if None not in (rss, rss_pre) else None,
+        })
+        self.done += 1
+        self._finish_times.append(now)
+        rendering.redraw_sidebars()
+
+    def _write(self, record):
+        record["pid"] = os.getpid()
+        self._log.write(json.dumps(record) + "\n")
+
+    # --- Readout ---
+
+    @property
+    def fps(self):
+        """Frames per second over the last RATE_WINDOW frames (None before the first).
+
+        Once finished, the average over the whole render.
+        """
+        times = self._finish_times
+        if not times:
+            return None
+        if self.finished is not None:
+            elapsed = self.finished - self.started
+            return self.done / elapsed if elapsed > 0 else None
+        if len(times) == 1:
+            elapsed = times[0] - self.started
+            return 1.0 / elapsed if elapsed > 0 else None
+        elapsed = times[-1] - times[0]
+        return (len(times) - 1) / elapsed if elapsed > 0 else None
+
+    @property
+    def progress(self):
+        """Dict with ``done``, ``total``, ``fps`` and ``eta`` (seconds or None)."""
+        fps = self.fps
+        remaining = max(self.total - self.done, 0)
+        return {
+            "done": self.done,
+            "total": self.total,
+            "fps": fps,
+            "eta": remaining / fps if fps else None,
+        }
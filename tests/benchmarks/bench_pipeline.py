@@ -0,0 +1,188 @@
+"""Micro-benchmarks of pipeline build / update latency on the fake bpy.
+
+Measures, for every normalization x output x mask combination:
+
+* build  - reconcile into a fresh scene (default RenderLayers -> Composite)
+* update - a value change (contrast) that touches one node
+* switch - a change of normalization mode (rebuilds part of the branch)
+* noop   - re-running setup on an unchanged tree (fingerprint fast path)
+
+and the same on trees pre-populated with many user nodes. Besides the median
+wall time, each case records how many nodes / links / RNA writes it made;
+those counts don't depend on the machine and are the primary regression
+signal. Wall-time limits are multiplied by ``DM_BENCH_TIME_SCALE`` (default
+1.0) so slow CI runners can loosen them without editing thresholds.json.
+
+Usage:
+    python -m tests.benchmarks.bench_pipeline            # print table
+    python -m tests.benchmarks.bench_pipeline --check    # exit 1 on regression
+    python -m tests.benchmarks.bench_pipeline --json out.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from tests import fake_bpy
+
+fake_bpy.install()
+
+from depth_map_generator.properties import DepthMapSettings  # noqa: E402
+from depth_map_generator.utils import pipeline  # noqa: E402
+from tests.conftest import COMBINATIONS, combination_id, configure  # noqa: E402
+
+THRESHOLDS_PATH = os.path.join(os.path.dirname(__file__), "thresholds.json")
+LARGE_TREE_SIZES = (1000, 5000)
+
+_OPERATION_KEYS = ("nodes_new", "nodes_remove", "links_new", "links_remove", "writes",
+                   "depsgraph_updates")
+
+
+def _new_context(user_nodes=0):
+    """Fresh scene and context, optionally with ``user_nodes`` chained Math nodes."""
+    scene = fake_bpy.new_scene(settings_cls=DepthMapSettings)
+    context = fake_bpy.Context(scene)
+    scene.use_nodes = True
+    tree = scene.node_tree
+    previous = None
+    for _ in range(user_nodes):
+        node = tree.nodes.new('CompositorNodeMath')
+        if previous is not None:
+            tree.links.new(previous.outputs['Value'], node.inputs[0])
+        previous = node
+    scene.depth_map_settings.setup_complete = True
+    return context
+
+
+def _measure(prepare, action, repeat):
+    """Median milliseconds and the operation counts of one ``action`` run.
+
+    ``prepare`` returns the argument for ``action`` and is not timed.
+    """
+    samples, operations = [], {}
+    for _ in range(repeat):
+        state = prepare()
+        fake_bpy.reset_counters()
+        started = time.perf_counter()
+        action(state)
+        samples.append((time.perf_counter() - started) * 1000.0)
+        operations = {key: fake_bpy.COUNTERS[key] for key in _OPERATION_KEYS}
+    return {"ms": statistics.median(samples), "ops": operations}
+
+
+def _cases(combination, user_nodes=0):
+    normalization = combination[0]
+    other = 'LOGARITHMIC' if normalization != 'LOGARITHMIC' else 'LINEAR'
+
+    def fresh():
+        context = _new_context(user_nodes)
+        configure(context.scene.depth_map_settings, *combination)
+        return context
+
+    def built():
+        context = fresh()
+        pipeline.ensure_pipeline(context, context.scene.depth_map_settings)
+        return context
+
+    def ensure(context):
+        pipeline.ensure_pipeline(context, context.scene.depth_map_settings)
+
+    def update(context):
+        context.scene.depth_map_settings.contrast_value += 0.1
+        ensure(context)
+
+    def switch(context):
+        context.scene.depth_map_settings.depth_normalization = other
+        ensure(context)
+
+    return {"build": (fresh, ensure), "update": (built, update),
+            "switch": (built, switch), "noop": (built, ensure)}
+
+
+def run(repeat=5, large_repeat=3):
+    """Run all cases.
+
+    Returns:
+        dict: case key -> {"ms": median, "ops": operation counts}
+    """
+    fake_bpy.set_blend_dir(tempfile.mkdtemp(prefix="dm_bench_"))
+    results = {}
+    for combination in COMBINATIONS:
+        for phase, (prepare, action) in _cases(combination).items():
+            results[f"{combination_id(combination)}/{phase}"] = _measure(prepare, action, repeat)
+
+    default = ('LINEAR', 'FILE_OUTPUT', 'OBJECT_INDEX')
+    for size in LARGE_TREE_SIZES:
+        for phase, (prepare, action) in _cases(default, user_nodes=size).items():
+            results[f"large-{size}/{phase}"] = _measure(prepare, action, large_repeat)
+    return results
+
+
+def _phase(key):
+    return key.split("/")[1]
+
+
+def check(results, thresholds, time_scale=1.0, timed=True):
+    """Compare results against thresholds.
+
+    Args:
+        timed: Also check the wall-time limits (operation counts always are)
+
+    Returns:
+        list: Human-readable regression messages (empty when all pass)
+    """
+    failures = []
+    for key, result in sorted(results.items()):
+        group = "large" if key.startswith("large-") else "combination"
+        limits = thresholds[group][_phase(key)]
+        max_ms = limits["max_ms"] * time_scale
+        if timed and result["ms"] > max_ms:
+            failures.append(f"{key}: {result['ms']:.3f} ms > {max_ms:.3f} ms")
+        for op, limit in limits.get("max_ops", {}).items():
+            if result["ops"].get(op, 0) > limit:
+                failures.append(f"{key}: {op}={result['ops'][op]} > {limit}")
+    return failures
+
+
+def format_table(results):
+    lines = [f"{'case':<44} {'ms':>9} {'new':>5} {'del':>5} {'links':>6} {'writes':>7}"]
+    for key, result in sorted(results.items()):
+        ops = result["ops"]
+        lines.append(
+            f"{key:<44} {result['ms']:9.3f} {ops['nodes_new']:5d} {ops['nodes_remove']:5d} "
+            f"{ops['links_new'] + ops['links_remove']:6d} {ops['writes']:7d}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--check", action="store_true",
+                        help="Exit with status 1 when a threshold is exceeded")
+    parser.add_argument("--json", metavar="PATH", help="Write the raw results as JSON")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case (median is kept)")
+    args = parser.parse_args(argv)
+
+    results = run(repeat=args.repeat)
+    print(format_table(results))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.check:
+        with open(THRESHOLDS_PATH, "r", encoding="utf-8") as f:
+            thresholds = json.load(f)
+        time_scale = float(os.environ.get("DM_BENCH_TIME_SCALE", "1.0"))
+        failures = check(results, thresholds, time_scale)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
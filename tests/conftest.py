@@ -0,0 +1,64 @@
+"""Shared fixtures: the fake bpy is installed before the addon is imported."""
+
+import itertools
+
+import pytest
+
+from tests import fake_bpy
+
+bpy = fake_bpy.install()
+
+from depth_map_generator.properties import DepthMapSettings  # noqa: E402
+
+NORMALIZATIONS = ('LINEAR', 'LOGARITHMIC', 'RAW', 'HISTOGRAM')
+OUTPUT_METHODS = ('COMPOSITE', 'VIEWER', 'FILE_OUTPUT')
+MASK_MODES = (None, 'OBJECT_INDEX', 'CRYPTOMATTE')
+
+# Every normalization x output x mask combination of the pipeline
+COMBINATIONS = list(itertools.product(NORMALIZATIONS, OUTPUT_METHODS, MASK_MODES))
+
+
+def combination_id(combination):
+    normalization, output_method, mask = combination
+    return f"{normalization}-{output_method}-{mask or 'NOMASK'}".lower()
+
+
+def configure(settings, normalization, output_method, mask):
+    """Apply one pipeline combination to a DepthMapSettings instance."""
+    settings.depth_normalization = normalization
+    settings.depth_output_method = output_method
+    settings.mask_enabled = mask is not None
+    if mask is not None:
+        settings.mask_source = mask
+    return settings
+
+
+@pytest.fixture(autouse=True)
+def blend_dir(tmp_path):
+    """Resolve ``//`` output paths into a per-test directory."""
+    fake_bpy.set_blend_dir(str(tmp_path))
+    fake_bpy.reset_counters()
+    return tmp_path
+
+
+@pytest.fixture
+def interactive(monkeypatch):
+    """Render from the UI: the fake defaults to background mode (no Viewer)."""
+    monkeypatch.setattr(bpy.app, "background", False)
+
+
+@pytest.fixture
+def scene():
+    return fake_bpy.new_scene(settings_cls=DepthMapSettings)
+
+
+@pytest.fixture
+def settings(scene):
+    return scene.depth_map_settings
+
+
+@pytest.fixture
+def context(scene):
+    context = fake_bpy.Context(scene)
+    bpy.context = context
+    return context
@@ -0,0 +1,719 @@
+"""In-process stand-in for Blender's ``bpy`` module, for tests and benchmarks.
+
+Implements just enough of the API used by the addon's pipeline code:
+compositor node trees with typed nodes, named/indexed sockets and links,
+FileOutput slots and image formats, color ramps, view layer pass flags that
+toggle RenderLayers sockets, property groups built from ``bpy.props``
+annotations, and operators with ``report()``.
+
+Every mutation of the fake data is counted in ``COUNTERS`` so tests and
+benchmarks can assert how much work a code path does, independent of the
+speed of the machine running them.
+
+Call install() before importing ``depth_map_generator``.
+"""
+
+import os
+import sys
+import tempfile
+import types
+from collections import Counter
+
+# Node creations/removals, link changes, RNA writes and depsgraph updates
+COUNTERS = Counter()
+
+
+def reset_counters():
+    COUNTERS.clear()
+
+
+class _Struct:
+    """Base for fake RNA structs: attribute writes after construction are counted."""
+
+    _pointer_seed = 0
+
+    def _finish_init(self):
+        _Struct._pointer_seed += 1
+        object.__setattr__(self, "_pointer", _Struct._pointer_seed)
+        object.__setattr__(self, "_ready", True)
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_ready", False) and not name.startswith("_"):
+            COUNTERS["writes"] += 1
+        object.__setattr__(self, name, value)
+
+    def as_pointer(self):
+        return self._pointer
+
+
+class _Collection:
+    """bpy_prop_collection look-alike: index and name access, get(), iteration."""
+
+    def __init__(self, items=None):
+        self._items = list(items or [])
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            item = self.get(key)
+            if item is None:
+                raise KeyError(key)
+            return item
+        return self._items[key]
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return self.get(key) is not None
+        return key in self._items
+
+    def get(self, key, default=None):
+        return next((item for item in self._items if item.name == key), default)
+
+    def foreach_get(self, attr, out):
+        values = []
+        for item in self._items:
+            value = getattr(item, attr)
+            values.extend(_flatten(value))
+        out[:] = values
+
+
+def _flatten(value):
+    if isinstance(value, (list, tuple)):
+        return [v for item in value for v in _flatten(item)]
+    return [value]
+
+
+# --- Nodes -------------------------------------------------------------------
+
+class NodeSocket(_Struct):
+    def __init__(self, node, name, is_output, default_value=0.0, enabled=True):
+        self.node = node
+        self.name = name
+        self.identifier = name
+        self.is_output = is_output
+        self.default_value = default_value
+        self.enabled = enabled
+        self.links = []
+        self._finish_init()
+
+
+# Passes controlling RenderLayers outputs, by socket name
+_PASS_SOCKETS = {
+    'Depth': "use_pass_z",
+    'IndexOB': "use_pass_object_index",
+    'CryptoObject00': "use_pass_cryptomatte_object",
+}
+
+# bl_idname -> (input sockets, output sockets); inputs are (name, default)
+NODE_TYPES = {
+    'CompositorNodeRLayers': (
+        [],
+        ['Image', 'Alpha', 'Depth', 'IndexOB', 'CryptoObject00'],
+    ),
+    'CompositorNodeComposite': ([('Image', (0.0, 0.0, 0.0, 1.0)), ('Alpha', 1.0)], []),
+    'CompositorNodeViewer': ([('Image', (0.0, 0.0, 0.0, 1.0)), ('Alpha', 1.0)], []),
+    'CompositorNodeOutputFile': ([('Image', (0.0, 0.0, 0.0, 1.0))], []),
+    'CompositorNodeMath': ([('Value', 0.5), ('Value', 0.5), ('Value', 0.5)], ['Value']),
+    'CompositorNodeMapRange': (
+        [('Value', 1.0), ('From Min', 0.0), ('From Max', 1.0),
+         ('To Min', 0.0), ('To Max', 1.0)],
+        ['Value'],
+    ),
+    'CompositorNodeBrightContrast': (
+        [('Image', (1.0, 1.0, 1.0, 1.0)), ('Bright', 0.0), ('Contrast', 0.0)],
+        ['Image'],
+    ),
+    'CompositorNodeValToRGB': ([('Fac', 0.5)], ['Image', 'Alpha']),
+    'CompositorNodeCryptomatteV2': ([('Image', (0.0, 0.0, 0.0, 1.0))], ['Image', 'Matte', 'Pick']),
+    'CompositorNodeCombineColor': (
+        [('Red', 0.0), ('Green', 0.0), ('Blue', 0.0), ('Alpha', 1.0)],
+        ['Image'],
+    ),
+    'CompositorNodeMixRGB': (
+        [('Fac', 1.0), ('Image', (1.0,) * 4), ('Image', (1.0,) * 4)],
+        ['Image'],
+    ),
+}
+
+
+class ImageFormat(_Struct):
+    def __init__(self):
+        self.file_format = 'PNG'
+        self.color_mode = 'RGBA'
+        self.color_depth = '8'
+        self.compression = 15
+        self.exr_codec = 'ZIP'
+        self.tiff_codec = 'DEFLATE'
+        self._finish_init()
+
+
+class FileSlot(_Struct):
+    def __init__(self, node, path):
+        self._node = node
+        self.format = ImageFormat()
+        self.use_node_format = True
+        self._finish_init()
+        object.__setattr__(self, "_path", path)
+
+    @property
+    def path(self):
+        return self._path
+
+    @path.setter
+    def path(self, value):
+        # Renaming a slot renames its input socket, as in Blender
+        COUNTERS["writes"] += 1
+        object.__setattr__(self, "_path", value)
+        self._node.inputs[self._node.file_slots.index(self)].name = value
+
+
+class FileSlots(list):
+    """FileOutput image slots; each owns one input socket, as in Blender."""
+
+    def __init__(self, node, items=()):
+        super().__init__(items)
+        self._node = node
+
+    def clear(self):
+        tree = self._node.id_data
+        for socket in list(self._node.inputs):
+            for link in list(socket.links):
+                tree.links.remove(link, count=False)
+        self._node.inputs._items.clear()
+        self._node.layer_slots._items.clear()
+        super().clear()
+
+    def new(self, name):
+        COUNTERS["writes"] += 1
+        socket = NodeSocket(self._node, name, False, (0.0, 0.0, 0.0, 1.0))
+        self._node.inputs._items.append(socket)
+        slot = FileSlot(self._node, name)
+        self.append(slot)
+        self._node.layer_slots._items.append(LayerSlot(socket))
+        return slot
+
+
+class LayerSlot(_Struct):
+    def __init__(self, socket):
+        self._socket = socket
+        self._finish_init()
+
+    @property
+    def name(self):
+        return self._socket.name
+
+
+class LayerSlots(_Collection):
+    """Multilayer EXR slots; like Blender they share the node's input sockets."""
+
+    def __init__(self, node):
+        super().__init__()
+        self._node = node
+
+    def clear(self):
+        tree = self._node.id_data
+        for socket in list(self._node.inputs):
+            for link in list(socket.links):
+                tree.links.remove(link, count=False)
+        self._node.inputs._items.clear()
+        self._node.file_slots.clear()
+        self._items.clear()
+
+    def new(self, name):
+        COUNTERS["writes"] += 1
+        socket = NodeSocket(self._node, name, False, (0.0, 0.0, 0.0, 1.0))
+        self._node.inputs._items.append(socket)
+        self._node.file_slots.append(FileSlot(self._node, name))
+        slot = LayerSlot(socket)
+        self._items.append(slot)
+        return slot
+
+
+class ColorRampElement(_Struct):
+    def __init__(self, position, color):
+        self.position = position
+        self.color = color
+        self._finish_init()
+
+
+class ColorRampElements(_Collection):
+    def new(self, position):
+        element = ColorRampElement(position, (1.0, 1.0, 1.0, 1.0))
+        self._items.append(element)
+        self._items.sort(key=lambda e: e.position)
+        return element
+
+    def remove(self, element):
+        if len(self._items) <= 1:
+            raise RuntimeError("Color ramp needs at least one element")
+        self._items.remove(element)
+
+
+class Node(_Struct):
+    def __init__(self, tree, bl_idname):
+        if bl_idname not in NODE_TYPES:
+            raise RuntimeError(f"Node type {bl_idname} undefined")
+        inputs, outputs = NODE_TYPES[bl_idname]
+        self.id_data = tree
+        self.bl_idname = bl_idname
+        self.type = bl_idname
+        self.name = bl_idname.replace("CompositorNode", "")
+        self.label = ""
+        self.location = (0.0, 0.0)
+        self.mute = False
+        self.inputs = _Collection(NodeSocket(self, n, False, d) for n, d in inputs)
+        self.outputs = _Collection(NodeSocket(self, n, True, None) for n in outputs)
+
+        if bl_idname == 'CompositorNodeRLayers':
+            self.layer = tree.scene.view_layers[0].name if tree.scene else "ViewLayer"
+            self.scene = tree.scene
+            self.update_pass_sockets()
+        elif bl_idname == 'CompositorNodeMath':
+            self.operation = 'ADD'
+            self.use_clamp = False
+        elif bl_idname == 'CompositorNodeOutputFile':
+            self.base_path = "/tmp/"
+            self.format = ImageFormat()
+            self.file_slots = FileSlots(self)
+            self.file_slots.append(FileSlot(self, "Image"))
+            self.layer_slots = LayerSlots(self)
+            self.layer_slots._items.append(LayerSlot(self.inputs[0]))
+        elif bl_idname == 'CompositorNodeValToRGB':
+            self.color_ramp = types.SimpleNamespace(elements=ColorRampElements([
+                ColorRampElement(0.0, (0.0, 0.0, 0.0, 1.0)),
+                ColorRampElement(1.0, (1.0, 1.0, 1.0, 1.0)),
+            ]))
+        elif bl_idname == 'CompositorNodeCombineColor':
+            self.mode = 'RGB'
+        elif bl_idname == 'CompositorNodeCryptomatteV2':
+            self.source = 'RENDER'
+            self.matte_id = ""
+        self._finish_init()
+
+    def update_pass_sockets(self):
+        """Enable pass outputs according to the view layer flags."""
+        scene = self.id_data.scene
+        if scene is None:
+            return
+        view_layer = scene.view_layers.get(self.layer) or scene.view_layers[0]
+        for socket in self.outputs:
+            flag = _PASS_SOCKETS.get(socket.name)
+            if flag is not None:
+                object.__setattr__(socket, "enabled", bool(getattr(view_layer, flag)))
+
+
+class NodeLink:
+    def __init__(self, from_socket, to_socket):
+        self.from_socket = from_socket
+        self.to_socket = to_socket
+        self.from_node = from_socket.node
+        self.to_node = to_socket.node
+        self.is_valid = True
+
+
+class Nodes(_Collection):
+    """Tree nodes, indexed by name so lookups stay O(1) on large trees."""
+
+    def __init__(self, tree):
+        super().__init__()
+        self._tree = tree
+        self._by_name = {}
+        self._next_suffix = {}
+        self.active = None
+
+    def get(self, key, default=None):
+        return self._by_name.get(key, default)
+
+    def new(self, type):
+        COUNTERS["nodes_new"] += 1
+        node = Node(self._tree, type)
+        name = self._unique_name(node.name)
+        object.__setattr__(node, "name", name)
+        self._items.append(node)
+        self._by_name[name] = node
+        return node
+
+    def remove(self, node):
+        COUNTERS["nodes_remove"] += 1
+        for socket in list(node.inputs) + list(node.outputs):
+            for link in list(socket.links):
+                self._tree.links.remove(link, count=False)
+        self._items.remove(node)
+        del self._by_name[node.name]
+
+    def _unique_name(self, name):
+        if name not in self._by_name:
+            return name
+        base, _, suffix = name.rpartition(".")
+        if not (base and suffix.isdigit()):
+            base = name
+        index = self._next_suffix.get(base, 1)
+        while f"{base}.{index:03d}" in self._by_name:
+            index += 1
+        self._next_suffix[base] = index + 1
+        return f"{base}.{index:03d}"
+
+    def rename(self, node, name):
+        if name == node.name:
+            return
+        del self._by_name[node.name]
+        name = self._unique_name(name)
+        object.__setattr__(node, "name", name)
+        self._by_name[name] = node
+
+
+class Links(_Collection):
+    def new(self, from_socket, to_socket):
+        COUNTERS["links_new"] += 1
+        if from_socket.is_output is False:
+            from_socket, to_socket = to_socket, from_socket
+        for link in list(to_socket.links):
+            self.remove(link, count=False)
+        link = NodeLink(from_socket, to_socket)
+        self._items.append(link)
+        to_socket.links.append(link)
+        from_socket.links.append(link)
+        return link
+
+    def remove(self, link, count=True):
+        if count:
+            COUNTERS["links_remove"] += 1
+        self._items.remove(link)
+        link.to_socket.links.remove(link)
+        link.from_socket.links.remove(link)
+
+
+def _node_setattr(self, name, value):
+    # Renaming keeps node names unique within the tree, like Blender
+    if name == "name" and getattr(self, "_ready", False):
+        COUNTERS["writes"] += 1
+        self.id_data.nodes.rename(self, value)
+        return
+    _Struct.__setattr__(self, name, value)
+
+
+Node.__setattr__ = _node_setattr
+
+
+class AnimData:
+    def __init__(self):
+        self.action = None
+
+
+class NodeTree(_Struct):
+    def __init__(self, scene=None, name="Compositing"):
+        self.name = name
+        self.scene = scene
+        self.nodes = Nodes(self)
+        self.links = Links()
+        self.animation_data = None
+        self._finish_init()
+
+    def animation_data_create(self):
+        self.animation_data = AnimData()
+        return self.animation_data
+
+    def update_tag(self):
+        COUNTERS["tree_update_tags"] += 1
+        for node in self.nodes:
+            if node.bl_idname == 'CompositorNodeRLayers':
+                node.update_pass_sockets()
+
+
+# --- Scene, view layers, context --------------------------------------------
+
+class ViewLayer(_Struct):
+    def __init__(self, scene, name="ViewLayer"):
+        self._scene = scene
+        self.name = name
+        self.use_pass_z = False
+        self.use_pass_object_index = False
+        self.use_pass_cryptomatte_object = False
+        self.use_pass_cryptomatte_material = False
+        self.use_pass_cryptomatte_asset = False
+        self.cycles = types.SimpleNamespace(use_denoising=False)
+        self._finish_init()
+
+    def __setattr__(self, name, value):
+        _Struct.__setattr__(self, name, value)
+        # RNA pass updates refresh RenderLayers sockets right away
+        if name.startswith("use_pass_") and getattr(self, "_ready", False):
+            tree = self._scene.node_tree
+            if tree is not None:
+                for node in tree.nodes:
+                    if node.bl_idname == 'CompositorNodeRLayers':
+                        node.update_pass_sockets()
+
+
+class Scene(_Struct):
+    def __init__(self, name="Scene"):
+        self.name = name
+        self.view_layers = _Collection()
+        self.view_layers._items.append(ViewLayer(self))
+        self.node_tree = None
+        self._use_nodes = False
+        self.objects = _Collection()
+        self.camera = None
+        self.frame_start = 1
+        self.frame_end = 250
+        self.frame_current = 1
+        self.render = types.SimpleNamespace(
+            engine='CYCLES', resolution_x=1920, resolution_y=1080,
+            resolution_percentage=100, pixel_aspect_x=1.0, pixel_aspect_y=1.0,
+            filepath="//render/", threads_mode='AUTO', threads=8,
+        )
+        self.view_settings = types.SimpleNamespace(
+            view_transform='Standard', look='None', exposure=0.0, gamma=1.0,
+        )
+        self.depth_map_settings = None
+        self._finish_init()
+
+    @property
+    def use_nodes(self):
+        return self._use_nodes
+
+    @use_nodes.setter
+    def use_nodes(self, value):
+        COUNTERS["writes"] += 1
+        object.__setattr__(self, "_use_nodes", value)
+        if value and self.node_tree is None:
+            # Blender creates a default RenderLayers -> Composite tree
+            tree = NodeTree(self)
+            object.__setattr__(self, "node_tree", tree)
+            render_layers = tree.nodes.new('CompositorNodeRLayers')
+            composite = tree.nodes.new('CompositorNodeComposite')
+            tree.links.new(render_layers.outputs['Image'], composite.inputs['Image'])
+
+    def update_tag(self):
+        COUNTERS["scene_update_tags"] += 1
+
+    def frame_set(self, frame):
+        self.frame_current = frame
+
+
+class Object(_Struct):
+    def __init__(self, name, type='MESH'):
+        self.name = name
+        self.type = type
+        self.data = None
+        self.users_collection = []
+        if type == 'CAMERA':
+            self.data = types.SimpleNamespace(dof=types.SimpleNamespace(use_dof=True))
+        self._finish_init()
+
+
+class Collection(_Struct):
+    def __init__(self, name, objects=()):
+        self.name = name
+        self.all_objects = _Collection(objects)
+        self._finish_init()
+
+
+def new_collection(name, objects=()):
+    """Add a collection holding ``objects`` to bpy.data.collections."""
+    collection = Collection(name, objects)
+    for obj in objects:
+        obj.users_collection.append(collection)
+    sys.modules["bpy"].data.collections._items.append(collection)
+    return collection
+
+
+def new_camera(scene, name="Camera"):
+    """Add a camera object to ``scene`` (not made the active camera)."""
+    camera = Object(name, 'CAMERA')
+    scene.objects._items.append(camera)
+    return camera
+
+
+class Depsgraph:
+    def __init__(self, scene):
+        self.scene = scene
+        self.objects = _Collection()
+        self.object_instances = []
+
+    def update(self):
+        COUNTERS["depsgraph_updates"] += 1
+
+
+class Context:
+    """Fake bpy.context with a scene, its first view layer and no addon prefs."""
+
+    def __init__(self, scene):
+        self.scene = scene
+        self.view_layer = scene.view_layers[0]
+        self.preferences = types.SimpleNamespace(addons={})
+        self.selected_objects = []
+        self.window = None
+        self.window_manager = None
+        self.area = None
+
+    def evaluated_depsgraph_get(self):
+        return Depsgraph(self.scene)
+
+
+# --- bpy.props / bpy.types ---------------------------------------------------
+
+class _PropertyDef:
+    """What a bpy.props function returns: the property kind and its keywords."""
+
+    def __init__(self, kind, kwargs):
+        self.kind = kind
+        self.kwargs = kwargs
+
+    def default(self):
+        if "default" in self.kwargs:
+            return self.kwargs["default"]
+        if self.kind == 'ENUM':
+            items = self.kwargs.get("items") or []
+            return items[0][0] if items and not callable(items) else ""
+        return {'BOOLEAN': False, 'INT': 0, 'FLOAT': 0.0, 'STRING': "",
+                'POINTER': None, 'COLLECTION': ()}.get(self.kind)
+
+
+def _prop_function(kind):
+    def _make(**kwargs):
+        return _PropertyDef(kind, kwargs)
+    _make.__name__ = f"{kind.title()}Property"
+    return _make
+
+
+def _annotations(cls):
+    merged = {}
+    for klass in reversed(cls.__mro__):
+        merged.update(getattr(klass, "__annotations__", {}))
+    return merged
+
+
+class bpy_struct:
+    pass
+
+
+class PropertyGroup(bpy_struct):
+    """Instances get every annotated bpy.props property set to its default."""
+
+    def __init__(self):
+        for name, definition in _annotations(type(self)).items():
+            if isinstance(definition, _PropertyDef):
+                setattr(self, name, definition.default())
+
+    @classmethod
+    def property_definitions(cls):
+        return {name: d for name, d in _annotations(cls).items()
+                if isinstance(d, _PropertyDef)}
+
+
+class AddonPreferences(PropertyGroup):
+    bl_idname = ""
+
+
+class Operator(bpy_struct):
+    """Operators get their annotated properties and collect report() calls."""
+
+    def __init__(self, **properties):
+        for name, definition in _annotations(type(self)).items():
+            if isinstance(definition, _PropertyDef):
+                setattr(self, name, properties.get(name, definition.default()))
+        self.reports = []
+
+    def report(self, level, message):
+        self.reports.append((set(level), message))
+
+
+class Panel(bpy_struct):
+    pass
+
+
+class UIList(bpy_struct):
+    pass
+
+
+# --- Module assembly ---------------------------------------------------------
+
+_blend_dir = [tempfile.gettempdir()]
+
+
+def set_blend_dir(path):
+    """Directory that ``//`` relative paths resolve against."""
+    _blend_dir[0] = path
+
+
+def _abspath(path, start=None, library=None):
+    if path.startswith("//"):
+        return os.path.join(start or _blend_dir[0], path[2:])
+    return path
+
+
+def new_scene(name="Scene", settings_cls=None):
+    """Create a Scene with ``depth_map_settings`` instantiated from ``settings_cls``."""
+    scene = Scene(name)
+    if settings_cls is not None:
+        object.__setattr__(scene, "depth_map_settings", settings_cls())
+    return scene
+
+
+def install():
+    """Register the fake as ``bpy`` (and its submodules) in sys.modules.
+
+    Returns:
+        module: The fake bpy module
+    """
+    if "bpy" in sys.modules and getattr(sys.modules["bpy"], "IS_FAKE", False):
+        return sys.modules["bpy"]
+
+    bpy = types.ModuleType("bpy")
+    bpy.IS_FAKE = True
+
+    props = types.ModuleType("bpy.props")
+    for kind in ('BOOLEAN', 'INT', 'FLOAT', 'STRING', 'ENUM', 'POINTER', 'COLLECTION'):
+        setattr(props, _prop_function(kind).__name__, _prop_function(kind))
+    props.BoolProperty = _prop_function('BOOLEAN')
+    props.IntVectorProperty = _prop_function('INT')
+    props.FloatVectorProperty = _prop_function('FLOAT')
+
+    bpy_types = types.ModuleType("bpy.types")
+    for cls in (bpy_struct, PropertyGroup, AddonPreferences, Operator, Panel, UIList):
+        setattr(bpy_types, cls.__name__, cls)
+    bpy_types.Scene = Scene
+    bpy_types.Object = Object
+    bpy_types.NodeTree = NodeTree
+    bpy_types.bpy_prop_collection = _Collection
+
+    utils = types.ModuleType("bpy.utils")
+    utils.register_class = lambda cls: None
+    utils.unregister_class = lambda cls: None
+
+    bpy.props = props
+    bpy.types = bpy_types
+    bpy.utils = utils
+    bpy.path = types.SimpleNamespace(abspath=_abspath)
+    bpy.app = types.SimpleNamespace(
+        version=(4, 2, 0),
+        version_string="4.2.0",
+        background=True,
+        binary_path="/usr/bin/blender",
+        handlers=types.SimpleNamespace(
+            render_pre=[], render_post=[], render_write=[], render_init=[],
+            render_complete=[], render_cancel=[], frame_change_pre=[],
+            frame_change_post=[], depsgraph_update_post=[], load_post=[],
+        ),
+        timers=types.SimpleNamespace(
+            register=lambda function, first_interval=0.0, persistent=False: None,
+            unregister=lambda function: None,
+            is_registered=lambda function: False,
+        ),
+    )
+    bpy.data = types.SimpleNamespace(filepath="", scenes=_Collection(), actions=_Collection(),
+                                     collections=_Collection())
+    bpy.ops = types.SimpleNamespace()
+    bpy.context = None
+
+    sys.modules["bpy"] = bpy
+    sys.modules["bpy.props"] = props
+    sys.modules["bpy.types"] = bpy_types
+    sys.modules["bpy.utils"] = utils
+    return bpy
@@ -0,0 +1,170 @@
+"""Background PNG encoding: bounded pool, frame encoding and the Viewer capture."""
+
+import threading
+import types
+
+import bpy
+import numpy as np
+
+from depth_map_generator.operators.mask_export import DEPTHMAP_OT_export_mask
+from depth_map_generator.utils import async_encode, frames, nodes, pipeline
+
+
+def test_pool_blocks_when_full_and_flushes():
+    release = threading.Event()
+    started = []
+
+    def task(frame):
+        started.append(frame)
+        release.wait(5)
+
+    pool = async_encode.EncodePool(threads=1, max_pending=2)
+    pool.submit(1, task, 1)
+    pool.submit(2, task, 2)
+
+    submitted = threading.Event()
+
+    def submit_third():
+        pool.submit(3, task, 3)
+        submitted.set()
+
+    thread = threading.Thread(target=submit_third)
+    thread.start()
+    # Backpressure: the third frame waits until the oldest is done
+    assert not submitted.wait(0.2)
+    release.set()
+    thread.join(5)
+    assert submitted.is_set()
+
+    pool.close()
+    assert pool.pending == 0
+    assert pool.encoded == 3 and pool.errors == []
+
+
+def test_pool_collects_errors():
+    def fail():
+        raise OSError("disk full")
+
+    pool = async_encode.EncodePool(threads=1, max_pending=1)
+    pool.submit(7, fail)
+    pool.close()
+    assert pool.errors == ["frame 7: disk full"]
+
+
+def test_encode_frame_matches_direct_png(tmp_path):
+    height, width = 3, 4
+    rgba = np.random.default_rng(0).random((height, width, 4), dtype=np.float32)
+    # Viewer buffers are stored bottom row first
+    pixels = rgba[::-1].ravel().copy()
+    depth_path, mask_path = tmp_path / "depth.png", tmp_path / "mask.png"
+
+    png = {"file_format": 'PNG', "transfer": 'LINEAR', "compress_level": 1}
+    async_encode.encode_frame(pixels, width, height, [
+        (0, str(depth_path), dict(png, bit_depth='16', color_mode='BW')),
+        (3, str(mask_path), dict(png, bit_depth='8', color_mode='RGBA')),
+        (0, str(tmp_path / "depth.npy"), {"file_format": 'NUMPY'}),
+    ])
+
+    assert depth_path.read_bytes() == frames.encode_png(frames.quantize(rgba[..., 0], 16))
+    mask = rgba[..., 3]
+    expected = np.stack((mask, mask, mask, np.ones_like(mask)), axis=-1)
+    assert mask_path.read_bytes() == frames.encode_png(frames.quantize(expected, 8))
+    np.testing.assert_array_equal(np.load(tmp_path / "depth.npy"), rgba[..., 0])
+
+
+def test_spec_routes_outputs_through_viewer(context, settings, interactive):
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.async_encoding = True
+    settings.mask_enabled = True
+    spec = nodes.pipeline_spec(settings, context.view_layer)
+
+    assert spec["nodes"]["DM_FileOutput"]["props"]["mute"]
+    assert spec["nodes"]["DM_MaskFileOutput"]["props"]["mute"]
+    assert ("DM_MaskCompare", 'Value', "DM_Viewer", 'Alpha') in spec["links"]
+
+    settings.async_encoding = False
+    spec = nodes.pipeline_spec(settings, context.view_layer)
+    assert "DM_Viewer" not in spec["nodes"]
+    assert not spec["nodes"]["DM_MaskFileOutput"]["props"]["mute"]
+
+
+def _viewer_image(width, height, value):
+    pixels = np.full(width * height * 4, value, dtype=np.float32)
+    return types.SimpleNamespace(
+        size=(width, height),
+        pixels=types.SimpleNamespace(foreach_get=lambda out: out.__setitem__(slice(None), pixels)),
+    )
+
+
+def test_encoder_captures_each_frame(tmp_path, context, settings, monkeypatch, interactive):
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.render_animation = True
+    settings.async_encoding = True
+    settings.output_path = str(tmp_path / "depth") + "/"
+    settings.setup_complete = True
+    pipeline.ensure_pipeline(context, settings)
+
+    monkeypatch.setattr(bpy.data, "images", {"Viewer Node": _viewer_image(4, 2, 0.5)},
+                        raising=False)
+    encoder = async_encode.AsyncFrameEncoder(context.scene, settings).start(
+        context.scene.node_tree)
+    assert context.scene.node_tree.nodes.active.name == "DM_Viewer"
+
+    for frame in (1, 2, 3):
+        context.scene.frame_current = frame
+        for handler in list(bpy.app.handlers.render_post):
+            handler(context.scene, None)
+
+    assert encoder.finish() == []
+    assert async_encode.get_active() is None
+    assert encoder.captured == 3
+    written = frames.find_frames(str(tmp_path / "depth"), "depth_")
+    assert sorted(written) == [1, 2, 3]
+
+
+def test_mask_export_encodes_the_muted_mask_output(tmp_path, context, settings, monkeypatch,
+                                                  interactive):
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.async_encoding = True
+    settings.mask_enabled = True
+    settings.output_path = str(tmp_path / "depth") + "/"
+    settings.mask_output_path = str(tmp_path / "mask") + "/"
+    settings.setup_complete = True
+    pipeline.ensure_pipeline(context, settings)
+    monkeypatch.setattr(bpy.data, "images", {"Viewer Node": _viewer_image(4, 2, 0.5)},
+                        raising=False)
+
+    def render(*_args, **_kwargs):
+        for handler in list(bpy.app.handlers.render_post):
+            handler(context.scene, None)
+        return {'FINISHED'}
+
+    monkeypatch.setattr(bpy, "ops", types.SimpleNamespace(
+        render=types.SimpleNamespace(render=render)), raising=False)
+    operator = DEPTHMAP_OT_export_mask(blocking=True)
+    assert operator.execute(context) == {'FINISHED'}, operator.reports
+    assert context.scene.node_tree.nodes["DM_MaskFileOutput"].mute
+    assert async_encode.get_active() is None
+    written = frames.find_frames(str(tmp_path / "mask"), "mask_map")
+    assert sorted(written) == [context.scene.frame_current]
+
+
+def test_numpy_output_always_uses_encoder(context, settings, interactive):
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.output_format = 'NUMPY'
+    assert nodes.wants_async_encoding(settings)
+    settings.output_format = 'TIFF'
+    settings.async_encoding = True
+    assert not nodes.wants_async_encoding(settings)
+
+
+def test_background_renders_keep_file_outputs_live(context, settings):
+    # blender -b never computes the Viewer: the FileOutput nodes write the PNGs
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.async_encoding = True
+    settings.mask_enabled = True
+    assert bpy.app.background and not nodes.wants_async_encoding(settings)
+    spec = nodes.pipeline_spec(settings, context.view_layer)
+    assert not spec["nodes"]["DM_FileOutput"]["props"]["mute"]
+    assert not spec["nodes"]["DM_MaskFileOutput"]["props"]["mute"]
+    assert "DM_Viewer" not in spec["nodes"]
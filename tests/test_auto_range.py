@@ -0,0 +1,80 @@
+"""Auto range: camera-space bounds of every visible instance."""
+
+import types
+
+import numpy as np
+
+from depth_map_generator.utils import auto_range
+from tests import fake_bpy
+
+_CUBE = [(x, y, z) for x in (-0.5, 0.5) for y in (-0.5, 0.5) for z in (-0.5, 0.5)]
+
+
+def _translation(z):
+    matrix = np.identity(4)
+    matrix[2, 3] = z
+    return matrix
+
+
+def _camera(near=0.1, far=1000.0):
+    # 90 degree perspective looking down -Z from the origin
+    projection = np.array([
+        [1.0, 0.0, 0.0, 0.0],
+        [0.0, 1.0, 0.0, 0.0],
+        [0.0, 0.0, -(far + near) / (far - near), -2.0 * far * near / (far - near)],
+        [0.0, 0.0, -1.0, 0.0],
+    ])
+    camera = types.SimpleNamespace(
+        matrix_world=np.identity(4),
+        data=types.SimpleNamespace(clip_start=near, clip_end=far),
+        calc_matrix_camera=lambda _depsgraph, **_kwargs: projection,
+    )
+    camera.evaluated_get = lambda _depsgraph: camera
+    return camera
+
+
+def _object(name, type='MESH', z=0.0, hide_render=False):
+    obj = types.SimpleNamespace(
+        name_full=name, type=type, data=types.SimpleNamespace(name_full=name), bound_box=_CUBE,
+        hide_render=hide_render, users_collection=[],
+        # Blender's foreach_get yields matrices column by column
+        matrix_world=_translation(z).T.tolist(),
+    )
+    obj.original = obj
+    return obj
+
+
+def test_instances_outside_the_real_objects_widen_the_range():
+    cube = _object("Cube", z=-5.0)
+    lamp = _object("Light", type='LIGHT', z=-50.0)
+    proxy = _object("Proxy", z=-80.0, hide_render=True)
+    layout = _object("Layout", type='EMPTY')
+    scatter = _object("Scatter", type='EMPTY', hide_render=True)
+    scene = types.SimpleNamespace(render=types.SimpleNamespace(
+        resolution_x=100, resolution_y=100, pixel_aspect_x=1.0, pixel_aspect_y=1.0,
+    ))
+
+    def instance(obj, z, parent=None):
+        return types.SimpleNamespace(object=obj, matrix_world=_translation(z),
+                                     is_instance=parent is not None, parent=parent)
+
+    # The real cube at 5 m and a collection instance of it at 20 m; the proxy
+    # and the instances of a render-disabled instancer don't count
+    objects = [cube, lamp, proxy, layout, scatter]
+    depsgraph = types.SimpleNamespace(
+        objects=fake_bpy._Collection(objects),
+        object_instances=[instance(obj, obj.matrix_world[3][2]) for obj in objects] + [
+            instance(cube, -20.0, parent=layout),
+            instance(cube, -90.0, parent=scatter),
+        ],
+    )
+    matrices, corners = auto_range.gather_bounds(depsgraph)
+    assert matrices.shape == (2, 4, 4) and corners.shape == (2, 8, 3)
+    np.testing.assert_array_equal(matrices[0], _translation(-5.0))
+
+    near, far = auto_range.compute_depth_range(scene, depsgraph, _camera())
+    assert np.isclose(near, 4.5) and np.isclose(far, 20.5)
+
+    # Nothing visible: no range
+    empty = types.SimpleNamespace(objects=fake_bpy._Collection(), object_instances=[])
+    assert auto_range.compute_depth_range(scene, empty, _camera()) is None
@@ -0,0 +1,33 @@
+"""Run the pipeline benchmarks against their regression thresholds.
+
+Operation counts (nodes, links, writes, depsgraph updates) are checked on
+every run. Wall-time limits depend on the machine and its load, so they are
+only checked with DM_BENCH_TIMING=1.
+"""
+
+import json
+import os
+
+import pytest
+
+from tests.benchmarks import bench_pipeline
+
+
+def _thresholds():
+    with open(bench_pipeline.THRESHOLDS_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_pipeline_operation_counts_within_thresholds():
+    results = bench_pipeline.run(repeat=1, large_repeat=1)
+    failures = bench_pipeline.check(results, _thresholds(), timed=False)
+    assert not failures, "\n".join(failures)
+
+
+@pytest.mark.skipif(os.environ.get("DM_BENCH_TIMING") != "1",
+                    reason="wall-time limits only with DM_BENCH_TIMING=1")
+def test_pipeline_timings_within_thresholds():
+    results = bench_pipeline.run(repeat=3, large_repeat=1)
+    time_scale = float(os.environ.get("DM_BENCH_TIME_SCALE", "1.0"))
+    failures = bench_pipeline.check(results, _thresholds(), time_scale)
+    assert not failures, "\n".join(failures)
@@ -0,0 +1,53 @@
+"""Depth cache renders: held frames, failed ingests and frames written from the cache."""
+
+import os
+import types
+
+import bpy
+import numpy as np
+
+from depth_map_generator.utils import cached_render, completion, frames, paths
+
+
+def _cached(settings, tmp_path):
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.use_depth_cache = True
+    settings.output_path = str(tmp_path / "depth") + "/"
+    return types.SimpleNamespace(cache_dir=str(tmp_path / "cache"), cache_budget_gb=0.0)
+
+
+def test_held_frames_are_rendered_when_the_ingest_fails(tmp_path, context, settings,
+                                                        monkeypatch):
+    prefs = _cached(settings, tmp_path)
+    rendered = []
+
+    def render(**_kwargs):
+        # No raw EXR is written, so nothing can be ingested
+        rendered.append(context.scene.frame_current)
+        return {'FINISHED'}
+
+    def load(path, **_kwargs):
+        raise RuntimeError(f"Error: Cannot read image '{path}'")
+
+    monkeypatch.setattr(bpy, "ops", types.SimpleNamespace(
+        render=types.SimpleNamespace(render=render)), raising=False)
+    monkeypatch.setattr(bpy.data, "images", types.SimpleNamespace(load=load), raising=False)
+    served, to_render = cached_render.render_cached(context, [1, 2, 3], prefs, blocking=True)
+
+    # An empty scene: every frame has the same fingerprint
+    assert (served, to_render) == (2, 1)
+    assert rendered == [1, 2, 3]
+
+
+def test_cache_hits_write_raw_depth_like_rendered_frames(tmp_path, context, settings):
+    prefs = _cached(settings, tmp_path)
+    settings.save_raw_depth = True
+    cache = cached_render.get_cache(prefs)
+    depth = np.linspace(1.0, 50.0, 12, dtype=np.float32).reshape(3, 4)
+    cache.put("abc", depth)
+
+    assert cached_render.write_from_cache(context.scene, settings, 7, "abc", cache, prefs)
+    raw = paths.get_frame_output_files_by_kind(settings, 7, prefs)["raw"]
+    assert [os.path.basename(path) for path in raw] == ["raw_depth0007.exr"]
+    np.testing.assert_array_equal(frames.load_depth(raw[0]), depth)
+    assert completion.check_file(raw[0])[0] is None
@@ -0,0 +1,198 @@
+"""ComfyUI hand-off: pooled connections, bounded in-flight window, stand-in server."""
+
+import json
+import os
+import threading
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import bpy
+import numpy as np
+import pytest
+
+from depth_map_generator.utils import (
+    comfy_client, comfy_stream, frames, paths, resume, static_frames,
+)
+
+WORKFLOW = {
+    "1": {"class_type": "LoadImage", "inputs": {"image": "{depth}"}},
+    "2": {"class_type": "LoadImage", "inputs": {"image": "{mask}"}},
+    "3": {"class_type": "SaveImage", "inputs": {"filename_prefix": "out_{frame}",
+                                                "images": ["1", 0]}},
+}
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    """Minimal ComfyUI: /upload/image, /prompt and /queue.
+
+    Every /queue request finishes the oldest outstanding prompt.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args):
+        pass
+
+    def _reply(self, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        state = self.server.state
+        with state["lock"]:
+            state["connections"].add(self.client_address)
+            if state["outstanding"]:
+                state["outstanding"].pop(0)
+            running = [[0, prompt_id, {}, {}, []] for prompt_id in state["outstanding"]]
+        self._reply({"queue_running": running[:1], "queue_pending": running[1:]})
+
+    def do_POST(self):
+        state = self.server.state
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        with state["lock"]:
+            state["connections"].add(self.client_address)
+            if self.path == "/upload/image":
+                name = body.split(b'filename="')[1].split(b'"')[0].decode()
+                subfolder = body.split(b'name="subfolder"\r\n\r\n')[1].split(b"\r\n")[0]
+                state["uploads"].append(name)
+                payload = {"name": name, "subfolder": subfolder.decode(), "type": "input"}
+            else:
+                prompt = json.loads(body)["prompt"]
+                prompt_id = f"p{len(state['prompts'])}"
+                state["prompts"].append(prompt)
+                state["outstanding"].append(prompt_id)
+                state["max_outstanding"] = max(state["max_outstanding"],
+                                               len(state["outstanding"]))
+                payload = {"prompt_id": prompt_id, "number": len(state["prompts"])}
+        self._reply(payload)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _StandIn)
+    httpd.state = {"lock": threading.Lock(), "connections": set(), "uploads": [],
+                   "prompts": [], "outstanding": [], "max_outstanding": 0}
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_stream_keeps_the_window_and_reuses_connections(tmp_path, server):
+    files = {}
+    for frame in range(1, 9):
+        for name in ("depth", "mask"):
+            path = tmp_path / name / f"{name}_{frame:04d}.png"
+            path.parent.mkdir(exist_ok=True)
+            path.write_bytes(b"png")
+        files[frame] = {name: str(tmp_path / name / f"{name}_{frame:04d}.png")
+                        for name in ("depth", "mask")}
+
+    client = comfy_client.ComfyClient(_url(server), pool_size=2)
+    stream = comfy_client.ComfyStream(client, WORKFLOW, window=3, workers=2,
+                                      subfolder="shot", poll_interval=0.01)
+    for frame, frame_paths in files.items():
+        stream.submit(frame, frame_paths)
+    assert stream.finish() == []
+
+    state = server.state
+    assert len(state["prompts"]) == 8 and sorted(stream.queued) == list(range(1, 9))
+    assert state["max_outstanding"] <= 3
+    # Two pooled keep-alive connections carried 24 requests and the queue checks
+    assert len(state["connections"]) <= 3
+    prompt = next(p for p in state["prompts"] if p["3"]["inputs"]["filename_prefix"] == "out_5")
+    assert prompt["1"]["inputs"]["image"] == "shot/depth/depth_0005.png"
+    assert prompt["2"]["inputs"]["image"] == "shot/mask/mask_0005.png"
+    assert prompt["3"]["inputs"]["images"] == ["1", 0]
+
+
+def test_render_write_hands_off_each_frame(tmp_path, settings, server):
+    workflow = tmp_path / "workflow_api.json"
+    workflow.write_text(json.dumps(WORKFLOW))
+    input_dir = tmp_path / "ComfyUI" / "input"
+    prefs = types.SimpleNamespace(comfyui_url=_url(server),
+                                           comfyui_input_dir=str(input_dir))
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.mask_enabled = True
+    settings.output_path = str(tmp_path / "depth") + "/"
+    settings.mask_output_path = str(tmp_path / "mask") + "/"
+    settings.comfy_stream = True
+    settings.comfy_workflow = str(workflow)
+    settings.comfy_stream_transfer = 'INPUT_DIR'
+    settings.publish_name = "shot"
+
+    session = comfy_stream.StreamSession(settings, [1, 2, 3], prefs).start()
+    assert comfy_stream.get_active() is session
+    scene = types.SimpleNamespace(frame_current=0)
+    for frame in (1, 2, 3):
+        for path in paths.get_frame_output_files(settings, frame, prefs):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "wb").close()
+        scene.frame_current = frame
+        for handler in list(bpy.app.handlers.render_write):
+            handler(scene)
+        assert len(session.handed_off) == frame
+
+    assert session.finish() == []
+    assert comfy_stream.get_active() is None and not bpy.app.handlers.render_write
+    # Referenced from the input directory, not uploaded
+    state = server.state
+    assert state["uploads"] == [] and len(state["prompts"]) == 3
+    depth = os.path.basename(paths.get_frame_output_files(settings, 2, prefs)[0])
+    assert f"shot/depth/{depth}" in [p["1"]["inputs"]["image"] for p in state["prompts"]]
+    # Same place as Publish to ComfyUI puts it
+    assert os.path.isfile(os.path.join(paths.get_publish_dir(settings, prefs), "depth", depth))
+
+
+def test_frame_queue_renders_hand_off_as_frames_are_written(tmp_path, context, settings,
+                                                             monkeypatch):
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.output_path = str(tmp_path / "depth") + "/"
+    events = []
+
+    def _write(frame):
+        for path in paths.get_frame_output_files(settings, frame):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            frames.write_png(path, np.zeros((2, 2), dtype=np.float32))
+
+    def render(**_kwargs):
+        events.append(("render", context.scene.frame_current))
+        _write(context.scene.frame_current)
+        return {'FINISHED'}
+
+    monkeypatch.setattr(bpy, "ops", types.SimpleNamespace(
+        render=types.SimpleNamespace(render=render)), raising=False)
+    # No render_write fires for these renders: only the on_frame hook hands off
+    monkeypatch.setattr(comfy_stream, "_active", types.SimpleNamespace(
+        hand_off=lambda frame: events.append(("hand_off", frame))))
+
+    # Frame 1 is intact from an earlier run and handed off before rendering starts
+    _write(1)
+    resume.render_resuming(context, [1, 2, 3], blocking=True)
+    assert events == [("hand_off", 1), ("render", 2), ("hand_off", 2),
+                      ("render", 3), ("hand_off", 3)]
+
+    events.clear()
+    monkeypatch.setattr(static_frames, "compute_signatures",
+                        lambda _context, _frames: {1: "a", 2: "a", 3: "b"})
+    static_frames.render_skipping_static(context, [1, 2, 3], blocking=True)
+    assert events == [("render", 1), ("hand_off", 1), ("hand_off", 2),
+                      ("render", 3), ("hand_off", 3)]
+
+
+def test_frame_files_with_a_shared_output_folder(tmp_path, settings):
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.mask_enabled = True
+    settings.save_raw_depth = True
+    settings.output_path = settings.mask_output_path = str(tmp_path / "render") + "/"
+    depth, _raw, mask = paths.get_frame_output_files(settings, 4)
+    assert comfy_stream.frame_files(settings, 4) == {"depth": depth, "mask": mask}
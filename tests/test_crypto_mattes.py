@@ -0,0 +1,96 @@
+"""Cryptomatte multi-matte export: one node and file slot per listed matte."""
+
+import os
+
+import bpy
+import pytest
+
+from depth_map_generator.operators.crypto_mattes import DEPTHMAP_OT_crypto_from_selection
+from depth_map_generator.utils import nodes, paths, pipeline
+from tests import fake_bpy
+
+
+@pytest.fixture(autouse=True)
+def collections():
+    yield bpy.data.collections
+    bpy.data.collections._items.clear()
+
+
+def _mattes(settings, mode, names):
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.render_animation = True
+    settings.mask_enabled = True
+    settings.mask_source = 'CRYPTOMATTE'
+    settings.crypto_matte_mode = mode
+    settings.crypto_mattes = names
+    settings.setup_complete = True
+    return settings
+
+
+def _linked_from(socket):
+    return [(link.from_node.name, link.from_socket.name) for link in socket.links]
+
+
+def test_one_node_and_slot_per_object(context, settings):
+    _mattes(settings, 'OBJECTS', "Hero, Villain/Left, Hero")
+    pipeline.ensure_pipeline(context, settings)
+    tree = context.scene.node_tree
+
+    assert "DM_Cryptomatte" not in tree.nodes and "DM_MaskFileOutput" not in tree.nodes
+    assert context.view_layer.use_pass_cryptomatte_object
+    assert [tree.nodes[f"DM_CryptoMatte_{i}"].matte_id for i in (0, 1)] == ["Hero", "Villain/Left"]
+    output = tree.nodes["DM_CryptoFileOutput"]
+    assert [slot.path for slot in output.file_slots] == ["Hero/mask_", "Villain_Left/mask_"]
+    assert _linked_from(output.inputs[1]) == [("DM_CryptoMatte_1", 'Matte')]
+    assert nodes.unconnected_outputs(tree, settings) == []
+
+    mask_dir = paths.get_mask_output_dir(settings)
+    assert paths.get_frame_output_files(settings, 3)[-2:] == [
+        os.path.join(mask_dir, "Hero", "mask_0003.png"),
+        os.path.join(mask_dir, "Villain_Left", "mask_0003.png"),
+    ]
+
+    # Adding a matte adds one node and one slot; the rest stays in place
+    settings.crypto_mattes = "Hero,Villain/Left,Extra"
+    fake_bpy.reset_counters()
+    result = pipeline.ensure_pipeline(context, settings)
+    assert result["added"] == 1 and result["removed"] == 0
+    assert [slot.path for slot in output.file_slots][-1] == "Extra/mask_"
+    assert nodes.unconnected_outputs(tree, settings) == []
+
+    # Back to manual picking restores the single matte node and mask output
+    settings.crypto_matte_mode = 'MANUAL'
+    pipeline.ensure_pipeline(context, settings)
+    assert "DM_Cryptomatte" in tree.nodes and "DM_CryptoFileOutput" not in tree.nodes
+    assert [slot.path for slot in tree.nodes["DM_MaskFileOutput"].file_slots] == ["mask_"]
+
+
+def test_collections_cover_all_their_objects(context, settings):
+    crowd = [fake_bpy.Object(name) for name in ("Extra_B", "Extra_A")]
+    fake_bpy.new_collection("Crowd", crowd)
+    _mattes(settings, 'COLLECTIONS', "Crowd, Missing")
+
+    with pytest.raises(RuntimeError, match="Collection 'Missing' not found"):
+        pipeline.ensure_pipeline(context, settings)
+    assert context.scene.node_tree.nodes["DM_CryptoMatte_0"].matte_id == "Extra_A,Extra_B"
+
+    settings.crypto_mattes = ""
+    with pytest.raises(RuntimeError, match="No Cryptomatte mattes listed"):
+        pipeline.ensure_pipeline(context, settings)
+
+
+def test_use_selection_fills_the_matte_list(context, settings):
+    hero, villain = fake_bpy.Object("Hero"), fake_bpy.Object("Villain")
+    fake_bpy.new_collection("Cast", [hero, villain])
+    context.selected_objects = [villain, hero]
+
+    _mattes(settings, 'OBJECTS', "")
+    assert DEPTHMAP_OT_crypto_from_selection().execute(context) == {'FINISHED'}
+    assert settings.crypto_mattes == "Hero,Villain"
+
+    settings.crypto_matte_mode = 'COLLECTIONS'
+    assert DEPTHMAP_OT_crypto_from_selection().execute(context) == {'FINISHED'}
+    assert settings.crypto_mattes == "Cast"
+
+    context.selected_objects = []
+    assert DEPTHMAP_OT_crypto_from_selection().execute(context) == {'CANCELLED'}
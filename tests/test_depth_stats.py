@@ -0,0 +1,52 @@
+"""Depth statistics: partial histograms merge into the statistics of the whole sequence."""
+
+import numpy as np
+import pytest
+
+from depth_map_generator.utils import depth_stats
+
+
+def _frames():
+    rng = np.random.default_rng(3)
+    frames = [rng.uniform(0.5, 80.0, size=(16, 16)).astype(np.float32) for _ in range(6)]
+    # Background and invalid depth don't count
+    frames[2][0, :4] = (np.inf, 0.0, -1.0, depth_stats.BLENDER_ZMAX * 2)
+    frames[4][:] = 1e10
+    return frames
+
+
+def test_merged_partials_equal_one_pass(tmp_path):
+    frames = _frames()
+    whole = depth_stats.DepthStats()
+    for frame in frames:
+        whole.add(frame)
+
+    # Partials as the worker processes produce them, through their JSON form
+    merged = depth_stats.DepthStats()
+    for chunk in (frames[:2], frames[2:5], frames[5:]):
+        partial = depth_stats.DepthStats()
+        for frame in chunk:
+            partial.add(frame)
+        path = str(tmp_path / "partial.json")
+        partial.save(path)
+        merged.merge(depth_stats.DepthStats.load(path))
+
+    np.testing.assert_array_equal(merged.counts, whole.counts)
+    assert (merged.minimum, merged.maximum) == (whole.minimum, whole.maximum)
+    assert merged.frames == 6 and merged.background == 4 + 256
+    assert merged.total == 6 * 256 - merged.background
+    for q in (0.0, 0.5, 50.0, 99.5, 100.0):
+        assert merged.percentile(q) == whole.percentile(q)
+
+    valid = np.concatenate([f.ravel() for f in frames])
+    valid = valid[np.isfinite(valid) & (valid > 0.0) & (valid <= depth_stats.BLENDER_ZMAX)]
+    assert merged.minimum == valid.min() and merged.maximum == valid.max()
+    # Bins are ~0.25% wide
+    assert merged.percentile(50.0) == pytest.approx(np.percentile(valid, 50.0), rel=5e-3)
+
+
+def test_merging_empty_stats_keeps_no_range():
+    stats = depth_stats.DepthStats().merge(depth_stats.DepthStats())
+    assert stats.percentile(50.0) is None and stats.to_dict()["min"] is None
+    knots, levels = stats.equalization_curve()
+    assert knots.tolist() == [0.0, depth_stats.BLENDER_ZMAX] and levels.tolist() == [1.0, 0.0]
@@ -0,0 +1,95 @@
+"""Scene fingerprints and static-frame signatures follow the render, not the viewport."""
+
+import types
+
+import numpy as np
+
+from depth_map_generator.utils import cached_render, fingerprint, static_frames
+from tests import fake_bpy
+
+
+def _mesh_object(name, modifiers=(), hide_render=False, visible=True):
+    mesh = types.SimpleNamespace(
+        name_full=name, shape_keys=None, polygons=[0],
+        vertices=fake_bpy._Collection(
+            [types.SimpleNamespace(co=(0.0, 0.0, float(i))) for i in range(3)]),
+    )
+    obj = types.SimpleNamespace(
+        name=name, name_full=name, type='MESH', data=mesh, pass_index=0,
+        modifiers=list(modifiers), hide_render=hide_render, users_collection=[],
+        visible_get=lambda view_layer=None: visible,
+    )
+    obj.original = obj
+    return obj
+
+
+def _subsurf(render_levels=2, show_viewport=True):
+    return types.SimpleNamespace(name="Subdivision", type='SUBSURF', show_render=True,
+                                 show_viewport=show_viewport, levels=1,
+                                 render_levels=render_levels)
+
+
+def _depsgraph(*instances):
+    return types.SimpleNamespace(object_instances=[
+        types.SimpleNamespace(object=obj, matrix_world=np.identity(4),
+                              is_instance=parent is not None, parent=parent)
+        for obj, parent in instances
+    ])
+
+
+def test_fingerprint_uses_render_visibility_and_levels(scene):
+    cube = _mesh_object("Cube", [_subsurf()])
+    base = fingerprint.scene_fingerprint(scene, _depsgraph((cube, None)))
+
+    # Objects and instances disabled in renders don't count
+    hidden = _mesh_object("Hidden", hide_render=True)
+    instancer = _mesh_object("Instancer", hide_render=True)
+    assert fingerprint.scene_fingerprint(
+        scene, _depsgraph((cube, None), (hidden, None), (_mesh_object("Rock"), instancer)),
+    ) == base
+    hidden.hide_render = False
+    assert fingerprint.scene_fingerprint(
+        scene, _depsgraph((cube, None), (hidden, None))) != base
+
+    # Render levels change the key even though the viewport mesh is the same
+    cube.modifiers[0].render_levels = 3
+    assert fingerprint.scene_fingerprint(scene, _depsgraph((cube, None))) != base
+    cube.modifiers[0].render_levels = 2
+    cube.modifiers[0].show_render = False
+    assert fingerprint.scene_fingerprint(scene, _depsgraph((cube, None))) != base
+
+
+def test_cache_refuses_geometry_the_viewport_does_not_show(scene, settings):
+    settings.depth_output_method = 'FILE_OUTPUT'
+    view_layer = types.SimpleNamespace(objects=[
+        _mesh_object("Cube", [_subsurf(render_levels=3)]),
+        _mesh_object("Proxy", hide_render=True, visible=False),
+    ])
+    assert fingerprint.render_mismatch(view_layer) is None
+    assert cached_render.check_supported(scene, settings, view_layer) == (True, None)
+
+    view_layer.objects.append(_mesh_object("Far", visible=False))
+    assert fingerprint.render_mismatch(view_layer) == "Far is hidden in the viewport but rendered"
+    view_layer.objects[-1] = _mesh_object("Rock", [_subsurf(show_viewport=False)])
+    supported, reason = cached_render.check_supported(scene, settings, view_layer)
+    assert not supported and reason.endswith("Rock has the render-only modifier Subdivision")
+
+
+def test_static_signatures_follow_render_changes(context, monkeypatch):
+    scene = context.scene
+    pop = _mesh_object("Pop")
+    rock = _mesh_object("Rock")
+    view_layer = types.SimpleNamespace(objects=[pop, rock])
+    monkeypatch.setattr(context, "view_layer", view_layer)
+
+    def evaluated_depsgraph_get():
+        # Animated render visibility; a render-only modifier from frame 5
+        pop.hide_render = scene.frame_current >= 3
+        rock.modifiers = [_subsurf(show_viewport=False)] if scene.frame_current >= 5 else []
+        return _depsgraph((pop, None), (rock, None))
+
+    monkeypatch.setattr(context, "evaluated_depsgraph_get", evaluated_depsgraph_get)
+    signatures = static_frames.compute_signatures(context, [1, 2, 3, 4, 5, 6])
+    render_frames, reuse = static_frames.group_static_runs([1, 2, 3, 4, 5, 6], signatures)
+    assert render_frames == [1, 3, 5, 6]
+    assert reuse == {1: [2], 3: [4]}
@@ -0,0 +1,100 @@
+"""Stacked sequence container: preallocated .npy, sidecar, capture during the render."""
+
+import json
+import types
+
+import bpy
+import numpy as np
+import pytest
+
+from depth_map_generator.utils import frame_stack, frames, nodes, pipeline, stack_capture
+
+
+def test_stack_is_preallocated_and_sliced_without_copies(tmp_path):
+    path = str(tmp_path / "out" / "depth_stack.npy")
+    stack = frame_stack.FrameStack.create(path, range(10, 16), 3, 4, np.uint16,
+                                          normalization='LINEAR', near=0.1, far=50.0)
+    stack.write(12, np.full((3, 4), 7, dtype=np.uint16))
+    stack.write(13, np.full((3, 4), 9, dtype=np.uint16))
+    stack.sync()
+    assert not stack.is_complete()
+
+    loaded = frame_stack.FrameStack.open(path)
+    assert isinstance(loaded.array, np.memmap)
+    assert loaded.array.shape == (6, 3, 4)
+    assert loaded.filled == {12, 13}
+    assert loaded.meta["near"] == 0.1 and loaded.meta["normalization"] == 'LINEAR'
+
+    clip = loaded.frame_range(12, 13)
+    assert np.shares_memory(clip, loaded.array)
+    assert clip[:, 0, 0].tolist() == [7, 9]
+    with pytest.raises(KeyError):
+        loaded[99]
+
+    # Readers without NumPy can seek straight to a frame
+    meta = json.loads((tmp_path / "out" / "depth_stack.npy.json").read_text())
+    with open(path, "rb") as f:
+        f.seek(meta["data_offset"] + 3 * meta["frame_bytes"])
+        raw = np.frombuffer(f.read(meta["frame_bytes"]), dtype=meta["dtype"])
+    assert raw.tolist() == [9] * 12
+
+
+def _viewer_image(width, height, rows):
+    """Viewer buffer with one depth value per row (stored bottom row first)."""
+    rgba = np.zeros((height, width, 4), dtype=np.float32)
+    rgba[..., 0] = np.asarray(rows, dtype=np.float32)[:, np.newaxis]
+    pixels = rgba[::-1].ravel().copy()
+    return types.SimpleNamespace(
+        size=(width, height),
+        pixels=types.SimpleNamespace(foreach_get=lambda out: out.__setitem__(slice(None), pixels)),
+    )
+
+
+def test_capture_appends_frames_as_they_render(tmp_path, context, settings, monkeypatch,
+                                               interactive):
+    scene = context.scene
+    scene.render.resolution_x, scene.render.resolution_y = 4, 2
+    scene.view_settings.view_transform = 'Raw'
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.render_animation = True
+    settings.stack_sequence = True
+    settings.use_scene_frame_range = False
+    settings.frame_start, settings.frame_end = 1, 3
+    settings.output_path = str(tmp_path / "depth") + "/"
+    settings.setup_complete = True
+    pipeline.ensure_pipeline(context, settings)
+    assert "DM_Viewer" in scene.node_tree.nodes
+
+    monkeypatch.setattr(bpy.data, "images", {"Viewer Node": _viewer_image(4, 2, [0.0, 1.0])},
+                        raising=False)
+    capture = stack_capture.StackCapture(scene, settings, [1, 2, 3]).start(scene.node_tree)
+    assert stack_capture.get_active() is capture
+    for frame in (1, 2):
+        scene.frame_current = frame
+        for handler in list(bpy.app.handlers.render_post):
+            handler(scene, None)
+
+    assert capture.finish() == []
+    assert stack_capture.get_active() is None
+    stack = frame_stack.FrameStack.open(stack_capture.stack_path(settings))
+    assert stack.filled == {1, 2} and stack.array.dtype == np.uint16
+    assert stack.meta["missing"] == [3]
+    # Same rows and quantization as the depth PNG files
+    expected = frames.quantize(np.array([[0.0] * 4, [1.0] * 4]), 16)
+    np.testing.assert_array_equal(stack[2], expected)
+    assert stack.meta["transfer"] == 'LINEAR'
+
+    # The sequence pass writes its files later and is not stacked
+    settings.depth_normalization = 'HISTOGRAM'
+    assert not nodes.wants_stack_output(settings)
+
+
+def test_background_renders_are_not_stacked(context, settings):
+    # blender -b never computes the Viewer the frames are captured from
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.render_animation = True
+    settings.stack_sequence = True
+    assert bpy.app.background and not nodes.wants_stack_output(settings)
+    settings.setup_complete = True
+    pipeline.ensure_pipeline(context, settings)
+    assert "DM_Viewer" not in context.scene.node_tree.nodes
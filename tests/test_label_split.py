@@ -0,0 +1,92 @@
+"""Object-index label maps: one raw index render split into per-index masks."""
+
+import os
+
+import numpy as np
+import pytest
+
+from depth_map_generator.operators.render import label_split_callback
+from depth_map_generator.utils import frames, label_split, paths, pipeline
+
+
+def _labels():
+    labels = np.zeros((6, 8), dtype=np.uint16)
+    labels[1:3, 2:5] = 3
+    labels[4, 7] = 3
+    labels[5, 0:2] = 700
+    return labels
+
+
+def test_parse_indices():
+    assert label_split.parse_indices("") == []
+    assert label_split.parse_indices("5-7, 1,3, 6") == [1, 3, 5, 6, 7]
+    for text in ("a", "4-2", "70000", "1-"):
+        with pytest.raises(ValueError):
+            label_split.parse_indices(text)
+
+
+def test_split_labels_counts_and_boxes():
+    masks, stats = label_split.split_labels(_labels(), [3, 700, 9])
+    assert masks.shape == (3, 6, 8)
+    np.testing.assert_array_equal(masks[0], _labels() == 3)
+    assert stats == {
+        3: {"pixels": 7, "bbox": [2, 1, 7, 4]},
+        700: {"pixels": 2, "bbox": [0, 5, 1, 5]},
+        9: {"pixels": 0, "bbox": None},
+    }
+    # Without indices every non-zero label present is reported
+    _masks, present = label_split.split_labels(_labels())
+    assert sorted(present) == [3, 700]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_split_sequence_writes_labels_masks_and_stats(tmp_path, workers):
+    sources = {}
+    for frame in (1, 2, 3):
+        path = tmp_path / f"raw_index_{frame:04d}.npy"
+        # IndexOB arrives as float; the label map rounds it
+        np.save(path, _labels().astype(np.float32) + 0.01 * frame)
+        sources[frame] = str(path)
+    assert label_split.find_index_frames(str(tmp_path)) == sources
+
+    out = tmp_path / "masks"
+    stats = label_split.split_sequence(sources, str(out), [3, 700], workers=workers)
+    assert sorted(stats) == [1, 2, 3]
+    assert stats[2][3]["pixels"] == 7
+
+    labels = label_split.load_labels(str(out / "labels_0002.png"))
+    np.testing.assert_array_equal(labels, _labels())
+    mask = frames.read_png(str(out / "index_700" / "mask_0003.png"))[..., 0]
+    np.testing.assert_array_equal(mask, np.where(_labels() == 700, 65535, 0))
+    assert label_split.load_stats(str(out / label_split.STATS_FILENAME)) == stats
+
+
+def test_label_map_pipeline_and_post_render_split(context, settings, monkeypatch):
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.render_animation = True
+    settings.mask_enabled = True
+    settings.mask_label_map = True
+    settings.label_indices = "3"
+    settings.setup_complete = True
+    pipeline.ensure_pipeline(context, settings)
+
+    output = context.scene.node_tree.nodes["DM_RawIndexOutput"]
+    assert [(link.from_node.name, link.from_socket.name) for link in output.inputs[0].links] \
+        == [("DM_MaskRenderLayers", 'IndexOB')]
+    raw_file = paths.get_frame_output_files(settings, 4)[-2]
+    assert os.path.basename(raw_file) == "raw_index_0004.exr"
+
+    os.makedirs(os.path.dirname(raw_file), exist_ok=True)
+    open(raw_file, "wb").close()
+    monkeypatch.setattr(frames, "load_depth", lambda _path: _labels().astype(np.float32))
+    label_split_callback(settings, None, [4, 5])()
+
+    mask_dir = paths.get_mask_output_dir(settings)
+    assert os.path.isfile(os.path.join(mask_dir, "labels_0004.png"))
+    assert os.path.isfile(os.path.join(mask_dir, "index_3", "mask_0004.png"))
+    # Raw index frames are intermediate unless raw depth is kept
+    assert not os.path.exists(raw_file)
+
+    settings.label_indices = "x"
+    with pytest.raises(ValueError):
+        label_split_callback(settings, None, [4])
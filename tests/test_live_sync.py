@@ -0,0 +1,93 @@
+"""Live settings sync: coalesced timer, value-only pushes, minimal mode rebuilds."""
+
+import types
+
+import bpy
+import pytest
+
+from depth_map_generator.properties import _live_update
+from depth_map_generator.utils import live_sync, pipeline
+from tests import fake_bpy
+
+
+@pytest.fixture
+def timers(monkeypatch):
+    registered = []
+    monkeypatch.setattr(bpy.app, "background", False)
+    monkeypatch.setattr(bpy.app, "timers", types.SimpleNamespace(
+        register=lambda function, first_interval=0.0: registered.append(function),
+        unregister=registered.remove,
+        is_registered=lambda function: function in registered,
+    ))
+    return registered
+
+
+def _run(timers):
+    assert len(timers) == 1
+    timers.pop()()
+
+
+def test_drag_is_coalesced_into_one_value_push(context, settings, timers):
+    settings.use_custom_range = True
+    settings.setup_complete = True
+    pipeline.ensure_pipeline(context, settings)
+    tree = context.scene.node_tree
+
+    # Nothing queued before setup or with live update off
+    settings.live_sync = False
+    _live_update(settings, context)
+    assert not timers
+    settings.live_sync = True
+
+    for value in (0.3, 0.4, 0.5):
+        settings.contrast_value = value
+        _live_update(settings, context)
+    settings.far_distance = 42.0
+    _live_update(settings, context)
+    assert live_sync.pending()
+
+    fake_bpy.reset_counters()
+    _run(timers)
+    assert not live_sync.pending()
+    assert tree.nodes["DM_Contrast"].inputs['Contrast'].default_value == 0.5
+    assert tree.nodes["DM_RangeMapper"].inputs['From Max'].default_value == 42.0
+    # Only the two input values were written: no nodes, links or evaluations
+    assert fake_bpy.COUNTERS["nodes_new"] == fake_bpy.COUNTERS["nodes_remove"] == 0
+    assert fake_bpy.COUNTERS["links_new"] == fake_bpy.COUNTERS["depsgraph_updates"] == 0
+    assert pipeline.ensure_pipeline(context, settings) is None
+
+
+def test_mode_change_rebuilds_only_the_depth_chain(context, settings, timers):
+    settings.setup_complete = True
+    pipeline.ensure_pipeline(context, settings)
+    tree = context.scene.node_tree
+    contrast = tree.nodes["DM_Contrast"]
+
+    settings.depth_normalization = 'LOGARITHMIC'
+    _live_update(settings, context)
+    fake_bpy.reset_counters()
+    _run(timers)
+
+    assert {"DM_ScaleMultiply", "DM_Logarithm"} <= {node.name for node in tree.nodes}
+    assert tree.nodes["DM_Contrast"] is contrast
+    assert fake_bpy.COUNTERS["nodes_new"] == 2 and fake_bpy.COUNTERS["nodes_remove"] == 0
+
+    # Scale edits in the new mode are value pushes again
+    settings.depth_scale_factor = 4.0
+    _live_update(settings, context)
+    fake_bpy.reset_counters()
+    _run(timers)
+    assert tree.nodes["DM_ScaleMultiply"].inputs[1].default_value == 4.0
+    assert fake_bpy.COUNTERS["nodes_new"] == 0
+
+
+def test_unregister_drops_the_pending_sync(context, settings, timers):
+    settings.setup_complete = True
+    pipeline.ensure_pipeline(context, settings)
+    settings.far_distance = 42.0
+    _live_update(settings, context)
+    assert timers and live_sync.pending()
+
+    live_sync.cancel()
+    assert not timers and not live_sync.pending()
+    live_sync.cancel()
@@ -0,0 +1,145 @@
+"""Camera batches: one pipeline build, per-camera folders and a shared render profile."""
+
+import json
+import os
+import types
+
+import bpy
+import pytest
+
+from depth_map_generator import cli
+from depth_map_generator.operators.render import DEPTHMAP_OT_render
+from depth_map_generator.operators.render_cameras import DEPTHMAP_OT_render_cameras
+from depth_map_generator.utils import multi_camera, pipeline
+from tests import fake_bpy
+
+
+@pytest.fixture
+def renders(context, monkeypatch):
+    """Run the real render operator per camera; record what each render saw."""
+    seen = []
+
+    def depth_render(**kwargs):
+        operator = DEPTHMAP_OT_render(**kwargs)
+        result = operator.execute(context)
+        assert result == {'FINISHED'}, operator.reports
+        return result
+
+    def render(**_kwargs):
+        scene = context.scene
+        seen.append({
+            "camera": scene.camera.name,
+            "base_path": scene.node_tree.nodes["DM_FileOutput"].base_path,
+            "dof": [obj.data.dof.use_dof for obj in scene.objects],
+            "depsgraph_updates": fake_bpy.COUNTERS["depsgraph_updates"],
+            "nodes_new": fake_bpy.COUNTERS["nodes_new"],
+        })
+        return {'FINISHED'}
+
+    monkeypatch.setattr(bpy, "ops", types.SimpleNamespace(
+        depthmap=types.SimpleNamespace(render=depth_render),
+        render=types.SimpleNamespace(render=render),
+    ), raising=False)
+    return seen
+
+
+def _batch_settings(context, settings, tmp_path):
+    for name in ("Front", "Side/Left", "Top"):
+        fake_bpy.new_camera(context.scene, name)
+    context.scene.camera = context.scene.objects["Front"]
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.output_path = str(tmp_path / "depth") + "/"
+    settings.record_telemetry = False
+    settings.depth_only_profile = True
+    settings.depth_only_override_materials = False
+    settings.setup_complete = True
+    pipeline.ensure_pipeline(context, settings)
+    return settings
+
+
+def test_batch_cameras_resolves_names(scene):
+    front = fake_bpy.new_camera(scene, "Front")
+    back = fake_bpy.new_camera(scene, "Back")
+    scene.objects._items.append(fake_bpy.Object("Cube"))
+
+    assert multi_camera.batch_cameras(scene) == [back, front]
+    assert multi_camera.batch_cameras(scene, "Front, Back") == [front, back]
+    with pytest.raises(ValueError):
+        multi_camera.batch_cameras(scene, "Cube")
+
+
+def test_blocking_batch_renders_each_camera_into_its_folder(
+        tmp_path, context, settings, renders):
+    _batch_settings(context, settings, tmp_path)
+    fake_bpy.reset_counters()
+
+    operator = DEPTHMAP_OT_render_cameras(blocking=True)
+    assert operator.execute(context) == {'FINISHED'}
+
+    depth_dir = str(tmp_path / "depth")
+    assert [r["camera"] for r in renders] == ["Front", "Side/Left", "Top"]
+    assert [r["base_path"] for r in renders] == [
+        os.path.join(depth_dir, name, "") for name in ("Front", "Side_Left", "Top")]
+    # No node rebuilt and no scene evaluation between cameras
+    assert all(r["nodes_new"] == 0 and r["depsgraph_updates"] == 0 for r in renders)
+    # One profile for the whole batch covers every camera
+    assert all(r["dof"] == [False, False, False] for r in renders)
+
+    assert context.scene.camera.name == "Front"
+    assert settings.camera_subdir == ""
+    assert [obj.data.dof.use_dof for obj in context.scene.objects] == [True, True, True]
+    assert multi_camera.get_active() is None
+
+
+def test_unknown_camera_cancels_before_rendering(tmp_path, context, settings, renders):
+    _batch_settings(context, settings, tmp_path)
+    settings.batch_cameras = "Front,Missing"
+    operator = DEPTHMAP_OT_render_cameras(blocking=True)
+    assert operator.execute(context) == {'CANCELLED'}
+    assert renders == []
+
+
+def test_cli_cameras_key(tmp_path):
+    spec = tmp_path / "jobs.json"
+    spec.write_text(json.dumps({"jobs": [
+        {"blend": "a.blend", "cameras": ["Front", "Top"]},
+        {"blend": "b.blend", "cameras": "all"},
+    ]}))
+    listed, every = cli.load_job_spec(str(spec))
+    assert listed["settings"]["batch_cameras"] == "Front,Top"
+    assert every["settings"]["batch_cameras"] == ""
+
+    spec.write_text(json.dumps({"jobs": [{"blend": "a.blend", "cameras": []}]}))
+    with pytest.raises(cli.JobSpecError):
+        cli.load_job_spec(str(spec))
+
+
+def test_interactive_batch_waits_for_each_render(context, settings, monkeypatch):
+    from depth_map_generator.utils import rendering
+
+    original = context.scene.camera
+    cameras = [fake_bpy.new_camera(context.scene, name) for name in ("A", "B")]
+    timers = []
+    monkeypatch.setattr(bpy.app.timers, "register",
+                        lambda function, first_interval=0.0: timers.append(function))
+    started = []
+
+    def render():
+        started.append(context.scene.camera.name)
+        return {'FINISHED'}
+
+    finished = []
+    batch = multi_camera.CameraBatch(context, cameras, render, on_finish=finished.append)
+    assert batch.start(context)
+    assert started == ["A"] and settings.camera_subdir == "A"
+
+    # The next camera starts from a timer once the render has fully ended
+    rendering.render_finished()
+    assert started == ["A"]
+    timers.pop()()
+    assert started == ["A", "B"] and settings.camera_subdir == "B"
+
+    rendering.render_finished()
+    timers.pop()()
+    assert finished == [batch] and batch.done == ["A", "B"]
+    assert settings.camera_subdir == "" and context.scene.camera is original
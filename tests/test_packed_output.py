@@ -0,0 +1,162 @@
+"""Packed depth + mask output: spec, reconciliation, file list and the loader."""
+
+import struct
+import types
+import zlib
+
+import bpy
+import numpy as np
+import pytest
+
+from depth_map_generator.operators.mask_export import DEPTHMAP_OT_export_mask
+from depth_map_generator.utils import frames, nodes, paths, pipeline
+from tests import fake_bpy
+
+
+def _packed(settings, output_format):
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.mask_enabled = True
+    settings.pack_depth_mask = True
+    settings.output_format = output_format
+    settings.render_animation = True
+    settings.setup_complete = True
+    return settings
+
+
+def _linked_from(socket):
+    return [(link.from_node.name, link.from_socket.name) for link in socket.links]
+
+
+def test_png_packs_depth_and_mask_into_one_output(context, settings):
+    _packed(settings, 'PNG')
+    pipeline.ensure_pipeline(context, settings)
+    tree = context.scene.node_tree
+
+    assert "DM_FileOutput" not in tree.nodes and "DM_MaskFileOutput" not in tree.nodes
+    combine = tree.nodes["DM_PackCombine"]
+    assert _linked_from(combine.inputs[0]) == [("DM_ColorRamp", 'Image')]
+    assert _linked_from(combine.inputs[1]) == [("DM_MaskCompare", 'Value')]
+    output = tree.nodes["DM_PackedOutput"]
+    assert _linked_from(output.inputs[0]) == [("DM_PackCombine", 'Image')]
+    assert (output.format.color_mode, output.format.color_depth) == ('RGB', '16')
+    assert nodes.unconnected_outputs(tree, settings) == []
+
+
+def test_exr_writes_depth_and_mask_layers(context, settings):
+    _packed(settings, 'OPEN_EXR')
+    pipeline.ensure_pipeline(context, settings)
+    tree = context.scene.node_tree
+
+    output = tree.nodes["DM_PackedOutput"]
+    assert output.format.file_format == 'OPEN_EXR_MULTILAYER'
+    assert output.base_path.endswith("depth_mask_")
+    assert [slot.name for slot in output.layer_slots] == ["depth", "mask"]
+    assert _linked_from(output.inputs['depth']) == [("DM_ColorRamp", 'Image')]
+    assert _linked_from(output.inputs['mask']) == [("DM_MaskCompare", 'Value')]
+    assert nodes.unconnected_outputs(tree, settings) == []
+
+    fake_bpy.reset_counters()
+    result = pipeline.ensure_pipeline(context, settings, force=True)
+    assert (result["added"], result["updated"], result["relinked"]) == (0, 0, 0)
+
+    # Unpacking brings back the two separate outputs
+    settings.pack_depth_mask = False
+    pipeline.ensure_pipeline(context, settings)
+    assert "DM_PackedOutput" not in tree.nodes
+    assert nodes.unconnected_outputs(tree, settings) == []
+
+
+def test_packing_needs_png_or_exr(settings):
+    _packed(settings, 'TIFF')
+    assert not nodes.wants_packed_output(settings)
+    settings.output_format = 'PNG'
+    settings.async_encoding = True
+    assert nodes.wants_packed_output(settings)
+    assert not nodes.wants_async_encoding(settings)
+
+
+def test_one_file_per_frame(settings):
+    _packed(settings, 'PNG')
+    files = paths.get_frame_output_files(settings, 7)
+    assert [path.rsplit("/", 1)[-1] for path in files] == ["depth_mask_0007.png"]
+
+
+def _filtered_png(pixels, filter_types):
+    """Encode uint16 RGB pixels with the given PNG filter per row (reference encoder)."""
+    height, width, channels = pixels.shape
+    raw = pixels.astype(">u2").view(np.uint8).reshape(height, -1).astype(int)
+    bpp = channels * 2
+    scanlines = bytearray()
+    for y in range(height):
+        kind = filter_types[y % len(filter_types)]
+        scanlines.append(kind)
+        for x in range(raw.shape[1]):
+            a = raw[y, x - bpp] if x >= bpp else 0
+            b = raw[y - 1, x] if y else 0
+            c = raw[y - 1, x - bpp] if y and x >= bpp else 0
+            if kind == 0:
+                predicted = 0
+            elif kind == 1:
+                predicted = a
+            elif kind == 2:
+                predicted = b
+            elif kind == 3:
+                predicted = (a + b) // 2
+            else:
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                predicted = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+            scanlines.append((raw[y, x] - predicted) & 0xFF)
+
+    def chunk(kind, data):
+        return (struct.pack(">I", len(data)) + kind + data
+                + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    header = struct.pack(">IIBBBBB", width, height, 16, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(bytes(scanlines))) + chunk(b"IEND", b""))
+
+
+@pytest.mark.parametrize("filter_types", [
+    [0, 1, 2, 3, 4],
+    [4],
+    [3],
+    [1, 3, 4, 4, 2, 0, 0, 0, 1, 2, 2],
+])
+def test_png_decoder_handles_every_filter(filter_types):
+    pixels = np.random.default_rng(1).integers(0, 65536, size=(11, 6, 3), dtype=np.uint16)
+    decoded = frames._decode_png(_filtered_png(pixels, filter_types))
+    np.testing.assert_array_equal(decoded, pixels)
+
+
+def test_load_packed_png(tmp_path):
+    depth = np.linspace(0.0, 1.0, 12, dtype=np.float32).reshape(3, 4)
+    mask = (depth > 0.5).astype(np.float32)
+    rgb = np.stack((depth, mask, np.zeros_like(depth)), axis=-1)
+    path = tmp_path / "depth_mask_0001.png"
+    frames.write_png(str(path), rgb, 16)
+
+    loaded_depth, loaded_mask = frames.load_packed(str(path))
+    np.testing.assert_allclose(loaded_depth, depth, atol=1 / 65535)
+    np.testing.assert_array_equal(loaded_mask, mask)
+
+    with pytest.raises(ValueError):
+        frames.load_packed(str(tmp_path / "depth_mask_0001.tif"))
+
+
+def test_mask_export_checks_the_packed_output(context, settings, monkeypatch):
+    _packed(settings, 'PNG')
+    pipeline.ensure_pipeline(context, settings)
+    settings.render_animation = False
+    monkeypatch.setattr(bpy, "ops", types.SimpleNamespace(render=types.SimpleNamespace(
+        render=lambda **_kwargs: {'FINISHED'})), raising=False)
+    assert DEPTHMAP_OT_export_mask(blocking=True).execute(context) == {'FINISHED'}
+
+    tree = context.scene.node_tree
+    for link in list(tree.nodes["DM_PackCombine"].inputs[1].links):
+        tree.links.remove(link)
+    # Keep the broken tree as it is
+    monkeypatch.setattr(pipeline, "ensure_pipeline", lambda *_args, **_kwargs: None)
+    operator = DEPTHMAP_OT_export_mask(blocking=True)
+    assert operator.execute(context) == {'CANCELLED'}
+    assert "mask branch (DM_PackCombine)" in operator.reports[-1][1]
@@ -0,0 +1,152 @@
+"""Pipeline spec and reconciliation against the fake bpy node tree."""
+
+import pytest
+
+from depth_map_generator.operators.setup import DEPTHMAP_OT_setup
+from depth_map_generator.utils import nodes, pipeline
+from tests import fake_bpy
+from tests.conftest import COMBINATIONS, combination_id, configure
+
+
+def _dm_nodes(tree):
+    return {node.name: node for node in tree.nodes if node.name.startswith("DM_")}
+
+
+def _dm_links(tree):
+    return {(link.from_node.name, link.from_socket.name, link.to_node.name, link.to_socket.name)
+            for link in tree.links
+            if link.from_node.name.startswith("DM_") and link.to_node.name.startswith("DM_")}
+
+
+@pytest.mark.parametrize("combination", COMBINATIONS, ids=combination_id)
+def test_build_matches_spec(context, settings, combination):
+    configure(settings, *combination)
+    settings.setup_complete = True
+
+    result = pipeline.ensure_pipeline(context, settings)
+    tree = context.scene.node_tree
+    spec = nodes.pipeline_spec(settings, context.view_layer)
+
+    assert result["added"] == len(spec["nodes"])
+    assert result["evaluations"] == 0
+    dm_nodes = _dm_nodes(tree)
+    assert set(dm_nodes) == set(spec["nodes"])
+    for name, want in spec["nodes"].items():
+        assert dm_nodes[name].bl_idname == want["type"]
+    assert len(_dm_links(tree)) == len(spec["links"])
+    assert context.view_layer.use_pass_z
+
+
+@pytest.mark.parametrize("combination", COMBINATIONS, ids=combination_id)
+def test_second_run_is_noop(context, settings, combination):
+    configure(settings, *combination)
+    settings.setup_complete = True
+    pipeline.ensure_pipeline(context, settings)
+
+    fake_bpy.reset_counters()
+    assert pipeline.ensure_pipeline(context, settings) is None
+    assert sum(fake_bpy.COUNTERS.values()) == 0
+
+    # A forced reconcile finds nothing to change either
+    result = pipeline.ensure_pipeline(context, settings, force=True)
+    assert (result["added"], result["removed"], result["updated"], result["relinked"]) \
+        == (0, 0, 0, 0)
+    assert fake_bpy.COUNTERS["nodes_new"] == fake_bpy.COUNTERS["links_new"] == 0
+
+
+def test_mode_switch_touches_only_the_difference(context, settings):
+    settings.setup_complete = True
+    pipeline.ensure_pipeline(context, settings)
+
+    settings.depth_normalization = 'LOGARITHMIC'
+    result = pipeline.ensure_pipeline(context, settings)
+    assert result["added"] == 2  # DM_ScaleMultiply, DM_Logarithm
+    assert result["removed"] == 0
+
+    settings.contrast_value = 0.5
+    result = pipeline.ensure_pipeline(context, settings)
+    assert (result["added"], result["removed"], result["updated"]) == (0, 0, 1)
+    assert context.scene.node_tree.nodes["DM_Contrast"].inputs['Contrast'].default_value == 0.5
+
+
+def test_user_nodes_and_links_are_preserved(context, settings):
+    context.scene.use_nodes = True
+    tree = context.scene.node_tree
+    user_math = tree.nodes.new('CompositorNodeMath')
+    user_viewer = tree.nodes.new('CompositorNodeViewer')
+    tree.links.new(user_math.outputs['Value'], user_viewer.inputs['Image'])
+
+    settings.setup_complete = True
+    settings.mask_enabled = True
+    pipeline.ensure_pipeline(context, settings)
+    settings.mask_enabled = False
+    pipeline.ensure_pipeline(context, settings)
+
+    assert user_math.name in tree.nodes and user_viewer.name in tree.nodes
+    assert any(link.from_node is user_math and link.to_node is user_viewer
+               for link in tree.links)
+
+
+def test_renamed_or_retyped_nodes_are_replaced(context, settings):
+    settings.setup_complete = True
+    pipeline.ensure_pipeline(context, settings)
+    tree = context.scene.node_tree
+    tree.nodes.remove(tree.nodes["DM_Contrast"])
+    stale = tree.nodes.new('CompositorNodeViewer')
+    stale.name = "DM_ColorRamp_old"
+    wrong = tree.nodes["DM_ColorRamp"]
+    tree.nodes.remove(wrong)
+    tree.nodes.new('CompositorNodeMath').name = "DM_ColorRamp"
+
+    result = pipeline.ensure_pipeline(context, settings)
+    assert result["added"] == 2
+    assert result["removed"] == 2
+    assert set(_dm_nodes(tree)) == set(nodes.pipeline_spec(settings, context.view_layer)["nodes"])
+
+
+def test_setup_operator_reports_and_finishes(context, settings):
+    operator = DEPTHMAP_OT_setup()
+    assert operator.execute(context) == {'FINISHED'}
+    assert settings.setup_complete
+    assert operator.reports[-1][0] == {'INFO'}
+
+    operator = DEPTHMAP_OT_setup()
+    assert operator.execute(context) == {'FINISHED'}
+    assert "up to date" in operator.reports[-1][1]
+
+
+def test_enabling_passes_does_not_evaluate_the_scene(context, settings):
+    settings.setup_complete = True
+    settings.mask_enabled = True
+    pipeline.ensure_pipeline(context, settings)
+    assert fake_bpy.COUNTERS["depsgraph_updates"] == 0
+    assert context.view_layer.use_pass_object_index
+
+
+@pytest.mark.parametrize("output_format, expected", [
+    ('PNG', {"file_format": 'PNG', "color_depth": '16', "compression": 40}),
+    ('OPEN_EXR', {"file_format": 'OPEN_EXR', "color_depth": '16', "exr_codec": 'DWAA'}),
+    ('TIFF', {"file_format": 'TIFF', "color_depth": '16', "tiff_codec": 'NONE'}),
+])
+def test_output_encodings_configure_file_outputs(context, settings, output_format, expected):
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.mask_enabled = True
+    settings.output_format = output_format
+    settings.png_compression = 40
+    settings.exr_codec = 'DWAA'
+    settings.setup_complete = True
+    pipeline.ensure_pipeline(context, settings)
+
+    tree = context.scene.node_tree
+    for name in ("DM_FileOutput", "DM_MaskFileOutput"):
+        image_format = tree.nodes[name].format
+        assert {attr: getattr(image_format, attr) for attr in expected} == expected
+
+    # A codec change reconciles just the two file outputs (TIFF has none to change)
+    settings.exr_codec = 'NONE'
+    settings.png_compression = 90
+    result = pipeline.ensure_pipeline(context, settings)
+    if output_format == 'TIFF':
+        assert result is None
+    else:
+        assert (result["added"], result["updated"]) == (0, 2)
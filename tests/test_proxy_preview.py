@@ -0,0 +1,120 @@
+"""Proxy depth preview: debounced refresh, temporary low-res render, change detection."""
+
+import types
+
+import bpy
+import numpy as np
+import pytest
+
+from depth_map_generator.operators.proxy_preview import DEPTHMAP_OT_proxy_preview
+from depth_map_generator.utils import proxy_preview
+from tests import fake_bpy
+
+
+class _Image:
+    def __init__(self, width, height, fill=0.0):
+        self.size = (width, height)
+        self.buffer = np.full(width * height * 4, fill, dtype=np.float32)
+        self.pixels = types.SimpleNamespace(
+            foreach_get=lambda out: out.__setitem__(slice(None), self.buffer),
+            foreach_set=lambda values: self.buffer.__setitem__(slice(None), values),
+        )
+
+    def scale(self, width, height):
+        self.__init__(width, height)
+
+    def update(self):
+        pass
+
+
+class _Images(dict):
+    def new(self, name, width, height, float_buffer=False):
+        self[name] = _Image(width, height)
+        return self[name]
+
+
+@pytest.fixture
+def timers(monkeypatch):
+    registered = {}
+    monkeypatch.setattr(bpy.app, "timers", types.SimpleNamespace(
+        register=lambda function, first_interval=0.0: registered.__setitem__(
+            function, first_interval),
+        unregister=lambda function: registered.pop(function),
+        is_registered=lambda function: function in registered,
+    ))
+    return registered
+
+
+@pytest.fixture
+def proxy_renders(context, monkeypatch):
+    scene = context.scene
+    images = _Images()
+    monkeypatch.setattr(bpy.data, "images", images, raising=False)
+    seen = []
+
+    def _render(**_kwargs):
+        tree = scene.node_tree
+        seen.append({
+            "percentage": scene.render.resolution_percentage,
+            "muted": [node.mute for node in tree.nodes if node.name == "DM_FileOutput"],
+            "active": tree.nodes.active.name,
+        })
+        size = scene.render.resolution_percentage
+        images["Viewer Node"] = _Image(size * 4, size * 2, fill=0.5)
+        return {'FINISHED'}
+
+    monkeypatch.setattr(bpy, "ops", types.SimpleNamespace(
+        render=types.SimpleNamespace(render=_render)))
+    return seen
+
+
+def _fire(scene, *updates):
+    depsgraph = types.SimpleNamespace(updates=list(updates))
+    for handler in list(bpy.app.handlers.depsgraph_update_post):
+        handler(scene, depsgraph)
+
+
+def test_proxy_renders_low_res_and_restores(context, settings, timers, proxy_renders,
+                                            monkeypatch):
+    scene = context.scene
+    scene.camera = fake_bpy.new_camera(scene)
+    scene.camera.matrix_world = np.eye(4).tolist()
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.proxy_resolution = 10
+
+    assert DEPTHMAP_OT_proxy_preview().execute(context) == {'FINISHED'}
+    session = proxy_preview.get_active()
+    assert settings.proxy_preview and list(timers) == [session._refresh]
+    assert timers[session._refresh] == settings.proxy_debounce
+
+    # The timer fires once the edits stop, long after the operator's context expired
+    monkeypatch.setattr(bpy, "context", fake_bpy.Context(scene))
+    context.scene = context.view_layer = None
+    refresh = next(iter(timers))
+    timers.clear()
+    assert refresh() is None
+    assert proxy_renders == [{"percentage": 10, "muted": [True], "active": "DM_Viewer"}]
+    # Everything the proxy changed is back
+    assert scene.render.resolution_percentage == 100
+    assert not scene.node_tree.nodes["DM_FileOutput"].mute
+    assert scene.node_tree.nodes.active is None
+    proxy = bpy.data.images[proxy_preview.PROXY_IMAGE]
+    assert proxy.size == (40, 20) and proxy.buffer[0] == 0.5
+    assert session.renders == 1 and session.last_error is None
+
+    # Updates caused by the proxy itself don't loop
+    _fire(scene)
+    assert not timers
+    # Setting changes and object edits do
+    settings.use_custom_range, settings.far_distance = True, 12.0
+    _fire(scene)
+    assert list(timers) == [session._refresh]
+    timers.clear()
+    moved = types.SimpleNamespace(id=fake_bpy.Object("Cube"), is_updated_transform=True,
+                                  is_updated_geometry=False)
+    _fire(scene, moved)
+    assert list(timers) == [session._refresh]
+
+    assert DEPTHMAP_OT_proxy_preview().execute(bpy.context) == {'FINISHED'}
+    assert proxy_preview.get_active() is None and not settings.proxy_preview
+    assert not timers and not bpy.app.handlers.depsgraph_update_post
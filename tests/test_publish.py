@@ -0,0 +1,101 @@
+"""Publishing into the ComfyUI input directory: link or copy, atomic renames, manifest."""
+
+import errno
+import os
+import types
+
+import pytest
+
+from depth_map_generator.operators.render import publish_callback
+from depth_map_generator.utils import frames, paths, publish
+
+
+def _write(path, data=b"png"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_publish_links_on_the_same_filesystem(tmp_path):
+    src = tmp_path / "render" / "depth"
+    files = {frame: [_write(str(src / f"depth_{frame:04d}.png"), b"x" * frame)]
+             for frame in (1, 2)}
+    dst = str(tmp_path / "ComfyUI" / "input" / "shot")
+
+    manifest = publish.publish_sequences({"depth": (str(src), files)}, dst,
+                                         info={"near": 0.1},
+                                         methods=("hardlink", "copy"))
+    assert manifest["methods"] == {"hardlink": 2}
+    assert os.path.samefile(files[2][0], os.path.join(dst, "depth", "depth_0002.png"))
+    assert publish.load_manifest(dst)["sequences"]["depth"]["files"][1] == {
+        "frame": 2, "path": "depth/depth_0002.png", "bytes": 2,
+    }
+    assert publish.load_manifest(dst)["near"] == 0.1
+    # Nothing but the published files: no temporary names left behind
+    assert sorted(os.listdir(dst)) == ["depth", "manifest.json"]
+    assert sorted(os.listdir(os.path.join(dst, "depth"))) == ["depth_0001.png", "depth_0002.png"]
+
+    # Publishing again leaves the links alone
+    manifest = publish.publish_sequences({"depth": (str(src), files)}, dst,
+                                         methods=("hardlink", "copy"))
+    assert manifest["methods"] == {"unchanged": 2}
+
+
+def test_publish_falls_back_to_copy_across_filesystems(tmp_path, monkeypatch):
+    src = _write(str(tmp_path / "depth_0001.png"), b"depth")
+    dst = str(tmp_path / "input" / "depth_0001.png")
+    os.makedirs(os.path.dirname(dst))
+    _write(dst, b"old frame")
+
+    def _cross_device(*_args):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "link", _cross_device)
+    assert publish.publish_file(src, dst, methods=("hardlink", "copy")) == "copy"
+    assert open(dst, "rb").read() == b"depth"
+    assert not os.path.samefile(src, dst)
+    assert os.listdir(os.path.dirname(dst)) == ["depth_0001.png"]
+
+    # Real errors are not hidden behind the fallback
+    with pytest.raises(FileNotFoundError):
+        publish.publish_file(str(tmp_path / "missing.png"), dst)
+    assert open(dst, "rb").read() == b"depth"
+
+
+def test_publish_callback_collects_depth_and_masks(tmp_path, context, settings):
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.mask_enabled = True
+    settings.output_path = str(tmp_path / "depth") + "/"
+    settings.mask_output_path = str(tmp_path / "mask") + "/"
+    settings.publish_name = "Shot 10"
+    for frame in (1, 2):
+        for path in paths.get_frame_output_files(settings, frame):
+            _write(path)
+    prefs = types.SimpleNamespace(comfyui_input_dir=str(tmp_path / "ComfyUI" / "input"))
+
+    with pytest.raises(ValueError, match="ComfyUI input directory"):
+        publish_callback(context.scene, settings, None, [1, 2])
+    manifest = publish_callback(context.scene, settings, prefs, [1, 2, 3])()
+
+    publish_dir = paths.get_publish_dir(settings, prefs)
+    assert publish_dir == os.path.join(str(tmp_path), "ComfyUI", "input", "Shot_10", "")
+    assert manifest["sequences"]["depth"]["frames"] == [1, 2]
+    assert manifest["normalization"] == settings.depth_normalization
+    mask = frames.frame_filename(paths.output_prefix("mask", settings), 2, ".png")
+    assert os.path.isfile(os.path.join(publish_dir, "mask", mask))
+
+
+def test_publish_callback_keeps_masks_in_a_shared_folder_apart(tmp_path, context, settings):
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.mask_enabled = True
+    settings.output_path = settings.mask_output_path = str(tmp_path / "render") + "/"
+    for path in paths.get_frame_output_files(settings, 1):
+        _write(path)
+    prefs = types.SimpleNamespace(comfyui_input_dir=str(tmp_path / "input"))
+
+    manifest = publish_callback(context.scene, settings, prefs, [1])()
+    depth = frames.frame_filename(paths.output_prefix("depth", settings), 1, ".png")
+    mask = frames.frame_filename(paths.output_prefix("mask", settings), 1, ".png")
+    assert [f["path"] for f in manifest["sequences"]["depth"]["files"]] == [f"depth/{depth}"]
+    assert [f["path"] for f in manifest["sequences"]["mask"]["files"]] == [f"mask/{mask}"]
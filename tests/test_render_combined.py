@@ -0,0 +1,161 @@
+"""Depth + mask from one render: branch validation, delegation and the CLI mode."""
+
+import json
+import os
+import types
+
+import bpy
+import pytest
+
+from depth_map_generator import cli
+from depth_map_generator.operators.render import DEPTHMAP_OT_render
+from depth_map_generator.operators.render_combined import DEPTHMAP_OT_render_combined
+from depth_map_generator.utils import nodes, pipeline
+
+
+@pytest.fixture
+def render_calls(monkeypatch):
+    """Replace bpy.ops.depthmap.render, recording its keyword arguments."""
+    calls = []
+
+    def render(**kwargs):
+        calls.append(kwargs)
+        return {'FINISHED'}
+
+    monkeypatch.setattr(bpy, "ops", types.SimpleNamespace(
+        depthmap=types.SimpleNamespace(render=render)), raising=False)
+    return calls
+
+
+def _combined(settings, **overrides):
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.mask_enabled = True
+    settings.mask_source = 'OBJECT_INDEX'
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+    settings.setup_complete = True
+    return settings
+
+
+@pytest.mark.parametrize("overrides", [
+    {},
+    {"async_encoding": True},
+    {"depth_normalization": 'HISTOGRAM'},
+])
+def test_both_branches_connected(context, settings, overrides):
+    _combined(settings, **overrides)
+    pipeline.ensure_pipeline(context, settings)
+    assert nodes.unconnected_outputs(context.scene.node_tree, settings) == []
+
+
+def test_disconnected_mask_branch_is_reported(context, settings):
+    _combined(settings)
+    pipeline.ensure_pipeline(context, settings)
+    tree = context.scene.node_tree
+    for link in list(tree.nodes["DM_MaskFileOutput"].inputs[0].links):
+        tree.links.remove(link)
+
+    problems = nodes.unconnected_outputs(tree, settings)
+    assert problems == ["mask branch (DM_MaskFileOutput) is not connected"]
+
+
+def test_operator_renders_once(context, settings, render_calls):
+    _combined(settings)
+    operator = DEPTHMAP_OT_render_combined(blocking=True)
+    assert operator.execute(context) == {'FINISHED'}
+    assert render_calls == [{"blocking": True, "normalize_sequence": True}]
+
+
+def test_operator_cancels_before_rendering(context, settings, render_calls):
+    _combined(settings, mask_source='CRYPTOMATTE')
+    context.scene.render.engine = 'BLENDER_EEVEE'
+    operator = DEPTHMAP_OT_render_combined()
+    assert operator.execute(context) == {'CANCELLED'}
+    assert render_calls == []
+    assert operator.reports[-1][0] == {'ERROR'}
+
+
+def test_numpy_output_is_refused_in_background_mode(context, settings):
+    # The Viewer the NumPy files are read from is never computed by blender -b
+    _combined(settings, output_format='NUMPY')
+    operator = DEPTHMAP_OT_render(blocking=True)
+    assert operator.execute(context) == {'CANCELLED'}
+    assert operator.reports[-1][0] == {'ERROR'}
+    assert "NumPy" in operator.reports[-1][1]
+
+
+def test_cli_depth_mask_mode(tmp_path):
+    spec = tmp_path / "jobs.json"
+    spec.write_text(json.dumps({"jobs": [
+        {"blend": "a.blend", "mode": "depth_mask"},
+        {"blend": "b.blend"},
+    ]}))
+    combined, depth = cli.load_job_spec(str(spec))
+    assert combined["settings"]["mask_enabled"] is True
+    assert combined["settings"]["depth_output_method"] == 'FILE_OUTPUT'
+    assert depth["mode"] == "depth" and "mask_enabled" not in depth["settings"]
+
+    spec.write_text(json.dumps({"jobs": [{"blend": "a.blend", "mode": "mask"}]}))
+    with pytest.raises(cli.JobSpecError):
+        cli.load_job_spec(str(spec))
+
+
+@pytest.mark.parametrize("spec", [
+    {"jobs": [{"blend": "a.blend", "frames": ["a", 10]}]},
+    {"jobs": [{"blend": "a.blend", "frames": [None, 10]}]},
+    {"jobs": [{"blend": "a.blend", "frames": [1.5, 10]}]},
+    {"jobs": [{"blend": "a.blend", "settings": ["mask_enabled"]}]},
+    {"jobs": [{"blend": "a.blend"}], "defaults": []},
+    {"jobs": [{"blend": "a.blend"}], "defaults": {"settings": "fast"}},
+    {"jobs": [{"blend": "a.blend", "settings": {"output_format": "NUMPY"}}]},
+    {"jobs": [{"blend": "a.blend", "frame": "12"}]},
+    {"jobs": [{"blend": "a.blend", "threads": 2.5}]},
+    {"jobs": [{"blend": "a.blend", "threads": True}]},
+])
+def test_cli_reports_malformed_specs(tmp_path, spec):
+    path = tmp_path / "jobs.json"
+    path.write_text(json.dumps(spec))
+    report = tmp_path / "report.json"
+    assert cli.main([str(path), "--report", str(report)]) == cli.EXIT_BAD_SPEC
+    assert json.loads(report.read_text())["error"]
+
+
+@pytest.mark.parametrize("overrides", [
+    {"mask_enabled": "false"},
+    {"mask_enabled": 0},
+    {"frame_start": 1.7},
+    {"frame_start": True},
+    {"near_distance": "0.5"},
+    {"depth_normalization": 1},
+])
+def test_setting_overrides_take_only_their_json_type(overrides):
+    kinds = {"mask_enabled": 'BOOLEAN', "frame_start": 'INT', "near_distance": 'FLOAT',
+             "depth_normalization": 'ENUM'}
+    settings = types.SimpleNamespace(bl_rna=types.SimpleNamespace(properties={
+        key: types.SimpleNamespace(type=kind) for key, kind in kinds.items()}))
+    with pytest.raises(cli.JobSpecError):
+        cli.apply_settings_overrides(settings, overrides)
+    assert not hasattr(settings, next(iter(overrides)))
+
+    cli.apply_settings_overrides(settings, {"mask_enabled": False, "frame_start": 3,
+                                            "near_distance": 2, "depth_normalization": "LINEAR"})
+    assert settings.mask_enabled is False and settings.frame_start == 3
+    assert settings.near_distance == 2.0 and isinstance(settings.near_distance, float)
+
+
+def test_cli_report_uses_preference_output_dirs(tmp_path, context, settings, monkeypatch):
+    settings.output_path = ""
+    settings.mask_output_path = ""
+    settings.mask_enabled = True
+    prefs = types.SimpleNamespace(default_depth_output_dir=str(tmp_path / "prefs_depth") + "/",
+                                  default_mask_output_dir=str(tmp_path / "prefs_mask") + "/")
+    context.preferences.addons["depth_map_generator"] = types.SimpleNamespace(preferences=prefs)
+    monkeypatch.setattr(cli, "_prepare_scene", lambda _job: (context.scene, context.view_layer))
+    monkeypatch.setattr(cli, "call_in_scene", lambda *_args, **_kwargs: {'FINISHED'})
+    monkeypatch.setattr(bpy, "ops", types.SimpleNamespace(depthmap=types.SimpleNamespace(
+        setup=None, render=None)), raising=False)
+
+    result = cli.run_job({"blend": "a.blend"})
+    assert result["status"] == "ok", result["error"]
+    assert result["depth_output_dir"] == os.path.join(str(tmp_path), "prefs_depth", "")
+    assert result["mask_output_dir"] == os.path.join(str(tmp_path), "prefs_mask", "")
@@ -0,0 +1,45 @@
+"""Render finish steps: chained callbacks and the post-render sequence pass."""
+
+import os
+
+import numpy as np
+import pytest
+
+from depth_map_generator.operators.render import sequence_pass_callback
+from depth_map_generator.utils import frames, paths, rendering
+
+
+def test_chained_callbacks_all_run_once_and_raise_the_first_error():
+    calls = []
+
+    def fail(name):
+        calls.append(name)
+        raise RuntimeError(name)
+
+    chained = rendering.chain_callbacks(
+        lambda: calls.append("restore"), None, lambda: fail("telemetry"),
+        lambda: calls.append("encoder"), lambda: fail("publish"),
+    )
+    with pytest.raises(RuntimeError, match="telemetry"):
+        chained()
+    assert calls == ["restore", "telemetry", "encoder", "publish"]
+    chained()
+    assert len(calls) == 4
+    assert rendering.chain_callbacks(None, None) is None
+
+
+def test_sequence_pass_of_background_only_frames(tmp_path, scene, settings, capsys):
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.depth_normalization = 'HISTOGRAM'
+    settings.output_path = str(tmp_path / "depth") + "/"
+    raw_dir = paths.get_raw_depth_output_dir(settings)
+    os.makedirs(raw_dir)
+    for frame in (1, 2):
+        # Nothing was hit: Blender writes its far "no hit" distance everywhere
+        frames.write_exr(os.path.join(raw_dir, frames.frame_filename(
+            paths.output_prefix("raw_depth", settings), frame, ".exr")),
+            np.full((3, 4), 1e10, dtype=np.float32))
+
+    sequence_pass_callback(scene, settings, None, [1, 2])()
+    assert "2 frames normalized (no valid depth)" in capsys.readouterr().out
+    assert sorted(frames.find_frames(paths.get_depth_output_dir(settings), "depth_map")) == [1, 2]
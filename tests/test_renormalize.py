@@ -0,0 +1,34 @@
+"""Offline normalization reproduces the compositor's MapRange, including background depth."""
+
+import numpy as np
+
+from depth_map_generator.utils import renormalize
+
+ZMAX = renormalize.BLENDER_ZMAX
+
+
+def test_map_range_sends_no_hit_depth_to_the_ends():
+    values = np.array([1.0, 11.0, 6.0, 21.0, ZMAX, ZMAX * 2, -ZMAX * 2], dtype=np.float32)
+    mapped = renormalize.map_range(values, 1.0, 11.0, 1.0, 0.0)
+    # Past far extrapolates; beyond BLENDER_ZMAX is background at to_max
+    np.testing.assert_allclose(mapped, [1.0, 0.0, 0.5, -1.0, -998.9, 0.0, 1.0], rtol=1e-6)
+
+    # A zero-width range maps everything to to_min
+    np.testing.assert_array_equal(renormalize.map_range(values[:3], 5.0, 5.0, 1.0, 0.0), 1.0)
+
+
+def test_normalize_matches_the_pipeline_modes():
+    params = dict(renormalize.default_params(), near=1.0, far=11.0, contrast=0.0)
+    depth = np.array([[1.0, 6.0], [11.0, 1e10]], dtype=np.float32)
+    np.testing.assert_allclose(renormalize.normalize(depth, params), [[1.0, 0.5], [0.0, 0.0]])
+
+    # LOGARITHMIC maps log10(depth * scale) from the converted range
+    params.update(mode='LOGARITHMIC', scale=10.0, near=1.0, far=3.0)
+    depth = np.array([1.0, 10.0, 100.0, 0.0], dtype=np.float32)
+    np.testing.assert_allclose(renormalize.normalize(depth, params), [1.0, 0.5, 0.0, 1.0],
+                               atol=1e-6)
+
+    # HISTOGRAM with a curve: background past BLENDER_ZMAX stays black
+    params.update(mode='HISTOGRAM', curve=(np.array([1.0, 3.0]), np.array([1.0, 0.0])))
+    depth = np.array([1.0, 2.0, ZMAX * 2], dtype=np.float32)
+    np.testing.assert_allclose(renormalize.normalize(depth, params), [1.0, 0.5, 0.0])
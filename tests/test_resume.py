@@ -0,0 +1,137 @@
+"""Resumable renders: completion manifest, integrity checks, rendering only missing frames."""
+
+import json
+import os
+import types
+
+import bpy
+import numpy as np
+
+from depth_map_generator.operators.render import DEPTHMAP_OT_render
+from depth_map_generator.utils import completion, frames, paths, resume, telemetry
+
+
+def _write_frame(settings, frame):
+    for path in paths.get_frame_output_files(settings, frame):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        frames.write_png(path, np.full((4, 6), frame / 10.0, dtype=np.float32))
+
+
+def _file_output(settings, tmp_path):
+    settings.depth_output_method = 'FILE_OUTPUT'
+    settings.mask_enabled = True
+    settings.output_path = str(tmp_path / "depth") + "/"
+    settings.mask_output_path = str(tmp_path / "mask") + "/"
+    return settings
+
+
+def test_verify_detects_truncated_and_corrupt_pngs(tmp_path):
+    # Stored (level 0) deflate: the size depends only on the image size
+    png = frames.encode_png(np.arange(64, dtype=np.uint16).reshape(8, 8), 0)
+    good, cut, flipped = (str(tmp_path / f"{name}.png") for name in ("good", "cut", "flipped"))
+    for path, data in ((good, png), (cut, png[:-20]),
+                       (flipped, png[:-20] + bytes([png[-20] ^ 0xFF]) + png[-19:])):
+        with open(path, "wb") as f:
+            f.write(data)
+
+    assert completion.check_file(good)[0] is None
+    assert completion.check_file(cut)[0] == "truncated"
+    assert completion.check_file(flipped)[0].startswith("corrupt")
+    assert completion.check_file(str(tmp_path / "none.png")) == ("missing", None)
+
+    manifest = completion.CompletionManifest(str(tmp_path / "m.json"), "abc")
+    valid, invalid = manifest.verify({1: [good], 2: [good, cut], 3: [flipped], 4: []})
+    assert valid == [1]
+    assert invalid == {2: "cut.png: truncated", 3: "flipped.png: corrupt IDAT chunk",
+                       4: "no output files"}
+    assert list(manifest.frames) == [1]
+
+    # A recorded file must keep its checksum even when it is still a valid PNG
+    manifest.save()
+    with open(good, "wb") as f:
+        f.write(frames.encode_png(np.zeros((8, 8), dtype=np.uint16), 0))
+    reloaded = completion.CompletionManifest.load(manifest.path, "abc")
+    assert reloaded.verify({1: [good]})[1] == {1: "good.png: checksum mismatch"}
+    assert completion.CompletionManifest.load(manifest.path, "other").discarded
+
+
+def test_unrecorded_exrs_need_every_line_block(tmp_path):
+    exr = frames.encode_exr(np.arange(24, dtype=np.float32).reshape(4, 6))
+    table = frames.read_exr_header(exr)[1]
+    cases = {"good": exr, "cut": exr[:-1], "header": exr[:table - 1],
+             # Interrupted writes leave the offset table zeroed
+             "unwritten": exr[:table] + bytes(len(exr) - table)}
+    errors = {}
+    for name, data in cases.items():
+        path = tmp_path / f"{name}.exr"
+        path.write_bytes(data)
+        errors[name] = completion.check_file(str(path))[0]
+    assert errors == {"good": None, "cut": "truncated",
+                      "header": "corrupt or truncated header", "unwritten": "truncated"}
+
+
+def test_resume_renders_only_missing_and_invalid_frames(tmp_path, context, settings,
+                                                        monkeypatch):
+    _file_output(settings, tmp_path)
+    for frame in (1, 2, 3, 4, 5):
+        _write_frame(settings, frame)
+    resume.plan_resume(context, settings, [1, 2, 3, 4, 5])
+
+    # Frame 2 lost its mask and frame 4's depth file was cut short by the crash
+    os.remove(paths.get_frame_output_files(settings, 2)[1])
+    depth_4 = paths.get_frame_output_files(settings, 4)[0]
+    size_4 = os.path.getsize(depth_4)
+    with open(depth_4, "r+b") as f:
+        f.truncate(30)
+
+    rendered = []
+
+    def render(**_kwargs):
+        rendered.append(context.scene.frame_current)
+        _write_frame(settings, context.scene.frame_current)
+        return {'FINISHED'}
+
+    monkeypatch.setattr(bpy, "ops", types.SimpleNamespace(
+        render=types.SimpleNamespace(render=render)), raising=False)
+    finished = []
+    kept, to_render, invalid = resume.render_resuming(
+        context, list(range(1, 8)), blocking=True, on_finish=lambda: finished.append(True),
+    )
+
+    assert (kept, to_render) == (3, 4)
+    assert rendered == [2, 4, 6, 7]
+    assert invalid == {4: f"{os.path.basename(depth_4)}: size 30 != {size_4}"}
+    assert finished == [True]
+    with open(resume.manifest_path(settings), "r", encoding="utf-8") as f:
+        assert sorted(json.load(f)["frames"]) == ["1", "2", "3", "4", "5", "6", "7"]
+
+    # Nothing left to do; other settings invalidate every frame
+    assert resume.render_resuming(context, list(range(1, 8)), blocking=True)[:2] == (7, 0)
+    context.scene.render.resolution_percentage = 50
+    assert resume.render_resuming(context, [1, 2], blocking=True)[:2] == (0, 2)
+    assert rendered[-2:] == [1, 2]
+
+
+def test_failed_start_restores_profile_and_handlers(tmp_path, context, settings, monkeypatch):
+    _file_output(settings, tmp_path)
+    settings.render_animation = True
+    settings.resume_render = True
+    settings.record_telemetry = True
+    settings.depth_only_profile = True
+    settings.depth_only_override_materials = False
+    settings.setup_complete = True
+    render = context.scene.render
+    render.use_motion_blur = True
+
+    def plan_resume(*_args, **_kwargs):
+        # The profile is applied and telemetry is recording when the start fails
+        assert not render.use_motion_blur and telemetry.get_active() is not None
+        raise OSError("manifest unreadable")
+
+    monkeypatch.setattr(resume, "plan_resume", plan_resume)
+    operator = DEPTHMAP_OT_render(blocking=True)
+    assert operator.execute(context) == {'CANCELLED'}
+    assert operator.reports[-1] == ({'ERROR'}, "Render failed: manifest unreadable")
+    assert render.use_motion_blur
+    assert telemetry.get_active() is None
+    assert not bpy.app.handlers.render_pre and not bpy.app.handlers.render_post
@@ -0,0 +1,108 @@
+"""Render telemetry driven through the fake render handlers."""
+
+import json
+
+import bpy
+import pytest
+
+from depth_map_generator.utils import telemetry
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _fire(name, scene):
+    for handler in list(getattr(bpy.app.handlers, name)):
+        handler(scene, None)
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_log_path_is_next_to_output_dir(tmp_path):
+    output_dir = str(tmp_path / "depth_maps") + "/"
+    assert telemetry.log_path_for(output_dir) == str(tmp_path / "depth_maps_telemetry.jsonl")
+
+
+def test_animation_frames_are_recorded(tmp_path, scene, context, monkeypatch):
+    output = tmp_path / "depth_0001.png"
+    clock = _Clock()
+    rss = iter([448.0, 512.0, 512.0, 640.0])
+    monkeypatch.setattr(telemetry, "resident_memory_mb", lambda: next(rss))
+    recorder = telemetry.RenderTelemetry(
+        str(tmp_path / "log.jsonl"), total=4, clock=clock,
+        files_for_frame=lambda frame: [str(output), str(tmp_path / "missing.png")],
+    ).start()
+    assert telemetry.get_active() is recorder
+
+    for frame in (1, 2):
+        scene.frame_current = frame
+        _fire("render_pre", scene)
+        clock.now += 2.0
+        output.write_bytes(b"x" * 10 * frame)
+        _fire("render_post", scene)
+        clock.now += 0.5
+        _fire("render_write", scene)
+
+    progress = recorder.progress
+    assert progress["done"] == 2
+    assert progress["fps"] == 1 / 2.5
+    assert progress["eta"] == 2 * 2.5
+
+    _fire("render_complete", scene)
+    recorder.finish()
+    recorder.finish()  # idempotent
+    assert telemetry.get_active() is None
+    assert telemetry.get_last() is recorder
+    assert not bpy.app.handlers.render_pre and not bpy.app.handlers.render_complete
+
+    records = _read(tmp_path / "log.jsonl")
+    assert [r["event"] for r in records] == ["start", "frame", "frame", "finish"]
+    first = records[1]
+    assert first["frame"] == 1
+    assert (first["wall_ms"], first["render_ms"]) == (2500.0, 2000.0)
+    assert first["files"] == {"depth_0001.png": 10}
+    assert (first["rss_mb"], first["rss_delta_mb"]) == (512.0, 64.0)
+    assert recorder.peak_rss_mb == 640.0
+    assert records[2]["bytes"] == 20
+    assert records[3]["frames"] == 2 and records[3]["cancelled"] is False
+
+
+def test_stills_finish_on_complete_and_cancel_drops_frame(tmp_path, scene, context):
+    clock = _Clock()
+    recorder = telemetry.RenderTelemetry(str(tmp_path / "log.jsonl"), total=3,
+                                         clock=clock).start()
+    _fire("render_pre", scene)
+    clock.now += 1.0
+    _fire("render_post", scene)
+    _fire("render_complete", scene)
+    _fire("render_pre", scene)
+    _fire("render_cancel", scene)
+    recorder.finish()
+
+    records = _read(tmp_path / "log.jsonl")
+    assert [r["event"] for r in records] == ["start", "frame", "finish"]
+    assert records[1]["render_ms"] == 1000.0
+    assert records[2]["cancelled"] is True
+
+
+def test_resident_memory_follows_allocations():
+    before = telemetry.resident_memory_mb()
+    if before is None:
+        pytest.skip("resident memory is only read on Linux")
+    block = bytearray(64 * 1024 * 1024)
+    block[::4096] = b"x" * (len(block) // 4096)
+    assert telemetry.resident_memory_mb() - before > 32
+
+
+def test_format_eta():
+    assert telemetry.format_eta(None) == "--:--"
+    assert telemetry.format_eta(65) == "1:05"
+    assert telemetry.format_eta(3725) == "1:02:05"